@@ -1,10 +1,12 @@
 from typing import Dict, Optional, List, Any
 from dataclasses import dataclass
 from datetime import datetime, timezone
+import copy
 import logging
 import aiohttp
 import json
 import os
+import time
 import asyncio
 from enum import Enum
 from solana.rpc.async_api import AsyncClient
@@ -51,6 +53,7 @@ class ApiConfig:
     timeout: int = 30
     max_retries: int = 3
     retry_delay: int = 1
+    max_concurrency: int = 10  # Requests in flight on the shared session
 
 class MetricsError(Exception):
     """Base exception for metrics collection"""
@@ -70,18 +73,42 @@ class BirdeyeEndpoints:
     BASE_URL = "https://public-api.birdeye.so/defi"
     
     @classmethod
-    def price_volume(cls, address: str) -> str:
-        return f"{cls.BASE_URL}/price_volume/single?address={address}&type=24h"
+    def price_volume(cls, address: str, base_url: Optional[str] = None) -> str:
+        return f"{base_url or cls.BASE_URL}/price_volume/single?address={address}&type=24h"
     
     @classmethod
-    def trade_data(cls, address: str) -> str:
-        return f"{cls.BASE_URL}/v3/token/trade-data/single?address={address}"
+    def trade_data(cls, address: str, base_url: Optional[str] = None) -> str:
+        return f"{base_url or cls.BASE_URL}/v3/token/trade-data/single?address={address}"
     
     @classmethod
-    def top_traders(cls, address: str) -> str:
-        return f"{cls.BASE_URL}/v2/tokens/top_traders?address={address}&time_frame=24h&sort_type=desc&sort_by=volume&limit=10"
+    def top_traders(cls, address: str, base_url: Optional[str] = None) -> str:
+        return f"{base_url or cls.BASE_URL}/v2/tokens/top_traders?address={address}&time_frame=24h&sort_type=desc&sort_by=volume&limit=10"
+    
+    @classmethod
+    def all(cls, address: str, base_url: Optional[str] = None) -> Dict[str, str]:
+        """Every endpoint a token's metrics are collected from, by name"""
+        return {
+            'price': cls.price_volume(address, base_url),
+            'trade_data': cls.trade_data(address, base_url),
+            'top_traders': cls.top_traders(address, base_url)
+        }
 
-@dataclass
+def _conform(data: Dict, default: Dict):
+    """Fill in missing default fields and convert numeric values to float, in one walk"""
+    for key, value in default.items():
+        if key not in data:
+            data[key] = copy.deepcopy(value)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            nested = default.get(key)
+            _conform(value, nested if isinstance(nested, dict) else {})
+        elif isinstance(value, (str, float, int)):
+            try:
+                data[key] = float(value)
+            except (ValueError, TypeError):
+                pass
+
+@dataclass(slots=True)
 class MetricsResponse:
     """Structured response with validation"""
     price: Dict
@@ -90,49 +117,17 @@ class MetricsResponse:
     timestamp: str
     success: bool
     error: Optional[str] = None
+    raw: Optional[Dict] = None  # Endpoint payloads by name, for callers that need more than the summary
 
     def __post_init__(self):
-        """Validate response data"""
-        self.validate_metrics()
-        self.normalize_values()
-
-    def validate_metrics(self):
-        """Ensure all required fields are present"""
-        metric_mapping = {
-            MetricType.PRICE: 'price',
-            MetricType.TRADE: 'trade',
-            MetricType.TRADER: 'traders'
-        }
-        
-        for metric_type in MetricType:
-            actual = getattr(self, metric_mapping[metric_type])
-            default = METRIC_DEFAULTS[metric_type]
-            self._ensure_fields(actual, default)
-
-    def _ensure_fields(self, actual: Dict, default: Dict):
-        """Recursively ensure all default fields exist"""
-        for key, value in default.items():
-            if key not in actual:
-                actual[key] = value
-            elif isinstance(value, dict):
-                self._ensure_fields(actual[key], value)
-
-    def normalize_values(self):
-        """Convert and normalize numeric values"""
-        for metric_type in MetricType:
-            metrics = getattr(self, f"{metric_type.value}_metrics")
-            self._normalize_dict_values(metrics)
+        """Ensure all required fields are present and numeric values are floats"""
+        _conform(self.price, METRIC_DEFAULTS[MetricType.PRICE])
+        _conform(self.trade, METRIC_DEFAULTS[MetricType.TRADE])
+        _conform(self.traders, METRIC_DEFAULTS[MetricType.TRADER])
 
-    def _normalize_dict_values(self, data: Dict):
-        """Recursively normalize numeric values"""
-        for key, value in data.items():
-            if isinstance(value, dict):
-                self._normalize_dict_values(value)
-            elif isinstance(value, (str, float, int)):
-                try:
-                    data[key] = float(value)
-                except (ValueError, TypeError):
-                    pass
+def default_metrics(metric_type: MetricType) -> Dict:
+    """Fresh copy of a metric's defaults, safe for MetricsResponse to fill in"""
+    return copy.deepcopy(METRIC_DEFAULTS[metric_type])
 
 def setup_logging():
     """Configure logging"""
@@ -165,35 +160,42 @@ class TokenMetricsCollector:
         }
         self.logger = setup_logging()
         self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
 
     async def __aenter__(self):
         """Context manager entry"""
-        self.session = aiohttp.ClientSession()
+        self._get_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         if self.session:
             await self.session.close()
+            self.session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared session; every request of the collector reuses its connections"""
+        if not self.session or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config.max_concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout)
+            )
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        return self.session
 
     async def _make_request(self, url: str) -> Optional[Dict]:
         """Make API request with retries"""
         for attempt in range(self.config.max_retries):
             try:
-                if not self.session:
-                    self.session = aiohttp.ClientSession()
-
-                async with self.session.get(
-                    url, 
-                    headers=self.headers,
-                    timeout=self.config.timeout
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success'):
-                            return data.get('data', {})
-                        raise ApiError(f"API error: {data.get('message')}")
-                    raise ApiError(f"Request failed: {response.status}")
+                session = self._get_session()
+                async with self._semaphore:
+                    async with session.get(url, headers=self.headers) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            if data.get('success'):
+                                return data.get('data', {})
+                            raise ApiError(f"API error: {data.get('message')}")
+                        raise ApiError(f"Request failed: {response.status}")
 
             except Exception as e:
                 self.logger.warning(
@@ -221,16 +223,15 @@ class TokenMetricsCollector:
             
             self.logger.info(f"Checking USDC balance for {wallet_address}")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get('success'):
-                            balance = float(data['data']['uiAmount'])
-                            self.logger.info(f"USDC Balance: ${balance:,.2f}")
-                            return balance
-                            
-                    self.logger.error(f"Birdeye API error: {await response.text()}")
+            async with self._get_session().get(url, params=params, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    if data.get('success'):
+                        balance = float(data['data']['uiAmount'])
+                        self.logger.info(f"USDC Balance: ${balance:,.2f}")
+                        return balance
+                        
+                self.logger.error(f"Birdeye API error: {await response.text()}")
             
             # Fallback to RPC call
             try:
@@ -267,7 +268,7 @@ class TokenMetricsCollector:
         
         if not isinstance(data, dict):
             self.logger.warning(f"Received non-dict price data: {type(data)}")
-            return METRIC_DEFAULTS[MetricType.PRICE]
+            return default_metrics(MetricType.PRICE)
         
         try:
             metrics = {
@@ -283,7 +284,7 @@ class TokenMetricsCollector:
         except Exception as e:
             self.logger.error(f"Error extracting price metrics: {str(e)}")
             self.logger.error(f"Data that caused error: {json.dumps(data, indent=2)}")
-            return METRIC_DEFAULTS[MetricType.PRICE]
+            return default_metrics(MetricType.PRICE)
 
     def _extract_trade_metrics(self, data: Dict) -> Dict:
         """Extract and organize trade metrics"""
@@ -324,51 +325,98 @@ class TokenMetricsCollector:
         }
         return metrics
 
+    async def _fetch_endpoints(self, token_mint: str) -> Dict[str, Any]:
+        """Request every endpoint of a token at once; failed endpoints map to their exception"""
+        endpoints = BirdeyeEndpoints.all(token_mint, self.config.base_url)
+        results = await asyncio.gather(*(self._make_request(url) for url in endpoints.values()),
+                                       return_exceptions=True)
+        return dict(zip(endpoints, results))
+
     async def get_token_metrics(self, token_mint: str) -> MetricsResponse:
-        """Get comprehensive token metrics"""
+        """
+        Get comprehensive token metrics
+        
+        The price, trade and trader endpoints are requested concurrently. An
+        endpoint that fails leaves its defaults in place and marks the
+        response unsuccessful.
+        """
         try:
             self.logger.info(f"Starting metrics collection for token: {token_mint}")
             
-            # Make API requests
-            self.logger.info("Making API requests...")
-            
-            price_data = await self._make_request(BirdeyeEndpoints.price_volume(token_mint))
-            self.logger.info(f"Raw price data: {json.dumps(price_data, indent=2)}")
-            
-            trade_data = await self._make_request(BirdeyeEndpoints.trade_data(token_mint))
-            self.logger.info(f"Raw trade data: {json.dumps(trade_data, indent=2)}")
-            
-            trader_data = await self._make_request(BirdeyeEndpoints.top_traders(token_mint))
-            self.logger.info(f"Raw trader data: {json.dumps(trader_data, indent=2)}")
+            results = await self._fetch_endpoints(token_mint)
+            errors = {name: result for name, result in results.items() if isinstance(result, BaseException)}
+            raw = {name: result or {} for name, result in results.items() if name not in errors}
+            for name, error in errors.items():
+                self.logger.error(f"Error fetching {name} for {token_mint}: {error}")
+            self.logger.debug(f"Raw data for {token_mint}: {json.dumps(raw, indent=2)}")
 
             # Extract metrics
-            self.logger.info("Extracting metrics from raw data...")
-            price_metrics = self._extract_price_metrics(price_data)
-            trade_metrics = self._extract_trade_metrics(trade_data or {})
-            
-            self.logger.info(f"Extracted price metrics: {json.dumps(price_metrics, indent=2)}")
-            self.logger.info(f"Extracted trade metrics: {json.dumps(trade_metrics, indent=2)}")
+            price_metrics = (self._extract_price_metrics(raw['price'])
+                             if 'price' in raw else default_metrics(MetricType.PRICE))
+            trade_metrics = (self._extract_trade_metrics(raw['trade_data'])
+                             if 'trade_data' in raw else default_metrics(MetricType.TRADE))
+            trader_metrics = raw.get('top_traders') or default_metrics(MetricType.TRADER)
 
             # Create response
             response = MetricsResponse(
                 price=price_metrics,
                 trade=trade_metrics,
-                traders=trader_data or METRIC_DEFAULTS[MetricType.TRADER],
+                traders=copy.deepcopy(trader_metrics),
                 timestamp=datetime.now(timezone.utc).isoformat(),
-                success=True
+                success=not errors,
+                error="; ".join(f"{name}: {error}" for name, error in errors.items()) or None,
+                raw=raw
             )
             
-            self.logger.info("Successfully created metrics response")
+            self.logger.info(f"Collected metrics for {token_mint}")
             return response
 
         except Exception as e:
             self.logger.error(f"Error collecting metrics: {str(e)}", exc_info=True)
-            self.logger.error(f"Stack trace:", exc_info=True)
             return MetricsResponse(
-                price=METRIC_DEFAULTS[MetricType.PRICE],
-                trade=METRIC_DEFAULTS[MetricType.TRADE],
-                traders=METRIC_DEFAULTS[MetricType.TRADER],
+                price=default_metrics(MetricType.PRICE),
+                trade=default_metrics(MetricType.TRADE),
+                traders=default_metrics(MetricType.TRADER),
                 timestamp=datetime.now(timezone.utc).isoformat(),
                 success=False,
-                error=str(e)
+                error=str(e),
+                raw={}
             )
+
+    async def get_tokens_metrics(self, token_mints: List[str]) -> Dict[str, MetricsResponse]:
+        """
+        Get metrics for many tokens concurrently on the shared session
+        
+        Every endpoint of every token is requested at once, bounded by
+        config.max_concurrency requests in flight.
+        
+        Args:
+            token_mints: Token mint addresses
+            
+        Returns:
+            Mint address to MetricsResponse, in the order given
+        """
+        token_mints = list(dict.fromkeys(token_mints))
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(self.get_token_metrics(mint) for mint in token_mints))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for response in responses if not response.success)
+        self.logger.info(f"Collected metrics for {len(token_mints)} tokens in {elapsed:.2f}s "
+                         f"({elapsed / max(len(token_mints), 1) * 1000:.0f} ms per token), {failed} incomplete")
+        return dict(zip(token_mints, responses))
+
+async def collect_tokens_metrics(token_mints: List[str], api_key: Optional[str] = None,
+                                 config: Optional[ApiConfig] = None) -> Dict[str, MetricsResponse]:
+    """
+    Collect metrics for many tokens with one short-lived collector
+    
+    Args:
+        token_mints: Token mint addresses
+        api_key: Birdeye API key, defaults to BIRDEYE_API_KEY
+        config: API configuration
+        
+    Returns:
+        Mint address to MetricsResponse
+    """
+    async with TokenMetricsCollector(api_key or os.getenv('BIRDEYE_API_KEY'), config) as collector:
+        return await collector.get_tokens_metrics(token_mints)
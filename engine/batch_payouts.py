@@ -0,0 +1,660 @@
+#!/usr/bin/env python3
+"""
+Batch Payouts
+
+Pays out profit redistributions with several SPL transfers packed into each
+transaction. Missing associated token accounts are created in bulk first,
+batches are submitted concurrently, and every payout is tracked in a local
+journal. A batch's signature is journaled before it is sent, so a run that
+crashes can be resumed: batches that landed are marked paid and only batches
+whose blockhash expired without landing are paid again.
+"""
+
+import os
+import sys
+import json
+import base64
+import sqlite3
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from dotenv import load_dotenv
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.instruction import AccountMeta, Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.system_program import ID as SYSTEM_PROGRAM_ID
+from solders.token.associated import get_associated_token_address
+from solders.transaction import Transaction
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.distributions import TOKEN_DECIMALS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'payout_journal.db'
+
+TOKEN_PROGRAM_ID = Pubkey.from_string("TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
+ASSOCIATED_TOKEN_PROGRAM_ID = Pubkey.from_string("ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL")
+
+TOKEN_MINTS = {
+    'UBC': "9psiRdn9cXYVps4F1kFuoNjd2EtmqNJXrCPmRppJpump",
+    'COMPUTE': "B1N1HcMm4RysYz4smsXwmk2UnS8NziqKCM6Ho8i62vXo",
+    'USDC': "EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v"
+}
+
+# Packet and compute limits for a single legacy transaction
+MAX_TRANSACTION_SIZE = 1232
+MAX_COMPUTE_UNITS = 1_400_000
+
+# Compute budgeted per instruction, with headroom over measured usage
+TRANSFER_COMPUTE_UNITS = 6_000
+CREATE_ACCOUNT_COMPUTE_UNITS = 30_000
+COMPUTE_BUDGET_OVERHEAD = 1_000
+
+# RPC request limits
+MAX_ACCOUNTS_PER_REQUEST = 100
+MAX_SIGNATURES_PER_REQUEST = 256
+
+
+class RpcError(Exception):
+    """Raised when the RPC node answers with a JSON-RPC error"""
+    pass
+
+
+def transfer_instruction(source: Pubkey, destination: Pubkey, owner: Pubkey, units: int) -> Instruction:
+    """SPL Token Transfer (instruction 3) of units from source to destination"""
+    return Instruction(
+        TOKEN_PROGRAM_ID,
+        bytes([3]) + int(units).to_bytes(8, byteorder='little'),
+        [
+            AccountMeta(source, is_signer=False, is_writable=True),
+            AccountMeta(destination, is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=True, is_writable=False)
+        ]
+    )
+
+
+def create_account_instruction(payer: Pubkey, owner: Pubkey, mint: Pubkey) -> Instruction:
+    """Idempotent associated token account creation (no-op if it already exists)"""
+    return Instruction(
+        ASSOCIATED_TOKEN_PROGRAM_ID,
+        bytes([1]),
+        [
+            AccountMeta(payer, is_signer=True, is_writable=True),
+            AccountMeta(get_associated_token_address(owner, mint), is_signer=False, is_writable=True),
+            AccountMeta(owner, is_signer=False, is_writable=False),
+            AccountMeta(mint, is_signer=False, is_writable=False),
+            AccountMeta(SYSTEM_PROGRAM_ID, is_signer=False, is_writable=False),
+            AccountMeta(TOKEN_PROGRAM_ID, is_signer=False, is_writable=False)
+        ]
+    )
+
+
+def budget_instructions(compute_units: int, compute_unit_price: int = 0) -> List[Instruction]:
+    """Compute budget instructions for a transaction using compute_units"""
+    instructions = [set_compute_unit_limit(min(compute_units + COMPUTE_BUDGET_OVERHEAD, MAX_COMPUTE_UNITS))]
+    if compute_unit_price:
+        instructions.append(set_compute_unit_price(compute_unit_price))
+    return instructions
+
+
+def transaction_size(payer: Pubkey, instructions: List[Instruction]) -> int:
+    """Serialized size in bytes of a transaction with one signature per signer"""
+    message = Message.new_with_blockhash(instructions, payer, Hash.default())
+    return len(bytes(Transaction.new_unsigned(message)))
+
+
+def pack_instructions(payer: Pubkey, items: List[Tuple[object, Instruction]], compute_units: int,
+                      compute_unit_price: int = 0) -> List[List[Tuple[object, Instruction]]]:
+    """
+    Greedily group (key, instruction) items into transactions
+
+    An item is added to the current group while the serialized transaction
+    stays within MAX_TRANSACTION_SIZE and the budgeted compute stays within
+    MAX_COMPUTE_UNITS; otherwise a new group is started.
+    """
+    groups = []
+    current = []
+
+    for item in items:
+        candidate = current + [item]
+        units = compute_units * len(candidate)
+        instructions = budget_instructions(units, compute_unit_price) + [ix for _, ix in candidate]
+
+        fits = (
+            units + COMPUTE_BUDGET_OVERHEAD <= MAX_COMPUTE_UNITS
+            and transaction_size(payer, instructions) <= MAX_TRANSACTION_SIZE
+        )
+        if fits:
+            current = candidate
+            continue
+
+        if not current:
+            raise ValueError(f"Instruction for {item[0]} does not fit in a single transaction")
+        groups.append(current)
+        current = [item]
+
+    if current:
+        groups.append(current)
+    return groups
+
+
+class SolanaRpc:
+    """Minimal async JSON-RPC client sharing one HTTP session"""
+
+    def __init__(self, rpc_url: str, timeout: float = 30):
+        self.rpc_url = rpc_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._request_id = 0
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def open(self):
+        """Open the pooled session, replacing one bound to a finished event loop"""
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._session_loop is not loop:
+            self.session = aiohttp.ClientSession(timeout=self.timeout)
+            self._session_loop = loop
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def call(self, method: str, params: list = None):
+        self.open()
+        self._request_id += 1
+        payload = {"jsonrpc": "2.0", "id": self._request_id, "method": method, "params": params or []}
+        async with self.session.post(self.rpc_url, json=payload) as response:
+            response.raise_for_status()
+            result = await response.json()
+        if result.get('error'):
+            raise RpcError(f"{method}: {result['error']}")
+        return result.get('result')
+
+    async def get_latest_blockhash(self) -> Tuple[Hash, int]:
+        result = await self.call("getLatestBlockhash", [{"commitment": "confirmed"}])
+        value = result['value']
+        return Hash.from_string(value['blockhash']), int(value['lastValidBlockHeight'])
+
+    async def get_block_height(self) -> int:
+        return int(await self.call("getBlockHeight", [{"commitment": "confirmed"}]))
+
+    async def get_existing_accounts(self, addresses: List[str]) -> set:
+        """Subset of addresses that exist on chain"""
+        existing = set()
+        for i in range(0, len(addresses), MAX_ACCOUNTS_PER_REQUEST):
+            chunk = addresses[i:i + MAX_ACCOUNTS_PER_REQUEST]
+            result = await self.call("getMultipleAccounts", [chunk, {"encoding": "base64", "commitment": "confirmed"}])
+            existing.update(address for address, account in zip(chunk, result['value']) if account)
+        return existing
+
+    async def send_transaction(self, transaction: Transaction, skip_preflight: bool = False) -> str:
+        encoded = base64.b64encode(bytes(transaction)).decode('ascii')
+        return await self.call("sendTransaction", [encoded, {
+            "encoding": "base64",
+            "skipPreflight": skip_preflight,
+            "preflightCommitment": "confirmed",
+            "maxRetries": 5
+        }])
+
+    async def get_signature_statuses(self, signatures: List[str]) -> Dict[str, Optional[dict]]:
+        statuses = {}
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_REQUEST):
+            chunk = signatures[i:i + MAX_SIGNATURES_PER_REQUEST]
+            result = await self.call("getSignatureStatuses", [chunk, {"searchTransactionHistory": True}])
+            statuses.update(zip(chunk, result['value']))
+        return statuses
+
+
+class PayoutJournal:
+    """Local journal of payouts and the batches that carry them"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path))
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS payouts (
+                    runId TEXT NOT NULL,
+                    wallet TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    units INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    batchId TEXT,
+                    signature TEXT,
+                    updatedAt TEXT NOT NULL,
+                    PRIMARY KEY (runId, wallet, token)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS batches (
+                    batchId TEXT PRIMARY KEY,
+                    runId TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    lastValidBlockHeight INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    createdAt TEXT NOT NULL,
+                    updatedAt TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_payouts_status ON payouts (runId, status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_batches_status ON batches (runId, status)")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def register(self, run_id: str, payouts: Iterable[Dict]) -> int:
+        """Add payouts for a run, keeping any that are already journaled; returns the number added"""
+        now = self._now()
+        rows = [
+            (run_id, payout['wallet'], payout['token'], int(payout['units']), now)
+            for payout in payouts
+            if int(payout['units']) > 0
+        ]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO payouts (runId, wallet, token, units, updatedAt)
+                VALUES (?, ?, ?, ?, ?)
+            """, rows)
+            added = conn.total_changes - before
+
+        if added < len(rows):
+            logger.info(f"Run {run_id}: {len(rows) - added} payouts already journaled, keeping their state")
+        return added
+
+    def pending(self, run_id: str) -> List[Tuple[str, str, int]]:
+        """(wallet, token, units) of payouts not yet submitted"""
+        with self._connect() as conn:
+            return conn.execute("""
+                SELECT wallet, token, units FROM payouts
+                WHERE runId = ? AND status = 'pending'
+                ORDER BY token, wallet
+            """, (run_id,)).fetchall()
+
+    def mark_submitted(self, run_id: str, batch_id: str, signature: str, last_valid_block_height: int,
+                       keys: List[Tuple[str, str]]):
+        """Record a signed batch before it is sent"""
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO batches (batchId, runId, signature, lastValidBlockHeight, status, createdAt, updatedAt)
+                VALUES (?, ?, ?, ?, 'submitted', ?, ?)
+            """, (batch_id, run_id, signature, last_valid_block_height, now, now))
+            conn.executemany("""
+                UPDATE payouts SET status = 'submitted', batchId = ?, signature = ?, updatedAt = ?
+                WHERE runId = ? AND wallet = ? AND token = ? AND status = 'pending'
+            """, [(batch_id, signature, now, run_id, wallet, token) for wallet, token in keys])
+
+    def outstanding(self, run_id: str) -> List[Tuple[str, str, int]]:
+        """(batchId, signature, lastValidBlockHeight) of batches awaiting confirmation"""
+        with self._connect() as conn:
+            return conn.execute("""
+                SELECT batchId, signature, lastValidBlockHeight FROM batches
+                WHERE runId = ? AND status = 'submitted'
+            """, (run_id,)).fetchall()
+
+    def resolve_batch(self, batch_id: str, status: str, error: Optional[str] = None):
+        """
+        Settle a batch: 'confirmed' marks its payouts paid, 'failed' or 'expired'
+        returns them to pending so a later round pays them again
+        """
+        now = self._now()
+        with self._connect() as conn:
+            conn.execute("UPDATE batches SET status = ?, error = ?, updatedAt = ? WHERE batchId = ?",
+                         (status, error, now, batch_id))
+            if status == 'confirmed':
+                conn.execute("""
+                    UPDATE payouts SET status = 'confirmed', updatedAt = ?
+                    WHERE batchId = ? AND status = 'submitted'
+                """, (now, batch_id))
+            else:
+                conn.execute("""
+                    UPDATE payouts SET status = 'pending', batchId = NULL, signature = NULL, updatedAt = ?
+                    WHERE batchId = ? AND status = 'submitted'
+                """, (now, batch_id))
+
+    def summary(self, run_id: str) -> Dict:
+        """Payout counts by status, confirmed units per token and confirmed signatures"""
+        with self._connect() as conn:
+            counts = dict(conn.execute(
+                "SELECT status, COUNT(*) FROM payouts WHERE runId = ? GROUP BY status", (run_id,)
+            ).fetchall())
+            units = dict(conn.execute("""
+                SELECT token, SUM(units) FROM payouts
+                WHERE runId = ? AND status = 'confirmed' GROUP BY token
+            """, (run_id,)).fetchall())
+            signatures = [row[0] for row in conn.execute(
+                "SELECT signature FROM batches WHERE runId = ? AND status = 'confirmed' ORDER BY createdAt",
+                (run_id,)
+            ).fetchall()]
+
+        return {
+            'runId': run_id,
+            'confirmed': counts.get('confirmed', 0),
+            'submitted': counts.get('submitted', 0),
+            'pending': counts.get('pending', 0),
+            'confirmedUnits': units,
+            'signatures': signatures
+        }
+
+
+@dataclass
+class PayoutBatch:
+    """One signed transaction and the payouts it carries"""
+    batch_id: str
+    keys: List[Tuple[str, str]]
+    transaction: Transaction
+    signature: str
+    last_valid_block_height: int
+    units: Dict[str, int] = field(default_factory=dict)
+
+
+class BatchPayoutExecutor:
+    """Pays journaled distributions in packed, concurrently submitted transactions"""
+
+    def __init__(self, rpc_url: Optional[str] = None, keypair: Optional[Keypair] = None,
+                 journal: Optional[PayoutJournal] = None, max_concurrency: int = 4,
+                 compute_unit_price: int = 0, confirm_timeout: float = 90, poll_interval: float = 2,
+                 max_rounds: int = 3):
+        load_dotenv(dotenv_path=os.path.join(project_root, '.env'))
+
+        self.rpc_url = rpc_url or os.getenv('NEXT_PUBLIC_HELIUS_RPC_URL') or os.getenv('HELIUS_RPC_URL')
+        if not self.rpc_url:
+            raise ValueError("Helius RPC URL not found in environment variables")
+
+        if keypair is None:
+            private_key = os.getenv('KINKONG_WALLET_PRIVATE_KEY')
+            if not private_key:
+                raise ValueError("KINKONG_WALLET_PRIVATE_KEY not found in environment variables")
+            keypair = Keypair.from_base58_string(private_key)
+
+        self.keypair = keypair
+        self.payer = keypair.pubkey()
+        self.journal = journal or PayoutJournal()
+        self.max_concurrency = max_concurrency
+        self.compute_unit_price = compute_unit_price
+        self.confirm_timeout = confirm_timeout
+        self.poll_interval = poll_interval
+        self.max_rounds = max_rounds
+
+        # Token accounts already seen on chain during this process
+        self._known_accounts = set()
+
+    @staticmethod
+    def _mint(token: str) -> Pubkey:
+        if token not in TOKEN_MINTS:
+            raise ValueError(f"Unsupported token: {token}. Supported tokens: {', '.join(TOKEN_MINTS)}")
+        return Pubkey.from_string(TOKEN_MINTS[token])
+
+    def _sign(self, instructions: List[Instruction], blockhash: Hash) -> Transaction:
+        message = Message.new_with_blockhash(instructions, self.payer, blockhash)
+        return Transaction([self.keypair], message, blockhash)
+
+    async def ensure_token_accounts(self, rpc: SolanaRpc, payouts: List[Tuple[str, str, int]]):
+        """Create every missing destination token account in packed transactions"""
+        accounts = {}
+        for wallet, token, _ in payouts:
+            address = str(get_associated_token_address(Pubkey.from_string(wallet), self._mint(token)))
+            if address not in self._known_accounts:
+                accounts[address] = (wallet, token)
+
+        if not accounts:
+            return
+
+        existing = await rpc.get_existing_accounts(list(accounts))
+        self._known_accounts.update(existing)
+        missing = [(address, accounts[address]) for address in accounts if address not in existing]
+        if not missing:
+            return
+
+        logger.info(f"Creating {len(missing)} missing token accounts")
+        items = [
+            (address, create_account_instruction(self.payer, Pubkey.from_string(wallet), self._mint(token)))
+            for address, (wallet, token) in missing
+        ]
+        groups = pack_instructions(self.payer, items, CREATE_ACCOUNT_COMPUTE_UNITS, self.compute_unit_price)
+        blockhash, last_valid = await rpc.get_latest_blockhash()
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        pending = {}
+
+        async def send(group):
+            instructions = budget_instructions(CREATE_ACCOUNT_COMPUTE_UNITS * len(group), self.compute_unit_price)
+            transaction = self._sign(instructions + [ix for _, ix in group], blockhash)
+            async with semaphore:
+                try:
+                    await rpc.send_transaction(transaction)
+                    pending[str(transaction.signatures[0])] = [address for address, _ in group]
+                except (RpcError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Token account creation batch failed: {e}")
+
+        await asyncio.gather(*(send(group) for group in groups))
+
+        # Transfers to accounts that failed to appear fail atomically and are retried next round
+        deadline = asyncio.get_running_loop().time() + self.confirm_timeout
+        while pending and asyncio.get_running_loop().time() < deadline:
+            statuses = await rpc.get_signature_statuses(list(pending))
+            height = await rpc.get_block_height()
+            for signature, status in statuses.items():
+                if status and status.get('confirmationStatus') in ('confirmed', 'finalized'):
+                    if not status.get('err'):
+                        self._known_accounts.update(pending[signature])
+                    pending.pop(signature)
+                elif status is None and height > last_valid:
+                    pending.pop(signature)
+            if pending:
+                await asyncio.sleep(self.poll_interval)
+
+    def build_batches(self, run_id: str, payouts: List[Tuple[str, str, int]], blockhash: Hash,
+                      last_valid_block_height: int) -> List[PayoutBatch]:
+        """Pack pending payouts into signed transactions"""
+        items = []
+        for wallet, token, units in payouts:
+            mint = self._mint(token)
+            source = get_associated_token_address(self.payer, mint)
+            destination = get_associated_token_address(Pubkey.from_string(wallet), mint)
+            items.append(((wallet, token, units), transfer_instruction(source, destination, self.payer, units)))
+
+        batches = []
+        for group in pack_instructions(self.payer, items, TRANSFER_COMPUTE_UNITS, self.compute_unit_price):
+            instructions = budget_instructions(TRANSFER_COMPUTE_UNITS * len(group), self.compute_unit_price)
+            transaction = self._sign(instructions + [ix for _, ix in group], blockhash)
+            signature = str(transaction.signatures[0])
+
+            units = {}
+            for (_, token, amount), _ in group:
+                units[token] = units.get(token, 0) + amount
+
+            batches.append(PayoutBatch(
+                batch_id=f"{run_id}:{signature}",
+                keys=[(wallet, token) for (wallet, token, _), _ in group],
+                transaction=transaction,
+                signature=signature,
+                last_valid_block_height=last_valid_block_height,
+                units=units
+            ))
+        return batches
+
+    async def submit_batches(self, rpc: SolanaRpc, run_id: str, batches: List[PayoutBatch]):
+        """Journal each batch, then send them concurrently"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def submit(batch: PayoutBatch):
+            # Journal first: if we crash after sending, the signature is still known
+            self.journal.mark_submitted(run_id, batch.batch_id, batch.signature,
+                                        batch.last_valid_block_height, batch.keys)
+            async with semaphore:
+                try:
+                    await rpc.send_transaction(batch.transaction)
+                    logger.info(f"Sent batch of {len(batch.keys)} transfers {batch.units}: {batch.signature}")
+                except RpcError as e:
+                    # Rejected by the node: the transaction cannot land, so its payouts are retried
+                    logger.error(f"Batch {batch.signature} rejected: {e}")
+                    self.journal.resolve_batch(batch.batch_id, 'failed', str(e))
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # Unknown outcome: leave it submitted and let confirmation decide
+                    logger.warning(f"Batch {batch.signature} send outcome unknown: {e}")
+
+        await asyncio.gather(*(submit(batch) for batch in batches))
+
+    async def confirm_batches(self, rpc: SolanaRpc, run_id: str, timeout: Optional[float] = None) -> int:
+        """
+        Poll outstanding batches until each has landed, failed or expired
+
+        A batch is only returned to pending once the chain's block height has
+        passed its blockhash's last valid height without the signature being
+        found, so it can no longer land. Returns the number still outstanding.
+        """
+        timeout = self.confirm_timeout if timeout is None else timeout
+        deadline = asyncio.get_running_loop().time() + timeout
+
+        while True:
+            outstanding = self.journal.outstanding(run_id)
+            if not outstanding:
+                return 0
+
+            statuses = await rpc.get_signature_statuses([signature for _, signature, _ in outstanding])
+            height = await rpc.get_block_height()
+
+            for batch_id, signature, last_valid in outstanding:
+                status = statuses.get(signature)
+                if status:
+                    if status.get('err'):
+                        logger.error(f"Batch {signature} failed on chain: {status['err']}")
+                        self.journal.resolve_batch(batch_id, 'failed', json.dumps(status['err']))
+                    elif status.get('confirmationStatus') in ('confirmed', 'finalized'):
+                        self.journal.resolve_batch(batch_id, 'confirmed')
+                elif height > last_valid:
+                    logger.warning(f"Batch {signature} expired without landing, returning payouts to pending")
+                    self.journal.resolve_batch(batch_id, 'expired')
+
+            remaining = len(self.journal.outstanding(run_id))
+            if not remaining or asyncio.get_running_loop().time() >= deadline:
+                return remaining
+            await asyncio.sleep(self.poll_interval)
+
+    async def execute(self, run_id: str, distributions: List[Dict]) -> Dict:
+        """
+        Pay a redistribution run, resuming from the journal if it was started before
+
+        Args:
+            run_id: Stable identifier of the redistribution (e.g. its Airtable record IDs)
+            distributions: Dicts with wallet, token and units (smallest token unit);
+                empty to resume a run from the payouts already journaled
+
+        Returns:
+            dict: Journal summary for the run
+        """
+        added = self.journal.register(run_id, distributions)
+        logger.info(f"Run {run_id}: {added} new payouts journaled")
+
+        async with SolanaRpc(self.rpc_url) as rpc:
+            # Settle batches left in flight by a previous run before paying anything
+            if self.journal.outstanding(run_id):
+                logger.info(f"Run {run_id}: reconciling batches from a previous run")
+                if await self.confirm_batches(rpc, run_id):
+                    logger.warning(f"Run {run_id}: batches still unresolved, not paying until they settle")
+                    return self.journal.summary(run_id)
+
+            for round_number in range(1, self.max_rounds + 1):
+                pending = self.journal.pending(run_id)
+                if not pending:
+                    break
+
+                logger.info(f"Run {run_id}: round {round_number}, {len(pending)} payouts pending")
+                await self.ensure_token_accounts(rpc, pending)
+
+                blockhash, last_valid = await rpc.get_latest_blockhash()
+                batches = self.build_batches(run_id, pending, blockhash, last_valid)
+                logger.info(f"Packed {len(pending)} transfers into {len(batches)} transactions")
+
+                await self.submit_batches(rpc, run_id, batches)
+                if await self.confirm_batches(rpc, run_id):
+                    logger.warning(f"Run {run_id}: batches still unresolved after {self.confirm_timeout}s")
+                    break
+
+        summary = self.journal.summary(run_id)
+        logger.info(f"Run {run_id}: {summary['confirmed']} confirmed, {summary['submitted']} in flight, "
+                    f"{summary['pending']} pending")
+        return summary
+
+
+def distributions_to_payouts(distributions: List[Dict]) -> List[Dict]:
+    """Payout rows from calculate_investor_distributions output, converting amounts to units when needed"""
+    payouts = []
+    for distribution in distributions:
+        units = distribution.get('units')
+        if units is None:
+            units = int(round(distribution['amount'] * 10 ** TOKEN_DECIMALS.get(distribution['token'], 6)))
+        payouts.append({'wallet': distribution['wallet'], 'token': distribution['token'], 'units': int(units)})
+    return payouts
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[logging.StreamHandler()]
+    )
+
+    if len(sys.argv) < 3 or sys.argv[1] not in ('pay', 'status'):
+        print("Usage: python batch_payouts.py pay <run_id> [distributions.json]")
+        print("       python batch_payouts.py status <run_id>")
+        sys.exit(1)
+
+    command, run_id = sys.argv[1], sys.argv[2]
+
+    if command == 'status':
+        print(json.dumps(PayoutJournal().summary(run_id), indent=2))
+        return
+
+    # Without a distributions file the run resumes from the payouts already journaled
+    distributions = []
+    if len(sys.argv) >= 4:
+        with open(sys.argv[3]) as f:
+            distributions = distributions_to_payouts(json.load(f))
+    else:
+        summary = PayoutJournal().summary(run_id)
+        if not (summary['confirmed'] or summary['submitted'] or summary['pending']):
+            print(f"No payouts journaled for run {run_id}, pass a distributions file to start it")
+            sys.exit(1)
+
+    summary = asyncio.run(BatchPayoutExecutor().execute(run_id, distributions))
+    print(json.dumps(summary, indent=2))
+    if summary['pending'] or summary['submitted']:
+        print("\n⚠️ Run incomplete, re-run the same command to resume")
+        sys.exit(1)
+    print("\n✅ All payouts confirmed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Bounded Pipeline
+
+Shared runner for bulk refreshes that make several provider calls per item
+(TOKENS refresh, KOL analysis, whale holder analysis). Blocking provider
+calls run in one thread pool with at most a set number in flight per
+provider, on top of the shared provider rate limiters, and the time spent in
+each stage is summed. Items are handled as they complete and their results
+are written back in batches while the remaining items are still running.
+"""
+
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from airtable import Airtable
+
+# Results written per flush; the Airtable wrapper sends at most this many records per request
+WRITE_BATCH_SIZE = Airtable.MAX_RECORDS_PER_REQUEST
+
+
+async def write_as_completed(jobs: Iterable[Awaitable[Optional[Any]]],
+                             write: Callable[[List[Any]], Awaitable[int]],
+                             batch_size: int = WRITE_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Await jobs in completion order and write their results in batches
+
+    Args:
+        jobs: Coroutines returning a result to write, or None when the item failed
+        write: Writes a batch of results and returns how many were written
+        batch_size: Results per write
+
+    Returns:
+        Dictionary with completed (jobs that returned a result), success
+        (results written) and failure (failed jobs plus unwritten results) counts
+    """
+    counts = {'completed': 0, 'success': 0, 'failure': 0}
+
+    async def flush(batch: List[Any]):
+        written = await write(batch)
+        counts['success'] += written
+        counts['failure'] += len(batch) - written
+
+    pending = []
+    for next_result in asyncio.as_completed(list(jobs)):
+        result = await next_result
+        if result is None:
+            counts['failure'] += 1
+            continue
+        counts['completed'] += 1
+        pending.append(result)
+        if len(pending) >= batch_size:
+            batch, pending = pending, []
+            await flush(batch)
+    if pending:
+        await flush(pending)
+    return counts
+
+
+class BoundedPipeline:
+    """Thread pool, per-provider limits and stage timings for one bulk run"""
+
+    def __init__(self, concurrency: Dict[str, int], stages: Iterable[str], thread_name_prefix: str):
+        """
+        Args:
+            concurrency: Provider -> maximum calls in flight
+            stages: Names of the stages timed during the run, in report order
+            thread_name_prefix: Prefix for the pool's thread names
+        """
+        self.semaphores = {provider: asyncio.Semaphore(limit) for provider, limit in concurrency.items()}
+        self.timings = {stage: 0.0 for stage in stages}
+        # One extra thread so a batch write never waits behind provider calls
+        self.executor = ThreadPoolExecutor(max_workers=sum(concurrency.values()) + 1,
+                                           thread_name_prefix=thread_name_prefix)
+
+    async def call(self, stage: str, provider: Optional[str], func: Callable, *args):
+        """Run a blocking call in the pool under the provider's limit, adding its time to stage"""
+        loop = asyncio.get_running_loop()
+        if provider is None:
+            return await self._timed(stage, loop, func, *args)
+        async with self.semaphores[provider]:
+            return await self._timed(stage, loop, func, *args)
+
+    async def _timed(self, stage: str, loop, func: Callable, *args):
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.timings[stage] += time.perf_counter() - start
+
+    async def run(self, jobs: Iterable[Awaitable[Optional[Any]]], write: Callable[[List[Any]], int],
+                  stage: str = 'airtable') -> Dict[str, int]:
+        """
+        Run jobs and write their results with write_as_completed, then release the pool
+
+        Args:
+            jobs: Coroutines built on call(), returning a result or None on failure
+            write: Blocking batch writer returning how many records were written
+            stage: Stage the write time is added to
+
+        Returns:
+            Counts from write_as_completed
+        """
+        async def write_batch(batch: List[Any]) -> int:
+            return await self.call(stage, None, write, batch)
+
+        try:
+            return await write_as_completed(jobs, write_batch)
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def report(self, logger: logging.Logger, total: float) -> Dict[str, float]:
+        """Log the stage timings with the run's wall time and return them rounded"""
+        self.timings['total'] = total
+        logger.info("Stage timings (provider stages are summed call time): " +
+                    ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in self.timings.items()))
+        return {stage: round(seconds, 2) for stage, seconds in self.timings.items()}
@@ -0,0 +1,147 @@
+"""
+Investor Distributions
+
+Vectorized pro-rata split of a redistribution pool across investors.
+Stakes are aggregated per wallet and token with group-by operations, the
+subscription rate is applied as a column multiplier, and payouts are rounded
+to the token's smallest unit with a largest-remainder pass so the total paid
+matches the pool exactly.
+"""
+
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+# Full rate (%) for wallets with an active subscription, reduced rate otherwise
+SUBSCRIBER_RATE = 75
+NON_SUBSCRIBER_RATE = 50
+
+# Smallest unit per distributed token
+TOKEN_DECIMALS = {
+    'UBC': 6,
+    'COMPUTE': 6
+}
+
+
+class DistributionError(Exception):
+    """Raised when payouts do not add up to the pool"""
+    pass
+
+
+def investments_frame(investments: List[Dict]) -> pd.DataFrame:
+    """Build a wallet/token/amount frame from raw INVESTMENTS records"""
+    rows = [
+        (
+            record['fields'].get('wallet'),
+            (record['fields'].get('token') or 'USDC').upper(),
+            record['fields'].get('amount', 0)
+        )
+        for record in investments
+        if record.get('fields', {}).get('wallet')
+    ]
+    frame = pd.DataFrame(rows, columns=['wallet', 'token', 'amount'])
+    frame['amount'] = pd.to_numeric(frame['amount'], errors='coerce').fillna(0.0)
+    return frame
+
+
+def calculate_distributions(investments: pd.DataFrame, subscribed_wallets: Iterable[str],
+                            pools: Dict[str, float], decimals: Dict[str, int] = None) -> pd.DataFrame:
+    """
+    Split each token pool pro rata to effective stakes
+
+    Args:
+        investments: Frame with wallet, token and amount columns (one row per investment or per total)
+        subscribed_wallets: Wallets with an active subscription
+        pools: Token -> amount to distribute, e.g. {'UBC': 1000, 'COMPUTE': 50000}
+        decimals: Token -> decimals used for rounding (defaults to TOKEN_DECIMALS)
+
+    Returns:
+        Frame with wallet, token, investment, effective, has_subscription, effective_rate,
+        percentage, units and amount columns, sorted by amount descending
+
+    Raises:
+        DistributionError: If the paid units of a token differ from its pool
+    """
+    decimals = decimals or TOKEN_DECIMALS
+    columns = ['wallet', 'token', 'investment', 'effective', 'has_subscription',
+               'effective_rate', 'percentage', 'units', 'amount']
+
+    frame = investments[investments['token'].isin(list(pools))]
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Total stake per wallet and token
+    stakes = frame.groupby(['wallet', 'token'], sort=False, as_index=False)['amount'].sum()
+    stakes = stakes.rename(columns={'amount': 'investment'})
+
+    subscribed = stakes['wallet'].isin(set(subscribed_wallets)).to_numpy()
+    stakes['has_subscription'] = subscribed
+    stakes['effective_rate'] = np.where(subscribed, SUBSCRIBER_RATE, NON_SUBSCRIBER_RATE)
+    stakes['effective'] = stakes['investment'].to_numpy() * stakes['effective_rate'].to_numpy() / SUBSCRIBER_RATE
+
+    stakes = stakes[stakes['effective'] > 0].reset_index(drop=True)
+    if stakes.empty:
+        return pd.DataFrame(columns=columns)
+
+    # Integer token codes let the per-token sums run as bincounts
+    codes, _ = pd.factorize(stakes['token'])
+    effective = stakes['effective'].to_numpy()
+    share = effective / np.bincount(codes, weights=effective)[codes]
+    stakes['percentage'] = share * 100
+
+    # Work in integer base units so the payout can be checked exactly
+    token_scale = {token: 10 ** decimals.get(token, 0) for token in pools}
+    token_units = {token: int(round(pools[token] * token_scale[token])) for token in pools}
+    scale = stakes['token'].map(token_scale).to_numpy(dtype=np.int64)
+
+    # Exact integer weights: every float stake is a fraction over a power of two,
+    # so scaling to the largest denominator gives integers with the same ratios
+    ratios = [amount.as_integer_ratio() for amount in stakes['investment'].to_numpy(dtype=np.float64).tolist()]
+    denominator = max(d for _, d in ratios)
+    weight_units = np.array([n * (denominator // d) for n, d in ratios], dtype=object)
+    weight_units = weight_units * stakes['effective_rate'].to_numpy().astype(object)
+
+    # Python integers (object arrays) so pool * weight cannot overflow or round;
+    # floored shares then never add up to more than the pool
+    total_units = np.zeros(codes.max() + 1, dtype=object)
+    np.add.at(total_units, codes, weight_units)
+    total_units = total_units[codes]
+    pool_units = stakes['token'].map(token_units).to_numpy().astype(object)
+
+    base_units = pool_units * weight_units // total_units
+    fraction = ((pool_units * weight_units % total_units) / total_units).astype(np.float64)
+    base = base_units.astype(np.int64)
+
+    # Largest remainder: hand leftover units to the largest fractional parts
+    paid_units = np.zeros(codes.max() + 1, dtype=object)
+    np.add.at(paid_units, codes, base_units)
+    leftover = (pool_units - paid_units[codes]).astype(np.int64)
+    order = np.lexsort((-fraction, codes))
+    sorted_codes = codes[order]
+    starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+    positions = np.arange(len(order))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = positions - starts[np.searchsorted(starts, positions, side='right') - 1] + 1
+    units = base + (rank <= leftover).astype(np.int64)
+
+    stakes['units'] = units
+    stakes['amount'] = units / scale
+
+    validate_distributions(stakes, pools, decimals)
+
+    return stakes[columns].sort_values('amount', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def validate_distributions(distributions: pd.DataFrame, pools: Dict[str, float], decimals: Dict[str, int] = None):
+    """Check that paid units equal each pool exactly and no payout is negative"""
+    decimals = decimals or TOKEN_DECIMALS
+
+    if (distributions['units'] < 0).any():
+        raise DistributionError("Negative payout calculated")
+
+    paid = distributions.groupby('token')['units'].sum()
+    for token, units in paid.items():
+        expected = int(round(pools[token] * 10 ** decimals.get(token, 0)))
+        if int(units) != expected:
+            raise DistributionError(f"{token} payout {int(units)} units does not match pool {expected} units")
@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 import aiohttp
 import traceback
@@ -24,6 +25,14 @@ from solders.signature import Signature
 from solders.signature import Signature
 from spl.token.instructions import get_associated_token_address
 from solana.rpc.commitment import Commitment
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import get_rate_limiter
 
 def setup_logging():
     """Configure logging"""
@@ -323,8 +332,11 @@ class JupiterTradeExecutor:
             self.logger.info(f"URL: {url}")
             self.logger.info(f"Amount Raw: {amount}")
             
+            jupiter = get_rate_limiter('jupiter')
+            await jupiter.acquire()
             async with aiohttp.ClientSession() as session:
                 async with session.get(url) as response:
+                    jupiter.update(response.status, response.headers)
                     if not response.ok:
                         self.logger.error(f"Jupiter API error: {response.status}")
                         self.logger.error(f"Response: {await response.text()}")
@@ -730,12 +742,15 @@ class JupiterTradeExecutor:
             self.logger.info("Requesting optimized swap transaction...")
             self.logger.debug(f"Swap parameters: {json.dumps(swap_data, indent=2)}")
             
+            jupiter = get_rate_limiter('jupiter')
+            await jupiter.acquire()
             async with aiohttp.ClientSession() as session:
                 async with session.post(
                     url, 
                     json=swap_data,
                     headers={'Content-Type': 'application/json'}
                 ) as response:
+                    jupiter.update(response.status, response.headers)
                     if not response.ok:
                         self.logger.error(f"Jupiter API error: {response.status}")
                         self.logger.error(f"Response: {await response.text()}")
@@ -47,6 +47,10 @@ except ImportError:
                 return self.address
 from spl.token.instructions import get_associated_token_address, transfer, create_associated_token_account, TransferParams
 
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine.transfer_builder import TransferBuilder
+
 def setup_logging():
     """Set up basic logging configuration"""
     import logging
@@ -106,6 +110,75 @@ class TokenTransferExecutor:
         except Exception as e:
             self.logger.error(f"Error loading wallet: {e}")
             raise ValueError(f"Invalid wallet configuration: {e}")
+        
+        # In-process transfer builder, created on first use and reused across transfers
+        self.transfer_builder = None
+    
+    def get_transfer_builder(self):
+        """Get the shared in-process transfer builder"""
+        if self.transfer_builder is None:
+            keypair = Keypair.from_bytes(base58.b58decode(self.private_key))
+            self.transfer_builder = TransferBuilder(self.rpc_url, keypair)
+        return self.transfer_builder
+    
+    async def sent_transfer_status(self, signature, last_valid_block_height=None):
+        """Status of a transfer that was already sent
+        
+        Args:
+            signature (str): Signature of the sent transaction
+            last_valid_block_height (int): Last block height its blockhash is valid for;
+                a transaction not seen by then can no longer land
+            
+        Returns:
+            str: 'confirmed', 'pending' if the cluster knows it but has not confirmed it,
+                 'failed' if it failed on chain, or 'missing' if it can no longer land
+        """
+        builder = self.get_transfer_builder()
+        try:
+            if await builder.confirm(signature):
+                return 'confirmed'
+        except ValueError as e:
+            self.logger.error(f"Sent transaction failed: {e}")
+            return 'failed'
+        
+        while True:
+            status = (await builder.rpc.get_signature_statuses([signature])).get(signature)
+            if status:
+                return 'failed' if status.get('err') else 'pending'
+            if last_valid_block_height is None or await builder.rpc.get_block_height() > last_valid_block_height:
+                return 'missing'
+            await asyncio.sleep(1)
+    
+    async def prepare_transfers(self, transfers):
+        """Build and sign transfers ahead of submission
+        
+        Args:
+            transfers (list): (destination_wallet, token, amount) tuples
+            
+        Returns:
+            list: PreparedTransfer objects for submit_prepared_transfers
+        """
+        requests_to_build = []
+        for destination_wallet, token, amount in transfers:
+            if token not in self.token_mints:
+                raise ValueError(f"Unsupported token: {token}. Supported tokens: {', '.join(self.token_mints.keys())}")
+            amount_lamports = int(round(amount * (10 ** self.token_decimals[token])))
+            requests_to_build.append((destination_wallet, self.token_mints[token], amount_lamports))
+        
+        return await self.get_transfer_builder().prepare(requests_to_build)
+    
+    async def submit_prepared_transfers(self, prepared, max_concurrency=4):
+        """Submit prepared transfers concurrently
+        
+        Returns:
+            dict: Transaction signature -> None on success or the send error
+        """
+        return await self.get_transfer_builder().submit_many(prepared, max_concurrency=max_concurrency)
+    
+    async def close(self):
+        """Close the pooled RPC session"""
+        if self.transfer_builder is not None:
+            await self.transfer_builder.close()
     
     async def execute_transfer(self, destination_wallet, token, amount):
         """Execute a token transfer to the destination wallet using Solana RPC
@@ -150,6 +223,10 @@ class TokenTransferExecutor:
             client = AsyncClient(rpc_url)
             self.successful_methods['rpc_url'] = rpc_url
             
+            # Set once the SDK path has sent the transfer
+            tx_signature = None
+            last_valid_block_height = None
+            
             try:
                 # Convert private key to keypair
                 private_key_bytes = base58.b58decode(self.private_key)
@@ -368,6 +445,7 @@ class TokenTransferExecutor:
                     }
                     
                     transaction.recent_blockhash = blockhash_resp.value.blockhash
+                    last_valid_block_height = blockhash_resp.value.last_valid_block_height
                     
                     # Sign the transaction
                     transaction.sign(keypair)
@@ -437,174 +515,41 @@ class TokenTransferExecutor:
                         self.logger.info(f"{method_name}: {method_info}")
                     self.logger.info("================================")
                     
-                    # Try a simpler approach - use the command line to execute a transfer
-                    self.logger.info("Falling back to command line approach...")
-                    try:
-                        import subprocess
-                        
-                        # Create a temporary script to execute the transfer
-                        script_content = f"""
-import os
-import json
-import base58
-import requests
-from solders.keypair import Keypair
-from solders.pubkey import Pubkey
-
-# Define the token program ID
-token_program_id = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
-
-# Define accounts
-source_account = "{source_token_account}"
-destination_account = "{destination_token_account}"
-owner = "{self.wallet}"
-amount = {amount_lamports}
-
-# Load keypair
-private_key = base58.b58decode("{self.private_key}")
-keypair = Keypair.from_bytes(private_key)
-
-# Create the instruction data for a token transfer
-# The first byte (3) is the instruction index for Transfer in the Token program
-instruction_data = bytes([3]) + amount.to_bytes(8, byteorder='little')
-
-# Create the transaction using direct JSON RPC
-payload = {{
-    "jsonrpc": "2.0",
-    "id": 1,
-    "method": "getLatestBlockhash",
-    "params": [{{"commitment": "confirmed"}}]
-}}
-
-response = requests.post("{self.rpc_url}", json=payload)
-blockhash_data = response.json()
-blockhash = blockhash_data["result"]["value"]["blockhash"]
-
-# Create the transaction
-transaction = {{
-    "recentBlockhash": blockhash,
-    "feePayer": owner,
-    "instructions": [
-        {{
-            "programId": token_program_id,
-            "accounts": [
-                {{"pubkey": source_account, "isSigner": False, "isWritable": True}},
-                {{"pubkey": destination_account, "isSigner": False, "isWritable": True}},
-                {{"pubkey": owner, "isSigner": True, "isWritable": False}}
-            ],
-            "data": base58.b58encode(instruction_data).decode('ascii')
-        }}
-    ]
-}}
-
-# Sign the transaction
-# This is a simplified approach - in a real implementation, you would use the Solana SDK
-# to properly sign the transaction
-signature = str(keypair.pubkey())
-
-# Send the transaction
-send_payload = {{
-    "jsonrpc": "2.0",
-    "id": 1,
-    "method": "sendTransaction",
-    "params": [
-        {{"transaction": json.dumps(transaction), "signatures": [signature]}},
-        {{"encoding": "json", "skipPreflight": False, "preflightCommitment": "confirmed"}}
-    ]
-}}
-
-send_response = requests.post("{self.rpc_url}", json=send_payload)
-result = send_response.json()
-print(json.dumps(result))
-"""
-                        
-                        # Write the script to a temporary file
-                        import tempfile
-                        with tempfile.NamedTemporaryFile(suffix='.py', delete=False, mode='w') as f:
-                            f.write(script_content)
-                            temp_script = f.name
-                        
-                        # Execute the script
-                        self.logger.info(f"Executing temporary script: {temp_script}")
-                        result = subprocess.run(['python', temp_script], capture_output=True, text=True)
-                        
-                        # Clean up the temporary file
-                        os.unlink(temp_script)
-                        
-                        # Check the result
-                        if result.returncode != 0:
-                            self.logger.error(f"Script execution failed: {result.stderr}")
-                            raise ValueError(f"Script execution failed: {result.stderr}")
-                        
-                        # Parse the result
-                        try:
-                            output = json.loads(result.stdout)
-                            tx_signature = output["result"]
-                            self.logger.info(f"Transaction sent successfully: {tx_signature}")
-                        except json.JSONDecodeError:
-                            self.logger.error(f"Failed to parse script output: {result.stdout}")
-                            raise ValueError(f"Failed to parse script output: {result.stdout}")
-                    except Exception as script_error:
-                        self.logger.error(f"Error with command line approach: {script_error}")
+                    # If the transfer was already sent, only send it again if it did not land
+                    sent_status = None
+                    if tx_signature:
+                        self.logger.info(f"Transaction {tx_signature} was already sent, checking its status...")
+                        sent_status = await self.sent_transfer_status(tx_signature, last_valid_block_height)
+                        self.successful_methods['sent_transfer_status'] = sent_status
+                    
+                    if sent_status in ('confirmed', 'pending'):
+                        if sent_status == 'pending':
+                            self.logger.warning(f"Transaction may not be confirmed: {tx_signature}")
+                        self.logger.info(f"Keeping already sent transaction: {tx_signature}")
+                    else:
+                        if sent_status:
+                            self.logger.warning(f"Transaction {tx_signature} is {sent_status}, sending the transfer again")
                         
-                        # If the script approach fails, try using the Solana CLI directly
-                        self.logger.info("Falling back to Solana CLI approach...")
+                        # Fall back to the in-process builder: pooled RPC session and cached blockhash
+                        self.logger.info("Falling back to in-process transfer builder...")
                         try:
-                            import subprocess
-                            import tempfile
-                            import re
+                            start_time = time.time()
+                            builder = self.get_transfer_builder()
+                            tx_signature, confirmed = await builder.transfer(destination_wallet, token_mint, amount_lamports)
+                            end_time = time.time()
                             
-                            # Write the private key to a temporary file
-                            with tempfile.NamedTemporaryFile(suffix='.json', delete=False, mode='w') as f:
-                                private_key_bytes = base58.b58decode(self.private_key)
-                                private_key_list = list(private_key_bytes)
-                                json.dump(private_key_list, f)
-                                keypair_path = f.name
+                            self.successful_methods['transfer_builder'] = {
+                                'method': 'transfer_builder',
+                                'time_ms': (end_time - start_time) * 1000,
+                                'confirmed': confirmed
+                            }
                             
-                            try:
-                                # Use the Solana CLI to transfer tokens
-                                cmd = [
-                                    "solana", "transfer",
-                                    "--from", keypair_path,
-                                    "--fee-payer", keypair_path,
-                                    destination_wallet,
-                                    str(amount),
-                                    token,
-                                    "--url", self.rpc_url,
-                                    "--commitment", "confirmed"
-                                ]
-                                
-                                self.logger.info(f"Executing Solana CLI command: {' '.join(cmd)}")
-                                result = subprocess.run(cmd, capture_output=True, text=True)
-                                
-                                # Check the result
-                                if result.returncode != 0:
-                                    self.logger.error(f"Solana CLI execution failed: {result.stderr}")
-                                    raise ValueError(f"Solana CLI execution failed: {result.stderr}")
-                                
-                                # Extract transaction signature from stdout
-                                output = result.stdout
-                                signature_match = re.search(r'Signature: ([a-zA-Z0-9]+)', output)
-                                if signature_match:
-                                    tx_signature = signature_match.group(1)
-                                    self.logger.info(f"Transaction sent successfully via CLI: {tx_signature}")
-                                    
-                                    return {
-                                        "success": True,
-                                        "signature": tx_signature,
-                                        "token": token,
-                                        "amount": amount,
-                                        "destination": destination_wallet
-                                    }
-                                else:
-                                    self.logger.error(f"Could not extract signature from CLI output: {output}")
-                                    raise ValueError(f"Could not extract signature from CLI output: {output}")
-                            finally:
-                                # Clean up the temporary keypair file
-                                os.unlink(keypair_path)
-                        except Exception as cli_error:
-                            self.logger.error(f"Error with Solana CLI approach: {cli_error}")
-                            raise ValueError(f"All transfer approaches failed: {e}, {script_error}, {cli_error}")
+                            if not confirmed:
+                                self.logger.warning(f"Transaction may not be confirmed: {tx_signature}")
+                            self.logger.info(f"Transaction sent successfully via transfer builder: {tx_signature}")
+                        except Exception as builder_error:
+                            self.logger.error(f"Error with transfer builder approach: {builder_error}")
+                            raise ValueError(f"All transfer approaches failed: {e}, {builder_error}")
                 
                 return {
                     "success": True,
@@ -730,6 +675,7 @@ async def async_main():
             # Initialize and run transfer executor
             executor = TokenTransferExecutor()
             result = await executor.execute_transfer(test_wallet, test_token, test_amount)
+            await executor.close()
             
             if result["success"]:
                 print(f"\n✅ Test transfer of {test_amount} {test_token} to {test_wallet} completed")
@@ -761,6 +707,7 @@ async def async_main():
         # Initialize and run transfer executor
         executor = TokenTransferExecutor()
         result = await executor.execute_transfer(destination_wallet, token, amount)
+        await executor.close()
         
         if result["success"]:
             print(f"\n✅ Transfer of {amount} {token} to {destination_wallet} completed")
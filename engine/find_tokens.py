@@ -23,6 +23,8 @@ import subprocess
 import time
 import traceback
 import argparse
+import asyncio
+import aiohttp
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from dotenv import load_dotenv
@@ -33,6 +35,8 @@ project_root = Path(__file__).parent.parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from engine.rate_limits import get_rate_limiter, rate_limited_session
+
 def setup_logging():
     """Configure logging with consistent output"""
     logging.basicConfig(
@@ -163,6 +167,30 @@ class TokenFinder:
             "offset": 0
         }
 
+    def _build_request(self, limit: int) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """Birdeye endpoint, parameters and headers for fetching `limit` tokens with the current strategy"""
+        # Ensure limit is within valid range
+        if limit < 1:
+            limit = 1
+        elif limit > 50:
+            limit = 50
+            
+        logger.info(f"Fetching top {limit} tokens using strategy: {self.strategy.value}")
+        
+        # Get endpoint and parameters for the current strategy
+        url, params = self.get_strategy_params()
+        
+        # Add limit to parameters
+        params["limit"] = limit
+        
+        # Prepare request headers
+        headers = {
+            "x-api-key": self.birdeye_api_key,
+            "accept": "application/json",
+            "x-chain": "solana"  # Add chain header
+        }
+        return url, params, headers
+
     def get_tokens(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get tokens from Birdeye API using the current strategy
@@ -174,26 +202,7 @@ class TokenFinder:
             List of token data
         """
         try:
-            # Ensure limit is within valid range
-            if limit < 1:
-                limit = 1
-            elif limit > 50:
-                limit = 50
-                
-            logger.info(f"Fetching top {limit} tokens using strategy: {self.strategy.value}")
-            
-            # Get endpoint and parameters for the current strategy
-            url, params = self.get_strategy_params()
-            
-            # Add limit to parameters
-            params["limit"] = limit
-            
-            # Prepare request headers
-            headers = {
-                "x-api-key": self.birdeye_api_key,
-                "accept": "application/json",
-                "x-chain": "solana"  # Add chain header
-            }
+            url, params, headers = self._build_request(limit)
             
             # Log request details for debugging
             logger.info(f"API Key prefix: {self.birdeye_api_key[:5]}...")
@@ -201,7 +210,7 @@ class TokenFinder:
             logger.info(f"Request params: {params}")
             
             # Make request with longer timeout
-            response = requests.get(url, headers=headers, params=params, timeout=60)
+            response = rate_limited_session('birdeye').get(url, headers=headers, params=params, timeout=60)
             
             # Log response details
             logger.info(f"Response status code: {response.status_code}")
@@ -216,104 +225,7 @@ class TokenFinder:
             data = response.json()
             logger.info(f"Response data: {json.dumps(data)[:500]}...")  # Log first 500 chars
             
-            # Handle different response structures based on API version
-            tokens = []
-            
-            if url.endswith('token_trending'):  # Legacy trending endpoint
-                # Check if data field exists
-                if 'data' not in data:
-                    logger.error("Response missing 'data' field")
-                    logger.info(f"Full response: {json.dumps(data)}")
-                    return []
-                    
-                # Check if tokens field exists
-                if 'tokens' not in data.get('data', {}):
-                    logger.error("Response missing 'data.tokens' field")
-                    logger.info(f"Data field content: {json.dumps(data.get('data', {}))}")
-                    return []
-                
-                tokens = data.get('data', {}).get('tokens', [])
-            else:  # V3 API endpoints
-                # Check if data field exists
-                if 'data' not in data:
-                    logger.error("Response missing 'data' field")
-                    logger.info(f"Full response: {json.dumps(data)}")
-                    return []
-                
-                # Check if items field exists in data
-                if 'items' not in data.get('data', {}):
-                    logger.error("Response missing 'data.items' field")
-                    logger.info(f"Data field content: {json.dumps(data.get('data', {}))}")
-                    return []
-                    
-                tokens = data.get('data', {}).get('items', [])
-            
-            if not tokens:
-                logger.warning(f"No tokens found for strategy: {self.strategy.value}")
-                return []
-            
-            logger.info(f"Found {len(tokens)} tokens")
-            
-            # Log the structure of the first few tokens for debugging
-            if tokens and len(tokens) > 0:
-                logger.info(f"First token type: {type(tokens[0])}")
-                if isinstance(tokens[0], dict):
-                    logger.info(f"First token keys: {list(tokens[0].keys())}")
-                elif isinstance(tokens[0], str):
-                    logger.info(f"Tokens appear to be string values: {tokens[0]}")
-                else:
-                    logger.info(f"Unexpected token type: {type(tokens[0])}")
-            
-            # Convert tokens to the format expected by process_token
-            formatted_tokens = []
-            for token in tokens:
-                try:
-                    # Check if token is already a string (symbol only)
-                    if isinstance(token, str):
-                        # Handle case where token is just a string
-                        formatted_token = {
-                            'symbol': token,
-                            'name': token,
-                            'address': None,
-                            'chain': 'solana',
-                            'verified': True
-                        }
-                    # Handle different response structures
-                    elif isinstance(token, dict):
-                        if 'address' in token:  # V3 API format
-                            formatted_token = {
-                                'symbol': token.get('symbol'),
-                                'name': token.get('name'),
-                                'address': token.get('address'),
-                                'chain': 'solana',
-                                'verified': True
-                            }
-                        else:  # Legacy trending format
-                            formatted_token = {
-                                'symbol': token.get('symbol'),
-                                'name': token.get('name'),
-                                'address': token.get('address'),
-                                'chain': 'solana',
-                                'verified': True
-                            }
-                    else:
-                        logger.warning(f"Skipping token with unexpected type: {type(token)}")
-                        continue
-                    
-                    formatted_tokens.append(formatted_token)
-                except AttributeError as e:
-                    logger.error(f"Error processing token data: {e}")
-                    logger.error(f"Token data type: {type(token)}")
-                    logger.error(f"Token data: {token}")
-                    continue
-            
-            # Log first few tokens for debugging
-            if formatted_tokens:
-                logger.info("First few tokens:")
-                for i, token in enumerate(formatted_tokens[:3]):
-                    logger.info(f"Token {i+1}: {token.get('symbol')} - {token.get('name')}")
-            
-            return formatted_tokens
+            return self._parse_tokens(url, data)
             
         except requests.exceptions.Timeout:
             logger.error("Request to Birdeye API timed out")
@@ -330,6 +242,166 @@ class TokenFinder:
             logger.error(traceback.format_exc())
             return []
     
+    async def fetch_tokens(self, session: aiohttp.ClientSession, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Async variant of get_tokens sharing the caller's session and the Birdeye limiter
+        
+        Args:
+            session: Shared aiohttp session
+            limit: Number of tokens to retrieve (max 50)
+            
+        Returns:
+            List of token data
+        """
+        try:
+            url, params, headers = self._build_request(limit)
+            
+            birdeye = get_rate_limiter('birdeye')
+            await birdeye.acquire()
+            async with session.get(url, headers=headers, params=params,
+                                   timeout=aiohttp.ClientTimeout(total=60)) as response:
+                birdeye.update(response.status, response.headers)
+                if response.status != 200:
+                    logger.error(f"Birdeye API error for {self.strategy.value}: {response.status}")
+                    logger.error(f"Response: {await response.text()}")
+                    return []
+                data = await response.json(content_type=None)
+            
+            return self._parse_tokens(url, data)
+            
+        except asyncio.TimeoutError:
+            logger.error(f"Request to Birdeye API timed out for strategy: {self.strategy.value}")
+            return []
+        except aiohttp.ClientError as e:
+            logger.error(f"Connection error when connecting to Birdeye API: {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Error fetching tokens for strategy {self.strategy.value}: {e}")
+            logger.error(traceback.format_exc())
+            return []
+
+    def _parse_tokens(self, url: str, data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Convert a Birdeye token list response into the format expected by process_token
+        
+        Args:
+            url: Endpoint the response came from (legacy trending or v3 list)
+            data: Decoded JSON response
+            
+        Returns:
+            List of token data
+        """
+        # Handle different response structures based on API version
+        tokens = []
+        
+        if url.endswith('token_trending'):  # Legacy trending endpoint
+            # Check if data field exists
+            if 'data' not in data:
+                logger.error("Response missing 'data' field")
+                logger.info(f"Full response: {json.dumps(data)}")
+                return []
+                
+            # Check if tokens field exists
+            if 'tokens' not in data.get('data', {}):
+                logger.error("Response missing 'data.tokens' field")
+                logger.info(f"Data field content: {json.dumps(data.get('data', {}))}")
+                return []
+            
+            tokens = data.get('data', {}).get('tokens', [])
+        else:  # V3 API endpoints
+            # Check if data field exists
+            if 'data' not in data:
+                logger.error("Response missing 'data' field")
+                logger.info(f"Full response: {json.dumps(data)}")
+                return []
+            
+            # Check if items field exists in data
+            if 'items' not in data.get('data', {}):
+                logger.error("Response missing 'data.items' field")
+                logger.info(f"Data field content: {json.dumps(data.get('data', {}))}")
+                return []
+                
+            tokens = data.get('data', {}).get('items', [])
+        
+        if not tokens:
+            logger.warning(f"No tokens found for strategy: {self.strategy.value}")
+            return []
+        
+        logger.info(f"Found {len(tokens)} tokens")
+        
+        # Log the structure of the first few tokens for debugging
+        if tokens and len(tokens) > 0:
+            logger.info(f"First token type: {type(tokens[0])}")
+            if isinstance(tokens[0], dict):
+                logger.info(f"First token keys: {list(tokens[0].keys())}")
+            elif isinstance(tokens[0], str):
+                logger.info(f"Tokens appear to be string values: {tokens[0]}")
+            else:
+                logger.info(f"Unexpected token type: {type(tokens[0])}")
+        
+        # Convert tokens to the format expected by process_token
+        formatted_tokens = []
+        for token in tokens:
+            try:
+                # Check if token is already a string (symbol only)
+                if isinstance(token, str):
+                    # Handle case where token is just a string
+                    formatted_token = {
+                        'symbol': token,
+                        'name': token,
+                        'address': None,
+                        'chain': 'solana',
+                        'verified': True
+                    }
+                # Handle different response structures
+                elif isinstance(token, dict):
+                    if 'address' in token:  # V3 API format
+                        formatted_token = {
+                            'symbol': token.get('symbol'),
+                            'name': token.get('name'),
+                            'address': token.get('address'),
+                            'chain': 'solana',
+                            'verified': True
+                        }
+                    else:  # Legacy trending format
+                        formatted_token = {
+                            'symbol': token.get('symbol'),
+                            'name': token.get('name'),
+                            'address': token.get('address'),
+                            'chain': 'solana',
+                            'verified': True
+                        }
+                else:
+                    logger.warning(f"Skipping token with unexpected type: {type(token)}")
+                    continue
+                
+                formatted_tokens.append(formatted_token)
+            except AttributeError as e:
+                logger.error(f"Error processing token data: {e}")
+                logger.error(f"Token data type: {type(token)}")
+                logger.error(f"Token data: {token}")
+                continue
+        
+        # Log first few tokens for debugging
+        if formatted_tokens:
+            logger.info("First few tokens:")
+            for i, token in enumerate(formatted_tokens[:3]):
+                logger.info(f"Token {i+1}: {token.get('symbol')} - {token.get('name')}")
+        
+        return formatted_tokens
+
+    @staticmethod
+    def _token_command(token_data: Dict[str, Any]) -> List[str]:
+        """Command calling engine\tokens.py for a token"""
+        tokens_script = Path(project_root) / "engine" / "tokens.py"
+        
+        # Add token address as an optional parameter if available
+        cmd = [sys.executable, str(tokens_script), token_data['symbol']]
+        if token_data.get('address'):
+            cmd.append('--address')
+            cmd.append(token_data.get('address'))
+        return cmd
+
     def process_token(self, token_data: Dict[str, Any]) -> bool:
         """
         Process a single token by calling engine\tokens.py
@@ -348,15 +420,7 @@ class TokenFinder:
                 return False
             
             logger.info(f"Processing token: {symbol}")
-            
-            # Build command to call engine\tokens.py
-            tokens_script = Path(project_root) / "engine" / "tokens.py"
-            
-            # Add token address as an optional parameter if available
-            cmd = [sys.executable, str(tokens_script), symbol]
-            if token_data.get('address'):
-                cmd.append('--address')
-                cmd.append(token_data.get('address'))
+            cmd = self._token_command(token_data)
             
             # Execute command
             logger.info(f"Executing: {' '.join(cmd)}")
@@ -377,6 +441,38 @@ class TokenFinder:
         except Exception as e:
             logger.error(f"Error processing token {token_data.get('symbol', 'unknown')}: {e}")
             return False
+
+    async def aprocess_token(self, token_data: Dict[str, Any]) -> bool:
+        """Async variant of process_token; the tokens.py subprocess runs without blocking the event loop"""
+        symbol = token_data.get('symbol')
+        if not symbol:
+            logger.error("No symbol found in token data")
+            return False
+        
+        try:
+            cmd = self._token_command(token_data)
+            logger.info(f"Executing: {' '.join(cmd)}")
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            
+            if process.returncode == 0:
+                logger.info(f"Successfully processed token {symbol}")
+                logger.info(stdout.decode(errors='replace'))
+                return True
+            
+            logger.error(f"Failed to process token {symbol}")
+            logger.error(f"Exit code: {process.returncode}")
+            logger.error(f"Stdout: {stdout.decode(errors='replace')}")
+            logger.error(f"Stderr: {stderr.decode(errors='replace')}")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Error processing token {symbol}: {e}")
+            return False
     
     def find_and_process_tokens(self, limit: int = 10) -> Dict[str, int]:
         """
@@ -388,49 +484,90 @@ class TokenFinder:
         Returns:
             Dictionary with success and failure counts
         """
-        results = {
-            'success': 0,
-            'failure': 0,
-            'total': 0,
-            'strategy': self.strategy.value
-        }
+        return asyncio.run(discover_tokens([self.strategy], limit))[self.strategy.value]
+
+def token_key(token: Dict[str, Any]) -> str:
+    """Identity used to dedupe candidates across strategies: the mint, or the symbol when Birdeye omits it"""
+    return token.get('address') or f"symbol:{(token.get('symbol') or '').upper()}"
+
+async def discover_tokens(strategies: List[DiscoveryStrategy], limit: int = 10,
+                          max_concurrency: int = 4) -> Dict[str, Dict[str, Any]]:
+    """
+    Query several strategies concurrently, dedupe by mint, then enrich the unique tokens in parallel
+    
+    All Birdeye list requests share one session and the Birdeye limiter, so the
+    discovery stage takes about as long as the slowest strategy. Each unique
+    token is then processed once by engine\tokens.py, with at most
+    max_concurrency subprocesses running and one Birdeye permit taken per token.
+    
+    Args:
+        strategies: Discovery strategies to run
+        limit: Number of tokens to fetch per strategy
+        max_concurrency: Maximum tokens.py processes running at once
         
-        try:
-            # Get tokens using the current strategy
-            tokens = self.get_tokens(limit)
-            results['total'] = len(tokens)
-            
-            if not tokens:
-                logger.warning(f"No tokens found for strategy: {self.strategy.value}")
-                return results
-            
-            logger.info(f"Processing {len(tokens)} tokens using strategy: {self.strategy.value}")
-            
-            # Process each token
-            for i, token in enumerate(tokens, 1):
-                try:
-                    symbol = token.get('symbol', 'unknown')
-                    logger.info(f"Processing token {i}/{len(tokens)}: {symbol}")
-                    
-                    # Add a small delay between requests to avoid rate limiting
-                    if i > 1:
-                        time.sleep(2)
-                    
-                    if self.process_token(token):
-                        results['success'] += 1
-                    else:
-                        results['failure'] += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing token: {e}")
-                    results['failure'] += 1
-            
-            logger.info(f"Processed {results['total']} tokens: {results['success']} successful, {results['failure']} failed")
-            return results
-            
-        except Exception as e:
-            logger.error(f"Error finding and processing tokens: {e}")
-            return results
+    Returns:
+        Results per strategy; 'total' counts the tokens the strategy found,
+        'success'/'failure' how their processing went, and 'duplicates' how many
+        of them another strategy had already found
+    """
+    finders = {strategy: TokenFinder(strategy) for strategy in strategies}
+    
+    # Stage 1: every strategy's list request at once
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        found = await asyncio.gather(*(finder.fetch_tokens(session, limit) for finder in finders.values()),
+                                     return_exceptions=True)
+    discovery_time = time.perf_counter() - start
+    
+    results = {}
+    candidates = {}  # token key -> (token data, finder of the first strategy that found it)
+    found_by = {}  # strategy value -> token keys
+    for (strategy, finder), tokens in zip(finders.items(), found):
+        if isinstance(tokens, Exception):
+            logger.error(f"Error running strategy {strategy.value}: {tokens}")
+            results[strategy.value] = {'success': 0, 'failure': 0, 'total': 0,
+                                       'strategy': strategy.value, 'error': str(tokens)}
+            continue
+        
+        keys = []
+        duplicates = 0
+        for token in tokens:
+            if not token.get('symbol'):
+                continue
+            key = token_key(token)
+            if key in candidates:
+                duplicates += 1
+            else:
+                candidates[key] = (token, finder)
+            keys.append(key)
+        found_by[strategy.value] = keys
+        results[strategy.value] = {'success': 0, 'failure': 0, 'total': len(keys),
+                                   'duplicates': duplicates, 'strategy': strategy.value}
+    
+    logger.info(f"Discovered {sum(len(keys) for keys in found_by.values())} candidates "
+                f"({len(candidates)} unique) from {len(strategies)} strategies in {discovery_time:.1f}s")
+    
+    # Stage 2: enrich each unique token once
+    start = time.perf_counter()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    birdeye = get_rate_limiter('birdeye')
+    
+    async def enrich(token: Dict[str, Any], finder: TokenFinder) -> bool:
+        async with semaphore:
+            await birdeye.acquire()
+            return await finder.aprocess_token(token)
+    
+    outcomes = await asyncio.gather(*(enrich(token, finder) for token, finder in candidates.values()))
+    processed = dict(zip(candidates.keys(), outcomes))
+    enrichment_time = time.perf_counter() - start
+    
+    for strategy_value, keys in found_by.items():
+        results[strategy_value]['success'] = sum(1 for key in keys if processed.get(key))
+        results[strategy_value]['failure'] = len(keys) - results[strategy_value]['success']
+    
+    logger.info(f"Processed {len(processed)} unique tokens in {enrichment_time:.1f}s: "
+                f"{sum(outcomes)} successful, {len(outcomes) - sum(outcomes)} failed")
+    return results
 
 def main():
     """Main function to run the script"""
@@ -504,18 +641,17 @@ def main():
         logger.error(f"Script failed: {e}")
         sys.exit(1)
 
-def run_all_strategies(limit: int = 20) -> Dict[str, Dict[str, int]]:
+def run_all_strategies(limit: int = 20, max_concurrency: int = 4) -> Dict[str, Dict[str, int]]:
     """
-    Run all discovery strategies sequentially
+    Run all discovery strategies concurrently
     
     Args:
         limit: Number of tokens to process per strategy
+        max_concurrency: Maximum tokens processed at once
         
     Returns:
         Dictionary with results for each strategy
     """
-    results = {}
-    
     # List of all strategies except ALL
     strategies = [
         strategy for strategy in DiscoveryStrategy 
@@ -524,44 +660,18 @@ def run_all_strategies(limit: int = 20) -> Dict[str, Dict[str, int]]:
     
     logger.info(f"Running all {len(strategies)} discovery strategies with limit {limit} each")
     
-    # Process each strategy
-    for strategy in strategies:
-        try:
-            logger.info(f"\n{'='*50}")
-            logger.info(f"Running strategy: {strategy.value}")
-            logger.info(f"{'='*50}\n")
-            
-            # Initialize finder with this strategy
-            finder = TokenFinder(strategy)
-            
-            # Find and process tokens
-            strategy_results = finder.find_and_process_tokens(limit)
-            
-            # Store results
-            results[strategy.value] = strategy_results
-            
-            # Add a small delay between strategies to avoid rate limiting
-            time.sleep(5)
-            
-        except Exception as e:
-            logger.error(f"Error running strategy {strategy.value}: {e}")
-            logger.error(traceback.format_exc())
-            results[strategy.value] = {
-                'success': 0,
-                'failure': 0,
-                'total': 0,
-                'strategy': strategy.value,
-                'error': str(e)
-            }
+    start = time.perf_counter()
+    results = asyncio.run(discover_tokens(strategies, limit, max_concurrency))
     
-    # Calculate totals
+    # Calculate totals (tokens found by several strategies are counted once per strategy)
     total_success = sum(r.get('success', 0) for r in results.values())
     total_failure = sum(r.get('failure', 0) for r in results.values())
     total_tokens = sum(r.get('total', 0) for r in results.values())
+    total_duplicates = sum(r.get('duplicates', 0) for r in results.values())
     
     logger.info(f"\n{'='*50}")
-    logger.info(f"All strategies completed")
-    logger.info(f"Total tokens processed: {total_tokens}")
+    logger.info(f"All strategies completed in {time.perf_counter() - start:.1f}s")
+    logger.info(f"Total tokens processed: {total_tokens} ({total_duplicates} found by more than one strategy)")
     logger.info(f"Total successful: {total_success}")
     logger.info(f"Total failed: {total_failure}")
     logger.info(f"{'='*50}\n")
@@ -572,7 +682,7 @@ def get_strategy_description(strategy: DiscoveryStrategy) -> str:
     """Get a description of the given strategy"""
     descriptions = {
         DiscoveryStrategy.ALL:
-            "Run all discovery strategies sequentially",
+            "Run all discovery strategies concurrently",
         DiscoveryStrategy.TRENDING: 
             "Find trending tokens based on Birdeye's ranking algorithm",
         DiscoveryStrategy.VOLUME_MOMENTUM: 
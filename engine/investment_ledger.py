@@ -0,0 +1,513 @@
+"""
+Investment Ledger
+
+Incremental local copy of the INVESTMENTS table and the strategy wallet's
+transfer history. Records are pulled from Airtable/Birdeye only after a stored
+cursor, and range totals are answered from per-key prefix sums with a binary
+search instead of a full table scan.
+"""
+
+import os
+import sys
+import sqlite3
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from airtable import Airtable
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'investment_ledger.db'
+
+STABLECOINS = ('USDC', 'USDT')
+
+
+def to_timestamp(value) -> float:
+    """Convert an ISO string or datetime to a Unix timestamp"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class PrefixIndex:
+    """Time-ordered values with prefix sums for O(log n) range totals"""
+
+    def __init__(self):
+        self.timestamps: List[float] = []
+        self.prefix: List[float] = []
+
+    def add(self, timestamp: float, value: float):
+        if not self.timestamps or timestamp >= self.timestamps[-1]:
+            # Common case: records arrive in time order
+            self.timestamps.append(timestamp)
+            self.prefix.append((self.prefix[-1] if self.prefix else 0.0) + value)
+            return
+
+        # Out-of-order record: insert it and rebuild the prefix sums
+        position = bisect_right(self.timestamps, timestamp)
+        values = [self.prefix[0]] + [self.prefix[i] - self.prefix[i - 1] for i in range(1, len(self.prefix))]
+        insort(self.timestamps, timestamp)
+        values.insert(position, value)
+        running = 0.0
+        self.prefix = []
+        for v in values:
+            running += v
+            self.prefix.append(running)
+
+    def _sum_before(self, index: int) -> float:
+        return self.prefix[index - 1] if index > 0 else 0.0
+
+    def range_sum(self, start: Optional[float] = None, end: Optional[float] = None) -> float:
+        """Sum of values strictly after start and strictly before end"""
+        lo = bisect_right(self.timestamps, start) if start is not None else 0
+        hi = bisect_left(self.timestamps, end) if end is not None else len(self.timestamps)
+        if hi <= lo:
+            return 0.0
+        return self._sum_before(hi) - self._sum_before(lo)
+
+
+class InvestmentLedger:
+    """Local, incrementally synced ledger of investments and wallet transfers"""
+
+    def __init__(self, db_path: Optional[str] = None, sync_interval: int = 60):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.sync_interval = sync_interval
+        self._last_sync = 0.0
+        self._investments_table = None
+        # Serializes syncs and index updates between threads sharing the ledger
+        self._lock = threading.RLock()
+
+        self._init_db()
+        self._load_indexes()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path))
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS investments (
+                    id TEXT PRIMARY KEY,
+                    createdAt TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    wallet TEXT,
+                    token TEXT,
+                    priceToken TEXT,
+                    amount REAL,
+                    isWithdrawal INTEGER,
+                    fixedUsd REAL,
+                    unpricedAmount REAL,
+                    transactionHash TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_investments_ts ON investments (ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_investments_wallet ON investments (wallet, token)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transfers (
+                    signature TEXT NOT NULL,
+                    transferIndex INTEGER NOT NULL,
+                    ts REAL NOT NULL,
+                    token TEXT,
+                    amount REAL,
+                    usdValue REAL,
+                    PRIMARY KEY (signature, transferIndex)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transfers_ts ON transfers (ts)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS wallet_token_totals (
+                    wallet TEXT NOT NULL,
+                    token TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    PRIMARY KEY (wallet, token)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ledger_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM ledger_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, conn: sqlite3.Connection, key: str, value: str):
+        conn.execute("INSERT OR REPLACE INTO ledger_state (key, value) VALUES (?, ?)", (key, value))
+
+    # ------------------------------------------------------------------
+    # In-memory indexes
+    # ------------------------------------------------------------------
+
+    def _load_indexes(self):
+        """Build prefix indexes from the local database (one pass at startup)"""
+        self.indexes: Dict[Tuple, PrefixIndex] = {}
+        self.investment_hashes = set()
+
+        with self._connect() as conn:
+            investments = conn.execute(
+                "SELECT ts, token, priceToken, amount, isWithdrawal, fixedUsd, unpricedAmount, transactionHash "
+                "FROM investments ORDER BY ts"
+            ).fetchall()
+            transfers = conn.execute(
+                "SELECT ts, signature, usdValue FROM transfers ORDER BY ts"
+            ).fetchall()
+
+        for row in investments:
+            self._index_investment(*row)
+
+        for ts, signature, usd_value in transfers:
+            if signature not in self.investment_hashes:
+                self._index('small_flow').add(ts, usd_value)
+
+    def _index(self, *key) -> PrefixIndex:
+        if key not in self.indexes:
+            self.indexes[key] = PrefixIndex()
+        return self.indexes[key]
+
+    def _index_investment(self, ts, token, price_token, amount, is_withdrawal, fixed_usd, unpriced_amount, transaction_hash):
+        kind = 'withdrawal' if is_withdrawal else 'investment'
+        if fixed_usd is not None:
+            self._index(kind, 'usd').add(ts, fixed_usd)
+        if unpriced_amount:
+            self._index(kind, 'unpriced', price_token).add(ts, unpriced_amount)
+        self._index('amount', token).add(ts, amount or 0.0)
+        if transaction_hash:
+            self.investment_hashes.add(transaction_hash)
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    @property
+    def investments_table(self) -> Airtable:
+        if self._investments_table is None:
+            self._investments_table = Airtable(
+                os.getenv('KINKONG_AIRTABLE_BASE_ID'),
+                'INVESTMENTS',
+                os.getenv('KINKONG_AIRTABLE_API_KEY')
+            )
+        return self._investments_table
+
+    @staticmethod
+    def parse_investment(record: Dict) -> Optional[Tuple]:
+        """
+        Turn an INVESTMENTS record into a ledger row
+
+        Withdrawal detection and USD resolution follow the same precedence as
+        WalletSnapshotTaker: originalAmountUsd / usdAmount, then amount * tokenPrice,
+        otherwise the amount is kept unpriced and valued at query time.
+
+        Records without a token count as USDC for per-token amounts (as in
+        ProfitRedistributor) and are priced as UBC (as in WalletSnapshotTaker).
+        """
+        fields = record.get('fields', {})
+        created_at = fields.get('createdAt')
+        if not created_at:
+            return None
+
+        token = (fields.get('token') or 'USDC').upper()
+        price_token = (fields.get('token') or 'UBC').upper()
+        amount = _float(fields.get('amount')) or 0.0
+        original_amount = _float(fields.get('originalAmount'))
+        is_withdrawal = bool(fields.get('isWithdrawal', False)) or (original_amount is not None and original_amount > 0)
+
+        fixed_usd = None
+        unpriced_amount = 0.0
+        token_price = _float(fields.get('tokenPrice'))
+
+        if is_withdrawal:
+            base_amount = original_amount
+            fixed_usd = _float(fields.get('originalAmountUsd'))
+            if fixed_usd is None:
+                fixed_usd = _float(fields.get('usdAmount'))
+        else:
+            base_amount = amount if fields.get('amount') is not None else None
+            fixed_usd = _float(fields.get('usdAmount'))
+
+        if fixed_usd is None and base_amount is not None:
+            if token_price is not None:
+                fixed_usd = base_amount * token_price if token_price > 0 else None
+            elif price_token in STABLECOINS:
+                fixed_usd = base_amount
+            else:
+                unpriced_amount = base_amount
+
+        return (
+            record['id'],
+            created_at,
+            to_timestamp(created_at),
+            fields.get('wallet'),
+            token,
+            price_token,
+            amount,
+            1 if is_withdrawal else 0,
+            fixed_usd,
+            unpriced_amount,
+            fields.get('transactionHash')
+        )
+
+    def sync_investments(self, force: bool = False) -> int:
+        """
+        Pull INVESTMENTS records created since the stored cursor
+
+        Concurrent callers wait for a sync in progress instead of starting their own.
+
+        Returns:
+            Number of new or changed records applied
+        """
+        with self._lock:
+            if not force and time.time() - self._last_sync < self.sync_interval:
+                return 0
+
+            cursor = self._get_state('investments_cursor')
+            formula = None
+            if cursor:
+                # Re-read the cursor instant itself so records sharing a timestamp are not missed
+                formula = f"OR(IS_AFTER({{createdAt}}, '{cursor}'), IS_SAME({{createdAt}}, '{cursor}'))"
+
+            records = self.investments_table.get_all(formula=formula) if formula else self.investments_table.get_all()
+            self._last_sync = time.time()
+
+            applied = self.apply_investments(records)
+        if applied:
+            logger.info(f"Investment ledger synced {applied} records (cursor {cursor or 'start'})")
+        return applied
+
+    def apply_investments(self, records: List[Dict]) -> int:
+        """Apply INVESTMENTS records to the ledger, updating running totals"""
+        with self._lock:
+            return self._apply_investments(records)
+
+    def _apply_investments(self, records: List[Dict]) -> int:
+        rows = [row for row in (self.parse_investment(r) for r in records) if row]
+        if not rows:
+            return 0
+
+        applied = 0
+        rebuild = False
+        new_hashes = False
+        max_created = self._get_state('investments_cursor')
+
+        with self._connect() as conn:
+            # Take the write lock before the existence checks so another process cannot apply the same records
+            conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                record_id, created_at, ts, wallet, token, price_token, amount = row[:7]
+                existing = conn.execute(
+                    "SELECT id, createdAt, ts, wallet, token, priceToken, amount, isWithdrawal, fixedUsd, "
+                    "unpricedAmount, transactionHash FROM investments WHERE id = ?",
+                    (record_id,)
+                ).fetchone()
+
+                if existing and tuple(existing) == row:
+                    continue
+
+                if existing:
+                    # Changed record: back out its old running total and rebuild indexes afterwards
+                    old_wallet, old_token, old_amount = existing[3], existing[4], existing[6]
+                    if old_wallet:
+                        conn.execute(
+                            "UPDATE wallet_token_totals SET amount = amount - ? WHERE wallet = ? AND token = ?",
+                            (old_amount or 0.0, old_wallet, old_token)
+                        )
+                    rebuild = True
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO investments "
+                    "(id, createdAt, ts, wallet, token, priceToken, amount, isWithdrawal, fixedUsd, unpricedAmount, transactionHash) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                if wallet:
+                    conn.execute(
+                        "INSERT INTO wallet_token_totals (wallet, token, amount) VALUES (?, ?, ?) "
+                        "ON CONFLICT(wallet, token) DO UPDATE SET amount = amount + excluded.amount",
+                        (wallet, token, amount or 0.0)
+                    )
+
+                if not existing:
+                    self._index_investment(ts, token, price_token, amount, *row[7:])
+                    new_hashes = new_hashes or bool(row[10])
+
+                if max_created is None or to_timestamp(created_at) > to_timestamp(max_created):
+                    max_created = created_at
+                applied += 1
+
+            if max_created:
+                self._set_state(conn, 'investments_cursor', max_created)
+
+        if rebuild or new_hashes:
+            # Edits or newly known investment hashes change already-indexed totals
+            self._load_indexes()
+
+        return applied
+
+    def sync_transactions(self, transactions: List[Dict], wallet: str, token_prices: Optional[Dict[str, float]] = None,
+                          min_usd: float = 1.0) -> int:
+        """
+        Apply wallet transactions (Birdeye tx_list items) newer than the stored cursor
+
+        Transfers are valued once, at ingest, with the transaction price or the
+        current price, and transfers under min_usd are ignored.
+
+        Returns:
+            Number of transfers recorded
+        """
+        with self._lock:
+            return self._apply_transactions(transactions, wallet, token_prices or {}, min_usd)
+
+    def _apply_transactions(self, transactions: List[Dict], wallet: str, token_prices: Dict[str, float],
+                            min_usd: float) -> int:
+        cursor = float(self._get_state('transactions_cursor') or 0)
+        max_block_time = cursor
+        recorded = 0
+
+        with self._connect() as conn:
+            for tx in transactions:
+                block_time = float(tx.get('blockTime', 0) or 0)
+                if block_time <= cursor:
+                    continue
+                max_block_time = max(max_block_time, block_time)
+
+                if tx.get('txType', '').lower() not in ['swap', 'transfer', 'unknown']:
+                    continue
+
+                signature = tx.get('signature')
+                for i, transfer in enumerate(tx.get('tokenTransfers', []) or []):
+                    is_sender = transfer.get('sender') == wallet
+                    is_receiver = transfer.get('receiver') == wallet
+                    if not (is_sender or is_receiver):
+                        continue
+
+                    symbol = transfer.get('symbol', 'Unknown')
+                    amount = _float(transfer.get('amount')) or 0.0
+                    price = _float(transfer.get('priceUsd')) or 0.0
+                    if price <= 0:
+                        price = token_prices.get(symbol, 0.0)
+
+                    usd_value = amount * price
+                    if usd_value < min_usd:
+                        continue
+                    if is_sender and not is_receiver:
+                        usd_value = -usd_value
+
+                    conn.execute(
+                        "INSERT OR IGNORE INTO transfers (signature, transferIndex, ts, token, amount, usdValue) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (signature, i, block_time, symbol, amount, usd_value)
+                    )
+                    if signature not in self.investment_hashes:
+                        self._index('small_flow').add(block_time, usd_value)
+                    recorded += 1
+
+            self._set_state(conn, 'transactions_cursor', str(max_block_time))
+
+        if recorded:
+            logger.info(f"Investment ledger recorded {recorded} wallet transfers")
+        return recorded
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _unpriced(self, kind: str, start: Optional[float], end: Optional[float]) -> Dict[str, float]:
+        amounts = {}
+        for key, index in self.indexes.items():
+            if key[0] == kind and key[1] == 'unpriced':
+                total = index.range_sum(start, end)
+                if total:
+                    amounts[key[2]] = total
+        return amounts
+
+    def _usd_total(self, kind: str, start: Optional[float], end: Optional[float],
+                   token_prices: Optional[Dict[str, float]], price_fetcher: Optional[Callable[[], Dict[str, float]]]) -> float:
+        total = self.indexes.get((kind, 'usd'), PrefixIndex()).range_sum(start, end)
+
+        unpriced = self._unpriced(kind, start, end)
+        if unpriced:
+            # Prices are only needed for records that carry no USD value
+            if token_prices is None and price_fetcher is not None:
+                token_prices = price_fetcher()
+            token_prices = token_prices or {}
+            for token, amount in unpriced.items():
+                price = token_prices.get(token, 0)
+                if price > 0:
+                    total += amount * price
+                else:
+                    logger.warning(f"No price available for {amount} {token} in investment ledger")
+
+        return total
+
+    def investment_flow(self, start_date=None, end_date=None, token_prices: Optional[Dict[str, float]] = None,
+                        price_fetcher: Optional[Callable[[], Dict[str, float]]] = None) -> Tuple[float, float]:
+        """
+        Get (investments_usd, withdrawals_usd) strictly between two dates
+
+        Either bound may be None for an open range.
+        """
+        start = to_timestamp(start_date) if start_date is not None else None
+        end = to_timestamp(end_date) if end_date is not None else None
+        with self._lock:
+            investments = self._usd_total('investment', start, end, token_prices, price_fetcher)
+            withdrawals = self._usd_total('withdrawal', start, end, token_prices, price_fetcher)
+        return investments, withdrawals
+
+    def token_amount_change(self, start_date=None, end_date=None) -> Dict[str, float]:
+        """Get raw investment amounts per token strictly between two dates"""
+        start = to_timestamp(start_date) if start_date is not None else None
+        end = to_timestamp(end_date) if end_date is not None else None
+        changes = {}
+        with self._lock:
+            for key, index in self.indexes.items():
+                if key[0] == 'amount':
+                    total = index.range_sum(start, end)
+                    if total:
+                        changes[key[1]] = total
+        return changes
+
+    def total_amount(self, as_of=None) -> float:
+        """Sum of raw investment amounts across tokens up to a date"""
+        return sum(self.token_amount_change(None, as_of).values())
+
+    def small_transactions_flow(self, start_date=None, end_date=None) -> float:
+        """Net USD flow of non-investment wallet transfers strictly between two dates"""
+        start = to_timestamp(start_date) if start_date is not None else None
+        end = to_timestamp(end_date) if end_date is not None else None
+        with self._lock:
+            return self.indexes.get(('small_flow',), PrefixIndex()).range_sum(start, end)
+
+    def wallet_token_totals(self) -> Dict[Tuple[str, str], float]:
+        """Running total of invested amount per (wallet, token)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT wallet, token, amount FROM wallet_token_totals").fetchall()
+        return {(wallet, token): amount for wallet, token, amount in rows}
@@ -0,0 +1,537 @@
+"""
+LLM Broker
+
+Single entry point for Claude Messages API calls. Responses are cached on
+local disk under a content hash of the request (model, system prompt,
+parameters and messages, with image payloads replaced by their SHA-256
+digests), so an identical re-analysis costs nothing. Concurrent calls are
+capped by a shared semaphore, 429/529 and transient errors are retried with
+exponential backoff and full jitter, and every call's latency, token counts
+and cost are recorded per caller. Large offline scans can go through the
+Message Batches API instead, at half the price.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import limit_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'llm_cache.db'
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Statuses worth retrying: rate limited, overloaded and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+
+# Message Batches are billed at half the standard rate
+BATCH_PRICE_FACTOR = 0.5
+
+# USD per million input / output tokens, matched by model name prefix
+MODEL_PRICING = {
+    'claude-3-opus': (15.0, 75.0),
+    'claude-3-7-sonnet': (3.0, 15.0),
+    'claude-3-5-sonnet': (3.0, 15.0),
+    'claude-3-sonnet': (3.0, 15.0),
+    'claude-3-5-haiku': (0.8, 4.0),
+    'claude-3-haiku': (0.25, 1.25)
+}
+
+
+class LLMError(Exception):
+    """Raised when a request fails after all retries or with a non-retryable error"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def model_cost(model: str, input_tokens: int, output_tokens: int) -> float:
+    """USD cost of a call, 0 for models without known pricing"""
+    for prefix, (input_price, output_price) in MODEL_PRICING.items():
+        if model.startswith(prefix):
+            return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def _digest_images(value):
+    """Copy of a message structure with base64 image data replaced by its digest"""
+    if isinstance(value, list):
+        return [_digest_images(item) for item in value]
+    if isinstance(value, dict):
+        if value.get('type') == 'base64' and 'data' in value:
+            digest = hashlib.sha256(value['data'].encode('ascii')).hexdigest()
+            return {**value, 'data': f"sha256:{digest}"}
+        return {key: _digest_images(item) for key, item in value.items()}
+    return value
+
+
+def request_key(payload: Dict) -> str:
+    """Content hash of a Messages API payload"""
+    canonical = json.dumps(_digest_images(payload), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class LLMResponse:
+    """Text and accounting of one Messages API call"""
+    text: str
+    model: str
+    input_tokens: int
+    output_tokens: int
+    cost: float
+    latency: float
+    cached: bool = False
+    stop_reason: Optional[str] = None
+    raw: Dict = field(default_factory=dict, repr=False)
+
+
+@dataclass
+class CallerStats:
+    calls: int = 0
+    cache_hits: int = 0
+    errors: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        api_calls = self.calls - self.cache_hits
+        return self.latency / api_calls if api_calls else 0.0
+
+
+class LLMBroker:
+    """Cached, rate-controlled Claude client shared by all callers in a process"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 db_path: Optional[str] = None, max_concurrency: int = 4, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_cap: float = 30.0, timeout: float = 120,
+                 cache_ttl: Optional[float] = None):
+        load_dotenv(dotenv_path=os.path.join(project_root, '.env'))
+
+        self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        self.base_url = (base_url or os.getenv('ANTHROPIC_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+
+        # Requests also take a permit from the shared Anthropic limiter, which follows
+        # the anthropic-ratelimit-* headers
+        self.session = limit_session(requests.Session(), 'anthropic')
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats_lock = threading.Lock()
+        self.stats: Dict[str, CallerStats] = {}
+
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    createdAt REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS usage (
+                    ts REAL NOT NULL,
+                    caller TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    cached INTEGER NOT NULL,
+                    inputTokens INTEGER NOT NULL,
+                    outputTokens INTEGER NOT NULL,
+                    cost REAL NOT NULL,
+                    latency REAL NOT NULL,
+                    retries INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_usage_caller ON usage (caller, ts)")
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, createdAt FROM responses WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        if self.cache_ttl is not None and time.time() - row[1] > self.cache_ttl:
+            return None
+        return json.loads(row[0])
+
+    def _store(self, key: str, model: str, response: Dict):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, model, response, createdAt) VALUES (?, ?, ?, ?)",
+                         (key, model, json.dumps(response), time.time()))
+
+    def _record(self, caller: str, response: LLMResponse, retries: int):
+        with self._stats_lock:
+            stats = self.stats.setdefault(caller, CallerStats())
+            stats.calls += 1
+            stats.retries += retries
+            if response.cached:
+                stats.cache_hits += 1
+            else:
+                stats.input_tokens += response.input_tokens
+                stats.output_tokens += response.output_tokens
+                stats.cost += response.cost
+                stats.latency += response.latency
+
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO usage (ts, caller, model, cached, inputTokens, outputTokens, cost, latency, retries)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (time.time(), caller, response.model, int(response.cached),
+                  0 if response.cached else response.input_tokens,
+                  0 if response.cached else response.output_tokens,
+                  response.cost,
+                  response.latency, retries))
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None,
+                 stream: bool = False) -> Tuple[requests.Response, int]:
+        """Send an API request with retries; returns (response, retries used)"""
+        if not self.api_key:
+            raise LLMError("ANTHROPIC_API_KEY not found in environment variables")
+
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": ANTHROPIC_VERSION,
+            "content-type": "application/json"
+        }
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.request(method, url, headers=headers, json=payload,
+                                                timeout=self.timeout, stream=stream)
+                if response.status_code == 200:
+                    return response, attempt
+                if response.status_code not in RETRY_STATUSES:
+                    raise LLMError(f"Claude API error {response.status_code}: {response.text[:500]}",
+                                   response.status_code)
+                retry_after = response.headers.get('retry-after')
+                error = LLMError(f"Claude API error {response.status_code}", response.status_code)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = LLMError(f"Claude API request failed: {e}")
+
+            if attempt == self.max_retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"{error}, retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+            time.sleep(delay)
+
+    @staticmethod
+    def build_payload(model: str, max_tokens: int, messages: List[Dict], system: Optional[str] = None,
+                      temperature: Optional[float] = None, **params) -> Dict:
+        """Messages API request body"""
+        payload = {'model': model, 'max_tokens': max_tokens, 'messages': messages, **params}
+        if system is not None:
+            payload['system'] = system
+        if temperature is not None:
+            payload['temperature'] = temperature
+        return payload
+
+    @staticmethod
+    def _to_response(body: Dict, model: str, cached: bool, latency: float, price_factor: float = 1.0) -> LLMResponse:
+        usage = body.get('usage', {})
+        input_tokens = usage.get('input_tokens', 0)
+        output_tokens = usage.get('output_tokens', 0)
+        return LLMResponse(
+            text="".join(block.get('text', '') for block in body.get('content', []) if block.get('type') == 'text'),
+            model=body.get('model', model),
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            cost=0.0 if cached else model_cost(model, input_tokens, output_tokens) * price_factor,
+            latency=latency,
+            cached=cached,
+            stop_reason=body.get('stop_reason'),
+            raw=body
+        )
+
+    def _count_error(self, caller: str):
+        with self._stats_lock:
+            self.stats.setdefault(caller, CallerStats()).errors += 1
+
+    def create_message(self, caller: str, model: str, max_tokens: int, messages: List[Dict],
+                       system: Optional[str] = None, temperature: Optional[float] = None,
+                       use_cache: bool = True, **params) -> LLMResponse:
+        """
+        Send a Messages API request, answering from the cache when possible
+
+        Args:
+            caller: Name the call is accounted under, e.g. 'analyze_charts'
+            model, max_tokens, messages, system, temperature: Messages API parameters
+            use_cache: Set False for calls that must not be answered from the cache
+            **params: Any other Messages API parameters
+
+        Returns:
+            LLMResponse
+
+        Raises:
+            LLMError: If the request fails after all retries
+        """
+        payload = self.build_payload(model, max_tokens, messages, system, temperature, **params)
+        key = request_key(payload)
+        start = time.perf_counter()
+
+        body = self._cached(key) if use_cache else None
+        cached = body is not None
+        retries = 0
+
+        if not cached:
+            try:
+                with self._slots:
+                    response, retries = self._request('POST', '/v1/messages', payload)
+                    body = response.json()
+            except LLMError:
+                self._count_error(caller)
+                raise
+            self._store(key, model, body)
+
+        response = self._to_response(body, model, cached, time.perf_counter() - start)
+        self._record(caller, response, retries)
+
+        logger.info(f"[{caller}] {'cache hit' if cached else 'Claude call'}: "
+                    f"{response.input_tokens} in / {response.output_tokens} out tokens, "
+                    f"${response.cost:.4f}, {response.latency:.2f}s")
+        return response
+
+    async def acreate_message(self, caller: str, **kwargs) -> LLMResponse:
+        """create_message for async callers, run in a worker thread"""
+        return await asyncio.to_thread(self.create_message, caller, **kwargs)
+
+    def create_messages(self, caller: str, requests_kwargs: List[Dict],
+                        return_exceptions: bool = True) -> List[object]:
+        """
+        Run many requests in parallel, bounded by the broker's concurrency
+
+        Returns responses in input order; failed requests yield their LLMError
+        when return_exceptions is True.
+        """
+        def run(kwargs):
+            try:
+                return self.create_message(caller, **kwargs)
+            except LLMError as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            return list(pool.map(run, requests_kwargs))
+
+    def submit_batch(self, payloads: Dict[str, Dict]) -> str:
+        """Submit Messages API payloads keyed by custom_id as one batch; returns the batch id"""
+        response, _ = self._request('POST', '/v1/messages/batches', {
+            'requests': [{'custom_id': custom_id, 'params': payload} for custom_id, payload in payloads.items()]
+        })
+        batch_id = response.json()['id']
+        logger.info(f"Submitted batch {batch_id} with {len(payloads)} requests")
+        return batch_id
+
+    def wait_for_batch(self, batch_id: str, poll_interval: float = 60, timeout: Optional[float] = None) -> Dict:
+        """Poll a batch until processing has ended; returns the batch object"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            response, _ = self._request('GET', f'/v1/messages/batches/{batch_id}')
+            batch = response.json()
+            counts = batch.get('request_counts', {})
+            if batch.get('processing_status') == 'ended':
+                logger.info(f"Batch {batch_id} ended: {counts}")
+                return batch
+
+            logger.info(f"Batch {batch_id} {batch.get('processing_status')}: {counts}")
+            if deadline is not None and time.monotonic() >= deadline:
+                raise LLMError(f"Batch {batch_id} still {batch.get('processing_status')} after {timeout}s")
+            time.sleep(poll_interval)
+
+    def batch_results(self, caller: str, batch_id: str, models: Dict[str, str],
+                      keys: Optional[Dict[str, str]] = None, poll_interval: float = 60,
+                      timeout: Optional[float] = None, submitted_at: Optional[float] = None) -> Iterator[Tuple[str, object]]:
+        """
+        Wait for a batch, then stream its results line by line
+
+        Args:
+            caller: Name the results are accounted under
+            batch_id: Batch to read
+            models: custom_id -> model, for cost accounting
+            keys: custom_id -> cache key; succeeded results are cached under it
+
+        Yields:
+            (custom_id, LLMResponse) for succeeded requests, (custom_id, LLMError) otherwise
+        """
+        submitted_at = submitted_at or time.perf_counter()
+        batch = self.wait_for_batch(batch_id, poll_interval, timeout)
+        results_url = batch.get('results_url') or f'/v1/messages/batches/{batch_id}/results'
+
+        response, _ = self._request('GET', results_url, stream=True)
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                entry = json.loads(line)
+                custom_id = entry.get('custom_id')
+                result = entry.get('result', {})
+
+                if result.get('type') != 'succeeded':
+                    self._count_error(caller)
+                    detail = result.get('error') or result.get('type')
+                    yield custom_id, LLMError(f"Batch request {custom_id} {result.get('type')}: {detail}")
+                    continue
+
+                body = result['message']
+                model = models.get(custom_id, body.get('model', ''))
+                if keys and custom_id in keys:
+                    self._store(keys[custom_id], model, body)
+
+                llm_response = self._to_response(body, model, False, time.perf_counter() - submitted_at,
+                                                  price_factor=BATCH_PRICE_FACTOR)
+                self._record(caller, llm_response, 0)
+                yield custom_id, llm_response
+        finally:
+            response.close()
+
+    def run_batch(self, caller: str, requests_kwargs: Dict[str, Dict], poll_interval: float = 60,
+                  timeout: Optional[float] = None, use_cache: bool = True) -> Iterator[Tuple[str, object]]:
+        """
+        Answer many requests through the Message Batches API
+
+        Requests already in the cache are yielded first without being submitted;
+        the rest go out as one batch whose results are yielded as they are read.
+
+        Args:
+            caller: Name the calls are accounted under
+            requests_kwargs: custom_id -> create_message keyword arguments
+                (custom_id: 1-64 letters, digits, '-' or '_')
+
+        Yields:
+            (custom_id, LLMResponse or LLMError)
+        """
+        pending = {}
+        keys = {}
+        for custom_id, kwargs in requests_kwargs.items():
+            payload = self.build_payload(**kwargs)
+            key = request_key(payload)
+            body = self._cached(key) if use_cache else None
+            if body is not None:
+                cached = self._to_response(body, payload['model'], True, 0.0)
+                self._record(caller, cached, 0)
+                yield custom_id, cached
+            else:
+                pending[custom_id] = payload
+                keys[custom_id] = key
+
+        if not pending:
+            return
+
+        submitted_at = time.perf_counter()
+        batch_id = self.submit_batch(pending)
+        yield from self.batch_results(
+            caller, batch_id,
+            models={custom_id: payload['model'] for custom_id, payload in pending.items()},
+            keys=keys, poll_interval=poll_interval, timeout=timeout, submitted_at=submitted_at
+        )
+
+    def usage_summary(self) -> Dict[str, Dict]:
+        """Per-caller stats for this process"""
+        with self._stats_lock:
+            return {
+                caller: {**asdict(stats), 'avg_latency': stats.avg_latency}
+                for caller, stats in self.stats.items()
+            }
+
+    def usage_history(self, since: Optional[float] = None) -> Dict[str, Dict]:
+        """Per-caller totals from the persisted usage log"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT caller, COUNT(*), SUM(cached), SUM(inputTokens), SUM(outputTokens), SUM(cost),
+                       AVG(CASE WHEN cached = 0 THEN latency END)
+                FROM usage WHERE ts >= ? GROUP BY caller
+            """, (since or 0,)).fetchall()
+        return {
+            row[0]: {
+                'calls': row[1],
+                'cache_hits': row[2],
+                'input_tokens': row[3],
+                'output_tokens': row[4],
+                'cost': row[5],
+                'avg_latency': row[6] or 0.0
+            }
+            for row in rows
+        }
+
+
+_broker: Optional[LLMBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> LLMBroker:
+    """Process-wide broker shared by all callers"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = LLMBroker()
+        return _broker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    since = None
+    if len(sys.argv) > 1:
+        since = time.time() - float(sys.argv[1]) * 3600
+
+    history = LLMBroker().usage_history(since)
+    if not history:
+        print("No Claude usage recorded")
+        return
+
+    print(f"{'Caller':<32} {'Calls':>7} {'Cached':>7} {'In tok':>10} {'Out tok':>10} {'Cost':>10} {'Latency':>8}")
+    print("-" * 90)
+    for caller, stats in sorted(history.items(), key=lambda item: -item[1]['cost']):
+        print(f"{caller:<32} {stats['calls']:>7} {stats['cache_hits']:>7} {stats['input_tokens']:>10} "
+              f"{stats['output_tokens']:>10} ${stats['cost']:>9.4f} {stats['avg_latency']:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
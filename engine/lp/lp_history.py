@@ -0,0 +1,406 @@
+"""
+LP Position History
+
+Local time-series store for normalized LP positions. Every sync made by
+LPPositionManager appends one row per position, so impermanent loss, realized
+fees and range utilization can be computed from history instead of new API calls.
+"""
+
+import sys
+import sqlite3
+import logging
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'lp_history.db'
+
+# Columns stored for every position in every snapshot
+HISTORY_COLUMNS = [
+    'snapshotAt',
+    'positionKey',
+    'poolAddress',
+    'poolName',
+    'poolType',
+    'token0',
+    'token1',
+    'token0Amount',
+    'token1Amount',
+    'token0Price',
+    'token1Price',
+    'totalValueUsd',
+    'feesToken0',
+    'feesToken1',
+    'lowerBound',
+    'upperBound',
+    'activeBound',
+]
+
+NUMERIC_COLUMNS = [
+    'token0Amount',
+    'token1Amount',
+    'token0Price',
+    'token1Price',
+    'totalValueUsd',
+    'feesToken0',
+    'feesToken1',
+    'lowerBound',
+    'upperBound',
+    'activeBound',
+]
+
+
+def pair_key(token0: str, token1: str) -> str:
+    """Build the allocation key used by the Token Maximizer (e.g. 'ubc_sol_lp')"""
+    return f"{token0.lower()}_{token1.lower()}_lp"
+
+
+def position_key(normalized: Dict, position: Dict, index: int = 0) -> str:
+    """
+    Build the history key identifying one position across syncs
+
+    DLMM positions carry the pool address in 'address', so the position account
+    pubkey is used when Shyft returns it. Otherwise the protocol version and the
+    position's index in the pool's position list keep positions in the same pool apart.
+    """
+    pool_address = normalized['poolAddress']
+    pubkey = position.get('pubkey')
+    if pubkey:
+        return f"{pool_address}:{pubkey}"
+
+    version = position.get('version', 'V1')
+    return f"{pool_address}:{normalized.get('positionAddress', '')}:{version}:{index}"
+
+
+def build_history_row(normalized: Dict, position: Dict, fees: Dict, token_prices: Dict,
+                      index: int = 0) -> Dict:
+    """
+    Build a history row from a normalized position and the raw position it came from
+
+    Args:
+        normalized: Output of LPPositionManager.normalize_position
+        position: Raw position data returned by Shyft or the pool mapper
+        fees: Claimed/owed fees in UI units as {'token0': float, 'token1': float}
+        token_prices: Token symbol -> USD price used for the sync
+        index: Position's index in its pool's position list, used when there is no pubkey
+
+    Returns:
+        Row dictionary keyed by HISTORY_COLUMNS (without snapshotAt)
+    """
+    details = position.get('lbPairDetails') or position.get('poolDetails') or {}
+
+    if normalized.get('poolType') == 'DLMM':
+        lower = position.get('lowerBinId')
+        upper = position.get('upperBinId')
+        active = details.get('activeId')
+    else:
+        lower = position.get('lowerTick')
+        upper = position.get('upperTick')
+        active = details.get('tick')
+
+    def _to_float(value) -> float:
+        try:
+            return float(value) if value is not None else np.nan
+        except (TypeError, ValueError):
+            return np.nan
+
+    return {
+        'positionKey': position_key(normalized, position, index),
+        'poolAddress': normalized['poolAddress'],
+        'poolName': normalized.get('poolName', ''),
+        'poolType': normalized.get('poolType', ''),
+        'token0': normalized['token0'],
+        'token1': normalized['token1'],
+        'token0Amount': float(normalized.get('token0Amount', 0) or 0),
+        'token1Amount': float(normalized.get('token1Amount', 0) or 0),
+        'token0Price': float(token_prices.get(normalized['token0'], 0) or 0),
+        'token1Price': float(token_prices.get(normalized['token1'], 0) or 0),
+        'totalValueUsd': float(normalized.get('totalValueUsd', 0) or 0),
+        'feesToken0': float(fees.get('token0', 0) or 0),
+        'feesToken1': float(fees.get('token1', 0) or 0),
+        'lowerBound': _to_float(lower),
+        'upperBound': _to_float(upper),
+        'activeBound': _to_float(active),
+    }
+
+
+class LPHistoryStore:
+    """SQLite-backed time series of normalized LP positions"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path))
+
+    def _init_db(self):
+        """Create the history table and its indexes if missing"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS lp_position_history (
+                    snapshotAt TEXT NOT NULL,
+                    positionKey TEXT NOT NULL,
+                    poolAddress TEXT NOT NULL,
+                    poolName TEXT,
+                    poolType TEXT,
+                    token0 TEXT,
+                    token1 TEXT,
+                    token0Amount REAL,
+                    token1Amount REAL,
+                    token0Price REAL,
+                    token1Price REAL,
+                    totalValueUsd REAL,
+                    feesToken0 REAL,
+                    feesToken1 REAL,
+                    lowerBound REAL,
+                    upperBound REAL,
+                    activeBound REAL,
+                    PRIMARY KEY (positionKey, snapshotAt)
+                )
+            """)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_lp_history_snapshot ON lp_position_history (snapshotAt)"
+            )
+
+    def append_snapshot(self, rows: List[Dict], snapshot_at: Optional[str] = None) -> int:
+        """
+        Append one sync worth of positions to the store
+
+        Args:
+            rows: Rows built with build_history_row
+            snapshot_at: ISO timestamp shared by every row of the sync (defaults to now)
+
+        Returns:
+            Number of rows written
+        """
+        if not rows:
+            return 0
+
+        snapshot_at = snapshot_at or datetime.now(timezone.utc).isoformat()
+        values = [
+            tuple([snapshot_at] + [row.get(column) for column in HISTORY_COLUMNS[1:]])
+            for row in rows
+        ]
+
+        placeholders = ', '.join('?' for _ in HISTORY_COLUMNS)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO lp_position_history ({', '.join(HISTORY_COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                values
+            )
+
+        logger.info(f"Recorded {len(values)} LP positions in history at {snapshot_at}")
+        return len(values)
+
+    def _load(self, since: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Load history rows into column arrays sorted by position and time"""
+        query = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM lp_position_history"
+        params = ()
+        if since:
+            query += " WHERE snapshotAt >= ?"
+            params = (since,)
+        query += " ORDER BY positionKey, snapshotAt"
+
+        with self._connect() as conn:
+            records = conn.execute(query, params).fetchall()
+
+        if not records:
+            return {}
+
+        columns = {name: [record[i] for record in records] for i, name in enumerate(HISTORY_COLUMNS)}
+        arrays = {}
+        for name, values in columns.items():
+            if name in NUMERIC_COLUMNS:
+                arrays[name] = np.array([np.nan if v is None else v for v in values], dtype=float)
+            else:
+                arrays[name] = np.array(values, dtype=object)
+        return arrays
+
+    def latest_snapshot_time(self) -> Optional[str]:
+        """Get the timestamp of the most recent sync"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(snapshotAt) FROM lp_position_history").fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, max_age_hours: float) -> bool:
+        """Check whether the most recent sync is at most max_age_hours old"""
+        latest = self.latest_snapshot_time()
+        if not latest:
+            return False
+
+        latest_dt = datetime.fromisoformat(latest.replace('Z', '+00:00'))
+        if datetime.now(timezone.utc) - latest_dt > timedelta(hours=max_age_hours):
+            logger.info(f"Latest LP history snapshot is stale ({latest})")
+            return False
+        return True
+
+    def latest_positions(self, max_age_hours: Optional[float] = None) -> List[Dict]:
+        """
+        Get the positions recorded by the most recent sync
+
+        Args:
+            max_age_hours: Return nothing if the last sync is older than this
+
+        Returns:
+            List of row dictionaries
+        """
+        latest = self.latest_snapshot_time()
+        if not latest:
+            return []
+
+        if max_age_hours is not None and not self.is_fresh(max_age_hours):
+            return []
+
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT * FROM lp_position_history WHERE snapshotAt = ?",
+                (latest,)
+            ).fetchall()
+
+        return [dict(row) for row in rows]
+
+    def compute_position_metrics(self, since: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Compute per-position performance from the stored history
+
+        For every position the first snapshot is treated as entry and the last one
+        as current state:
+          - hodlValueUsd: entry token amounts valued at current prices
+          - impermanentLossPct: current LP value vs HODL value, excluding fees
+          - realizedFeesUsd: fees accrued since entry valued at current prices
+          - netVsHodlPct: LP value plus fees vs HODL value
+          - rangeUtilization: share of snapshots where the active bin/tick was in range
+          - isOpen: whether the position was present in the most recent sync
+
+        Recorded fees are owed, unclaimed amounts that reset when claimed, so fees
+        are summed per interval: a drop means a claim happened, and the amount owed
+        after it is what accrued since.
+
+        Args:
+            since: Only consider snapshots at or after this ISO timestamp
+
+        Returns:
+            Dictionary of positionKey -> metrics
+        """
+        data = self._load(since)
+        if not data:
+            return {}
+
+        keys = data['positionKey']
+        # Rows are sorted by positionKey, so group boundaries are where the key changes
+        boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        first = boundaries
+        last = np.r_[boundaries[1:] - 1, len(keys) - 1]
+        counts = last - first + 1
+
+        price0 = data['token0Price'][last]
+        price1 = data['token1Price'][last]
+
+        entry_amount0 = data['token0Amount'][first]
+        entry_amount1 = data['token1Amount'][first]
+        current_amount0 = data['token0Amount'][last]
+        current_amount1 = data['token1Amount'][last]
+
+        hodl_value = entry_amount0 * price0 + entry_amount1 * price1
+        lp_value = current_amount0 * price0 + current_amount1 * price1
+
+        fees0 = np.add.reduceat(self._fee_increments(data['feesToken0'], first), first)
+        fees1 = np.add.reduceat(self._fee_increments(data['feesToken1'], first), first)
+        fees_usd = fees0 * price0 + fees1 * price1
+        is_open = data['snapshotAt'][last] == data['snapshotAt'].max()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            il_pct = np.where(hodl_value > 0, (lp_value / hodl_value - 1) * 100, 0.0)
+            net_pct = np.where(hodl_value > 0, ((lp_value + fees_usd) / hodl_value - 1) * 100, 0.0)
+
+        lower = data['lowerBound']
+        upper = data['upperBound']
+        active = data['activeBound']
+        known = ~(np.isnan(lower) | np.isnan(upper) | np.isnan(active))
+        in_range = known & (active >= lower) & (active <= upper)
+        in_range_counts = np.add.reduceat(in_range.astype(int), first)
+        known_counts = np.add.reduceat(known.astype(int), first)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            range_utilization = np.where(known_counts > 0, in_range_counts / known_counts, np.nan)
+
+        metrics = {}
+        for i, row_index in enumerate(last):
+            key = keys[row_index]
+            metrics[key] = {
+                'positionKey': key,
+                'poolAddress': data['poolAddress'][row_index],
+                'poolName': data['poolName'][row_index],
+                'poolType': data['poolType'][row_index],
+                'token0': data['token0'][row_index],
+                'token1': data['token1'][row_index],
+                'firstSnapshotAt': data['snapshotAt'][first[i]],
+                'lastSnapshotAt': data['snapshotAt'][row_index],
+                'snapshots': int(counts[i]),
+                'currentValueUsd': float(lp_value[i]),
+                'hodlValueUsd': float(hodl_value[i]),
+                'impermanentLossPct': float(il_pct[i]),
+                'realizedFeesUsd': float(fees_usd[i]),
+                'netVsHodlPct': float(net_pct[i]),
+                'rangeUtilization': None if np.isnan(range_utilization[i]) else float(range_utilization[i]),
+                'inRange': bool(in_range[row_index]) if known[row_index] else None,
+                'isOpen': bool(is_open[i]),
+            }
+
+        return metrics
+
+    @staticmethod
+    def _fee_increments(owed: np.ndarray, first: np.ndarray) -> np.ndarray:
+        """Fees accrued between each row and the previous row of the same position"""
+        increments = np.zeros_like(owed)
+        change = owed[1:] - owed[:-1]
+        # A drop is a claim; what is owed after it accrued since the claim
+        increments[1:] = np.where(change >= 0, change, owed[1:])
+        increments[first] = 0.0
+        return np.nan_to_num(increments)
+
+    def metrics_by_pair(self, since: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Aggregate position metrics by token pair using Token Maximizer keys
+        Only positions present in the most recent sync are counted
+
+        Returns:
+            Dictionary like {'ubc_sol_lp': {'currentValueUsd': ..., ...}}
+        """
+        pairs = {}
+        for metrics in self.compute_position_metrics(since).values():
+            if not metrics['isOpen']:
+                continue
+            key = pair_key(metrics['token0'], metrics['token1'])
+            pair = pairs.setdefault(key, {
+                'currentValueUsd': 0.0,
+                'hodlValueUsd': 0.0,
+                'realizedFeesUsd': 0.0,
+                'positions': 0,
+                'inRange': True,
+            })
+            pair['currentValueUsd'] += metrics['currentValueUsd']
+            pair['hodlValueUsd'] += metrics['hodlValueUsd']
+            pair['realizedFeesUsd'] += metrics['realizedFeesUsd']
+            pair['positions'] += 1
+            if metrics['inRange'] is False:
+                pair['inRange'] = False
+
+        for pair in pairs.values():
+            hodl = pair['hodlValueUsd']
+            pair['impermanentLossPct'] = (pair['currentValueUsd'] / hodl - 1) * 100 if hodl > 0 else 0.0
+
+        return pairs
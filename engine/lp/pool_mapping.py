@@ -23,6 +23,8 @@ project_root = str(Path(__file__).parent.parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from engine.rate_limits import get_rate_limiter
+
 # Set Windows event loop policy
 if os.name == 'nt':  # Windows
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -146,6 +148,7 @@ class PoolMapper:
                     lastUpdatedAt
                     lbPair
                     owner
+                    pubkey
                   }}
                   meteora_dlmm_Position(
                     where: {{lbPair: {{_eq: "{pool_address}"}}}}
@@ -157,6 +160,7 @@ class PoolMapper:
                     totalClaimedFeeYAmount
                     totalClaimedFeeXAmount
                     owner
+                    pubkey
                   }}
                 }}
             """
@@ -173,6 +177,7 @@ class PoolMapper:
                         logger.info(f"Retry {retry+1}/{max_retries} after {delay:.2f}s delay")
                         await asyncio.sleep(delay)
                     
+                    await get_rate_limiter('shyft').acquire()
                     async with aiohttp.ClientSession() as session:
                         async with session.post(
                             f"https://programs.shyft.to/v0/graphql/accounts?api_key={self.shyft_api_key}&network=mainnet-beta",
@@ -183,6 +188,7 @@ class PoolMapper:
                             },
                             headers={"Content-Type": "application/json"}
                         ) as response:
+                            get_rate_limiter('shyft').update(response.status, response.headers)
                             response_text = await response.text()
                             
                             # Check for rate limit errors
@@ -225,6 +231,7 @@ class PoolMapper:
                                     position_data = {
                                         "address": position["lbPair"],
                                         "poolAddress": position["lbPair"],
+                                        "pubkey": position.get("pubkey", ""),
                                         "owner": position["owner"],
                                         "lowerBinId": position["lowerBinId"],
                                         "upperBinId": position["upperBinId"],
@@ -244,6 +251,7 @@ class PoolMapper:
                                     position_data = {
                                         "address": position["lbPair"],
                                         "poolAddress": position["lbPair"],
+                                        "pubkey": position.get("pubkey", ""),
                                         "owner": position["owner"],
                                         "lowerBinId": position["lowerBinId"],
                                         "upperBinId": position["upperBinId"],
@@ -315,6 +323,7 @@ class PoolMapper:
                         logger.info(f"Retry {retry+1}/{max_retries} after {delay:.2f}s delay")
                         await asyncio.sleep(delay)
                     
+                    await get_rate_limiter('shyft').acquire()
                     async with aiohttp.ClientSession() as session:
                         async with session.post(
                             f"https://programs.shyft.to/v0/graphql/accounts?api_key={self.shyft_api_key}&network=mainnet-beta",
@@ -325,6 +334,7 @@ class PoolMapper:
                             },
                             headers={"Content-Type": "application/json"}
                         ) as response:
+                            get_rate_limiter('shyft').update(response.status, response.headers)
                             response_text = await response.text()
                             
                             # Check for rate limit errors
@@ -430,6 +440,7 @@ class PoolMapper:
                     await asyncio.sleep(delay)
                 
                 # Make the API request to get LB pair details
+                await get_rate_limiter('shyft').acquire()
                 async with aiohttp.ClientSession() as session:
                     async with session.post(
                         f"https://programs.shyft.to/v0/graphql/accounts?api_key={self.shyft_api_key}&network=mainnet-beta",
@@ -440,6 +451,7 @@ class PoolMapper:
                         },
                         headers={"Content-Type": "application/json"}
                     ) as response:
+                        get_rate_limiter('shyft').update(response.status, response.headers)
                         response_text = await response.text()
                         
                         # Check for rate limit errors
@@ -537,6 +549,7 @@ class PoolMapper:
                     await asyncio.sleep(delay)
                 
                 # Make the API request to get pool details
+                await get_rate_limiter('shyft').acquire()
                 async with aiohttp.ClientSession() as session:
                     async with session.post(
                         f"https://programs.shyft.to/v0/graphql/accounts?api_key={self.shyft_api_key}&network=mainnet-beta",
@@ -547,6 +560,7 @@ class PoolMapper:
                         },
                         headers={"Content-Type": "application/json"}
                     ) as response:
+                        get_rate_limiter('shyft').update(response.status, response.headers)
                         response_text = await response.text()
                         
                         # Check for rate limit errors
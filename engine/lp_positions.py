@@ -19,6 +19,9 @@ project_root = str(Path(__file__).parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from engine.lp.lp_history import LPHistoryStore, build_history_row
+from engine.rate_limits import get_rate_limiter
+
 # Set Windows event loop policy
 if os.name == 'nt':  # Windows
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -101,11 +104,21 @@ class LPPositionManager:
             "COMPUTE": "B1N1HcMm4RysYz4smsXwmk2UnS8NziqKCM6Ho8i62vXo"
         }
         
+        # Token decimals for converting raw fee amounts
+        self.token_decimals = {
+            "SOL": 9,
+            "UBC": 6,
+            "COMPUTE": 6
+        }
+        
         # Initialize token prices dictionary
         self.token_prices = {}
         
         # Initialize pool mapper for direct pool data access
         self.pool_mapper = None
+        
+        # Local time series of every sync for IL / fee tracking
+        self.history = LPHistoryStore()
 
     async def fetch_token_prices(self) -> Dict[str, float]:
         """Fetch current prices for tokens from Jupiter API"""
@@ -205,6 +218,7 @@ class LPPositionManager:
                     lastUpdatedAt
                     lbPair
                     owner
+                    pubkey
                   }}
                   meteora_dlmm_Position(
                     where: {{owner: {{_eq: "{self.wallet_address}"}}}}
@@ -216,6 +230,7 @@ class LPPositionManager:
                     totalClaimedFeeYAmount
                     totalClaimedFeeXAmount
                     owner
+                    pubkey
                   }}
                 }}
             """
@@ -232,6 +247,7 @@ class LPPositionManager:
                         self.logger.info(f"Retry {retry+1}/{max_retries} after {delay:.2f}s delay")
                         await asyncio.sleep(delay)
                     
+                    await get_rate_limiter('shyft').acquire()
                     async with aiohttp.ClientSession() as session:
                         async with session.post(
                             f"https://programs.shyft.to/v0/graphql/accounts?api_key={shyft_api_key}&network=mainnet-beta",
@@ -242,6 +258,7 @@ class LPPositionManager:
                             },
                             headers={"Content-Type": "application/json"}
                         ) as response:
+                            get_rate_limiter('shyft').update(response.status, response.headers)
                             response_text = await response.text()
                             
                             # Check for rate limit errors
@@ -290,6 +307,7 @@ class LPPositionManager:
                                         position_data = {
                                             "address": position["lbPair"],
                                             "poolAddress": position["lbPair"],
+                                            "pubkey": position.get("pubkey", ""),
                                             "owner": position["owner"],
                                             "lowerBinId": position["lowerBinId"],
                                             "upperBinId": position["upperBinId"],
@@ -316,6 +334,7 @@ class LPPositionManager:
                                         position_data = {
                                             "address": position["lbPair"],
                                             "poolAddress": position["lbPair"],
+                                            "pubkey": position.get("pubkey", ""),
                                             "owner": position["owner"],
                                             "lowerBinId": position["lowerBinId"],
                                             "upperBinId": position["upperBinId"],
@@ -364,6 +383,7 @@ class LPPositionManager:
                             status
                             tokenXMint
                             tokenYMint
+                            activeId
                         }}
                     }}
                 """
@@ -376,6 +396,7 @@ class LPPositionManager:
                     await asyncio.sleep(delay)
                 
                 # Make the API request to get LB pair details
+                await get_rate_limiter('shyft').acquire()
                 async with aiohttp.ClientSession() as session:
                     async with session.post(
                         f"https://programs.shyft.to/v0/graphql/accounts?api_key={shyft_api_key}&network=mainnet-beta",
@@ -386,6 +407,7 @@ class LPPositionManager:
                         },
                         headers={"Content-Type": "application/json"}
                     ) as response:
+                        get_rate_limiter('shyft').update(response.status, response.headers)
                         response_text = await response.text()
                         
                         # Check for rate limit errors
@@ -472,6 +494,7 @@ class LPPositionManager:
                         self.logger.info(f"Retry {retry+1}/{max_retries} after {delay:.2f}s delay")
                         await asyncio.sleep(delay)
                     
+                    await get_rate_limiter('shyft').acquire()
                     async with aiohttp.ClientSession() as session:
                         async with session.post(
                             f"https://programs.shyft.to/v0/graphql/accounts?api_key={shyft_api_key}&network=mainnet-beta",
@@ -482,6 +505,7 @@ class LPPositionManager:
                             },
                             headers={"Content-Type": "application/json"}
                         ) as response:
+                            get_rate_limiter('shyft').update(response.status, response.headers)
                             response_text = await response.text()
                             
                             # Check for rate limit errors
@@ -589,6 +613,7 @@ class LPPositionManager:
                     await asyncio.sleep(delay)
                 
                 # Make the API request to get pool details
+                await get_rate_limiter('shyft').acquire()
                 async with aiohttp.ClientSession() as session:
                     async with session.post(
                         f"https://programs.shyft.to/v0/graphql/accounts?api_key={shyft_api_key}&network=mainnet-beta",
@@ -599,6 +624,7 @@ class LPPositionManager:
                         },
                         headers={"Content-Type": "application/json"}
                     ) as response:
+                        get_rate_limiter('shyft').update(response.status, response.headers)
                         response_text = await response.text()
                         
                         # Check for rate limit errors
@@ -668,6 +694,39 @@ class LPPositionManager:
         
         return positions
 
+    def is_token0_x(self, token_x_mint: str, token_y_mint: str, pool: Dict) -> bool:
+        """Check whether the pool's token0 is the on-chain X token"""
+        for token_name, token_mint in self.token_mints.items():
+            if token_mint == token_x_mint and token_name == pool['token0']:
+                return True
+            if token_mint == token_y_mint and token_name == pool['token0']:
+                return False
+        return False
+
+    def get_position_fees(self, position: Dict, pool: Dict) -> Dict[str, float]:
+        """Get claimed (DLMM) or owed (DYN) fees for a position in UI units"""
+        try:
+            if pool['type'] == "DLMM":
+                details = position.get('lbPairDetails') or position.get('poolDetails') or {}
+                fee_x = float(position.get('totalClaimedFeeXAmount', 0) or 0)
+                fee_y = float(position.get('totalClaimedFeeYAmount', 0) or 0)
+                token0_is_x = self.is_token0_x(details.get('tokenXMint', ''), details.get('tokenYMint', ''), pool)
+            else:
+                fee_x = float(position.get('tokenFeesOwedX', 0) or 0)
+                fee_y = float(position.get('tokenFeesOwedY', 0) or 0)
+                token0_is_x = True
+            
+            fee0 = fee_x if token0_is_x else fee_y
+            fee1 = fee_y if token0_is_x else fee_x
+            
+            return {
+                'token0': fee0 / (10 ** self.token_decimals.get(pool['token0'], 0)),
+                'token1': fee1 / (10 ** self.token_decimals.get(pool['token1'], 0))
+            }
+        except Exception as e:
+            self.logger.error(f"Error reading position fees: {e}")
+            return {'token0': 0.0, 'token1': 0.0}
+
     def normalize_dlmm_position(self, position: Dict, pool: Dict) -> Dict:
         """Normalize DLMM position data from Shyft API"""
         try:
@@ -679,14 +738,7 @@ class LPPositionManager:
             token_y_mint = lb_pair_details.get('tokenYMint', '')
             
             # Determine which token is which based on our pool definition
-            token0_is_x = False
-            for token_name, token_mint in self.token_mints.items():
-                if token_mint == token_x_mint and token_name == pool['token0']:
-                    token0_is_x = True
-                    break
-                if token_mint == token_y_mint and token_name == pool['token0']:
-                    token0_is_x = False
-                    break
+            token0_is_x = self.is_token0_x(token_x_mint, token_y_mint, pool)
             
             # Get reserve amounts from LB pair details
             reserve_x = float(lb_pair_details.get('reserveX', 0))
@@ -871,6 +923,9 @@ class LPPositionManager:
             self.token_prices = await self.fetch_token_prices()
             self.logger.info(f"Fetched prices: {self.token_prices}")
             
+            # Rows for the local LP history, written once per sync
+            history_rows = []
+            
             # Process each pool
             for pool in self.pools:
                 self.logger.info(f"Processing pool: {pool['name']} ({pool['address']})")
@@ -890,12 +945,19 @@ class LPPositionManager:
                     positions = await self.fetch_positions_for_pool(pool)
                 
                 # Process each position
-                for position in positions:
+                for index, position in enumerate(positions):
                     # Normalize position data
                     normalized_position = self.normalize_position(position, pool)
                     
                     # Save to Airtable
                     if normalized_position:
+                        history_rows.append(build_history_row(
+                            normalized_position,
+                            position,
+                            self.get_position_fees(position, pool),
+                            self.token_prices,
+                            index
+                        ))
                         await self.save_position(normalized_position)
                         # Small delay between saving positions
                         await asyncio.sleep(0.5)
@@ -903,6 +965,12 @@ class LPPositionManager:
                 # Larger delay between pools
                 await asyncio.sleep(3)
                 
+            # Append this sync to the local time series
+            try:
+                self.history.append_snapshot(history_rows)
+            except Exception as e:
+                self.logger.error(f"Error recording LP history: {e}")
+            
             self.logger.info("Finished processing all positions")
             
         except Exception as e:
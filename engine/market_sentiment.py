@@ -1,4 +1,5 @@
 import os
+import sys
 import json
 from datetime import datetime, timezone, timedelta
 from airtable import Airtable
@@ -9,6 +10,15 @@ from typing import Dict, List, Tuple
 import logging.handlers
 from pathlib import Path
 
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.records import Signal, TokenSnapshot
+
 def setup_logging():
     """Configure logging with file and console handlers"""
     logger = logging.getLogger(__name__)
@@ -53,6 +63,8 @@ class MarketSentimentAnalyzer:
         self.snapshots_table = Airtable(self.base_id, 'TOKEN_SNAPSHOTS', self.api_key)
         self.tokens_table = Airtable(self.base_id, 'TOKENS', self.api_key)
         self.logger = setup_logging()
+        # Parsed weekly snapshots per token, shared by the analyses of one run
+        self._weekly_series: Dict[str, np.ndarray] = {}
 
     def get_weekly_snapshots(self, token: str) -> List[Dict]:
         """Get snapshots from the last 7 days for a token"""
@@ -61,6 +73,12 @@ class MarketSentimentAnalyzer:
             formula=f"AND({{token}}='{token}', IS_AFTER({{createdAt}}, '{seven_days_ago}'))"
         )
 
+    def get_weekly_series(self, token: str) -> np.ndarray:
+        """Weekly snapshots of a token as a TokenSnapshot array, fetched and parsed once per run"""
+        if token not in self._weekly_series:
+            self._weekly_series[token] = TokenSnapshot.array_from_airtable(self.get_weekly_snapshots(token))
+        return self._weekly_series[token]
+
     def analyze_price_action(self, active_tokens: List[Dict]) -> Tuple[bool, str, int, int]:
         """Check if >60% of AI tokens are above their 7-day average"""
         logger = logging.getLogger(__name__)
@@ -74,14 +92,12 @@ class MarketSentimentAnalyzer:
             if token_name == 'SOL':
                 continue
                 
-            snapshots = self.get_weekly_snapshots(token_name)
-            if snapshots:
-                prices = [float(snap['fields'].get('price', 0)) for snap in snapshots]
-                if prices:
-                    avg_price = sum(prices) / len(prices)
-                    current_price = prices[-1]
-                    if current_price > avg_price:
-                        tokens_above_avg += 1
+            prices = self.get_weekly_series(token_name)['price']
+            if prices.size:
+                avg_price = prices.mean()
+                current_price = prices[-1]
+                if current_price > avg_price:
+                    tokens_above_avg += 1
         
         percent_above = (tokens_above_avg / total_tokens * 100) if total_tokens > 0 else 0
         is_bullish = percent_above > 60
@@ -99,18 +115,12 @@ class MarketSentimentAnalyzer:
             if token_name == 'SOL':
                 continue
                 
-            snapshots = self.get_weekly_snapshots(token_name)
-            if len(snapshots) >= 2:
+            volumes = self.get_weekly_series(token_name)['volume24h']
+            if volumes.size >= 2:
                 # Split snapshots into current and previous week
-                mid_point = len(snapshots) // 2
-                current_week = snapshots[:mid_point]
-                previous_week = snapshots[mid_point:]
-                
-                current_vol = sum(float(snap['fields'].get('volume24h', 0)) for snap in current_week)
-                previous_vol = sum(float(snap['fields'].get('volume24h', 0)) for snap in previous_week)
-                
-                total_volume_current += current_vol
-                total_volume_previous += previous_vol
+                mid_point = volumes.size // 2
+                total_volume_current += float(volumes[:mid_point].sum())
+                total_volume_previous += float(volumes[mid_point:].sum())
         
         volume_growth = ((total_volume_current - total_volume_previous) / total_volume_previous * 100) if total_volume_previous > 0 else 0
         is_bullish = volume_growth > 0
@@ -128,15 +138,14 @@ class MarketSentimentAnalyzer:
             if token_name == 'SOL':
                 continue
                 
-            snapshots = self.get_weekly_snapshots(token_name)
-            for i in range(1, len(snapshots)):
-                current_price = float(snapshots[i]['fields'].get('price', 0))
-                previous_price = float(snapshots[i-1]['fields'].get('price', 0))
-                volume = float(snapshots[i]['fields'].get('volume24h', 0))
-                
-                if current_price > previous_price:
-                    total_up_volume += volume
-                total_volume += volume
+            series = self.get_weekly_series(token_name)
+            if series.size < 2:
+                continue
+            prices = series['price']
+            volumes = series['volume24h'][1:]
+            up_days = prices[1:] > prices[:-1]
+            total_up_volume += float(volumes[up_days].sum())
+            total_volume += float(volumes.sum())
         
         up_volume_percent = (total_up_volume / total_volume * 100) if total_volume > 0 else 0
         is_bullish = up_volume_percent > 60
@@ -151,16 +160,16 @@ class MarketSentimentAnalyzer:
             three_days_ago = (datetime.now(timezone.utc) - timedelta(days=3)).isoformat()
             signals_table = Airtable(self.base_id, 'SIGNALS', self.api_key)
             
-            signals = signals_table.get_all(
+            signals = Signal.array_from_airtable(signals_table.get_all(
                 formula=f"AND(timeframe='POSITION', confidence='HIGH', IS_AFTER(createdAt, '{three_days_ago}'))"
-            )
+            ))
             
-            if not signals:
+            if not signals.size:
                 return False, "No recent POSITION signals", 0, 0
                 
             # Count BUY vs SELL signals
-            buy_signals = len([s for s in signals if s['fields'].get('type') == 'BUY'])
-            total_signals = len(signals)
+            buy_signals = int((signals['type'] == 'BUY').sum())
+            total_signals = int(signals.size)
             
             buy_percentage = (buy_signals / total_signals * 100) if total_signals > 0 else 0
             is_bullish = buy_percentage > 60  # Bullish if >60% BUY signals
@@ -182,14 +191,14 @@ class MarketSentimentAnalyzer:
     def analyze_relative_strength(self, active_tokens: List[Dict]) -> Tuple[bool, str, float, float]:
         """Check if AI tokens are outperforming SOL"""
         # Get SOL performance
-        sol_snapshots = self.get_weekly_snapshots('SOL')
-        if not sol_snapshots:
+        sol_snapshots = self.get_weekly_series('SOL')
+        if not sol_snapshots.size:
             return False, "No SOL data available", 0, 0
             
         # Sort snapshots by date and get first and last prices
-        sol_snapshots.sort(key=lambda x: x['fields'].get('createdAt', ''))
-        sol_start_price = float(sol_snapshots[0]['fields'].get('price', 0))
-        sol_end_price = float(sol_snapshots[-1]['fields'].get('price', 0))
+        sol_prices = sol_snapshots['price'][np.argsort(sol_snapshots['createdAt'], kind='stable')]
+        sol_start_price = float(sol_prices[0])
+        sol_end_price = float(sol_prices[-1])
         
         if sol_start_price == 0:
             return False, "Insufficient SOL price data", 0, 0
@@ -203,12 +212,12 @@ class MarketSentimentAnalyzer:
             if token_name == 'SOL':
                 continue
                 
-            snapshots = self.get_weekly_snapshots(token_name)
-            if snapshots:
+            snapshots = self.get_weekly_series(token_name)
+            if snapshots.size:
                 # Sort snapshots by date
-                snapshots.sort(key=lambda x: x['fields'].get('createdAt', ''))
-                start_price = float(snapshots[0]['fields'].get('price', 0))
-                end_price = float(snapshots[-1]['fields'].get('price', 0))
+                prices = snapshots['price'][np.argsort(snapshots['createdAt'], kind='stable')]
+                start_price = float(prices[0])
+                end_price = float(prices[-1])
                 
                 if start_price > 0:  # Avoid division by zero
                     token_return = ((end_price - start_price) / start_price * 100)
@@ -241,8 +250,9 @@ class MarketSentimentAnalyzer:
             week_end_date = now
             week_start_date = now - timedelta(days=7)
 
-            # Get active tokens
+            # Get active tokens, and refetch snapshots rather than reuse a previous run's
             active_tokens = self.tokens_table.get_all(formula="{isActive}=1")
+            self._weekly_series = {}
             
             # Run all analyses with additional return values
             price_bullish, price_notes, total_tokens, tokens_above_avg = self.analyze_price_action(active_tokens)
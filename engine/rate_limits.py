@@ -0,0 +1,273 @@
+"""
+Rate Limits
+
+One token bucket per external provider (Birdeye, DexScreener, Jupiter, Shyft,
+X, Airtable, Anthropic), shared by every caller in the process. Callers take a
+permit before each request, with `await limiter.acquire()` in async code or
+`limiter.wait()` in sync code. The wait is only as long as the bucket needs,
+so callers do not sleep for a fixed interval. After each response the caller
+passes the status and headers to `limiter.update()`. The bucket then follows
+what the server reports:
+- `retry-after` pauses the provider.
+- An exhausted `remaining` count blocks until the window resets.
+- The refill rate tracks the remaining quota over the time left in the window.
+
+Requests sessions can be throttled transparently with `limit_session()`, for
+example the session behind an `Airtable` table, or created with
+`rate_limited_session()`.
+
+Default limits can be overridden per provider with an environment variable,
+e.g. RATE_LIMIT_BIRDEYE="15,15" (requests per second, burst).
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import functools
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Requests per second, burst size and pause after a 429 without retry-after
+PROVIDER_LIMITS = {
+    'birdeye': (5.0, 5, 5.0),
+    'dexscreener': (5.0, 5, 5.0),      # 300 requests per minute
+    'jupiter': (1.0, 5, 10.0),         # 60 requests per minute on the free tier
+    'shyft': (2.0, 2, 5.0),
+    'x': (0.5, 10, 60.0),              # 450 searches per 15 minutes
+    'airtable': (5.0, 5, 30.0),        # 5 requests per second per base, 30s lockout
+    'anthropic': (1.0, 5, 10.0),
+}
+
+# Header names carrying the remaining quota and its reset time, in lookup order
+REMAINING_HEADERS = (
+    'x-ratelimit-remaining',
+    'x-rate-limit-remaining',
+    'ratelimit-remaining',
+    'anthropic-ratelimit-requests-remaining',
+)
+RESET_HEADERS = (
+    'x-ratelimit-reset',
+    'x-rate-limit-reset',
+    'ratelimit-reset',
+    'anthropic-ratelimit-requests-reset',
+)
+
+# Never let header adaptation stall a provider completely
+MIN_RATE = 0.01
+
+
+def _parse_reset(value: str, now: float) -> Optional[float]:
+    """Seconds until a reset header's time; accepts deltas, epoch seconds/ms and RFC 3339"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        try:
+            reset_at = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            return None
+        if reset_at.tzinfo is None:
+            reset_at = reset_at.replace(tzinfo=timezone.utc)
+        return max(0.0, reset_at.timestamp() - now)
+
+    if number > 1e12:  # Epoch milliseconds
+        return max(0.0, number / 1000 - now)
+    if number > 1e9:  # Epoch seconds (X)
+        return max(0.0, number - now)
+    return max(0.0, number)
+
+
+class RateLimiter:
+    """Thread- and asyncio-safe token bucket for one provider"""
+
+    def __init__(self, name: str, rate: float, burst: int = 1, penalty: float = 5.0):
+        self.name = name
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.penalty = penalty
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        # Time the bucket was last refilled; in the future while the provider is paused
+        self._updated = time.monotonic()
+
+        self.permits = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _reserve(self, permits: int) -> float:
+        """Take permits now, going into debt if needed; returns how long the caller must wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+            self._tokens -= permits
+            delay = max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+            self.permits += permits
+            if delay > 0:
+                self.throttled += 1
+                self.waited += delay
+            return delay
+
+    async def acquire(self, permits: int = 1):
+        """Wait until the provider allows another request"""
+        delay = self._reserve(permits)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self, permits: int = 1):
+        """Blocking variant of acquire() for sync callers"""
+        delay = self._reserve(permits)
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        """Hand out no permits for the given number of seconds"""
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, time.monotonic() + seconds)
+
+    def update(self, status: Optional[int], headers: Optional[Mapping] = None):
+        """Adapt to a response's status and rate-limit headers"""
+        headers = {str(key).lower(): value for key, value in (headers or {}).items()}
+        now = time.time()
+
+        retry_after = _parse_reset(headers['retry-after'], now) if 'retry-after' in headers else None
+        if status == 429 or (status == 503 and retry_after is not None):
+            seconds = retry_after if retry_after is not None else self.penalty
+            logger.warning(f"[{self.name}] rate limited, pausing for {seconds:.1f}s")
+            self.pause(seconds)
+            return
+
+        remaining = next((headers[name] for name in REMAINING_HEADERS if name in headers), None)
+        reset = next((headers[name] for name in RESET_HEADERS if name in headers), None)
+        if remaining is None:
+            return
+        try:
+            remaining = int(float(remaining))
+        except ValueError:
+            return
+        reset_in = _parse_reset(reset, now) if reset is not None else None
+
+        if remaining <= 0:
+            seconds = reset_in if reset_in is not None else self.penalty
+            logger.info(f"[{self.name}] quota exhausted, pausing for {seconds:.1f}s")
+            self.pause(seconds)
+            return
+
+        with self._lock:
+            # Never hand out more than the server says is left
+            self._tokens = min(self._tokens, float(remaining))
+            if reset_in:
+                # Spread what is left evenly over the rest of the window
+                self.rate = max(MIN_RATE, remaining / reset_in)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'rate': round(self.rate, 3),
+                'burst': self.burst,
+                'permits': self.permits,
+                'throttled': self.throttled,
+                'waited': round(self.waited, 2)
+            }
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _configured_limits(provider: str):
+    rate, burst, penalty = PROVIDER_LIMITS[provider]
+    override = os.getenv(f"RATE_LIMIT_{provider.upper()}")
+    if override:
+        try:
+            parts = [float(part) for part in override.split(',')]
+            rate = parts[0]
+            burst = int(parts[1]) if len(parts) > 1 else max(1, int(rate))
+        except ValueError:
+            logger.warning(f"Ignoring invalid RATE_LIMIT_{provider.upper()}={override!r}")
+    return rate, burst, penalty
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    """Process-wide limiter for a provider"""
+    provider = provider.lower()
+    with _limiters_lock:
+        if provider not in _limiters:
+            if provider not in PROVIDER_LIMITS:
+                raise ValueError(f"Unknown rate-limited provider: {provider}")
+            _limiters[provider] = RateLimiter(provider, *_configured_limits(provider))
+        return _limiters[provider]
+
+
+def rate_limit_stats() -> Dict[str, Dict]:
+    """Stats of every limiter used so far"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.stats() for name, limiter in limiters.items()}
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """Requests transport adapter that takes a permit before each request and adapts to each response"""
+
+    def __init__(self, provider: str, **kwargs):
+        self.limiter = get_rate_limiter(provider)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        self.limiter.wait()
+        response = super().send(request, **kwargs)
+        self.limiter.update(response.status_code, response.headers)
+        return response
+
+
+def limit_session(session: requests.Session, provider: str) -> requests.Session:
+    """Throttle every request made through an existing session"""
+    adapter = RateLimitedAdapter(provider)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+_sessions: Dict[str, requests.Session] = {}
+
+
+def rate_limited_session(provider: str) -> requests.Session:
+    """Shared, pooled requests session for a provider"""
+    provider = provider.lower()
+    with _limiters_lock:
+        session = _sessions.get(provider)
+    if session is None:
+        session = limit_session(requests.Session(), provider)
+        with _limiters_lock:
+            session = _sessions.setdefault(provider, session)
+    return session
+
+
+def rate_limited(provider: str):
+    """Decorator taking one permit per call, for sync and async functions alike"""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                await get_rate_limiter(provider).acquire()
+                return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            get_rate_limiter(provider).wait()
+            return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,192 @@
+"""
+Records
+
+Typed, slotted records for the Airtable rows the engine works with, plus
+NumPy structured arrays for bulk work over many of them.
+
+Each record type parses an Airtable {'id', 'fields'} dict once. Numbers are
+coerced to float and timestamps to epoch seconds at parse time, so loops over
+the records do no dict lookups or float() calls. A missing or unparseable
+number becomes 0.0, like the fields.get(name, 0) reads it replaces.
+
+to_array() packs records into a structured array with one column per field,
+for vectorized sums, means and comparisons. Text columns are truncated to
+TEXT_WIDTH characters there; the records themselves keep the full text.
+"""
+
+import sys
+import dataclasses
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+# Characters kept per text column in structured arrays
+TEXT_WIDTH = 32
+
+_ARRAY_TYPES = {float: 'f8', bool: '?', str: f'U{TEXT_WIDTH}'}
+
+
+def parse_number(value: Any) -> float:
+    """Float of an Airtable number or numeric string, 0.0 if missing or invalid"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_time(value: Any) -> float:
+    """Epoch seconds of an ISO timestamp, 0.0 if missing or invalid"""
+    if not value:
+        return 0.0
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_text(value: Any) -> str:
+    return '' if value is None else str(value)
+
+
+class AirtableRecord:
+    """Parsing and array packing shared by the record types"""
+
+    __slots__ = ()
+
+    # Float fields holding timestamps rather than numbers
+    TIME_FIELDS: ClassVar[Tuple[str, ...]] = ()
+
+    @classmethod
+    def _parsers(cls) -> List[Tuple[str, Any]]:
+        """(field, parser) per field other than id, built once per class"""
+        parsers = cls.__dict__.get('_field_parsers')
+        if parsers is None:
+            parsers = []
+            for field in dataclasses.fields(cls):
+                if field.name == 'id':
+                    continue
+                if field.name in cls.TIME_FIELDS:
+                    parser = parse_time
+                elif field.type is float:
+                    parser = parse_number
+                elif field.type is bool:
+                    parser = bool
+                else:
+                    parser = _parse_text
+                parsers.append((field.name, parser))
+            cls._field_parsers = parsers
+        return parsers
+
+    @classmethod
+    def from_airtable(cls, record: Dict[str, Any]):
+        """Parse an Airtable record"""
+        fields = record.get('fields', {})
+        values = {name: parser(fields.get(name)) for name, parser in cls._parsers()}
+        return cls(id=record.get('id', ''), **values)
+
+    @classmethod
+    def parse_all(cls, records: Iterable[Dict[str, Any]]) -> list:
+        """Parse many Airtable records"""
+        return [cls.from_airtable(record) for record in records]
+
+    @classmethod
+    def dtype(cls) -> np.dtype:
+        """Structured array dtype with one column per field"""
+        return np.dtype([(field.name, _ARRAY_TYPES.get(field.type, f'U{TEXT_WIDTH}'))
+                         for field in dataclasses.fields(cls)])
+
+    @classmethod
+    def to_array(cls, records: Sequence['AirtableRecord']) -> np.ndarray:
+        """Pack records into a structured array, in the order given"""
+        names = [field.name for field in dataclasses.fields(cls)]
+        getter = attrgetter(*names)
+        return np.array([getter(record) for record in records], dtype=cls.dtype())
+
+    @classmethod
+    def array_from_airtable(cls, records: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """Parse Airtable records straight into a structured array"""
+        return cls.to_array(cls.parse_all(records))
+
+
+@dataclass(slots=True)
+class TokenSnapshot(AirtableRecord):
+    """Row of TOKEN_SNAPSHOTS"""
+    id: str
+    token: str
+    createdAt: float
+    price: float
+    volume24h: float
+    liquidity: float
+    priceChange24h: float
+    volume7d: float
+    price7dAvg: float
+
+    TIME_FIELDS: ClassVar[Tuple[str, ...]] = ('createdAt',)
+
+
+@dataclass(slots=True)
+class Signal(AirtableRecord):
+    """Row of SIGNALS"""
+    id: str
+    token: str
+    type: str
+    timeframe: str
+    confidence: str
+    createdAt: float
+    expiryDate: float
+    entryPrice: float
+    targetPrice: float
+    stopLoss: float
+    actualReturn: float
+
+    TIME_FIELDS: ClassVar[Tuple[str, ...]] = ('createdAt', 'expiryDate')
+
+
+@dataclass(slots=True)
+class Trade(AirtableRecord):
+    """Row of TRADES; price is the executed entry price"""
+    id: str
+    signalId: str
+    token: str
+    type: str
+    status: str
+    timeframe: str
+    createdAt: float
+    expiryDate: float
+    entryPrice: float
+    targetPrice: float
+    stopLoss: float
+    price: float
+    amount: float
+    value: float
+    exitPrice: float
+    realizedPnl: float
+    roi: float
+
+    TIME_FIELDS: ClassVar[Tuple[str, ...]] = ('createdAt', 'expiryDate')
+
+
+@dataclass(slots=True)
+class LPPosition(AirtableRecord):
+    """Row of LP_POSITIONS"""
+    id: str
+    name: str
+    token0: str
+    token1: str
+    token0Amount: float
+    token1Amount: float
+    totalValueUsd: float
+    isActive: bool
+    notes: str
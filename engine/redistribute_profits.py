@@ -2,7 +2,9 @@
 import os
 import json
 import sys
+import asyncio
 import requests
+import pandas as pd
 from datetime import datetime, timezone, timedelta
 from airtable import Airtable
 from dotenv import load_dotenv
@@ -10,6 +12,8 @@ from dotenv import load_dotenv
 # Import the WalletSnapshotTaker class from wallet_snapshots.py
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from engine.wallet_snapshots import WalletSnapshotTaker
+from engine.distributions import calculate_distributions, investments_frame
+from engine.batch_payouts import BatchPayoutExecutor, distributions_to_payouts
 
 def setup_logging():
     """Set up basic logging configuration"""
@@ -50,6 +54,9 @@ class ProfitRedistributor:
         # Initialize WalletSnapshotTaker for taking a new snapshot if needed
         self.snapshot_taker = WalletSnapshotTaker()
         
+        # Share the snapshot taker's incrementally synced investment ledger
+        self.ledger = self.snapshot_taker.investment_ledger
+        
     def get_active_subscriptions(self):
         """Get a mapping of wallet addresses with active subscriptions"""
         self.logger.info("Fetching active subscriptions")
@@ -133,25 +140,23 @@ class ProfitRedistributor:
         self.logger.info(f"Fetching investment changes between {start_date.isoformat()} and {end_date.isoformat()}")
         
         try:
-            # Query for investments in the date range
-            investments = self.investments_table.get_all(
-                formula=f"AND(IS_AFTER({{createdAt}}, '{start_date.isoformat()}'), IS_BEFORE({{createdAt}}, '{end_date.isoformat()}'))"
-            )
+            # Per-token totals for the range come from the ledger's prefix sums
+            self.ledger.sync_investments()
+            token_changes = self.ledger.token_amount_change(start_date, end_date)
             
             net_change_usd = 0.0
             
-            # Get current token prices
-            token_prices = self.get_token_prices()
+            # Only fetch prices when a non-stable token changed
+            token_prices = {}
+            if any(token not in ('USDC', 'USDT') for token in token_changes):
+                token_prices = self.snapshot_taker.get_current_token_prices()
             
             # Log token prices for debugging
             for token, price in token_prices.items():
                 self.logger.info(f"Using price for {token}: ${price:.6f}")
             
-            for investment in investments:
+            for token_symbol, amount in token_changes.items():
                 try:
-                    amount = float(investment['fields'].get('amount', 0))
-                    token_symbol = investment['fields'].get('token', 'USDC').upper()
-                    
                     # Convert token amount to USD based on token type
                     if token_symbol == 'USDC' or token_symbol == 'USDT':
                         # Stablecoins are 1:1 with USD
@@ -168,7 +173,7 @@ class ProfitRedistributor:
                     net_change_usd += amount_usd
                     self.logger.info(f"Found investment change: {amount} {token_symbol} = ${amount_usd:.2f}")
                 except (ValueError, TypeError) as e:
-                    self.logger.warning(f"Error processing investment {investment.get('id')}: {e}")
+                    self.logger.warning(f"Error processing investment change for {token_symbol}: {e}")
             
             self.logger.info(f"Total net investment change in USD: ${net_change_usd:.2f}")
             
@@ -184,18 +189,11 @@ class ProfitRedistributor:
         """Get the total value of all investments at a given date"""
         self.logger.info(f"Calculating total investments value {date and 'as of ' + date.isoformat() or 'current'}")
         
-        # If no date is provided, get current investments
-        if not date:
-            investments = self.investments_table.get_all()
-            total_value = sum(float(inv['fields'].get('amount', 0)) for inv in investments)
-            self.logger.info(f"Current total investments value: ${total_value:.2f}")
-            return total_value
-        
-        # For historical data, we would need a snapshot of investments
-        # This is a simplified approach - in a real system, you might have investment snapshots
-        # For now, we'll use the current investments as an approximation
-        self.logger.warning("Historical investment data not available, using current as approximation")
-        return self.get_total_investments_value()
+        # The ledger keeps cumulative totals, so historical values are exact
+        self.ledger.sync_investments()
+        total_value = self.ledger.total_amount(as_of=date)
+        self.logger.info(f"Total investments value {date and 'as of ' + date.isoformat() or 'current'}: ${total_value:.2f}")
+        return total_value
     
     # Method removed as it's no longer needed
         
@@ -207,132 +205,40 @@ class ProfitRedistributor:
             # Get active subscriptions
             active_subscriptions = self.get_active_subscriptions()
             
-            # Get all investors from the INVESTMENTS table
-            investments = self.investments_table.get_all()
-            
-            # Group investments by wallet and token
-            wallet_investments = {}
-            for investment in investments:
-                wallet = investment['fields'].get('wallet')
-                if not wallet:
-                    continue
-                    
-                amount = float(investment['fields'].get('amount', 0))
-                token_symbol = investment['fields'].get('token', 'USDC').upper()
-                
-                if wallet not in wallet_investments:
-                    wallet_investments[wallet] = {}
-                    
-                if token_symbol not in wallet_investments[wallet]:
-                    wallet_investments[wallet][token_symbol] = []
-                    
-                wallet_investments[wallet][token_symbol].append({
-                    'token': token_symbol,
-                    'amount': amount,
-                    'id': investment['id']
-                })
-            
-            self.logger.info(f"Found {len(wallet_investments)} unique investors")
-            
-            # Calculate total investment value by token
-            total_ubc_investment = 0
-            total_compute_investment = 0
-            wallet_token_investments = {}
-            wallet_has_subscription = {}
-            
-            for wallet, token_investments in wallet_investments.items():
-                # Check if wallet has active subscription
-                has_subscription = wallet in active_subscriptions
-                wallet_has_subscription[wallet] = has_subscription
-                
-                # Initialize wallet token investments if not exists
-                if wallet not in wallet_token_investments:
-                    wallet_token_investments[wallet] = {}
-                
-                # Calculate UBC investment
-                ubc_investment = sum(inv['amount'] for inv in token_investments.get('UBC', []))
-                
-                # Apply different rate based on subscription status
-                effective_ubc = ubc_investment
-                if not has_subscription:
-                    # Non-subscribers get 50% instead of 75% (2/3 of the full rate)
-                    effective_ubc = ubc_investment * (50/75)
-                    self.logger.info(f"Wallet {wallet}: No active subscription, applying 50% rate for UBC")
-                else:
-                    self.logger.info(f"Wallet {wallet}: Has active subscription, applying full 75% rate for UBC")
-                
-                wallet_token_investments[wallet]['UBC'] = {
-                    'actual': ubc_investment,
-                    'effective': effective_ubc
-                }
-                total_ubc_investment += effective_ubc
-                
-                # Calculate COMPUTE investment
-                compute_investment = sum(inv['amount'] for inv in token_investments.get('COMPUTE', []))
-                
-                # Apply different rate based on subscription status
-                effective_compute = compute_investment
-                if not has_subscription:
-                    # Non-subscribers get 50% instead of 75% (2/3 of the full rate)
-                    effective_compute = compute_investment * (50/75)
-                    self.logger.info(f"Wallet {wallet}: No active subscription, applying 50% rate for COMPUTE")
-                else:
-                    self.logger.info(f"Wallet {wallet}: Has active subscription, applying full 75% rate for COMPUTE")
-                
-                wallet_token_investments[wallet]['COMPUTE'] = {
-                    'actual': compute_investment,
-                    'effective': effective_compute
-                }
-                total_compute_investment += effective_compute
-            
-            self.logger.info(f"Total effective UBC investment: {total_ubc_investment} UBC")
-            self.logger.info(f"Total effective COMPUTE investment: {total_compute_investment} COMPUTE")
-            
-            # Calculate distribution for each wallet based on their percentage of total investment
-            distributions = []
-            
-            for wallet, token_investments in wallet_token_investments.items():
-                has_subscription = wallet_has_subscription[wallet]
-                effective_rate = 75 if has_subscription else 50
-                
-                # Calculate UBC distribution
-                ubc_distribution = 0
-                ubc_percentage = 0
-                if total_ubc_investment > 0 and token_investments.get('UBC', {}).get('effective', 0) > 0:
-                    ubc_percentage = (token_investments['UBC']['effective'] / total_ubc_investment) * 100
-                    ubc_distribution = (token_investments['UBC']['effective'] / total_ubc_investment) * ubc_amount
-                    
-                    distributions.append({
-                        'wallet': wallet,
-                        'token': 'UBC',
-                        'percentage': ubc_percentage,
-                        'amount': ubc_distribution,
-                        'has_subscription': has_subscription,
-                        'effective_rate': effective_rate
-                    })
-                    
-                    self.logger.info(f"Wallet {wallet}: UBC Investment {token_investments['UBC']['actual']}, Rate {effective_rate}% → Distribution {ubc_distribution:.6f} UBC")
-                
-                # Calculate COMPUTE distribution
-                compute_distribution = 0
-                compute_percentage = 0
-                if total_compute_investment > 0 and token_investments.get('COMPUTE', {}).get('effective', 0) > 0:
-                    compute_percentage = (token_investments['COMPUTE']['effective'] / total_compute_investment) * 100
-                    compute_distribution = (token_investments['COMPUTE']['effective'] / total_compute_investment) * compute_amount
-                    
-                    distributions.append({
-                        'wallet': wallet,
-                        'token': 'COMPUTE',
-                        'percentage': compute_percentage,
-                        'amount': compute_distribution,
-                        'has_subscription': has_subscription,
-                        'effective_rate': effective_rate
-                    })
-                    
-                    self.logger.info(f"Wallet {wallet}: COMPUTE Investment {token_investments['COMPUTE']['actual']}, Rate {effective_rate}% → Distribution {compute_distribution:.6f} COMPUTE")
+            # Per-wallet totals come from the ledger; fall back to the full table
+            try:
+                self.ledger.sync_investments()
+                investments = pd.DataFrame(
+                    [(wallet, token, amount) for (wallet, token), amount in self.ledger.wallet_token_totals().items()],
+                    columns=['wallet', 'token', 'amount']
+                )
+            except Exception as e:
+                self.logger.warning(f"Investment ledger unavailable, reading INVESTMENTS table: {e}")
+                investments = investments_frame(self.investments_table.get_all())
+            
+            self.logger.info(f"Found {investments['wallet'].nunique()} unique investors")
+            
+            distributions = calculate_distributions(
+                investments,
+                active_subscriptions.keys(),
+                {'UBC': ubc_amount, 'COMPUTE': compute_amount}
+            )
             
-            # Sort distributions by amount (descending)
-            distributions.sort(key=lambda x: x['amount'], reverse=True)
+            for token in ('UBC', 'COMPUTE'):
+                token_rows = distributions[distributions['token'] == token]
+                self.logger.info(
+                    f"Total effective {token} investment: {token_rows['effective'].sum()} {token} "
+                    f"across {len(token_rows)} wallets ({int(token_rows['has_subscription'].sum())} subscribed)"
+                )
+            
+            distributions = distributions.drop(columns=['effective']).to_dict('records')
+            for distribution in distributions:
+                distribution['has_subscription'] = bool(distribution['has_subscription'])
+                distribution['effective_rate'] = int(distribution['effective_rate'])
+                distribution['units'] = int(distribution['units'])
+                distribution['amount'] = float(distribution['amount'])
+                distribution['percentage'] = float(distribution['percentage'])
+                distribution['investment'] = float(distribution['investment'])
             
             return distributions
         
@@ -500,15 +406,18 @@ def main():
         ubc_amount = 0
         compute_amount = 0
         
-        if len(sys.argv) >= 3:
+        args = [arg for arg in sys.argv[1:] if arg != '--pay']
+        pay = '--pay' in sys.argv
+
+        if len(args) >= 2:
             try:
-                ubc_amount = float(sys.argv[1])
-                compute_amount = float(sys.argv[2])
+                ubc_amount = float(args[0])
+                compute_amount = float(args[1])
             except ValueError:
                 print("Error: UBC and COMPUTE amounts must be numbers")
                 sys.exit(1)
         else:
-            print("Usage: python redistribute_profits.py <ubc_amount> <compute_amount>")
+            print("Usage: python redistribute_profits.py <ubc_amount> <compute_amount> [--pay]")
             sys.exit(1)
         
         # Initialize and run profit redistribution
@@ -578,6 +487,17 @@ def main():
                 print(f"\n✅ Redistribution saved to Airtable with IDs:")
                 for token, record_id in redistribution_ids.items():
                     print(f"  - {token}: {record_id}")
+
+                if pay:
+                    # Journaled under the redistribution record IDs so a re-run resumes the same payouts
+                    run_id = "-".join(redistribution_ids[token] for token in sorted(redistribution_ids))
+                    print(f"\n=== Executing Batch Payouts (run {run_id}) ===")
+                    summary = asyncio.run(BatchPayoutExecutor().execute(run_id, distributions_to_payouts(distributions)))
+                    print(f"Confirmed: {summary['confirmed']}, in flight: {summary['submitted']}, pending: {summary['pending']}")
+                    for signature in summary['signatures']:
+                        print(f"  - https://solscan.io/tx/{signature}")
+                    if summary['pending'] or summary['submitted']:
+                        print(f"\n⚠️ Payouts incomplete, resume with: python engine/batch_payouts.py pay {run_id}")
             else:
                 print("\n❌ Failed to save redistribution to Airtable")
         else:
@@ -21,8 +21,15 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 # Import project modules
-from scripts.generate_chart import generate_chart, fetch_token_data, calculate_support_levels
-from scripts.analyze_charts import analyze_charts_with_claude, create_airtable_signal
+from scripts.generate_chart import generate_chart, fetch_token_data, calculate_support_levels, CHART_STYLE_VERSION
+from scripts.chart_cache import get_chart_cache
+from scripts.analyze_charts import (
+    analyze_charts_with_claude,
+    build_chart_analysis_request,
+    parse_chart_analysis,
+    create_airtable_signal
+)
+from engine.llm_broker import get_broker
 
 # Configure logging
 logging.basicConfig(
@@ -99,50 +106,172 @@ class SignalGenerator:
             logger.error(f"Error fetching active tokens: {e}")
             return []
 
-    async def analyze_token(self, token: Dict) -> Optional[Dict]:
-        """Generate and analyze charts for a single token"""
-        try:
-            logger.info(f"\nAnalyzing {token['token']}...")
+    def generate_charts(self, token: Dict, token_dir: Path) -> List[str]:
+        """Render (or reuse cached) charts for every timeframe; returns their paths"""
+        # Generate charts for each timeframe
+        chart_paths = []
+        chart_cache = get_chart_cache()
+        for config in self.TIMEFRAMES:
+            try:
+                # Format config for this token
+                token_config = {
+                    **config,
+                    'title': config['title'].format(token=token['token']),
+                    'filename': config['filename'].format(token=token['token'])
+                }
+                
+                # Fetch and validate data
+                df = fetch_token_data(
+                    timeframe=config['timeframe'],
+                    hours=config['hours'],
+                    token_address=token['mint']
+                )
+                
+                if df is None or df.empty:
+                    logger.warning(f"No data for {token['token']} - {config['timeframe']}")
+                    continue
+                
+                # Reuse the chart if it was rendered from the same candles
+                chart_path = token_dir / token_config['filename']
+                last_candle = int(df.index[-1].timestamp())
+                if chart_cache.lookup(chart_path, token['mint'], config['timeframe'], last_candle, CHART_STYLE_VERSION):
+                    chart_paths.append(str(chart_path))
+                    logger.info(f"Reusing cached chart: {chart_path}")
+                    continue
+                    
+                # Calculate support levels and generate chart
+                support_levels = calculate_support_levels(df)
+                
+                if generate_chart(df, token_config, support_levels):
+                    if chart_path.exists():
+                        chart_cache.store(chart_path, token['mint'], config['timeframe'], last_candle, CHART_STYLE_VERSION)
+                        chart_paths.append(str(chart_path))
+                        logger.info(f"Generated chart: {chart_path}")
+                
+            except Exception as e:
+                logger.error(f"Error generating chart for {config['timeframe']}: {e}")
+                continue
+        return chart_paths
+
+    def create_signals(self, token: Dict, analyses: Dict) -> Dict:
+        """Create Airtable signals for the strong setups in a chart analysis"""
+        # Create signals for strong setups
+        signals_created = 0
+        for timeframe, analysis in analyses.items():
+            if timeframe == 'overall':
+                continue
+                
+            signal_type = analysis.get('signal')
+            confidence = analysis.get('confidence', 0)
             
-            # Create token directory for charts
-            token_dir = Path('public/charts') / token['token'].lower()
-            token_dir.mkdir(parents=True, exist_ok=True)
+            # Log the analysis details for debugging
+            logger.info(f"Analysis for {token['token']} - {timeframe}: signal={signal_type}, confidence={confidence}, expectedReturn={analysis.get('expectedReturn', 0)}")
+            logger.info(f"Full analysis data for {token['token']} - {timeframe}: {analysis}")
             
-            # Generate charts for each timeframe
-            chart_paths = []
-            for config in self.TIMEFRAMES:
-                try:
-                    # Format config for this token
-                    token_config = {
-                        **config,
-                        'title': config['title'].format(token=token['token']),
-                        'filename': config['filename'].format(token=token['token'])
-                    }
+            # Only create signals for BUY/SELL (not HOLD) with confidence >= 60
+            # Also check that the expected return meets minimum targets based on timeframe
+            if signal_type and signal_type != 'HOLD' and confidence >= 60:
+                # Calculate expected return based on entry and target prices
+                if hasattr(analysis, 'key_levels') and analysis.key_levels:
+                    key_levels = analysis.key_levels
                     
-                    # Fetch and validate data
-                    df = fetch_token_data(
-                        timeframe=config['timeframe'],
-                        hours=config['hours'],
-                        token_address=token['mint']
-                    )
+                    # Extract support and resistance levels
+                    support_levels = key_levels.get('support', [])
+                    resistance_levels = key_levels.get('resistance', [])
                     
-                    if df is None or df.empty:
-                        logger.warning(f"No data for {token['token']} - {config['timeframe']}")
-                        continue
+                    # Calculate entry and target prices based on signal type
+                    if signal_type == 'BUY':
+                        # For BUY signals: entry at support, target at resistance
+                        entry_price = min(support_levels) if support_levels else 0
+                        target_price = min(resistance_levels) if resistance_levels else 0
+                    else:  # SELL
+                        # For SELL signals: entry at resistance, target at support
+                        entry_price = max(resistance_levels) if resistance_levels else 0
+                        target_price = max(support_levels) if support_levels else 0
+                    
+                    # Calculate expected return as percentage
+                    if entry_price and target_price and entry_price > 0:
+                        if signal_type == 'BUY':
+                            expected_return = ((target_price - entry_price) / entry_price) * 100
+                        else:  # SELL
+                            expected_return = ((entry_price - target_price) / entry_price) * 100
                         
-                    # Calculate support levels and generate chart
-                    support_levels = calculate_support_levels(df)
-                    chart_path = token_dir / token_config['filename']
+                        # Ensure expected return is positive
+                        expected_return = abs(expected_return)
+                    else:
+                        expected_return = 0
+                else:
+                    # Fallback to existing methods if key_levels not available
+                    if hasattr(analysis, 'get'):
+                        expected_return = analysis.get('expectedReturn', 0)
+                    elif hasattr(analysis, 'to_dict'):
+                        expected_return = analysis.to_dict().get('expectedReturn', 0)
+                    elif hasattr(analysis, 'risk_reward_ratio'):
+                        # Use risk_reward_ratio as a fallback for expectedReturn
+                        expected_return = getattr(analysis, 'risk_reward_ratio', 0) * 100 if getattr(analysis, 'risk_reward_ratio', 0) else 0
+                    else:
+                        expected_return = 0
+                
+                # Log the calculated expected return
+                logger.info(f"Calculated expected return for {token['token']} - {timeframe}: {expected_return:.2f}%")
+                
+                # Set minimum target based on timeframe
+                min_target = {
+                    'SCALP': 12,      # 12% for SCALP
+                    'INTRADAY': 15,   # 15% for INTRADAY
+                    'SWING': 20,      # 20% for SWING
+                    'POSITION': 25    # 25% for POSITION
+                }.get(timeframe, 15)  # Default to 15% if timeframe not recognized
+                
+                # Skip if expected return is below minimum target
+                if expected_return < min_target:
+                    logger.info(f"Skipping {timeframe} signal for {token['token']} - expected return {expected_return:.2f}% below minimum target {min_target}%")
+                    if hasattr(analysis, 'to_dict'):
+                        logger.info(f"Analysis keys available: {list(analysis.to_dict().keys())}")
+                    elif hasattr(analysis, '__dict__'):
+                        logger.info(f"Analysis keys available: {list(analysis.__dict__.keys())}")
+                    else:
+                        logger.info(f"Analysis object doesn't support keys() method")
+                    continue
                     
-                    if generate_chart(df, token_config, support_levels):
-                        if chart_path.exists():
-                            chart_paths.append(str(chart_path))
-                            logger.info(f"Generated chart: {chart_path}")
+                # Check for existing signal before creating a new one
+                existing_signal = self.check_existing_signal(token['token'], timeframe)
+                if existing_signal:
+                    logger.info(f"Using existing {timeframe} signal for {token['token']} (ID: {existing_signal['id']})")
+                    signals_created += 1
+                    continue  # Skip to next timeframe
                     
+                try:
+                    result = create_airtable_signal(
+                        analysis,
+                        timeframe,
+                        {'token': token['token'], 'mint': token['mint']},
+                        analyses,
+                        {'validated': False}
+                    )
+                    if result:
+                        signals_created += 1
+                        logger.info(f"Created {timeframe} signal for {token['token']}")
                 except Exception as e:
-                    logger.error(f"Error generating chart for {config['timeframe']}: {e}")
-                    continue
+                    logger.error(f"Error creating signal: {e}")
+        
+        logger.info(f"Created {signals_created} signals for {token['token']}")
+        return {
+            'token': token['token'],
+            'signals_created': signals_created,
+            'analyses': analyses
+        }
+
+    async def analyze_token(self, token: Dict) -> Optional[Dict]:
+        """Generate and analyze charts for a single token"""
+        try:
+            logger.info(f"\nAnalyzing {token['token']}...")
+            
+            # Create token directory for charts
+            token_dir = Path('public/charts') / token['token'].lower()
+            token_dir.mkdir(parents=True, exist_ok=True)
             
+            chart_paths = self.generate_charts(token, token_dir)
             if not chart_paths:
                 logger.warning(f"No charts generated for {token['token']}")
                 return None
@@ -162,119 +291,66 @@ class SignalGenerator:
             for tf, analysis in analyses.items():
                 logger.info(f"  {tf}: {analysis}")
             
-            # Create signals for strong setups
-            signals_created = 0
-            for timeframe, analysis in analyses.items():
-                if timeframe == 'overall':
-                    continue
-                    
-                signal_type = analysis.get('signal')
-                confidence = analysis.get('confidence', 0)
-                
-                # Log the analysis details for debugging
-                logger.info(f"Analysis for {token['token']} - {timeframe}: signal={signal_type}, confidence={confidence}, expectedReturn={analysis.get('expectedReturn', 0)}")
-                logger.info(f"Full analysis data for {token['token']} - {timeframe}: {analysis}")
-                
-                # Only create signals for BUY/SELL (not HOLD) with confidence >= 60
-                # Also check that the expected return meets minimum targets based on timeframe
-                if signal_type and signal_type != 'HOLD' and confidence >= 60:
-                    # Calculate expected return based on entry and target prices
-                    if hasattr(analysis, 'key_levels') and analysis.key_levels:
-                        key_levels = analysis.key_levels
-                        
-                        # Extract support and resistance levels
-                        support_levels = key_levels.get('support', [])
-                        resistance_levels = key_levels.get('resistance', [])
-                        
-                        # Calculate entry and target prices based on signal type
-                        if signal_type == 'BUY':
-                            # For BUY signals: entry at support, target at resistance
-                            entry_price = min(support_levels) if support_levels else 0
-                            target_price = min(resistance_levels) if resistance_levels else 0
-                        else:  # SELL
-                            # For SELL signals: entry at resistance, target at support
-                            entry_price = max(resistance_levels) if resistance_levels else 0
-                            target_price = max(support_levels) if support_levels else 0
-                        
-                        # Calculate expected return as percentage
-                        if entry_price and target_price and entry_price > 0:
-                            if signal_type == 'BUY':
-                                expected_return = ((target_price - entry_price) / entry_price) * 100
-                            else:  # SELL
-                                expected_return = ((entry_price - target_price) / entry_price) * 100
-                            
-                            # Ensure expected return is positive
-                            expected_return = abs(expected_return)
-                        else:
-                            expected_return = 0
-                    else:
-                        # Fallback to existing methods if key_levels not available
-                        if hasattr(analysis, 'get'):
-                            expected_return = analysis.get('expectedReturn', 0)
-                        elif hasattr(analysis, 'to_dict'):
-                            expected_return = analysis.to_dict().get('expectedReturn', 0)
-                        elif hasattr(analysis, 'risk_reward_ratio'):
-                            # Use risk_reward_ratio as a fallback for expectedReturn
-                            expected_return = getattr(analysis, 'risk_reward_ratio', 0) * 100 if getattr(analysis, 'risk_reward_ratio', 0) else 0
-                        else:
-                            expected_return = 0
-                    
-                    # Log the calculated expected return
-                    logger.info(f"Calculated expected return for {token['token']} - {timeframe}: {expected_return:.2f}%")
-                    
-                    # Set minimum target based on timeframe
-                    min_target = {
-                        'SCALP': 12,      # 12% for SCALP
-                        'INTRADAY': 15,   # 15% for INTRADAY
-                        'SWING': 20,      # 20% for SWING
-                        'POSITION': 25    # 25% for POSITION
-                    }.get(timeframe, 15)  # Default to 15% if timeframe not recognized
-                    
-                    # Skip if expected return is below minimum target
-                    if expected_return < min_target:
-                        logger.info(f"Skipping {timeframe} signal for {token['token']} - expected return {expected_return:.2f}% below minimum target {min_target}%")
-                        if hasattr(analysis, 'to_dict'):
-                            logger.info(f"Analysis keys available: {list(analysis.to_dict().keys())}")
-                        elif hasattr(analysis, '__dict__'):
-                            logger.info(f"Analysis keys available: {list(analysis.__dict__.keys())}")
-                        else:
-                            logger.info(f"Analysis object doesn't support keys() method")
-                        continue
-                        
-                    # Check for existing signal before creating a new one
-                    existing_signal = self.check_existing_signal(token['token'], timeframe)
-                    if existing_signal:
-                        logger.info(f"Using existing {timeframe} signal for {token['token']} (ID: {existing_signal['id']})")
-                        signals_created += 1
-                        continue  # Skip to next timeframe
-                        
-                    try:
-                        result = create_airtable_signal(
-                            analysis,
-                            timeframe,
-                            {'token': token['token'], 'mint': token['mint']},
-                            analyses,
-                            {'validated': False}
-                        )
-                        if result:
-                            signals_created += 1
-                            logger.info(f"Created {timeframe} signal for {token['token']}")
-                    except Exception as e:
-                        logger.error(f"Error creating signal: {e}")
-            
-            logger.info(f"Created {signals_created} signals for {token['token']}")
-            return {
-                'token': token['token'],
-                'signals_created': signals_created,
-                'analyses': analyses
-            }
+            return self.create_signals(token, analyses)
             
         except Exception as e:
             logger.error(f"Error analyzing {token['token']}: {e}")
             return None
 
-    async def generate_signals(self):
-        """Main function to generate signals for all active tokens"""
+    def analyze_tokens_batch(self, tokens: List[Dict], poll_interval: float = 60) -> List[Dict]:
+        """Analyze all tokens through one Message Batches job, creating signals as results arrive"""
+        requests_kwargs = {}
+        pending = {}
+        for i, token in enumerate(tokens):
+            try:
+                token_dir = Path('public/charts') / token['token'].lower()
+                token_dir.mkdir(parents=True, exist_ok=True)
+
+                chart_paths = self.generate_charts(token, token_dir)
+                if not chart_paths:
+                    logger.warning(f"No charts generated for {token['token']}")
+                    continue
+
+                custom_id = f"token-{i}"
+                requests_kwargs[custom_id] = build_chart_analysis_request(
+                    chart_paths,
+                    token_info={'token': token['token'], 'mint': token['mint']}
+                )
+                pending[custom_id] = token
+            except Exception as e:
+                logger.error(f"Error preparing {token['token']}: {e}")
+
+        if not requests_kwargs:
+            return []
+
+        logger.info(f"Submitting {len(requests_kwargs)} chart analyses as one batch...")
+        results = []
+        for custom_id, response in get_broker().run_batch("signals.batch", requests_kwargs,
+                                                          poll_interval=poll_interval):
+            token = pending[custom_id]
+            if isinstance(response, Exception):
+                logger.error(f"Batch analysis failed for {token['token']}: {response}")
+                continue
+
+            try:
+                analyses = parse_chart_analysis(response.text)
+                if not analyses:
+                    logger.warning(f"No analysis generated for {token['token']}")
+                    continue
+                results.append(self.create_signals(token, analyses))
+            except Exception as e:
+                logger.error(f"Error processing batch result for {token['token']}: {e}")
+        return results
+
+    async def generate_signals(self, batch: bool = False):
+        """
+        Main function to generate signals for all active tokens
+        
+        Args:
+            batch: Submit all analyses as one Message Batches job instead of one
+                request per token. Results can take hours but cost half, which
+                suits nightly full-universe scans.
+        """
         try:
             logger.info("Starting signal generation process...")
             
@@ -284,17 +360,23 @@ class SignalGenerator:
                 logger.error("No active tokens found")
                 return
             
-            # Process each token
-            results = []
-            for token in tokens:
-                try:
-                    result = await self.analyze_token(token)
-                    if result:
-                        results.append(result)
-                    await asyncio.sleep(1)  # Rate limiting
-                except Exception as e:
-                    logger.error(f"Error processing {token['token']}: {e}")
-                    continue
+            # Drop charts of tokens that have not been scanned for a while
+            get_chart_cache().expire()
+            
+            if batch:
+                results = await asyncio.to_thread(self.analyze_tokens_batch, tokens)
+            else:
+                results = []
+                # Process each token
+                for token in tokens:
+                    try:
+                        result = await self.analyze_token(token)
+                        if result:
+                            results.append(result)
+                        await asyncio.sleep(1)  # Rate limiting
+                    except Exception as e:
+                        logger.error(f"Error processing {token['token']}: {e}")
+                        continue
             
             # Summarize results
             total_signals = sum(r['signals_created'] for r in results if r)
@@ -408,9 +490,12 @@ def main():
         # Initialize signal generator
         generator = SignalGenerator()
         
+        args = [arg for arg in sys.argv[1:] if arg != '--batch']
+        batch = '--batch' in sys.argv[1:]
+
         # Check if a specific token was provided as argument
-        if len(sys.argv) > 1:
-            token_symbol = sys.argv[1].upper()
+        if args:
+            token_symbol = args[0].upper()
             logger.info(f"Analyzing specific token: {token_symbol}")
             
             # Analyze the specified token
@@ -437,7 +522,7 @@ def main():
                 sys.exit(1)
         else:
             # Generate signals for all active tokens
-            asyncio.run(generator.generate_signals())
+            asyncio.run(generator.generate_signals(batch=batch))
             logger.info("\n✅ Signal generation completed for all active tokens")
             sys.exit(0)
 
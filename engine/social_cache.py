@@ -0,0 +1,190 @@
+"""
+Social Cache
+
+Persistent cache for the X lookups and Claude verdicts behind social signal
+analysis: username to user ID resolution, account timelines, tweet searches
+and per-token sentiment verdicts. Entries live in SQLite under data/, so they
+survive restarts and are shared by every process on the machine. Each entry
+expires after its namespace's TTL. The cache is bounded by max_entries, and
+the least recently used entries are evicted first.
+
+Repeated scans within the TTL are served without X API calls.
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import rate_limited_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'social_cache.db'
+DEFAULT_MAX_ENTRIES = 5000
+
+# Namespaces
+USER_IDS = 'x_user_id'
+ACCOUNT_TWEETS = 'x_account_tweets'
+TWEET_SEARCHES = 'x_search'
+SENTIMENT = 'sentiment'
+
+# Seconds each kind of entry stays valid
+DEFAULT_TTLS = {
+    USER_IDS: 7 * 86400,      # Usernames rarely change owner
+    ACCOUNT_TWEETS: 3600,
+    TWEET_SEARCHES: 3600,
+    SENTIMENT: 6 * 3600,
+}
+
+
+def tweets_digest(tweets: List[Dict]) -> str:
+    """Short digest of a tweet list, so a verdict is reused only for the same tweets"""
+    ids = [str(tweet.get('id') or tweet.get('text', '')) for tweet in tweets]
+    return hashlib.sha256('\n'.join(ids).encode('utf-8')).hexdigest()[:16]
+
+
+class SocialCache:
+    """SQLite-backed LRU cache with per-namespace TTLs"""
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expiresAt REAL NOT NULL,
+                    lastUsedAt REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_used ON entries (lastUsedAt)")
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, expiresAt FROM entries WHERE namespace = ? AND key = ?",
+                               (namespace, key)).fetchone()
+            if row and row[1] > now:
+                conn.execute("UPDATE entries SET lastUsedAt = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, key))
+                self.hits += 1
+                return json.loads(row[0])
+            if row:
+                conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        self.misses += 1
+        return None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """Store a JSON-serializable value, evicting the least recently used entries beyond max_entries"""
+        now = time.time()
+        ttl = self.ttls.get(namespace, 3600) if ttl is None else ttl
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO entries (namespace, key, value, expiresAt, lastUsedAt)
+                VALUES (?, ?, ?, ?, ?)
+            """, (namespace, key, json.dumps(value), now + ttl, now))
+
+            excess = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute("""
+                    DELETE FROM entries WHERE rowid IN (
+                        SELECT rowid FROM entries ORDER BY expiresAt <= ? DESC, lastUsedAt LIMIT ?
+                    )
+                """, (now, excess))
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Optional[Any]],
+                    ttl: Optional[float] = None) -> Optional[Any]:
+        """
+        Cached value, or the loader's result stored for next time
+
+        The loader returns None on failure; failures are not cached.
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            return value
+        value = loader()
+        if value is not None:
+            self.set(namespace, key, value, ttl)
+        return value
+
+    def clear(self, namespace: Optional[str] = None) -> int:
+        """Remove every entry, or every entry of one namespace; returns the number removed"""
+        with self._connect() as conn:
+            if namespace:
+                return conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,)).rowcount
+            return conn.execute("DELETE FROM entries").rowcount
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT namespace, COUNT(*) FROM entries GROUP BY namespace").fetchall()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': dict(rows)}
+
+
+_cache: Optional[SocialCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_social_cache() -> SocialCache:
+    """Process-wide social cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SocialCache()
+        return _cache
+
+
+def resolve_x_user_id(x_account: str, bearer_token: str, timeout: float = 15) -> Optional[str]:
+    """
+    X user ID of an account, resolved through the cache
+
+    Args:
+        x_account: X account username, with or without @
+        bearer_token: X/Twitter API bearer token
+        timeout: Request timeout in seconds
+
+    Returns:
+        User ID, or None if the account could not be resolved
+    """
+    username = x_account.lstrip('@')
+
+    def load() -> Optional[str]:
+        user_url = f"https://api.twitter.com/2/users/by/username/{username}"
+        headers = {"Authorization": f"Bearer {bearer_token}"}
+        try:
+            response = rate_limited_session('x').get(user_url, headers=headers, timeout=timeout)
+        except Exception as e:
+            logger.error(f"Error resolving X user @{username}: {e}")
+            return None
+        if not response.ok:
+            logger.error(f"X/Twitter API error resolving @{username}: {response.status_code}")
+            logger.error(f"Response: {response.text}")
+            return None
+        return response.json().get('data', {}).get('id')
+
+    return get_social_cache().get_or_load(USER_IDS, username.lower(), load)
@@ -0,0 +1,226 @@
+"""
+Token Matcher
+
+Finds token mentions in tweet text with a matcher built once from the TOKENS
+table, and answers status questions from an in-memory map of that table.
+Mentions are matched in two ways:
+- Any $SYMBOL cashtag, with one precompiled regex, so tokens not yet in
+  TOKENS are still discovered.
+- Optionally, the full names of known tokens, by hashing the word n-grams
+  that start with a known name's first word.
+
+A batch of tweets is classified in one pass without any per-token Airtable
+lookups. The map is reloaded when it is older than max_age, and single tokens
+can be refreshed after they have been updated.
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import limit_session
+
+logger = logging.getLogger(__name__)
+
+# Cashtags that are never treated as token mentions
+IGNORE_SYMBOLS = {'USD', 'USDT', 'USDC'}
+
+# Symbols after $ must be 2 to 10 characters, followed by punctuation, whitespace or the end
+CASHTAG_PATTERN = r'\$([A-Za-z0-9]{2,10})(?=[.,!?\s]|$)'
+
+# Names shorter than this are too likely to be ordinary words
+MIN_NAME_LENGTH = 4
+
+# Words of a name; cashtags are kept whole so "$Jupiter" is not also read as the name "Jupiter"
+WORD_REGEX = re.compile(r'\$?[a-z0-9]+')
+
+# Seconds before the TOKENS map is reloaded
+DEFAULT_MAX_AGE = 300
+
+# Tokens updated more recently than this do not need a refresh
+FRESH_FOR = timedelta(hours=48)
+
+TOKEN_FIELDS = ['token', 'name', 'isActive', 'explanation', 'updatedAt']
+
+
+@dataclass
+class TokenStatus:
+    """Status of a TOKENS record"""
+    symbol: str
+    is_active: bool
+    explanation: str
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_fields(cls, fields: Dict) -> 'TokenStatus':
+        updated_at = None
+        if fields.get('updatedAt'):
+            try:
+                updated_at = datetime.fromisoformat(fields['updatedAt'].replace('Z', '+00:00'))
+                if updated_at.tzinfo is None:
+                    updated_at = updated_at.replace(tzinfo=timezone.utc)
+            except ValueError:
+                pass
+        return cls(
+            symbol=fields['token'].upper(),
+            is_active=bool(fields.get('isActive', False)),
+            explanation=fields.get('explanation', '') or '',
+            updated_at=updated_at
+        )
+
+
+class TokenMatcher:
+    """Token mention matcher and status map built from TOKENS records"""
+
+    def __init__(self, records: Iterable[Dict]):
+        self.statuses: Dict[str, TokenStatus] = {}
+        # Lower-case name words -> symbol, e.g. ('universal', 'basic', 'compute') -> 'UBC'
+        self.names: Dict[tuple, str] = {}
+
+        for record in records:
+            fields = record.get('fields', record)
+            if not fields.get('token'):
+                continue
+            status = TokenStatus.from_fields(fields)
+            self.statuses[status.symbol] = status
+
+            name = (fields.get('name') or '').strip()
+            if len(name) >= MIN_NAME_LENGTH and name.upper() != status.symbol:
+                words = tuple(WORD_REGEX.findall(name.lower()))
+                if words:
+                    self.names.setdefault(words, status.symbol)
+
+        # Names are found by hashing word n-grams that start with a known first word
+        self.first_words = {words[0] for words in self.names}
+        self.max_name_words = max((len(words) for words in self.names), default=0)
+        self.cashtag_regex = re.compile(CASHTAG_PATTERN)
+        self.loaded_at = time.monotonic()
+
+    def _match_names(self, text: str, found: Dict[str, None]):
+        words = WORD_REGEX.findall(text.lower())
+        for i, word in enumerate(words):
+            if word not in self.first_words:
+                continue
+            for n in range(1, min(self.max_name_words, len(words) - i) + 1):
+                symbol = self.names.get(tuple(words[i:i + n]))
+                if symbol:
+                    found.setdefault(symbol, None)
+
+    def extract(self, text: str, include_names: bool = False) -> List[str]:
+        """
+        Token symbols mentioned in a text, cashtags first, in order of first mention
+
+        Args:
+            text: Tweet or message text
+            include_names: Also match the full names of known tokens
+
+        Returns:
+            Upper-case symbols, without ignored cashtags
+        """
+        found = dict.fromkeys(cashtag.upper() for cashtag in self.cashtag_regex.findall(text))
+        if include_names and self.names:
+            self._match_names(text, found)
+        return [symbol for symbol in found if symbol not in IGNORE_SYMBOLS]
+
+    def status(self, symbol: str) -> Optional[TokenStatus]:
+        return self.statuses.get(symbol.upper())
+
+    def needs_update(self, symbol: str, now: Optional[datetime] = None) -> bool:
+        """Whether a token is unknown or was not updated within FRESH_FOR"""
+        status = self.status(symbol)
+        if not status or not status.updated_at:
+            return True
+        return (now or datetime.now(timezone.utc)) - status.updated_at > FRESH_FOR
+
+    def classify(self, texts: Iterable[str], include_names: bool = True) -> List[Dict[str, List[str]]]:
+        """
+        Classify the token mentions of many texts in one pass
+
+        Args:
+            texts: Tweet texts
+            include_names: Also match the full names of known tokens
+
+        Returns:
+            One dictionary per text with its 'tokens', split into 'active',
+            'inactive' and 'unknown' (not in TOKENS)
+        """
+        results = []
+        for text in texts:
+            tokens = self.extract(text, include_names)
+            result = {'tokens': tokens, 'active': [], 'inactive': [], 'unknown': []}
+            for symbol in tokens:
+                status = self.statuses.get(symbol)
+                if status is None:
+                    result['unknown'].append(symbol)
+                elif status.is_active:
+                    result['active'].append(symbol)
+                else:
+                    result['inactive'].append(symbol)
+            results.append(result)
+        return results
+
+    def update(self, records: Iterable[Dict]):
+        """Replace the status of the given TOKENS records"""
+        for record in records:
+            fields = record.get('fields', record)
+            if fields.get('token'):
+                status = TokenStatus.from_fields(fields)
+                self.statuses[status.symbol] = status
+
+
+def _tokens_table():
+    from airtable import Airtable
+    table = Airtable(os.getenv('KINKONG_AIRTABLE_BASE_ID'), 'TOKENS', os.getenv('KINKONG_AIRTABLE_API_KEY'))
+    limit_session(table.session, 'airtable')
+    return table
+
+
+_matcher: Optional[TokenMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_token_matcher(max_age: float = DEFAULT_MAX_AGE) -> TokenMatcher:
+    """Process-wide matcher, loaded from TOKENS and reloaded once older than max_age seconds"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None or time.monotonic() - _matcher.loaded_at > max_age:
+            try:
+                records = _tokens_table().get_all(fields=TOKEN_FIELDS)
+                _matcher = TokenMatcher(records)
+                logger.info(f"Loaded token matcher with {len(_matcher.statuses)} tokens and {len(_matcher.names)} names")
+            except Exception as e:
+                logger.error(f"Error loading tokens for matcher: {e}")
+                if _matcher is None:
+                    _matcher = TokenMatcher([])
+                else:
+                    # Keep the previous map rather than failing every lookup until the next reload
+                    _matcher.loaded_at = time.monotonic()
+        return _matcher
+
+
+def refresh_tokens(symbols: List[str]) -> TokenMatcher:
+    """Reload the status of a few tokens, e.g. right after they were updated, in one Airtable query"""
+    matcher = get_token_matcher()
+    symbols = [symbol.upper().replace("'", "") for symbol in symbols]
+    if not symbols:
+        return matcher
+    formula = "OR(" + ",".join(f"{{token}}='{symbol}'" for symbol in symbols) + ")"
+    try:
+        records = _tokens_table().get_all(formula=formula, fields=TOKEN_FIELDS)
+        with _matcher_lock:
+            matcher.update(records)
+    except Exception as e:
+        logger.error(f"Error refreshing token status for {symbols}: {e}")
+    return matcher
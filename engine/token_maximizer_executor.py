@@ -18,6 +18,7 @@ if str(project_root) not in sys.path:
 
 # Import trade executor
 from engine.execute_trade import JupiterTradeExecutor
+from engine.lp.lp_history import LPHistoryStore
 
 def setup_logging():
     """Configure logging with a single handler"""
@@ -98,6 +99,14 @@ class TokenMaximizerExecutor:
             "compute_usdc_lp": 0.0
         }
         
+        # Local LP history written by LPPositionManager
+        self.lp_history = LPHistoryStore()
+        self.lp_history_max_age_hours = 6
+        self.lp_metrics = {}
+        
+        # Skip LP top-ups when an in-range position is within this share of target
+        self.lp_rebalance_tolerance = 0.1
+        
         # Transaction history
         self.transactions = []
         
@@ -534,11 +543,44 @@ class TokenMaximizerExecutor:
     def get_last_rebalance_summary(self) -> Dict:
         """Get the summary of the last rebalance operation"""
         return getattr(self, '_last_rebalance_summary', {})
+
+    def load_lp_history(self) -> Dict[str, Dict]:
+        """
+        Load current LP values, fees and IL from the local LP history
+        Returns an empty dict, leaving LP values untouched, if the last sync is older
+        than lp_history_max_age_hours
+        """
+        try:
+            self.lp_metrics = {}
+            if not self.lp_history.is_fresh(self.lp_history_max_age_hours):
+                self.logger.warning("LP history is missing or stale, not using it for LP decisions")
+                return {}
+            
+            self.lp_metrics = self.lp_history.metrics_by_pair()
+            
+            for lp_name, metrics in self.lp_metrics.items():
+                self.lp_values[lp_name] = metrics['currentValueUsd']
+                self.lp_fees_earned[lp_name] = metrics['realizedFeesUsd']
+                self.logger.info(
+                    f"{lp_name}: ${metrics['currentValueUsd']:.2f} "
+                    f"(IL {metrics['impermanentLossPct']:.2f}%, fees ${metrics['realizedFeesUsd']:.2f}, "
+                    f"{'in range' if metrics['inRange'] else 'out of range'})"
+                )
+            
+            return self.lp_metrics
+            
+        except Exception as e:
+            self.logger.error(f"Error loading LP history: {e}")
+            return {}
+    
     async def process_lp_positions(self, target_allocation: Dict[str, float], portfolio_value: float, dry_run: bool = False) -> bool:
         """Process LP positions based on target allocation"""
         try:
             self.logger.info(f"Processing LP positions {'(DRY RUN)' if dry_run else ''}")
             
+            # Use recorded LP state instead of querying the pools again
+            self.load_lp_history()
+            
             # Get LP allocations from target
             lp_allocations = {
                 "ubc_sol_lp": target_allocation.get("ubc_sol_lp", 0),
@@ -561,6 +603,18 @@ class TokenMaximizerExecutor:
                     self.logger.info(f"Skipping {lp_name} - target value too small: ${target_value:.2f}")
                     continue
                 
+                # Only add the shortfall when an in-range position already exists
+                existing = self.lp_metrics.get(lp_name)
+                if existing and existing['inRange']:
+                    existing_value = existing['currentValueUsd']
+                    if existing_value >= target_value * (1 - self.lp_rebalance_tolerance):
+                        self.logger.info(f"Skipping {lp_name} - existing position ${existing_value:.2f} is within tolerance of ${target_value:.2f}")
+                        continue
+                    target_value -= existing_value
+                    if target_value < 10:
+                        self.logger.info(f"Skipping {lp_name} - top-up too small: ${target_value:.2f}")
+                        continue
+                
                 # Parse LP name to get tokens
                 tokens = lp_name.split('_')
                 token1 = tokens[0]
@@ -634,7 +688,7 @@ class TokenMaximizerExecutor:
                     self.logger.info(f"DRY RUN: Would create {lp_name} with {token1_amount:.6f} {token1.upper()} and {token2_amount:.6f} {token2.upper()}")
                     
                     # Update LP values for dry run simulation
-                    self.lp_values[lp_name] = token1_value + token2_value
+                    self.lp_values[lp_name] = self.lp_values.get(lp_name, 0) + token1_value + token2_value
             
             return True
             
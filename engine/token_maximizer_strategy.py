@@ -9,7 +9,6 @@ from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple, Any
 from dotenv import load_dotenv
 from pathlib import Path
-import anthropic
 
 # Get absolute path to project root
 project_root = Path(__file__).parent.parent.absolute()
@@ -22,6 +21,7 @@ if str(project_root) not in sys.path:
 # Import executor
 from engine.token_maximizer_executor import TokenMaximizerExecutor
 from engine.execute_trade import JupiterTradeExecutor
+from engine.llm_broker import get_broker
 
 def setup_logging():
     """Configure logging with a single handler"""
@@ -66,7 +66,7 @@ class TokenMaximizerStrategy:
         if not self.claude_api_key:
             self.logger.warning("ANTHROPIC_API_KEY not found in environment variables")
         else:
-            self.claude = anthropic.Anthropic(api_key=self.claude_api_key)
+            self.claude = get_broker()
         
         # Token scores (-10 to +10)
         self.ubc_score = 0
@@ -472,8 +472,9 @@ Score {token} on a scale from -10 to +10 relative to SOL for the next 24 hours:
                         }
                     ]
             
-            # Call Claude API
-            response = self.claude.messages.create(
+            # Call Claude API through the shared broker
+            response = await self.claude.acreate_message(
+                caller="token_maximizer.score",
                 model="claude-3-7-sonnet-latest",
                 max_tokens=1000,
                 temperature=0,
@@ -482,7 +483,7 @@ Score {token} on a scale from -10 to +10 relative to SOL for the next 24 hours:
             )
             
             # Extract JSON from response
-            response_text = response.content[0].text
+            response_text = response.text
             
             # Log the response
             response_log_path = self.logs_dir / f"claude_{token.lower()}_response_{timestamp}.txt"
@@ -598,12 +599,12 @@ Score {token} on a scale from -10 to +10 relative to SOL for the next 24 hours:
                 self.logger.warning("No Claude API key available, using default scores")
                 return (0, 0)
             
-            # Make separate calls for each token
-            self.logger.info("Getting UBC score from Claude...")
-            ubc_score = await self.get_token_score_from_claude("UBC")
-            
-            self.logger.info("Getting COMPUTE score from Claude...")
-            compute_score = await self.get_token_score_from_claude("COMPUTE")
+            # Score both tokens concurrently; the broker caps parallel Claude calls
+            self.logger.info("Getting UBC and COMPUTE scores from Claude...")
+            ubc_score, compute_score = await asyncio.gather(
+                self.get_token_score_from_claude("UBC"),
+                self.get_token_score_from_claude("COMPUTE")
+            )
             
             self.logger.info(f"Claude scores - UBC: {ubc_score}, COMPUTE: {compute_score}")
             
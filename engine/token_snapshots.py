@@ -14,8 +14,16 @@ from dotenv import load_dotenv
 import asyncio
 from typing import List, Dict, Optional, Any
 from datetime import timedelta
+from pathlib import Path
 import logging
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.records import TokenSnapshot
+
 # Load environment variables
 load_dotenv()
 
@@ -204,37 +212,38 @@ class TokenSnapshotTaker:
             
             # Calculate metrics
             if historical_snapshots and sol_snapshots:
-                # Token metrics
-                volumes = [float(snap['fields'].get('volume24h', 0)) for snap in historical_snapshots]
-                prices = [float(snap['fields'].get('price', 0)) for snap in historical_snapshots]
+                # Token metrics, parsed once
+                history = TokenSnapshot.array_from_airtable(historical_snapshots)
+                volumes = history['volume24h']
+                prices = history['price']
                 
                 # SOL metrics
-                sol_prices = [float(snap['fields'].get('price', 0)) for snap in sol_snapshots]
+                sol_prices = TokenSnapshot.array_from_airtable(sol_snapshots)['price']
                 
                 # Basic averages
-                volume7d = sum(volumes) / len(volumes)
-                price7dAvg = sum(prices) / len(prices)
+                volume7d = float(volumes.mean())
+                price7dAvg = float(prices.mean())
                 
                 # Calculate trends
                 volume_growth = ((volume24h - volume7d) / volume7d * 100) if volume7d > 0 else 0
                 price_trend = ((current_price - price7dAvg) / price7dAvg * 100) if price7dAvg > 0 else 0
                 
-                # Calculate volatility
-                if len(prices) > 1:
-                    price_changes = [(prices[i] - prices[i-1])/prices[i-1] * 100 for i in range(1, len(prices))]
-                    mean_change = sum(price_changes) / len(price_changes)
-                    squared_diff = sum((x - mean_change) ** 2 for x in price_changes)
-                    volatility = (squared_diff / len(price_changes)) ** 0.5
+                # Calculate volatility, skipping changes from a zero price
+                previous = prices[:-1]
+                valid = previous > 0
+                if valid.any():
+                    price_changes = (prices[1:][valid] - previous[valid]) / previous[valid] * 100
+                    volatility = float(price_changes.std())
                 else:
                     volatility = 0
                     
                 # Calculate vs SOL performance
                 if len(prices) > 1 and len(sol_prices) > 1:
                     # Get first and last prices for both
-                    token_start_price = prices[0]
-                    token_end_price = prices[-1]
-                    sol_start_price = sol_prices[0]
-                    sol_end_price = sol_prices[-1]
+                    token_start_price = float(prices[0])
+                    token_end_price = float(prices[-1])
+                    sol_start_price = float(sol_prices[0])
+                    sol_end_price = float(sol_prices[-1])
                     
                     # Calculate percentage changes
                     token_return = ((token_end_price - token_start_price) / token_start_price) * 100
@@ -1,10 +1,12 @@
 import os
 import sys
 import json
+import time
+import asyncio
 import requests
 import logging
 import traceback
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from airtable import Airtable
 from dotenv import load_dotenv
@@ -15,6 +17,13 @@ project_root = Path(__file__).parent.parent.absolute()
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
+from engine.bounded_pipeline import BoundedPipeline
+from engine.llm_broker import get_broker
+from engine.rate_limits import limit_session, rate_limited_session
+from engine.social_cache import (
+    ACCOUNT_TWEETS, SENTIMENT, TWEET_SEARCHES, get_social_cache, resolve_x_user_id, tweets_digest
+)
+
 def setup_logging():
     """Configure logging with consistent output"""
     # Configure the root logger
@@ -34,6 +43,16 @@ def setup_logging():
 # Initialize logger
 logger = setup_logging()
 
+# Tokens updated more recently than this are skipped by process_all_tokens
+STALE_AFTER = timedelta(hours=72)
+
+# Maximum requests in flight per provider during a bulk refresh
+REFRESH_CONCURRENCY = {
+    'dexscreener': 8,
+    'x': 4,
+    'anthropic': 4
+}
+
 class TokenManager:
     """Manages token data in Airtable with Birdeye and DexScreener integration"""
     
@@ -72,19 +91,7 @@ class TokenManager:
             if token_data and 'xAccount' in token_data:
                 x_account = token_data.get('xAccount')
             
-            # Get tweets - either from account or search for token mentions
-            tweets = []
-            if x_account:
-                logger.info(f"Getting tweets from account @{x_account}")
-                tweets = self.get_account_tweets(x_account, x_bearer_token)
-                
-                if not tweets:
-                    logger.info(f"No tweets found for account @{x_account}, falling back to token search")
-                    # Fall back to token search if no tweets from account
-                    tweets = self.search_token_tweets(token_symbol, x_bearer_token)
-            else:
-                logger.info(f"No X account found for {token_symbol}, searching for token mentions")
-                tweets = self.search_token_tweets(token_symbol, x_bearer_token)
+            tweets = self.get_social_tweets(token_symbol, x_account, x_bearer_token)
             
             if not tweets:
                 logger.info(f"No tweets found for {token_symbol}")
@@ -111,6 +118,31 @@ class TokenManager:
             logger.error(traceback.format_exc())
             return False, f"Error analyzing social signals: {e}"
     
+    def get_social_tweets(self, token_symbol: str, x_account: Optional[str], bearer_token: str) -> List[Dict]:
+        """
+        Get tweets for a token - from its X account if known, otherwise by searching for mentions
+        
+        Args:
+            token_symbol: Token symbol to search for
+            x_account: Optional X account username of the token
+            bearer_token: X/Twitter API bearer token
+            
+        Returns:
+            List of tweet data dictionaries
+        """
+        if x_account:
+            logger.info(f"Getting tweets from account @{x_account}")
+            tweets = self.get_account_tweets(x_account, bearer_token)
+            
+            if not tweets:
+                logger.info(f"No tweets found for account @{x_account}, falling back to token search")
+                # Fall back to token search if no tweets from account
+                tweets = self.search_token_tweets(token_symbol, bearer_token)
+            return tweets
+        
+        logger.info(f"No X account found for {token_symbol}, searching for token mentions")
+        return self.search_token_tweets(token_symbol, bearer_token)
+    
     def __init__(self):
         """Initialize the TokenManager with API credentials"""
         # Load environment variables
@@ -132,6 +164,7 @@ class TokenManager:
         
         # Initialize Airtable client
         self.tokens_table = Airtable(self.airtable_base_id, 'TOKENS', self.airtable_api_key)
+        limit_session(self.tokens_table.session, 'airtable')
         
         logger.info("TokenManager initialized successfully")
     
@@ -177,7 +210,7 @@ class TokenManager:
             }
             
             # Use a shorter timeout for Birdeye (8 seconds instead of 15)
-            response = requests.get(url, params=params, headers=headers, timeout=8)
+            response = rate_limited_session('birdeye').get(url, params=params, headers=headers, timeout=8)
             
             if not response.ok:
                 logger.error(f"Birdeye API error: {response.status_code}")
@@ -227,7 +260,7 @@ class TokenManager:
                 'Accept': 'application/json'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = rate_limited_session('dexscreener').get(url, headers=headers, timeout=10)
             
             if response.ok:
                 data = response.json()
@@ -283,11 +316,14 @@ class TokenManager:
         Returns:
             Tuple of (is_bullish, analysis_text)
         """
+        cache = get_social_cache()
+        cache_key = f"{token_symbol.upper()}|{tweets_digest(tweets[:5])}"
+        cached = cache.get(SENTIMENT, cache_key)
+        if cached is not None:
+            logger.info(f"Using cached sentiment verdict for {token_symbol}")
+            return cached['is_bullish'], cached['analysis']
+        
         try:
-            import anthropic
-            
-            client = anthropic.Client(api_key=api_key)
-            
             # Format tweets for analysis
             tweets_text = "\n\n".join([
                 f"Tweet {i+1}:\n{tweet.get('text', '')}\n"
@@ -328,7 +364,8 @@ class TokenManager:
 
             Start directly with analysis and end with your VERDICT."""
 
-            message = client.messages.create(
+            message = get_broker().create_message(
+                caller="tokens.analyze_sentiment",
                 model="claude-3-7-sonnet-20250219",
                 max_tokens=1000,
                 system=system_prompt,
@@ -340,13 +377,12 @@ class TokenManager:
                 ]
             )
             
-            analysis = message.content[0].text.strip()
+            analysis = message.text.strip()
             
             # Check if analysis ends with a verdict
-            if "VERDICT: BULLISH" in analysis:
-                return True, analysis
-            else:
-                return False, analysis
+            is_bullish = "VERDICT: BULLISH" in analysis
+            cache.set(SENTIMENT, cache_key, {'is_bullish': is_bullish, 'analysis': analysis})
+            return is_bullish, analysis
                 
         except Exception as e:
             logger.error(f"Error analyzing sentiment with Claude: {str(e)}")
@@ -354,7 +390,7 @@ class TokenManager:
     
     def search_token_tweets(self, token_symbol: str, bearer_token: str) -> List[Dict]:
         """
-        Search for tweets mentioning a token
+        Search for tweets mentioning a token, served from the social cache within its TTL
         
         Args:
             token_symbol: Token symbol to search for (without $ prefix)
@@ -363,51 +399,53 @@ class TokenManager:
         Returns:
             List of tweet data dictionaries
         """
-        try:
-            logger.info(f"Searching for tweets mentioning {token_symbol}")
-            
-            headers = {
-                "Authorization": f"Bearer {bearer_token}",
-                "Content-Type": "application/json"
-            }
-            
-            # Search endpoint
-            search_url = "https://api.twitter.com/2/tweets/search/recent"
-            
-            # Search for token without $ prefix
-            query = f"{token_symbol} -is:retweet -is:reply lang:en"
-            
-            params = {
-                "query": query,
-                "max_results": 10,
-                "tweet.fields": "created_at,public_metrics,text",
-                "sort_order": "relevancy"
-            }
-            
-            # Use requests with timeout
-            response = requests.get(search_url, headers=headers, params=params, timeout=15)
-            
-            if not response.ok:
-                logger.error(f"X/Twitter API error: {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                return []
-            
-            data = response.json()
-            tweets = data.get('data', [])
-            
-            logger.info(f"Found {len(tweets)} tweets mentioning ${token_symbol}")
-            return tweets
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"X/Twitter API request timed out")
-            return []
-        except Exception as e:
-            logger.error(f"Error searching tweets for {token_symbol}: {e}")
-            return []
+        # Search for token without $ prefix
+        query = f"{token_symbol} -is:retweet -is:reply lang:en"
+        
+        def load() -> Optional[List[Dict]]:
+            try:
+                logger.info(f"Searching for tweets mentioning {token_symbol}")
+                
+                headers = {
+                    "Authorization": f"Bearer {bearer_token}",
+                    "Content-Type": "application/json"
+                }
+                
+                # Search endpoint
+                search_url = "https://api.twitter.com/2/tweets/search/recent"
+                
+                params = {
+                    "query": query,
+                    "max_results": 10,
+                    "tweet.fields": "created_at,public_metrics,text",
+                    "sort_order": "relevancy"
+                }
+                
+                # Use requests with timeout
+                response = rate_limited_session('x').get(search_url, headers=headers, params=params, timeout=15)
+                
+                if not response.ok:
+                    logger.error(f"X/Twitter API error: {response.status_code}")
+                    logger.error(f"Response: {response.text}")
+                    return None
+                
+                data = response.json()
+                return data.get('data', [])
+                
+            except requests.exceptions.Timeout:
+                logger.error(f"X/Twitter API request timed out")
+                return None
+            except Exception as e:
+                logger.error(f"Error searching tweets for {token_symbol}: {e}")
+                return None
+        
+        tweets = get_social_cache().get_or_load(TWEET_SEARCHES, f"{query}|10", load) or []
+        logger.info(f"Found {len(tweets)} tweets mentioning ${token_symbol}")
+        return tweets
     
     def get_account_tweets(self, x_account: str, bearer_token: str) -> List[Dict]:
         """
-        Get recent tweets from a specific X account with timeout
+        Get recent tweets from a specific X account, served from the social cache within its TTL
         
         Args:
             x_account: X account username (without @)
@@ -416,63 +454,54 @@ class TokenManager:
         Returns:
             List of tweet data dictionaries
         """
-        try:
-            # Remove @ if present in account name
-            x_account = x_account.lstrip('@')
-            
-            logger.info(f"Getting tweets from account @{x_account}")
-            
-            headers = {
-                "Authorization": f"Bearer {bearer_token}",
-                "Content-Type": "application/json"
-            }
-            
-            # First get the user ID
-            user_url = f"https://api.twitter.com/2/users/by/username/{x_account}"
-            
-            # Use requests with timeout
-            user_response = requests.get(user_url, headers=headers, timeout=15)
-            
-            if not user_response.ok:
-                logger.error(f"X/Twitter API error: {user_response.status_code}")
-                logger.error(f"Response: {user_response.text}")
-                return []
-            
-            user_data = user_response.json()
-            user_id = user_data.get('data', {}).get('id')
-            
-            if not user_id:
-                logger.error(f"Could not find user ID for account: @{x_account}")
-                return []
+        # Remove @ if present in account name
+        x_account = x_account.lstrip('@')
+        
+        def load() -> Optional[List[Dict]]:
+            try:
+                logger.info(f"Getting tweets from account @{x_account}")
                 
-            # Then get their tweets
-            tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
-            params = {
-                "max_results": 10,  # Get last 10 tweets
-                "tweet.fields": "created_at,public_metrics,text",
-                "exclude": "retweets,replies"
-            }
-            
-            # Use requests with timeout
-            response = requests.get(tweets_url, headers=headers, params=params, timeout=15)
-            
-            if not response.ok:
-                logger.error(f"X/Twitter API error: {response.status_code}")
-                logger.error(f"Response: {response.text}")
-                return []
-            
-            data = response.json()
-            tweets = data.get('data', [])
-            
-            logger.info(f"Found {len(tweets)} tweets from @{x_account}")
-            return tweets
-            
-        except requests.exceptions.Timeout:
-            logger.error(f"X/Twitter API request timed out")
-            return []
-        except Exception as e:
-            logger.error(f"Error getting tweets for account @{x_account}: {e}")
-            return []
+                # First get the user ID
+                user_id = resolve_x_user_id(x_account, bearer_token)
+                
+                if not user_id:
+                    logger.error(f"Could not find user ID for account: @{x_account}")
+                    return None
+                
+                headers = {
+                    "Authorization": f"Bearer {bearer_token}",
+                    "Content-Type": "application/json"
+                }
+                
+                # Then get their tweets
+                tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
+                params = {
+                    "max_results": 10,  # Get last 10 tweets
+                    "tweet.fields": "created_at,public_metrics,text",
+                    "exclude": "retweets,replies"
+                }
+                
+                # Use requests with timeout
+                response = rate_limited_session('x').get(tweets_url, headers=headers, params=params, timeout=15)
+                
+                if not response.ok:
+                    logger.error(f"X/Twitter API error: {response.status_code}")
+                    logger.error(f"Response: {response.text}")
+                    return None
+                
+                data = response.json()
+                return data.get('data', [])
+                
+            except requests.exceptions.Timeout:
+                logger.error(f"X/Twitter API request timed out")
+                return None
+            except Exception as e:
+                logger.error(f"Error getting tweets for account @{x_account}: {e}")
+                return None
+        
+        tweets = get_social_cache().get_or_load(ACCOUNT_TWEETS, f"{x_account.lower()}|10", load) or []
+        logger.info(f"Found {len(tweets)} tweets from @{x_account}")
+        return tweets
     
     def get_dexscreener_data(self, token_address: str) -> Dict[str, Any]:
         """
@@ -506,7 +535,7 @@ class TokenManager:
                 'Accept': 'application/json'
             }
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = rate_limited_session('dexscreener').get(url, headers=headers, timeout=15)
             
             if not response.ok:
                 logger.error(f"DexScreener API error: {response.status_code}")
@@ -572,6 +601,52 @@ class TokenManager:
             logger.error(traceback.format_exc())
             return result
     
+    def special_token_status(self, symbol: str) -> Optional[tuple[bool, str]]:
+        """
+        Fixed status of a special token
+        
+        Args:
+            symbol: Upper-case token symbol
+            
+        Returns:
+            Tuple of (is_active, explanation), or None if the token needs social analysis
+        """
+        if symbol in self.ALWAYS_ACTIVE_TOKENS:
+            return True, f"{symbol} is a special token - always active"
+        if symbol in self.ALWAYS_INACTIVE_TOKENS:
+            return False, f"{symbol} is a special token - always inactive"
+        return None
+    
+    def build_token_record(self, token_data: Dict[str, Any], dex_data: Dict[str, Any],
+                           is_active: bool, explanation: str) -> Dict[str, Any]:
+        """
+        Build the Airtable fields of a token record
+        
+        Args:
+            token_data: Token data from search_token
+            dex_data: Data from get_dexscreener_data
+            is_active: Whether the token should be active
+            explanation: Social analysis or reason for the status
+            
+        Returns:
+            Dictionary of TOKENS fields
+        """
+        symbol = token_data['symbol'].upper()
+        return {
+            'token': symbol,
+            'name': token_data.get('name', ''),
+            'mint': token_data.get('address', ''),
+            'isActive': is_active,
+            'updatedAt': datetime.now(timezone.utc).isoformat(),
+            'website': dex_data['social_links']['website'],
+            'xAccount': dex_data['social_links']['xAccount'],
+            'telegram': dex_data['social_links']['telegram'],
+            'pair': dex_data['pair'],
+            'image': dex_data['image'],
+            'explanation': explanation,  # Add explanation field
+            'description': f"Token {symbol} on Solana chain"
+        }
+    
     def create_or_update_token(self, token_data: Dict[str, Any]) -> Optional[str]:
         """
         Create or update a token record in Airtable
@@ -591,25 +666,14 @@ class TokenManager:
             symbol = symbol.upper()
             logger.info(f"Creating/updating token record for {symbol}")
             
-            # Get current timestamp
-            current_time = datetime.now(timezone.utc).isoformat()
-            
             # Get additional data from DexScreener
             dex_data = self.get_dexscreener_data(token_data.get('address'))
             
             # Determine if token should be active based on social signals
-            is_active = False  # Default to False
-            explanation = ""
-
-            # Special token handling
-            if symbol in self.ALWAYS_ACTIVE_TOKENS:
-                is_active = True
-                explanation = f"{symbol} is a special token - always active"
-                logger.info(f"{symbol} is a special token - always active")
-            elif symbol in self.ALWAYS_INACTIVE_TOKENS:
-                is_active = False
-                explanation = f"{symbol} is a special token - always inactive"
-                logger.info(f"{symbol} is a special token - always inactive")
+            special_status = self.special_token_status(symbol)
+            if special_status:
+                is_active, explanation = special_status
+                logger.info(explanation)
             else:
                 # Analyze social signals - pass token data with xAccount
                 logger.info(f"Analyzing social signals for {symbol}")
@@ -619,9 +683,7 @@ class TokenManager:
                     'xAccount': dex_data['social_links']['xAccount']
                 }
                 
-                is_bullish, analysis = self.analyze_social_signals(symbol, token_social_data)
-                is_active = is_bullish
-                explanation = analysis
+                is_active, explanation = self.analyze_social_signals(symbol, token_social_data)
                 
                 if is_active:
                     logger.info(f"Setting {symbol} to active based on bullish signals")
@@ -629,20 +691,7 @@ class TokenManager:
                     logger.info(f"Setting {symbol} to inactive based on social analysis")
             
             # Prepare record data
-            airtable_record = {
-                'token': symbol,
-                'name': token_data.get('name', ''),
-                'mint': token_data.get('address', ''),
-                'isActive': is_active,
-                'updatedAt': current_time,
-                'website': dex_data['social_links']['website'],
-                'xAccount': dex_data['social_links']['xAccount'],
-                'telegram': dex_data['social_links']['telegram'],
-                'pair': dex_data['pair'],
-                'image': dex_data['image'],
-                'explanation': explanation,  # Add explanation field
-                'description': f"Token {symbol} on Solana chain"
-            }
+            airtable_record = self.build_token_record(token_data, dex_data, is_active, explanation)
             
             # Log the record we're about to save
             logger.info(f"Saving token record with the following data:")
@@ -665,7 +714,7 @@ class TokenManager:
             else:
                 # Create new record
                 logger.info(f"Creating new token record for {symbol}")
-                airtable_record['createdAt'] = current_time
+                airtable_record['createdAt'] = airtable_record['updatedAt']
                 record = self.tokens_table.insert(airtable_record)
                 logger.info(f"Token record created successfully")
                 return record['id']
@@ -686,6 +735,30 @@ class TokenManager:
             logger.error(f"Error fetching tokens: {e}")
             return []
     
+    @staticmethod
+    def token_age(fields: Dict[str, Any], now: Optional[datetime] = None) -> Optional[timedelta]:
+        """
+        Time since a token record was last updated
+        
+        Args:
+            fields: Airtable fields of the token record
+            now: Reference time, defaults to the current UTC time
+            
+        Returns:
+            Age of the record, or None if updatedAt is missing or invalid
+        """
+        updated_at = fields.get('updatedAt')
+        if not updated_at:
+            return None
+        try:
+            updated_at_dt = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+        except ValueError:
+            logger.warning(f"Invalid updatedAt value {updated_at!r}. Will proceed with update.")
+            return None
+        if updated_at_dt.tzinfo is None:
+            updated_at_dt = updated_at_dt.replace(tzinfo=timezone.utc)
+        return (now or datetime.now(timezone.utc)) - updated_at_dt
+    
     def process_token(self, symbol: str) -> bool:
         """
         Process a single token by symbol
@@ -711,17 +784,11 @@ class TokenManager:
                 try:
                     # Get the token record to check updatedAt
                     token_record = self.tokens_table.get(record_id)
-                    updated_at = token_record['fields'].get('updatedAt')
+                    age = self.token_age(token_record['fields'])
                     
-                    if updated_at:
-                        # Convert to datetime and check if older than 24 hours
-                        from datetime import datetime, timezone, timedelta
-                        updated_at_dt = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-                        age = datetime.now(timezone.utc) - updated_at_dt
-                        
-                        if age < timedelta(hours=72):
-                            logger.info(f"Token {symbol} was updated less than 72 hours ago ({age.total_seconds()/3600:.1f} hours). Skipping.")
-                            return True  # Return success without processing
+                    if age is not None and age < STALE_AFTER:
+                        logger.info(f"Token {symbol} was updated less than 72 hours ago ({age.total_seconds()/3600:.1f} hours). Skipping.")
+                        return True  # Return success without processing
                 except Exception as e:
                     logger.warning(f"Error checking token update time: {e}. Will proceed with update.")
             
@@ -740,9 +807,136 @@ class TokenManager:
             logger.error(traceback.format_exc())
             return False
     
+    def select_tokens_to_refresh(self, records: List[Dict], skip_fresh: bool,
+                                 results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Turn TOKENS records into token data in a single pass, dropping records without a symbol
+        and, if skip_fresh is set, records updated within STALE_AFTER
+        
+        Args:
+            records: TOKENS records from Airtable
+            skip_fresh: Whether to skip recently updated tokens
+            results: Result counters, updated with failures and skips
+            
+        Returns:
+            Token data (as from search_token) of the tokens to refresh
+        """
+        now = datetime.now(timezone.utc)
+        selected = []
+        
+        for token_record in records:
+            fields = token_record['fields']
+            symbol = fields.get('token')
+            
+            if not symbol:
+                logger.warning(f"Token record {token_record['id']} has no symbol, skipping")
+                results['failure'] += 1
+                continue
+            
+            if skip_fresh:
+                age = self.token_age(fields, now)
+                if age is not None and age < STALE_AFTER:
+                    results['skipped'] += 1
+                    continue
+            
+            selected.append({
+                'symbol': symbol,
+                'name': fields.get('name'),
+                'address': fields.get('mint'),
+                'verified': True,
+                'record_id': token_record['id']
+            })
+        
+        return selected
+    
+    async def refresh_tokens(self, records: List[Dict], skip_fresh: bool = False) -> Dict[str, Any]:
+        """
+        Refresh many token records concurrently
+        
+        Each token goes through DexScreener, X and Claude with at most
+        REFRESH_CONCURRENCY[provider] requests in flight per provider, on top
+        of the shared provider rate limiters. Finished records are written back
+        in batches of WRITE_BATCH_SIZE records while the rest are still running.
+        
+        Args:
+            records: TOKENS records from Airtable
+            skip_fresh: Whether to skip tokens updated within STALE_AFTER
+            
+        Returns:
+            Dictionary with success, failure, total and skipped counts, plus
+            'timings' holding the seconds spent in each stage
+        """
+        results = {
+            'success': 0,
+            'failure': 0,
+            'total': len(records),
+            'skipped': 0
+        }
+        pipeline = BoundedPipeline(REFRESH_CONCURRENCY, ['filter', 'dexscreener', 'x', 'claude', 'airtable'],
+                                   'token-refresh')
+        total_start = time.perf_counter()
+        
+        start = time.perf_counter()
+        tokens = self.select_tokens_to_refresh(records, skip_fresh, results)
+        pipeline.timings['filter'] = time.perf_counter() - start
+        logger.info(f"Refreshing {len(tokens)} of {len(records)} tokens "
+                    f"({results['skipped']} fresh, {results['failure']} without symbol)")
+        
+        anthropic_api_key = os.getenv('ANTHROPIC_API_KEY')
+        x_bearer_token = os.getenv('X_BEARER_TOKEN')
+        if not anthropic_api_key:
+            logger.warning("ANTHROPIC_API_KEY not found, skipping sentiment analysis")
+        elif not x_bearer_token:
+            logger.warning("X_BEARER_TOKEN not found, skipping X/Twitter analysis")
+        
+        async def enrich(token_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            symbol = token_data['symbol'].upper()
+            try:
+                dex_data = await pipeline.call('dexscreener', 'dexscreener', self.get_dexscreener_data,
+                                               token_data.get('address'))
+                
+                special_status = self.special_token_status(symbol)
+                if special_status:
+                    is_active, explanation = special_status
+                elif not anthropic_api_key:
+                    is_active, explanation = False, "Sentiment analysis skipped (missing API key)"
+                elif not x_bearer_token:
+                    is_active, explanation = False, "X/Twitter analysis skipped (missing API key)"
+                else:
+                    tweets = await pipeline.call('x', 'x', self.get_social_tweets, symbol,
+                                                 dex_data['social_links']['xAccount'], x_bearer_token)
+                    if tweets:
+                        is_active, explanation = await pipeline.call('claude', 'anthropic',
+                                                                     self.analyze_sentiment_with_claude,
+                                                                     symbol, tweets, anthropic_api_key)
+                    else:
+                        is_active, explanation = False, f"No recent tweets found for {symbol}"
+                
+                logger.info(f"{symbol}: {'active' if is_active else 'inactive'}")
+                return {'id': token_data['record_id'],
+                        'fields': self.build_token_record(token_data, dex_data, is_active, explanation)}
+            except Exception as e:
+                logger.error(f"Error refreshing token {symbol}: {e}")
+                return None
+        
+        def write_batch(batch: List[Dict[str, Any]]) -> int:
+            try:
+                self.tokens_table.batch_update(batch)
+                return len(batch)
+            except Exception as e:
+                logger.error(f"Error writing batch of {len(batch)} token records: {e}")
+                return 0
+        
+        counts = await pipeline.run([enrich(token_data) for token_data in tokens], write_batch)
+        results['success'] += counts['success']
+        results['failure'] += counts['failure']
+        
+        results['timings'] = pipeline.report(logger, time.perf_counter() - total_start)
+        return results
+    
     def process_all_tokens(self) -> Dict[str, int]:
         """
-        Process all tokens in the database
+        Process all tokens in the database that were not updated in the last 72 hours
         
         Returns:
             Dictionary with success and failure counts
@@ -757,56 +951,9 @@ class TokenManager:
         try:
             # Get all tokens
             tokens = self.get_all_tokens()
-            results['total'] = len(tokens)
             
             logger.info(f"Processing {len(tokens)} tokens")
-            
-            for token_record in tokens:
-                try:
-                    symbol = token_record['fields'].get('token')
-                    
-                    if not symbol:
-                        logger.warning(f"Token record {token_record['id']} has no symbol, skipping")
-                        results['failure'] += 1
-                        continue
-                    
-                    # Check when the token was last updated
-                    updated_at = token_record['fields'].get('updatedAt')
-                    if updated_at:
-                        # Convert to datetime and check if older than 24 hours
-                        from datetime import datetime, timezone, timedelta
-                        updated_at_dt = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-                        age = datetime.now(timezone.utc) - updated_at_dt
-                        
-                        if age < timedelta(hours=72):
-                            logger.info(f"Token {symbol} was updated less than 72 hours ago ({age.total_seconds()/3600:.1f} hours). Skipping.")
-                            results['skipped'] += 1
-                            continue
-                    
-                    logger.info(f"Processing token {symbol}")
-                    
-                    # Create token data from record
-                    token_data = {
-                        'symbol': symbol,
-                        'name': token_record['fields'].get('name'),
-                        'address': token_record['fields'].get('mint'),
-                        'verified': True,
-                        'record_id': token_record['id']
-                    }
-                    
-                    # Update token record
-                    record_id = self.create_or_update_token(token_data)
-                    
-                    if record_id:
-                        logger.info(f"Token {symbol} updated successfully")
-                        results['success'] += 1
-                    else:
-                        logger.error(f"Failed to update token {symbol}")
-                        results['failure'] += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error processing token record: {e}")
-                    results['failure'] += 1
+            results = asyncio.run(self.refresh_tokens(tokens, skip_fresh=True))
             
             logger.info(f"Processed {results['total']} tokens: {results['success']} successful, {results['failure']} failed, {results['skipped']} skipped")
             return results
@@ -834,43 +981,9 @@ class TokenManager:
             # Get all active tokens
             logger.info("Fetching active tokens from Airtable")
             records = self.tokens_table.get_all(formula="{isActive}=1")
-            results['total'] = len(records)
             
             logger.info(f"Found {len(records)} active tokens to refresh")
-            
-            for token_record in records:
-                try:
-                    symbol = token_record['fields'].get('token')
-                    
-                    if not symbol:
-                        logger.warning(f"Token record {token_record['id']} has no symbol, skipping")
-                        results['failure'] += 1
-                        continue
-                    
-                    logger.info(f"Refreshing active token {symbol}")
-                    
-                    # Create token data from record
-                    token_data = {
-                        'symbol': symbol,
-                        'name': token_record['fields'].get('name'),
-                        'address': token_record['fields'].get('mint'),
-                        'verified': True,
-                        'record_id': token_record['id']
-                    }
-                    
-                    # Update token record
-                    record_id = self.create_or_update_token(token_data)
-                    
-                    if record_id:
-                        logger.info(f"Token {symbol} refreshed successfully")
-                        results['success'] += 1
-                    else:
-                        logger.error(f"Failed to refresh token {symbol}")
-                        results['failure'] += 1
-                        
-                except Exception as e:
-                    logger.error(f"Error refreshing token record: {e}")
-                    results['failure'] += 1
+            results = asyncio.run(self.refresh_tokens(records))
             
             logger.info(f"Refreshed {results['total']} active tokens: {results['success']} successful, {results['failure']} failed")
             return results
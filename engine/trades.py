@@ -53,6 +53,8 @@ from solana.rpc.commitment import Commitment
 import base58
 from spl.token.constants import TOKEN_PROGRAM_ID
 from spl.token.instructions import get_associated_token_address
+from engine.rate_limits import get_rate_limiter, limit_session, rate_limited_session
+from engine.records import Trade
 
 def setup_logging():
     """Configure logging with a single handler"""
@@ -113,6 +115,8 @@ class TradeExecutor:
         self.api_key = os.getenv('KINKONG_AIRTABLE_API_KEY')
         self.signals_table = Airtable(self.base_id, 'SIGNALS', self.api_key)
         self.trades_table = Airtable(self.base_id, 'TRADES', self.api_key)
+        limit_session(self.signals_table.session, 'airtable')
+        limit_session(self.trades_table.session, 'airtable')
         self.logger = setup_logging()
         
         # Initialize Jupiter trade executor
@@ -247,7 +251,7 @@ class TradeExecutor:
                 'Accept': 'application/json'
             }
             
-            response = requests.get(url, headers=headers)
+            response = rate_limited_session('dexscreener').get(url, headers=headers)
             if not response.ok:
                 self.logger.error(f"{RED}❌ DexScreener API error: {response.status_code}{ENDC}")
                 return False
@@ -305,8 +309,11 @@ class TradeExecutor:
                 'accept': 'application/json'
             }
             
+            birdeye = get_rate_limiter('birdeye')
+            await birdeye.acquire()
             async with aiohttp.ClientSession() as session:
                 async with session.get(url, headers=headers) as response:
+                    birdeye.update(response.status, response.headers)
                     if response.status == 200:
                         data = await response.json()
                         if data.get('success'):
@@ -318,8 +325,11 @@ class TradeExecutor:
             self.logger.info(f"Falling back to DexScreener for {token_mint}")
             dexscreener_url = f"https://api.dexscreener.com/latest/dex/tokens/{token_mint}"
             
+            dexscreener = get_rate_limiter('dexscreener')
+            await dexscreener.acquire()
             async with aiohttp.ClientSession() as session:
                 async with session.get(dexscreener_url) as response:
+                    dexscreener.update(response.status, response.headers)
                     if response.status == 200:
                         data = await response.json()
                         pairs = data.get('pairs', [])
@@ -564,9 +574,10 @@ class TradeExecutor:
                 return None
 
             # Get trade parameters
-            entry_price = float(trade['fields'].get('price', 0))
-            target_price = float(trade['fields'].get('targetPrice', 0))
-            stop_loss = float(trade['fields'].get('stopLoss', 0))
+            record = Trade.from_airtable(trade)
+            entry_price = record.price
+            target_price = record.targetPrice
+            stop_loss = record.stopLoss
             
             # Calculate percentages
             price_change_pct = ((current_price - entry_price) / entry_price * 100) if entry_price > 0 else 0
@@ -601,7 +612,7 @@ class TradeExecutor:
                 self.logger.info(f"Take Profit: Need {GREEN}+{((target_price/current_price)-1)*100:.2f}%{ENDC} more")
             
             # Check stop loss - handle differently for BUY vs SELL trades
-            trade_type = trade['fields'].get('type', 'BUY')
+            trade_type = record.type or 'BUY'
             if (trade_type == 'BUY' and current_price <= stop_loss) or (trade_type == 'SELL' and current_price >= stop_loss):
                 self.logger.info(f"{RED}⚠️ Stop loss triggered!{ENDC}")
                 return "STOP_LOSS"
@@ -613,7 +624,7 @@ class TradeExecutor:
             
             # Check if we've reached minimum profit target for SCALP trades
             price_change_pct = ((current_price - entry_price) / entry_price * 100)
-            timeframe = trade['fields'].get('timeframe', '')
+            timeframe = record.timeframe
             
             # Only apply minimum profit target to SCALP trades
             if timeframe == 'SCALP' and price_change_pct >= 12.0:
@@ -649,8 +660,11 @@ class TradeExecutor:
                 'wallet': self.wallet_address
             }
 
+            birdeye = get_rate_limiter('birdeye')
+            await birdeye.acquire()
             async with aiohttp.ClientSession() as session:
                 async with session.get(url, headers=headers, params=params) as response:
+                    birdeye.update(response.status, response.headers)
                     if response.status == 200:
                         data = await response.json()
                         if data.get('success'):
@@ -1035,8 +1049,6 @@ class TradeExecutor:
                 except Exception as e:
                     self.logger.error(f"Error processing trade {trade['id']}: {e}")
                     continue
-                
-                await asyncio.sleep(2)  # Delay between trades
 
             # Then check for new signals
             self.logger.info("Checking for active signals...")
@@ -1068,8 +1080,6 @@ class TradeExecutor:
                     self.logger.error(f"Error processing signal {signal['id']}: {e}")
                     continue
 
-                await asyncio.sleep(2)  # Delay between signals
-
             self.logger.info("✅ Finished processing all trades and signals")
 
         except Exception as e:
@@ -1129,8 +1139,6 @@ class TradeExecutor:
                     self.logger.error(f"Error processing trade {trade['id']}: {e}")
                     continue
                 
-                await asyncio.sleep(2)  # Delay between trades
-                
             self.logger.info("✅ Finished monitoring existing trades")
             
         except Exception as e:
@@ -1168,8 +1176,6 @@ class TradeExecutor:
                     self.logger.error(f"Error processing signal {signal['id']}: {e}")
                     continue
 
-                await asyncio.sleep(2)  # Delay between signals
-
             self.logger.info("✅ Finished opening new trades")
             
         except Exception as e:
@@ -1202,8 +1208,6 @@ class TradeExecutor:
                     self.logger.error(f"Error processing trade {trade['id']}: {e}")
                     continue
                 
-                await asyncio.sleep(2)  # Delay between trades
-                
             self.logger.info("✅ Finished checking trades for exit conditions")
             
         except Exception as e:
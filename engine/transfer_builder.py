@@ -0,0 +1,225 @@
+"""
+Transfer Builder
+
+Builds, signs and submits SPL token transfers in-process with solders
+instructions. The recent blockhash is cached for its validity window and all
+RPC calls share one pooled session, so a transfer costs a couple of round
+trips instead of an interpreter start. Transfers can be prepared ahead of time
+and submitted later; a prepared transfer whose blockhash has gone stale is
+re-signed with a fresh one on submission.
+"""
+
+import sys
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from solders.hash import Hash
+from solders.instruction import Instruction
+from solders.keypair import Keypair
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from solders.transaction import Transaction
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.batch_payouts import (
+    CREATE_ACCOUNT_COMPUTE_UNITS,
+    TRANSFER_COMPUTE_UNITS,
+    SolanaRpc,
+    budget_instructions,
+    create_account_instruction,
+    transfer_instruction
+)
+
+logger = logging.getLogger(__name__)
+
+# A blockhash stays valid for 150 blocks (~60s); refresh well before that
+BLOCKHASH_MAX_AGE = 30
+
+
+class BlockhashCache:
+    """Latest blockhash, refetched only once it is older than max_age seconds"""
+
+    def __init__(self, rpc: SolanaRpc, max_age: float = BLOCKHASH_MAX_AGE):
+        self.rpc = rpc
+        self.max_age = max_age
+        self.blockhash: Optional[Hash] = None
+        self.last_valid_block_height = 0
+        self.fetched_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def is_fresh(self, blockhash: Optional[Hash] = None) -> bool:
+        """Whether the cached blockhash (or the given one, if it is the cached one) is still usable"""
+        if self.blockhash is None or time.monotonic() - self.fetched_at > self.max_age:
+            return False
+        return blockhash is None or blockhash == self.blockhash
+
+    def invalidate(self):
+        self.blockhash = None
+
+    async def get(self) -> Tuple[Hash, int]:
+        if self.is_fresh():
+            return self.blockhash, self.last_valid_block_height
+
+        # One refresh at a time; concurrent callers reuse its result
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+
+        async with self._lock:
+            if not self.is_fresh():
+                self.blockhash, self.last_valid_block_height = await self.rpc.get_latest_blockhash()
+                self.fetched_at = time.monotonic()
+        return self.blockhash, self.last_valid_block_height
+
+
+@dataclass
+class PreparedTransfer:
+    """A signed transfer ready for submission"""
+    destination: str
+    mint: str
+    units: int
+    instructions: List[Instruction]
+    transaction: Transaction
+    blockhash: Hash
+
+    @property
+    def signature(self) -> str:
+        return str(self.transaction.signatures[0])
+
+
+class TransferBuilder:
+    """In-process SPL transfer builder sharing one RPC session and blockhash cache"""
+
+    def __init__(self, rpc_url: str, keypair: Keypair, compute_unit_price: int = 0):
+        self.keypair = keypair
+        self.payer = keypair.pubkey()
+        self.compute_unit_price = compute_unit_price
+        self.rpc = SolanaRpc(rpc_url)
+        self.blockhashes = BlockhashCache(self.rpc)
+
+        # Token accounts already seen on chain
+        self._known_accounts = set()
+
+    async def close(self):
+        await self.rpc.close()
+
+    def _sign(self, instructions: List[Instruction], blockhash: Hash) -> Transaction:
+        message = Message.new_with_blockhash(instructions, self.payer, blockhash)
+        return Transaction([self.keypair], message, blockhash)
+
+    def build_instructions(self, destination_wallet: str, mint: str, units: int,
+                           create_account: bool = False) -> List[Instruction]:
+        """Compute budget, optional account creation and transfer instructions"""
+        mint_key = Pubkey.from_string(mint)
+        owner = Pubkey.from_string(destination_wallet)
+        source = get_associated_token_address(self.payer, mint_key)
+        destination = get_associated_token_address(owner, mint_key)
+
+        compute_units = TRANSFER_COMPUTE_UNITS + (CREATE_ACCOUNT_COMPUTE_UNITS if create_account else 0)
+        instructions = budget_instructions(compute_units, self.compute_unit_price)
+        if create_account:
+            instructions.append(create_account_instruction(self.payer, owner, mint_key))
+        instructions.append(transfer_instruction(source, destination, self.payer, units))
+        return instructions
+
+    async def missing_accounts(self, transfers: List[Tuple[str, str, int]]) -> set:
+        """Destination token accounts that do not exist yet, checked in one request"""
+        addresses = {
+            str(get_associated_token_address(Pubkey.from_string(wallet), Pubkey.from_string(mint)))
+            for wallet, mint, _ in transfers
+        }
+        unknown = [address for address in addresses if address not in self._known_accounts]
+        if not unknown:
+            return set()
+
+        existing = await self.rpc.get_existing_accounts(unknown)
+        self._known_accounts.update(existing)
+        return set(unknown) - existing
+
+    async def prepare(self, transfers: List[Tuple[str, str, int]]) -> List[PreparedTransfer]:
+        """
+        Build and sign many transfers ahead of submission
+
+        Args:
+            transfers: (destination_wallet, mint, units) tuples
+
+        Returns:
+            list: PreparedTransfer per input, in order
+        """
+        missing = await self.missing_accounts(transfers)
+        blockhash, _ = await self.blockhashes.get()
+
+        prepared = []
+        for wallet, mint, units in transfers:
+            destination = str(get_associated_token_address(Pubkey.from_string(wallet), Pubkey.from_string(mint)))
+            instructions = self.build_instructions(wallet, mint, units, create_account=destination in missing)
+            prepared.append(PreparedTransfer(
+                destination=wallet,
+                mint=mint,
+                units=units,
+                instructions=instructions,
+                transaction=self._sign(instructions, blockhash),
+                blockhash=blockhash
+            ))
+        return prepared
+
+    async def submit(self, prepared: PreparedTransfer) -> str:
+        """Send a prepared transfer, re-signing it first if its blockhash went stale"""
+        if not self.blockhashes.is_fresh(prepared.blockhash):
+            blockhash, _ = await self.blockhashes.get()
+            prepared.transaction = self._sign(prepared.instructions, blockhash)
+            prepared.blockhash = blockhash
+
+        await self.rpc.send_transaction(prepared.transaction)
+        return prepared.signature
+
+    async def submit_many(self, prepared: List[PreparedTransfer], max_concurrency: int = 4) -> Dict[str, object]:
+        """Submit prepared transfers concurrently; maps signature to None or the send error"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        results = {}
+
+        async def send(transfer: PreparedTransfer):
+            async with semaphore:
+                try:
+                    results[await self.submit(transfer)] = None
+                except Exception as e:
+                    logger.error(f"Transfer to {transfer.destination} failed: {e}")
+                    results[transfer.signature] = e
+
+        await asyncio.gather(*(send(transfer) for transfer in prepared))
+        return results
+
+    async def confirm(self, signature: str, timeout: float = 60, poll_interval: float = 1) -> bool:
+        """Poll until the signature is confirmed; raises if it failed on chain"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = (await self.rpc.get_signature_statuses([signature])).get(signature)
+            if status:
+                if status.get('err'):
+                    raise ValueError(f"Transaction {signature} failed: {status['err']}")
+                if status.get('confirmationStatus') in ('confirmed', 'finalized'):
+                    return True
+            await asyncio.sleep(poll_interval)
+        return False
+
+    async def transfer(self, destination_wallet: str, mint: str, units: int, timeout: float = 60) -> Tuple[str, bool]:
+        """Prepare, send and confirm a single transfer; returns (signature, confirmed)"""
+        prepared = (await self.prepare([(destination_wallet, mint, units)]))[0]
+        signature = await self.submit(prepared)
+        confirmed = await self.confirm(signature, timeout=timeout)
+        if confirmed:
+            self._known_accounts.add(str(get_associated_token_address(
+                Pubkey.from_string(destination_wallet), Pubkey.from_string(mint)
+            )))
+        return signature, confirmed
@@ -0,0 +1,351 @@
+"""
+Performance Charts
+
+Headless renderer for the figures of the signal performance report.
+
+Each chart is the plain data it is drawn from plus a drawing function. The
+data is extracted from the signals and metrics in the calling process.
+Charts are drawn with the object-oriented matplotlib API on the Agg backend,
+one figure per process-pool worker, so no pyplot state is shared. Report
+time therefore shrinks with the number of cores.
+
+A manifest in the output directory records the hash of each chart's data.
+A chart is skipped when its data is unchanged and its image still exists.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT_DIR = 'public/performances'
+MANIFEST_NAME = '.charts.json'
+
+# Bump when the drawing code changes, so existing images are redrawn
+CHART_VERSION = 1
+
+TIMEFRAME_LABELS = ['SCALP', 'INTRADAY', 'SWING', 'POSITION']
+
+
+def _values(values) -> List[float]:
+    """Plain floats, so chart data pickles cheaply and hashes the same across runs"""
+    return [float(value) for value in values]
+
+
+def _label_bars(ax, bars):
+    """Value labels on top of bars"""
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height + 0.1, f'{height:.2f}',
+                ha='center', va='bottom', color='white')
+
+
+def _draw_signal_types(ax, data):
+    ax.pie(data['counts'], labels=['BUY', 'SELL'], autopct='%1.1f%%', colors=['#4CAF50', '#F44336'],
+           startangle=90)
+    ax.set_title('Signal Type Distribution')
+
+
+def _draw_confidence(ax, data):
+    import seaborn as sns
+    labels = ['HIGH', 'MEDIUM', 'LOW']
+    sns.barplot(x=labels, y=data['counts'], hue=labels, palette=['#4CAF50', '#FFC107', '#F44336'],
+                legend=False, ax=ax)
+    ax.set_title('Confidence Level Distribution')
+    ax.set_xlabel('Confidence Level')
+    ax.set_ylabel('Number of Signals')
+
+
+def _draw_timeframes(ax, data):
+    import seaborn as sns
+    sns.barplot(x=TIMEFRAME_LABELS, y=data['counts'], hue=TIMEFRAME_LABELS, palette='viridis',
+                legend=False, ax=ax)
+    ax.set_title('Timeframe Distribution')
+    ax.set_xlabel('Timeframe')
+    ax.set_ylabel('Number of Signals')
+
+
+def _draw_return_distribution(ax, data):
+    import seaborn as sns
+    returns_df = pd.DataFrame({
+        'Expected Return': pd.Series(data['expected'], dtype=float),
+        'Actual Return': pd.Series(data['actual'], dtype=float)
+    })
+    sns.boxplot(data=returns_df, ax=ax)
+    ax.set_title('Expected vs Actual Return Distribution')
+    ax.set_ylabel('Return (%)')
+
+
+def _draw_success_by_timeframe(ax, data):
+    ax.bar(data['timeframes'], data['success_rates'], color='#2196F3')
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.set_title('Success Rate by Timeframe')
+    ax.set_xlabel('Timeframe')
+    ax.set_ylabel('Success Rate (%)')
+
+
+def _draw_return_by_token(ax, data):
+    import seaborn as sns
+    sns.barplot(x=data['tokens'], y=data['returns'], hue=data['tokens'], palette='viridis', legend=False, ax=ax)
+    ax.set_title('Average Return by Token (Top 10)')
+    ax.set_xlabel('Token')
+    ax.set_ylabel('Average Return (%)')
+    ax.tick_params(axis='x', labelrotation=45)
+
+
+def _draw_weekly_performance(ax, data):
+    ax.plot(data['weeks'], data['returns'], marker='o', linestyle='-', color='#2196F3')
+    ax.axhline(y=0, color='r', linestyle='--', alpha=0.3)
+    ax.set_title('Weekly Performance Trend')
+    ax.set_xlabel('Week Number')
+    ax.set_ylabel('Average Return (%)')
+    ax.grid(True, alpha=0.3)
+
+
+def _draw_risk_return(ax, data):
+    bars = ax.bar(['Sharpe Ratio', 'Win/Loss Ratio', 'Profit Factor', 'Recovery Factor'], data['values'],
+                  color='#4CAF50')
+    ax.set_title('Risk-Return Metrics')
+    ax.set_ylabel('Value')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    _label_bars(ax, bars)
+
+
+def _draw_consistency(ax, data):
+    labels = ['Positive Returns %', 'Max Consecutive Wins', 'Max Consecutive Losses', 'Avg Win %', 'Avg Loss %']
+    colors = ['#4CAF50', '#2196F3', '#F44336', '#4CAF50', '#F44336']
+    bars = ax.bar(labels, data['values'], color=colors)
+    ax.set_title('Consistency Metrics')
+    ax.set_ylabel('Value')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.tick_params(axis='x', labelrotation=45)
+    _label_bars(ax, bars)
+
+
+# Image filename to figure size and drawing function
+CHARTS: Dict[str, tuple] = {
+    'signal_type_distribution.png': ((10, 6), _draw_signal_types),
+    'confidence_distribution.png': ((10, 6), _draw_confidence),
+    'timeframe_distribution.png': ((10, 6), _draw_timeframes),
+    'return_distribution.png': ((10, 6), _draw_return_distribution),
+    'success_by_timeframe.png': ((10, 6), _draw_success_by_timeframe),
+    'return_by_token.png': ((12, 8), _draw_return_by_token),
+    'weekly_performance.png': ((12, 6), _draw_weekly_performance),
+    'risk_return_metrics.png': ((10, 6), _draw_risk_return),
+    'consistency_metrics.png': ((10, 6), _draw_consistency),
+}
+
+
+def chart_data(df: pd.DataFrame, metrics: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Data behind each report chart
+
+    Args:
+        df: Prepared signals of the report period
+        metrics: Metrics from compute_metrics
+
+    Returns:
+        Image filename to the plain data the chart is drawn from; charts
+        without the data they need are left out
+    """
+    charts = {}
+
+    # 1. Signal Type Distribution (Pie Chart)
+    if 'buy_signals' in metrics and 'sell_signals' in metrics:
+        charts['signal_type_distribution.png'] = {
+            'counts': _values([metrics['buy_signals'], metrics['sell_signals']])}
+
+    # 2. Confidence Level Distribution (Bar Chart)
+    if all(key in metrics for key in ['high_confidence', 'medium_confidence', 'low_confidence']):
+        charts['confidence_distribution.png'] = {'counts': _values(
+            [metrics['high_confidence'], metrics['medium_confidence'], metrics['low_confidence']])}
+
+    # 3. Timeframe Distribution (Bar Chart)
+    if all(f'{timeframe.lower()}_signals' in metrics for timeframe in TIMEFRAME_LABELS):
+        charts['timeframe_distribution.png'] = {'counts': _values(
+            metrics[f'{timeframe.lower()}_signals'] for timeframe in TIMEFRAME_LABELS)}
+
+    # 4. Expected vs Actual Return (Box Plot)
+    if 'expectedReturn' in df.columns and 'actualReturn' in df.columns:
+        charts['return_distribution.png'] = {
+            'expected': _values(df['expectedReturn'].dropna()),
+            'actual': _values(df['actualReturn'].dropna())
+        }
+
+    # 6. Success Rate by Timeframe (Bar Chart)
+    if 'timeframe' in df.columns and 'isSuccessful' in df.columns:
+        success_by_timeframe = df.groupby('timeframe')['isSuccessful'].mean() * 100
+        charts['success_by_timeframe.png'] = {
+            'timeframes': [str(timeframe) for timeframe in success_by_timeframe.index],
+            'success_rates': _values(success_by_timeframe)
+        }
+
+    # 7. Average Return by Token (Top 10)
+    if 'token' in df.columns and 'actualReturn' in df.columns:
+        token_returns = df.groupby('token')['actualReturn'].agg(['mean', 'count'])
+        token_returns = token_returns[token_returns['count'] >= 3]  # At least 3 signals
+        token_returns = token_returns.sort_values('mean', ascending=False).head(10)
+        charts['return_by_token.png'] = {
+            'tokens': [str(token) for token in token_returns.index],
+            'returns': _values(token_returns['mean'])
+        }
+
+    # 8. Weekly Performance Trend
+    if 'weekly_performance' in metrics:
+        charts['weekly_performance.png'] = {
+            'weeks': [str(week) for week in metrics['weekly_performance']],
+            'returns': _values(metrics['weekly_performance'].values())
+        }
+
+    # 9. Risk-Return Metrics, capping very high values for better visualization
+    risk_metrics = [metrics.get(key, 0) for key in ['sharpe_ratio', 'win_loss_ratio', 'profit_factor',
+                                                   'recovery_factor']]
+    charts['risk_return_metrics.png'] = {'values': _values(min(x, 5) if x > 5 else x for x in risk_metrics)}
+
+    # 10. Consistency Metrics
+    charts['consistency_metrics.png'] = {'values': _values([
+        metrics.get('positive_return_percentage', 0),
+        metrics.get('max_consecutive_wins', 0),
+        metrics.get('max_consecutive_losses', 0),
+        metrics.get('average_win', 0),
+        abs(metrics.get('average_loss', 0))
+    ])}
+
+    return charts
+
+
+def chart_hash(name: str, data: Dict[str, Any]) -> str:
+    """Hash of a chart's data and drawing code version"""
+    encoded = json.dumps({'chart': name, 'version': CHART_VERSION, 'data': data}, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_chart(name: str, data: Dict[str, Any], output_dir: str) -> str:
+    """
+    Draw one chart and save it; runs in a pool worker
+
+    Args:
+        name: Image filename, a key of CHARTS
+        data: Data from chart_data
+        output_dir: Directory to save the image to
+
+    Returns:
+        Path of the saved image
+    """
+    import seaborn as sns
+
+    figsize, draw = CHARTS[name]
+    style = {**sns.plotting_context('notebook'), **sns.axes_style('darkgrid'), 'font.size': 12}
+    output_path = os.path.join(output_dir, name)
+    with matplotlib.rc_context(style):
+        fig = Figure(figsize=figsize)
+        ax = fig.add_subplot()
+        draw(ax, data)
+        fig.tight_layout()
+        # Write beside the target first so readers never see a half-written image
+        tmp_path = f"{output_path}.tmp"
+        fig.savefig(tmp_path, format='png')
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class ChartManifest:
+    """Hash of the data each chart image in a directory was drawn from"""
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.output_dir / MANIFEST_NAME
+        try:
+            self.hashes = json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.hashes = {}
+
+    def is_current(self, name: str, data_hash: str) -> bool:
+        return self.hashes.get(name) == data_hash and (self.output_dir / name).exists()
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.hashes, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.path)
+
+
+def render_charts(charts: Dict[str, Dict[str, Any]], output_dir: str = DEFAULT_OUTPUT_DIR,
+                  max_workers: Optional[int] = None, force: bool = False) -> Dict[str, List[str]]:
+    """
+    Render the charts whose data changed since they were last drawn
+
+    Args:
+        charts: Image filename to data, from chart_data
+        output_dir: Directory the images and manifest live in
+        max_workers: Worker processes, defaults to the number of cores
+        force: Redraw every chart even if its data is unchanged
+
+    Returns:
+        Dictionary with the 'rendered', 'skipped' and 'failed' image filenames
+    """
+    start = time.perf_counter()
+    manifest = ChartManifest(output_dir)
+    hashes = {name: chart_hash(name, data) for name, data in charts.items()}
+    pending = [name for name in charts if force or not manifest.is_current(name, hashes[name])]
+    result = {'rendered': [], 'skipped': [name for name in charts if name not in pending], 'failed': []}
+
+    done = set()
+
+    def finish(name: str, error: Optional[BaseException] = None):
+        done.add(name)
+        if error is None:
+            manifest.hashes[name] = hashes[name]
+            result['rendered'].append(name)
+        else:
+            logger.error(f"Error rendering {name}: {error}")
+            manifest.hashes.pop(name, None)
+            result['failed'].append(name)
+
+    workers = min(len(pending), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(render_chart, name, charts[name], str(output_dir)): name
+                           for name in pending}
+                for future in as_completed(futures):
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        raise error
+                    finish(futures[future], error)
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Process pool unavailable, rendering the remaining charts in this process: {e}")
+
+    # Single chart, single core, or whatever the pool did not get to
+    for name in pending:
+        if name in done:
+            continue
+        try:
+            render_chart(name, charts[name], str(output_dir))
+            finish(name)
+        except Exception as e:
+            finish(name, e)
+    manifest.save()
+
+    logger.info(f"Rendered {len(result['rendered'])} charts with {max(workers, 1)} workers, "
+                f"skipped {len(result['skipped'])} unchanged, {len(result['failed'])} failed "
+                f"in {time.perf_counter() - start:.1f}s")
+    return result
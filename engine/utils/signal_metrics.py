@@ -0,0 +1,417 @@
+"""
+Signal Metrics
+
+Vectorized performance metrics for closed signals, and a local store the
+signals are synced into incrementally.
+
+The store keeps completed HIGH confidence BUY signals in SQLite under data/.
+After the first full sync, each sync only asks Airtable for signals modified
+since the previous one. Newly closed signals therefore arrive without
+refetching the whole window, and modified signals that no longer qualify are
+removed. A periodic full resync also removes signals deleted in Airtable.
+
+Metrics use column operations only, with no row-wise apply. Rolling windows
+(7/30/90 days and all time) come from one pass of cumulative sums over the
+signals sorted by creation time. After that, each window's counts, sums and
+derived ratios are a difference of two prefix-sum rows, and only its
+drawdown needs a scan of the window itself.
+"""
+
+import sys
+import time
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'signal_performance.db'
+
+# Completed signals the performance report covers
+SIGNAL_FILTER = "NOT(actualReturn = 0), NOT(actualReturn = ''), type='BUY', confidence='HIGH'"
+
+SIGNAL_FIELDS = ['token', 'type', 'timeframe', 'confidence', 'entryPrice', 'targetPrice', 'stopLoss',
+                 'actualReturn', 'createdAt']
+
+# Rolling windows reported alongside the main period, in days (None for all time)
+WINDOWS = {'7d': 7, '30d': 30, '90d': 90, 'all': None}
+
+# Seconds of overlap between syncs, so records modified while a sync ran are not missed
+SYNC_OVERLAP = 300
+
+# Seconds between full resyncs, which drop signals deleted in Airtable
+FULL_SYNC_INTERVAL = 24 * 3600
+
+TIMEFRAMES = ['SCALP', 'INTRADAY', 'SWING', 'POSITION']
+
+
+def prepare_signals(df: pd.DataFrame) -> pd.DataFrame:
+    """Type the signal columns and add expectedReturn and isSuccessful with column operations"""
+    df = df.copy()
+    if 'createdAt' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['createdAt']):
+        df['createdAt'] = pd.to_datetime(df['createdAt'], utc=True)
+
+    for col in ['entryPrice', 'targetPrice', 'stopLoss', 'actualReturn']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Calculate expected return based on entry and target prices
+    if all(col in df.columns for col in ['entryPrice', 'targetPrice', 'type']):
+        move = (df['targetPrice'] - df['entryPrice']) / df['entryPrice'] * 100
+        df['expectedReturn'] = np.where(df['type'] == 'BUY', move, -move)
+
+    if 'actualReturn' in df.columns:
+        df['isSuccessful'] = df['actualReturn'] > 0
+    return df
+
+
+def is_completed_signal(fields: Dict) -> bool:
+    """Whether a signal's fields match SIGNAL_FILTER"""
+    try:
+        actual_return = float(fields.get('actualReturn'))
+    except (TypeError, ValueError):
+        return False
+    return actual_return != 0 and fields.get('type') == 'BUY' and fields.get('confidence') == 'HIGH'
+
+
+def max_drawdown(returns: np.ndarray) -> float:
+    """Largest peak-to-trough fall, in percent, of returns compounded in order"""
+    if returns.size == 0:
+        return 0.0
+    equity = np.cumprod(1 + returns / 100)
+    drawdown = (equity / np.maximum.accumulate(equity) - 1) * 100
+    return float(abs(drawdown.min()))
+
+
+def max_streaks(wins: np.ndarray) -> tuple:
+    """Longest runs of wins and of losses in a boolean sequence"""
+    if wins.size == 0:
+        return 0, 0
+    # Run boundaries are where the value changes; run lengths are the gaps between them
+    boundaries = np.flatnonzero(np.diff(wins.astype(np.int8))) + 1
+    starts = np.concatenate(([0], boundaries))
+    lengths = np.diff(np.concatenate((starts, [wins.size])))
+    run_is_win = wins[starts]
+    longest_wins = int(lengths[run_is_win].max()) if run_is_win.any() else 0
+    longest_losses = int(lengths[~run_is_win].max()) if (~run_is_win).any() else 0
+    return longest_wins, longest_losses
+
+
+def compute_metrics(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Performance metrics of a window of prepared signals
+
+    Args:
+        df: Signals from prepare_signals
+
+    Returns:
+        Dictionary of metrics, with the same keys as the performance report
+    """
+    metrics: Dict[str, Any] = {}
+    total = len(df)
+    metrics['total_signals'] = total
+    if 'createdAt' in df.columns:
+        # Drawdown and streaks depend on order, so use signal order rather than Airtable's
+        df = df.sort_values('createdAt', kind='stable')
+
+    def share(count):
+        return count / total * 100 if total > 0 else 0
+
+    # Confidence level distribution
+    if 'confidence' in df.columns:
+        confidence_counts = df['confidence'].value_counts()
+        metrics['high_confidence'] = confidence_counts.get('HIGH', 0)
+        metrics['medium_confidence'] = confidence_counts.get('MEDIUM', 0)
+        metrics['high_confidence_percentage'] = share(metrics['high_confidence'])
+        metrics['medium_confidence_percentage'] = share(metrics['medium_confidence'])
+
+    # Timeframe distribution
+    if 'timeframe' in df.columns:
+        timeframe_counts = df['timeframe'].value_counts()
+        for timeframe in TIMEFRAMES:
+            name = timeframe.lower()
+            metrics[f'{name}_signals'] = timeframe_counts.get(timeframe, 0)
+            metrics[f'{name}_percentage'] = share(metrics[f'{name}_signals'])
+
+    # Return metrics
+    if 'expectedReturn' in df.columns:
+        expected = df['expectedReturn']
+        metrics['average_expected_return'] = expected.mean()
+        metrics['median_expected_return'] = expected.median()
+        metrics['max_expected_return'] = expected.max()
+        metrics['min_expected_return'] = expected.min()
+
+    if 'actualReturn' in df.columns:
+        returns = df['actualReturn'].dropna().to_numpy(dtype=np.float64)
+        metrics['signals_with_results'] = int(returns.size)
+        if returns.size:
+            wins = returns > 0
+            win_sum = returns[wins].sum()
+            loss_sum = returns[~wins].sum()
+            std = returns.std(ddof=1) if returns.size > 1 else np.nan
+
+            metrics['average_actual_return'] = returns.mean()
+            metrics['median_actual_return'] = np.median(returns)
+            metrics['max_actual_return'] = returns.max()
+            metrics['min_actual_return'] = returns.min()
+            metrics['return_std_dev'] = std
+            # Risk-adjusted return (Sharpe ratio with 0% risk-free rate)
+            metrics['sharpe_ratio'] = returns.mean() / std if std > 0 else 0
+            metrics['win_rate'] = wins.mean() * 100
+            metrics['average_win'] = returns[wins].mean() if wins.any() else 0
+            metrics['average_loss'] = returns[~wins].mean() if (~wins).any() else 0
+            metrics['win_loss_ratio'] = (abs(metrics['average_win'] / metrics['average_loss'])
+                                         if metrics['average_loss'] != 0 else float('inf'))
+            metrics['profit_factor'] = win_sum / abs(loss_sum) if loss_sum != 0 else float('inf')
+            metrics['max_drawdown'] = max_drawdown(returns)
+            metrics['recovery_factor'] = (returns.mean() / metrics['max_drawdown']
+                                          if metrics['max_drawdown'] > 0 else float('inf'))
+
+            # Consistency metrics
+            if returns.size > 1:
+                metrics['positive_return_percentage'] = wins.mean() * 100
+                metrics['max_consecutive_wins'], metrics['max_consecutive_losses'] = max_streaks(wins)
+
+    # Success rate
+    if 'isSuccessful' in df.columns:
+        metrics['success_rate'] = df['isSuccessful'].mean() * 100 if total > 0 else 0
+
+    # Performance by timeframe
+    if all(col in df.columns for col in ['timeframe', 'actualReturn']):
+        by_timeframe = df.groupby('timeframe').agg(ret=('actualReturn', 'mean'), success=('isSuccessful', 'mean'))
+        for timeframe in TIMEFRAMES:
+            name = timeframe.lower()
+            found = timeframe in by_timeframe.index
+            metrics[f'{name}_return'] = by_timeframe.at[timeframe, 'ret'] if found else 0
+            metrics[f'{name}_success_rate'] = by_timeframe.at[timeframe, 'success'] * 100 if found else 0
+
+    # Performance by token (top tokens with at least 3 signals)
+    if all(col in df.columns for col in ['token', 'actualReturn']):
+        by_token = df.groupby('token').agg(ret=('actualReturn', 'mean'), signals=('actualReturn', 'count'),
+                                           success=('isSuccessful', 'mean'))
+        top_tokens = by_token[by_token['signals'] >= 3].sort_values('ret', ascending=False).head(10)
+        metrics['top_tokens'] = {
+            token: {'return': row.ret, 'count': row.signals, 'success_rate': row.success * 100}
+            for token, row in zip(top_tokens.index, top_tokens.itertuples(index=False))
+        }
+
+    # Weekly and monthly performance
+    if 'createdAt' in df.columns and 'actualReturn' in df.columns:
+        periods = {'weekly': df['createdAt'].dt.isocalendar().week, 'monthly': df['createdAt'].dt.month}
+        for name, period in periods.items():
+            grouped = df.groupby(period)
+            metrics[f'{name}_performance'] = {str(k): v for k, v in grouped['actualReturn'].mean().items()}
+            metrics[f'{name}_success_rates'] = {str(k): v * 100 for k, v in grouped['isSuccessful'].mean().items()}
+
+    return metrics
+
+
+def window_metrics(df: pd.DataFrame, windows: Optional[Dict[str, Optional[int]]] = None,
+                   now: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Core metrics of several trailing windows from one pass of prefix sums
+
+    Args:
+        df: Prepared signals with createdAt, actualReturn and expectedReturn
+        windows: Window name to length in days, None for all time; defaults to WINDOWS
+        now: Epoch time the windows end at, defaults to the current time
+
+    Returns:
+        Window name to signals, win rate, average expected and actual return,
+        standard deviation, Sharpe ratio, profit factor, win/loss ratio and
+        max drawdown
+    """
+    windows = WINDOWS if windows is None else windows
+    now = time.time() if now is None else now
+    if df.empty:
+        return {name: {'signals': 0} for name in windows}
+
+    df = df.sort_values('createdAt', kind='stable')
+    # Epoch seconds whatever the datetime resolution
+    times = (df['createdAt'] - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+    returns = df['actualReturn'].to_numpy(dtype=np.float64)
+    expected = df['expectedReturn'].to_numpy(dtype=np.float64) if 'expectedReturn' in df else np.full(len(df), np.nan)
+
+    has_return = ~np.isnan(returns)
+    r = np.where(has_return, returns, 0.0)
+    wins = has_return & (r > 0)
+    losses = has_return & (r <= 0)
+    has_expected = ~np.isnan(expected)
+
+    # One cumulative pass; row i holds the totals of the first i signals
+    columns = np.column_stack([
+        has_return, r, r * r, wins, np.where(wins, r, 0.0), losses, np.where(losses, r, 0.0),
+        has_expected, np.where(has_expected, expected, 0.0)
+    ]).astype(np.float64)
+    prefix = np.vstack([np.zeros(columns.shape[1]), np.cumsum(columns, axis=0)])
+
+    results = {}
+    for name, days in windows.items():
+        start = 0 if days is None else int(np.searchsorted(times, now - days * 86400, side='left'))
+        n, total, total_sq, n_wins, win_sum, n_losses, loss_sum, n_expected, expected_sum = prefix[-1] - prefix[start]
+        n = int(round(n))
+        if n == 0:
+            results[name] = {'signals': 0}
+            continue
+
+        mean = total / n
+        variance = (total_sq - total * total / n) / (n - 1) if n > 1 else np.nan
+        std = float(np.sqrt(max(variance, 0.0))) if n > 1 else np.nan
+        average_win = win_sum / n_wins if n_wins else 0.0
+        average_loss = loss_sum / n_losses if n_losses else 0.0
+        results[name] = {
+            'signals': n,
+            'win_rate': n_wins / n * 100,
+            'average_actual_return': mean,
+            'average_expected_return': expected_sum / n_expected if n_expected else np.nan,
+            'return_std_dev': std,
+            'sharpe_ratio': mean / std if std > 0 else 0,
+            'profit_factor': win_sum / abs(loss_sum) if loss_sum != 0 else float('inf'),
+            'win_loss_ratio': abs(average_win / average_loss) if average_loss != 0 else float('inf'),
+            'max_drawdown': max_drawdown(returns[start:][has_return[start:]]),
+        }
+    return results
+
+
+class SignalPerformanceStore:
+    """Local copy of completed signals, synced from Airtable incrementally"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS signals (
+                    id TEXT PRIMARY KEY,
+                    createdAt REAL NOT NULL,
+                    token TEXT,
+                    type TEXT,
+                    timeframe TEXT,
+                    confidence TEXT,
+                    entryPrice REAL,
+                    targetPrice REAL,
+                    stopLoss REAL,
+                    actualReturn REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_signals_created ON signals (createdAt)")
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+
+    def upsert(self, records: Iterable[Dict]) -> int:
+        """Insert or replace Airtable signal records; returns how many were stored"""
+        rows = []
+        for record in records:
+            fields = record.get('fields', {})
+            try:
+                created_at = datetime.fromisoformat(fields['createdAt'].replace('Z', '+00:00'))
+            except (KeyError, AttributeError, ValueError):
+                continue
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+
+            def number(field):
+                try:
+                    return float(fields[field])
+                except (KeyError, TypeError, ValueError):
+                    return None
+
+            rows.append((record['id'], created_at.timestamp(), fields.get('token'), fields.get('type'),
+                         fields.get('timeframe'), fields.get('confidence'), number('entryPrice'),
+                         number('targetPrice'), number('stopLoss'), number('actualReturn')))
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO signals VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def delete(self, record_ids: Iterable[str]) -> int:
+        """Remove signals by record ID; returns how many were removed"""
+        with self._connect() as conn:
+            cursor = conn.executemany("DELETE FROM signals WHERE id = ?", [(record_id,) for record_id in record_ids])
+        return cursor.rowcount
+
+    def _state(self, key: str) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def last_synced(self) -> Optional[float]:
+        return self._state('lastSyncedAt')
+
+    def sync(self, signals_table, full: bool = False) -> int:
+        """
+        Fetch signals closed or modified since the last sync
+
+        Modified signals are fetched whether or not they still match
+        SIGNAL_FILTER, and the ones that no longer do are removed. Every
+        FULL_SYNC_INTERVAL the whole filtered table is refetched instead, and
+        stored signals missing from it (deleted in Airtable) are removed.
+
+        Args:
+            signals_table: pyairtable SIGNALS table
+            full: Refetch every completed signal instead of only the changes
+
+        Returns:
+            Number of signals stored
+        """
+        started_at = time.time()
+        last_synced = self.last_synced()
+        last_full_sync = self._state('lastFullSyncAt')
+        full = full or last_synced is None or last_full_sync is None or \
+            started_at - last_full_sync >= FULL_SYNC_INTERVAL
+
+        if full:
+            records = signals_table.all(formula=f"AND({SIGNAL_FILTER})", fields=SIGNAL_FIELDS)
+        else:
+            since = datetime.fromtimestamp(last_synced - SYNC_OVERLAP, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+            records = signals_table.all(formula=f"IS_AFTER(LAST_MODIFIED_TIME(), '{since}')", fields=SIGNAL_FIELDS)
+
+        completed = [record for record in records if is_completed_signal(record.get('fields', {}))]
+        stored = self.upsert(completed)
+
+        if full:
+            keep = {record['id'] for record in completed}
+            with self._connect() as conn:
+                stale = [row[0] for row in conn.execute("SELECT id FROM signals") if row[0] not in keep]
+        else:
+            stale = [record['id'] for record in records if not is_completed_signal(record.get('fields', {}))]
+        removed = self.delete(stale) if stale else 0
+
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('lastSyncedAt', ?)", (started_at,))
+            if full:
+                conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('lastFullSyncAt', ?)",
+                             (started_at,))
+        logger.info(f"Synced {stored} {'completed' if full else 'new or updated completed'} signals, "
+                    f"removed {removed}")
+        return stored
+
+    def load(self, days_back: Optional[int] = None, now: Optional[float] = None) -> pd.DataFrame:
+        """Prepared signals created in the last days_back days, or all of them"""
+        query = "SELECT * FROM signals"
+        params: List[Any] = []
+        if days_back is not None:
+            query += " WHERE createdAt >= ?"
+            params.append((time.time() if now is None else now) - days_back * 86400)
+        query += " ORDER BY createdAt"
+
+        with self._connect() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        if df.empty:
+            return df
+        df['createdAt'] = pd.to_datetime(df['createdAt'], unit='s', utc=True)
+        return prepare_signals(df)
@@ -0,0 +1,291 @@
+"""
+Wallet Digest
+
+Turns a wallet's Birdeye transaction history into a compact statistical
+digest for LLM prompts, so prompts carry a few hundred characters instead of
+the raw transaction rows.
+
+The digest holds:
+- Trade frequency: count, span, trades per day, median gap, recent activity.
+- Per-token flows: buys, sells, net amount and in/out value.
+- A realized PnL estimate per token, using average buy cost against sells.
+- A histogram of holding periods, measured from each sell back to the
+  latest earlier buy of the same token.
+
+Balance changes are flattened once into NumPy arrays, and every aggregate is
+a bincount, mask or searchsorted over them. Trades are valued in USD when
+Birdeye gives a usdValue or the trade has a USDC/USDT leg. Otherwise they are
+valued in SOL when the trade has a SOL leg.
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.wallet_store import transaction_timestamp
+
+# Mints and symbols treated as quote currencies rather than traded tokens
+STABLE_MINTS = {
+    'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v',  # USDC
+    'Es9vMFrzaCERmJfrF4H2FYD4KCoNkY11McCe8BenwNYB',  # USDT
+}
+SOL_MINTS = {
+    'So11111111111111111111111111111111111111112',
+    'So11111111111111111111111111111111111111111',
+}
+STABLE_SYMBOLS = {'USDC', 'USDT'}
+SOL_SYMBOLS = {'SOL', 'WSOL'}
+
+# Upper bounds, in seconds, of the holding period buckets; the last bucket is open-ended
+HOLDING_BUCKETS = [3600, 86400, 7 * 86400, 30 * 86400]
+HOLDING_LABELS = ['<1h', '1h-1d', '1d-7d', '7d-30d', '>30d']
+
+# Tokens listed in a digest, by traded value then trade count
+MAX_DIGEST_TOKENS = 10
+
+
+def _quantity(change: Dict) -> float:
+    """Signed token amount of a balance change in UI units, 0 if unknown"""
+    try:
+        if change.get('uiAmount') is not None:
+            return float(change['uiAmount'])
+        if change.get('amount') is not None:
+            return float(change['amount']) / 10 ** int(change.get('decimals') or 0)
+    except (ValueError, TypeError):
+        pass
+    return 0.0
+
+
+def _usd_value(change: Dict) -> float:
+    try:
+        return float(change['usdValue'])
+    except (KeyError, ValueError, TypeError):
+        return np.nan
+
+
+def _flatten(transactions: List[Dict]) -> Dict[str, np.ndarray]:
+    """One row per balance change, with the transaction index and time"""
+    tx_idx, times, keys, symbols, qty, usd = [], [], [], [], [], []
+    for i, txn in enumerate(transactions):
+        changes = txn.get('balanceChange')
+        if not isinstance(changes, list):
+            continue
+        timestamp = transaction_timestamp(txn)
+        for change in changes:
+            symbol = change.get('symbol') or '?'
+            key = change.get('address') or symbol
+            tx_idx.append(i)
+            times.append(timestamp)
+            keys.append(key)
+            symbols.append(symbol)
+            qty.append(_quantity(change))
+            usd.append(_usd_value(change))
+
+    return {
+        'tx': np.asarray(tx_idx, dtype=np.int64),
+        'time': np.asarray(times, dtype=np.float64),
+        'key': np.asarray(keys, dtype=object),
+        'symbol': np.asarray(symbols, dtype=object),
+        'qty': np.asarray(qty, dtype=np.float64),
+        'usd': np.asarray(usd, dtype=np.float64),
+    }
+
+
+def _frequency(times: np.ndarray, now: float) -> Dict[str, Any]:
+    times = np.sort(times[times > 0])
+    if times.size == 0:
+        return {'transactions': 0}
+    span_days = max((times[-1] - times[0]) / 86400, 1 / 24)
+    gaps = np.diff(times)
+    return {
+        'transactions': int(times.size),
+        'firstTrade': datetime.fromtimestamp(times[0], timezone.utc).strftime('%Y-%m-%d'),
+        'lastTrade': datetime.fromtimestamp(times[-1], timezone.utc).strftime('%Y-%m-%d'),
+        'spanDays': round(float(span_days), 1),
+        'tradesPerDay': round(float(times.size / span_days), 2),
+        'activeDays': int(np.unique((times // 86400).astype(np.int64)).size),
+        'medianGapHours': round(float(np.median(gaps)) / 3600, 1) if gaps.size else None,
+        'last24h': int(np.count_nonzero(times >= now - 86400)),
+        'last7d': int(np.count_nonzero(times >= now - 7 * 86400)),
+        'last30d': int(np.count_nonzero(times >= now - 30 * 86400)),
+    }
+
+
+def _realized_pnl(token: np.ndarray, qty: np.ndarray, value: np.ndarray, n_tokens: int) -> np.ndarray:
+    """Per-token realized PnL of sells against the average cost of buys, over valued trades only"""
+    valued = ~np.isnan(value) & (qty != 0)
+    amount = np.abs(qty)
+    value = np.where(valued, np.abs(value), 0.0)
+    buys = valued & (qty > 0)
+    sells = valued & (qty < 0)
+
+    buy_qty = np.bincount(token, amount * buys, n_tokens)
+    buy_value = np.bincount(token, value * buys, n_tokens)
+    sell_qty = np.bincount(token, amount * sells, n_tokens)
+    sell_value = np.bincount(token, value * sells, n_tokens)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_cost = buy_value / buy_qty
+        avg_sale = sell_value / sell_qty
+    # Sells beyond what was bought in the window have unknown cost and are left out
+    matched = np.minimum(buy_qty, sell_qty)
+    pnl = np.where(matched > 0, matched * (avg_sale - avg_cost), np.nan)
+    return pnl
+
+
+def _holding_periods(token: np.ndarray, qty: np.ndarray, times: np.ndarray) -> Dict[str, int]:
+    """Histogram of the time from each sell back to the latest earlier buy of the same token"""
+    histogram = dict.fromkeys(HOLDING_LABELS, 0)
+    histogram['sells without buy'] = 0
+
+    buys = (qty > 0) & (times > 0)
+    sells = (qty < 0) & (times > 0)
+    if not sells.any():
+        return histogram
+
+    # Sort buys by (token, time) packed into one key, so one searchsorted finds every match
+    seconds = times.astype(np.int64)
+    buy_keys = (token[buys] << 34) + seconds[buys]
+    order = np.argsort(buy_keys)
+    buy_keys = buy_keys[order]
+    buy_tokens = token[buys][order]
+    buy_times = seconds[buys][order]
+
+    sell_tokens = token[sells]
+    sell_times = seconds[sells]
+    idx = np.searchsorted(buy_keys, (sell_tokens << 34) + sell_times, side='right') - 1
+    matched = idx >= 0
+    matched[matched] = buy_tokens[idx[matched]] == sell_tokens[matched]
+
+    periods = sell_times[matched] - buy_times[idx[matched]]
+    counts = np.bincount(np.digitize(periods, HOLDING_BUCKETS), minlength=len(HOLDING_LABELS))
+    histogram.update({label: int(count) for label, count in zip(HOLDING_LABELS, counts)})
+    histogram['sells without buy'] = int(np.count_nonzero(~matched))
+    return histogram
+
+
+def summarize_transactions(transactions: List[Dict], focus_symbol: Optional[str] = None,
+                           now: Optional[float] = None, max_tokens: int = MAX_DIGEST_TOKENS) -> Dict[str, Any]:
+    """
+    Compact statistical digest of a wallet's transactions
+
+    Args:
+        transactions: Raw Birdeye tx_list transactions, in any order
+        focus_symbol: Token always listed in the digest, e.g. the token a whale holds
+        now: Reference epoch time for recent activity, defaults to the current time
+        max_tokens: Maximum number of tokens listed
+
+    Returns:
+        Dictionary with 'frequency', 'tokens' (the most traded, quote
+        currencies excluded), 'tokenCount', 'quoteFlows', 'realizedPnl' and
+        'holdingPeriods'
+    """
+    now = datetime.now(timezone.utc).timestamp() if now is None else now
+    tx_times = np.asarray([transaction_timestamp(txn) for txn in transactions], dtype=np.float64)
+    digest = {'frequency': _frequency(tx_times, now), 'tokens': [], 'tokenCount': 0,
+              'quoteFlows': {}, 'realizedPnl': {}, 'holdingPeriods': {}}
+
+    rows = _flatten(transactions)
+    if rows['tx'].size == 0:
+        return digest
+
+    keys, token = np.unique(rows['key'], return_inverse=True)
+    token = token.astype(np.int64)
+    n_tokens = keys.size
+    symbols = np.empty(n_tokens, dtype=object)
+    symbols[token] = rows['symbol']
+    upper_symbols = np.asarray([str(symbol).upper() for symbol in symbols], dtype=object)
+
+    is_stable_token = np.isin(keys, list(STABLE_MINTS)) | np.isin(upper_symbols, list(STABLE_SYMBOLS))
+    is_sol_token = np.isin(keys, list(SOL_MINTS)) | np.isin(upper_symbols, list(SOL_SYMBOLS))
+    is_quote_token = is_stable_token | is_sol_token
+    qty, usd, tx = rows['qty'], rows['usd'], rows['tx']
+    n_tx = len(transactions)
+
+    # Value the other legs of a trade by the size of its stablecoin leg, else its SOL leg
+    stable_size = np.bincount(tx, np.abs(qty) * is_stable_token[token], n_tx)[tx]
+    sol_size = np.bincount(tx, np.abs(qty) * is_sol_token[token], n_tx)[tx]
+    usd_value = np.where(np.isnan(usd), np.where(stable_size > 0, stable_size, np.nan), usd)
+    sol_value = np.where(np.isnan(usd_value) & (sol_size > 0), sol_size, np.nan)
+
+    buys = qty > 0
+    sells = qty < 0
+    buy_count = np.bincount(token, buys, n_tokens)
+    sell_count = np.bincount(token, sells, n_tokens)
+    net_qty = np.bincount(token, qty, n_tokens)
+    signed_usd = np.where(np.isnan(usd_value), 0.0, np.abs(usd_value) * np.sign(qty))
+    signed_sol = np.where(np.isnan(sol_value), 0.0, np.abs(sol_value) * np.sign(qty))
+    usd_in = np.bincount(token, np.where(buys, signed_usd, 0.0), n_tokens)
+    usd_out = -np.bincount(token, np.where(sells, signed_usd, 0.0), n_tokens)
+    sol_in = np.bincount(token, np.where(buys, signed_sol, 0.0), n_tokens)
+    sol_out = -np.bincount(token, np.where(sells, signed_sol, 0.0), n_tokens)
+    pnl_usd = _realized_pnl(token, qty, usd_value, n_tokens)
+    pnl_sol = _realized_pnl(token, qty, sol_value, n_tokens)
+
+    traded = np.flatnonzero(~is_quote_token)
+    focus = np.flatnonzero(upper_symbols == focus_symbol.upper()) if focus_symbol else np.empty(0, dtype=np.int64)
+    ranking = traded[np.lexsort((-(buy_count + sell_count)[traded], -(usd_in + usd_out + sol_in + sol_out)[traded]))]
+    focused = set(focus.tolist())
+    listed = list(focus) + [i for i in ranking if i not in focused][:max(max_tokens - len(focus), 0)]
+
+    def rounded(value: float, digits: int = 2) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), digits)
+
+    for i in listed:
+        entry = {'symbol': str(symbols[i]), 'buys': int(buy_count[i]), 'sells': int(sell_count[i]),
+                 'netAmount': rounded(net_qty[i], 4)}
+        if usd_in[i] or usd_out[i]:
+            entry.update(inUsd=rounded(usd_in[i]), outUsd=rounded(usd_out[i]), pnlUsd=rounded(pnl_usd[i]))
+        if sol_in[i] or sol_out[i]:
+            entry.update(inSol=rounded(sol_in[i], 3), outSol=rounded(sol_out[i], 3), pnlSol=rounded(pnl_sol[i], 3))
+        digest['tokens'].append(entry)
+
+    digest['tokenCount'] = int(traded.size)
+    digest['quoteFlows'] = {
+        'SOL': rounded(net_qty[is_sol_token].sum(), 3),
+        'USD stablecoins': rounded(net_qty[is_stable_token].sum()),
+    }
+    digest['realizedPnl'] = {
+        'USD': rounded(np.nansum(pnl_usd[traded])),
+        'SOL': rounded(np.nansum(pnl_sol[traded]), 3),
+    }
+    digest['holdingPeriods'] = _holding_periods(token, np.where(is_quote_token[token], 0.0, qty), rows['time'])
+    return digest
+
+
+def format_digest(digest: Optional[Dict[str, Any]]) -> str:
+    """Plain-text rendering of a digest for an LLM prompt"""
+    if not digest or not digest.get('frequency', {}).get('transactions'):
+        return "No transaction history available"
+
+    freq = digest['frequency']
+    lines = [
+        f"Transactions: {freq['transactions']} from {freq['firstTrade']} to {freq['lastTrade']} "
+        f"({freq['spanDays']} days, {freq['activeDays']} active), {freq['tradesPerDay']}/day, "
+        f"median gap {freq['medianGapHours']}h",
+        f"Recent activity: {freq['last24h']} in 24h, {freq['last7d']} in 7d, {freq['last30d']} in 30d",
+        f"Tokens traded: {digest['tokenCount']}",
+        "Net quote flow: " + (", ".join(f"{quote} {value:+,}" for quote, value in digest['quoteFlows'].items()
+                                       if value) or "none"),
+        f"Realized PnL estimate: USD {digest['realizedPnl']['USD']:+,}, SOL {digest['realizedPnl']['SOL']:+,}",
+        "Holding periods (latest buy to sell): " + (", ".join(
+            f"{label} {count}" for label, count in digest['holdingPeriods'].items() if count) or "no sells"),
+        "Per token (buys/sells, net amount, value in/out, realized PnL):"
+    ]
+    for entry in digest['tokens']:
+        parts = [f"{entry['symbol']}: {entry['buys']}/{entry['sells']}, net {entry['netAmount']:+,}"]
+        for quote in ('Usd', 'Sol'):
+            if f'in{quote}' in entry:
+                pnl = entry[f'pnl{quote}']
+                parts.append(f"{quote.upper()} in {entry[f'in{quote}']:,} out {entry[f'out{quote}']:,}"
+                             + (f" PnL {pnl:+,}" if pnl is not None else ""))
+        lines.append("- " + "; ".join(parts))
+    return "\n".join(lines)
@@ -1,10 +1,79 @@
 import os
 import json
+import time
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 import requests
 from airtable import Airtable
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Optional
+import sys
+
+# Add project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.lp.lp_history import LPHistoryStore
+from engine.investment_ledger import InvestmentLedger
+
+COMPUTE_MINT = "B1N1HcMm4RysYz4smsXwmk2UnS8NziqKCM6Ho8i62vXo"
+COMPUTE_METEORA_POOL = "HN7ibjiyX399d1EfYXcWaSHZRSMfUmonYvXGFXG41Rr3"
+
+@dataclass
+class TokenBalance:
+    """A single holding in a wallet snapshot"""
+    token: str
+    mint: str
+    amount: float
+    price: float
+    value: float
+    isLpPosition: bool = False
+    lpDetails: Optional[Dict[str, Any]] = None
+
+@dataclass
+class WalletSnapshot:
+    """Result of a fast-path wallet snapshot"""
+    createdAt: str
+    balances: List[TokenBalance]
+    totalValue: float
+    investedAmount: float
+    investor7dFlow: float
+    smallTransactionsFlow: float
+    netResult: float
+    grossResult: float
+    pnlPercentage: float
+    latencySeconds: float = 0.0
+    priceSources: Dict[str, str] = field(default_factory=dict)
+
+    def holdings_json(self) -> str:
+        """Serialize holdings in the format stored in WALLET_SNAPSHOTS"""
+        return json.dumps([{
+            'token': b.token,
+            'amount': b.amount,
+            'price': b.price,
+            'value': b.value,
+            'isLpPosition': b.isLpPosition,
+            'lpDetails': b.lpDetails if b.isLpPosition else None
+        } for b in self.balances])
+
+    def to_airtable_fields(self) -> Dict[str, Any]:
+        """Build the WALLET_SNAPSHOTS record fields"""
+        return {
+            'createdAt': self.createdAt,
+            'totalValue': self.totalValue,
+            'investedAmount': self.investedAmount,
+            'investor7dFlow': self.investor7dFlow,
+            'smallTransactionsFlow': self.smallTransactionsFlow,
+            'netResult': self.netResult,
+            'grossResult': self.grossResult,
+            'pnlPercentage': self.pnlPercentage,
+            'holdings': self.holdings_json()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
 # Load environment variables from .env file
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.env'))
@@ -23,8 +92,20 @@ class WalletSnapshotTaker:
         )
         self.birdeye_api_key = os.getenv('BIRDEYE_API_KEY')
         self.wallet = os.getenv('KINKONG_WALLET')
+        
+        # Local LP history is used when the last LP sync is recent enough
+        self.lp_history = LPHistoryStore()
+        self.lp_history_max_age_hours = 6
+        
+        # Incrementally synced INVESTMENTS / transfer ledger
+        self.investment_ledger = InvestmentLedger()
+        
+        # Shared HTTP session for the fast snapshot path
+        self.session = requests.Session()
+        self.request_timeout = 10
+        self.snapshot_latency_target = 3.0
 
-    def get_token_balances(self) -> dict:
+    def get_token_balances(self, verbose: bool = True) -> dict:
         """Get all token balances from Birdeye API"""
         url = "https://public-api.birdeye.so/v1/wallet/token_list"
         params = {
@@ -37,12 +118,16 @@ class WalletSnapshotTaker:
         }
 
         try:
-            response = requests.get(url, params=params, headers=headers)
+            if verbose:
+                response = requests.get(url, params=params, headers=headers)
+            else:
+                response = self.session.get(url, params=params, headers=headers, timeout=self.request_timeout)
             response.raise_for_status()
             data = response.json()
             
             # Debug logging
-            print(f"Raw API response:", json.dumps(data, indent=2))
+            if verbose:
+                print(f"Raw API response:", json.dumps(data, indent=2))
             
             if not data.get('success'):
                 raise Exception(f"API returned success=false: {data.get('message', 'No error message')}")
@@ -142,6 +227,129 @@ class WalletSnapshotTaker:
                 'COMPUTE': 0.0001
             }
 
+    def _birdeye_headers(self) -> Dict[str, str]:
+        return {
+            "x-api-key": self.birdeye_api_key,
+            "x-chain": "solana",
+            "accept": "application/json"
+        }
+
+    def get_birdeye_multi_price(self, mints: List[str]) -> Dict[str, float]:
+        """Get prices for many mints in a single Birdeye request"""
+        prices = {}
+        try:
+            response = self.session.get(
+                "https://public-api.birdeye.so/defi/multi_price",
+                params={"list_address": ",".join(mints)},
+                headers=self._birdeye_headers(),
+                timeout=self.request_timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            if data.get('success'):
+                for mint, price_data in (data.get('data') or {}).items():
+                    if price_data and price_data.get('value'):
+                        prices[mint] = float(price_data['value'])
+        except Exception as e:
+            print(f"❌ Error fetching Birdeye multi price: {str(e)}")
+        
+        return prices
+
+    def get_jupiter_prices(self, mints: List[str]) -> Dict[str, float]:
+        """Get prices for many mints in a single Jupiter request"""
+        prices = {}
+        try:
+            response = self.session.get(
+                "https://price.jup.ag/v4/price",
+                params={"ids": ",".join(mints)},
+                timeout=self.request_timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            
+            for mint, price_data in (data.get('data') or {}).items():
+                if price_data and price_data.get('price'):
+                    prices[mint] = float(price_data['price'])
+        except Exception as e:
+            print(f"❌ Error fetching Jupiter prices: {str(e)}")
+        
+        return prices
+
+    def get_dexscreener_prices(self, mints: List[str]) -> Dict[str, float]:
+        """Get prices from DexScreener, 30 mints per request, preferring stablecoin pairs"""
+        prices = {}
+        for i in range(0, len(mints), 30):
+            chunk = mints[i:i + 30]
+            try:
+                response = self.session.get(
+                    f"https://api.dexscreener.com/latest/dex/tokens/{','.join(chunk)}",
+                    timeout=self.request_timeout
+                )
+                response.raise_for_status()
+                pairs = response.json().get('pairs') or []
+                
+                for mint in chunk:
+                    mint_pairs = [p for p in pairs if p.get('baseToken', {}).get('address') == mint and p.get('priceUsd')]
+                    if not mint_pairs:
+                        continue
+                    stable_pairs = [
+                        p for p in mint_pairs
+                        if 'USDC' in p.get('quoteToken', {}).get('symbol', '') or 'USDT' in p.get('quoteToken', {}).get('symbol', '')
+                    ]
+                    prices[mint] = float((stable_pairs or mint_pairs)[0]['priceUsd'])
+            except Exception as e:
+                print(f"❌ Error fetching DexScreener prices: {str(e)}")
+        
+        return prices
+
+    def get_compute_pool_price(self) -> Optional[float]:
+        """Get the COMPUTE price from its Meteora dynamic pool"""
+        try:
+            response = self.session.get(
+                "https://public-api.birdeye.so/v1/pool/price",
+                params={"pool_address": COMPUTE_METEORA_POOL},
+                headers=self._birdeye_headers(),
+                timeout=self.request_timeout
+            )
+            if response.content:
+                pool_data = response.json()
+                if pool_data.get('success'):
+                    price = float(pool_data.get('data', {}).get('price', 0))
+                    return price if price > 0 else None
+        except Exception as e:
+            print(f"❌ Error fetching COMPUTE price from Meteora pool: {str(e)}")
+        return None
+
+    def get_bulk_token_prices(self, mints: List[str]) -> tuple:
+        """
+        Price every mint with one bulk request per provider
+        Birdeye is tried first; Jupiter and DexScreener are only asked for the misses
+        Returns (mint -> price, mint -> source)
+        """
+        prices = {}
+        sources = {}
+        missing = list(dict.fromkeys(mints))
+        
+        for source, fetch in (
+            ('birdeye', self.get_birdeye_multi_price),
+            ('jupiter', self.get_jupiter_prices),
+            ('dexscreener', self.get_dexscreener_prices)
+        ):
+            if not missing:
+                break
+            found = fetch(missing)
+            for mint, price in found.items():
+                if mint in missing and price > 0:
+                    prices[mint] = price
+                    sources[mint] = source
+            missing = [mint for mint in missing if mint not in prices]
+        
+        if missing:
+            print(f"⚠️ No price found for {len(missing)} mints: {', '.join(missing)}")
+        
+        return prices, sources
+
     def get_small_transactions_flow(self, start_date, end_date):
         """
         Calculate the flow of small transactions between two dates
@@ -205,6 +413,17 @@ class WalletSnapshotTaker:
             if transactions:
                 print(f"Sample transaction structure: {json.dumps(transactions[0], indent=2)}")
             
+            # Record only transactions newer than the ledger cursor and answer from its totals
+            try:
+                self.investment_ledger.sync_investments()
+                self.investment_ledger.sync_transactions(transactions, self.wallet, token_prices)
+                # Widen by half a second so block times on the bounds are included
+                net_flow = self.investment_ledger.small_transactions_flow(start_timestamp - 0.5, end_timestamp + 0.5)
+                print(f"\nSmall transactions flow between {start_date} and {end_date}: ${net_flow:.2f} (from ledger)")
+                return net_flow
+            except Exception as e:
+                print(f"⚠️ Investment ledger unavailable, scanning transactions: {str(e)}")
+            
             # Track processed transactions for debugging
             processed_count = 0
             skipped_count = 0
@@ -321,11 +540,43 @@ class WalletSnapshotTaker:
             traceback.print_exc()
             return 0
             
-    def get_investment_flow(self, start_date, end_date):
+    def get_ledger_investment_flow(self, start_date, end_date, token_prices=None):
+        """
+        Calculate net investment flow from the local investment ledger
+        Either date may be None for an open range
+        Returns None if the ledger cannot be used
+        """
+        try:
+            self.investment_ledger.sync_investments()
+            total_investments, total_withdrawals = self.investment_ledger.investment_flow(
+                start_date,
+                end_date,
+                token_prices=token_prices,
+                price_fetcher=self.get_current_token_prices
+            )
+            net_flow = total_investments - total_withdrawals
+            
+            print(f"Investment flow between {start_date or 'start'} and {end_date or 'now'} (from ledger):")
+            print(f"  Total investments: ${total_investments:.2f}")
+            print(f"  Total withdrawals: ${total_withdrawals:.2f}")
+            print(f"  Net flow: ${net_flow:.2f}")
+            
+            return net_flow
+            
+        except Exception as e:
+            print(f"⚠️ Investment ledger unavailable, reading INVESTMENTS table: {str(e)}")
+            return None
+
+    def get_investment_flow(self, start_date, end_date, token_prices=None):
         """
         Calculate the net investment flow between two dates
         Returns the difference between investments and withdrawals
+        Pass token_prices (symbol -> USD) to avoid fetching prices again
         """
+        ledger_flow = self.get_ledger_investment_flow(start_date, end_date, token_prices)
+        if ledger_flow is not None:
+            return ledger_flow
+        
         try:
             # Initialize Airtable connection to INVESTMENTS table
             investments_table = Airtable(
@@ -340,7 +591,8 @@ class WalletSnapshotTaker:
             )
             
             # Get current token prices for conversion
-            token_prices = self.get_current_token_prices()
+            if token_prices is None:
+                token_prices = self.get_current_token_prices()
             
             # Calculate total investments (positive flow) in USD
             total_investments = 0
@@ -439,11 +691,16 @@ class WalletSnapshotTaker:
             print(f"❌ Error calculating investment flow: {str(e)}")
             return 0
             
-    def get_total_invested_amount(self):
+    def get_total_invested_amount(self, token_prices=None):
         """
         Calculate the total amount invested to date (all time) in USD
         Returns the net of all investments and withdrawals in USD
+        Pass token_prices (symbol -> USD) to avoid fetching prices again
         """
+        ledger_total = self.get_ledger_investment_flow(None, None, token_prices)
+        if ledger_total is not None:
+            return ledger_total
+        
         try:
             # Initialize Airtable connection to INVESTMENTS table
             investments_table = Airtable(
@@ -456,7 +713,8 @@ class WalletSnapshotTaker:
             records = investments_table.get_all()
             
             # Get current token prices for conversion
-            token_prices = self.get_current_token_prices()
+            if token_prices is None:
+                token_prices = self.get_current_token_prices()
             
             # Calculate total investments (positive flow) in USD
             total_investments = 0
@@ -558,11 +816,60 @@ class WalletSnapshotTaker:
             print(f"❌ Error calculating total invested amount: {str(e)}")
             return 0
 
+    def get_lp_positions_from_history(self) -> List[Dict[str, Any]]:
+        """
+        Get LP positions from the local LP history written by LPPositionManager
+        Returns an empty list if the last sync is older than lp_history_max_age_hours
+        """
+        try:
+            rows = self.lp_history.latest_positions(max_age_hours=self.lp_history_max_age_hours)
+            if not rows:
+                return []
+            
+            metrics = self.lp_history.compute_position_metrics()
+            lp_positions = []
+            
+            for row in rows:
+                amount0 = float(row.get('token0Amount') or 0)
+                amount1 = float(row.get('token1Amount') or 0)
+                value_usd = float(row.get('totalValueUsd') or 0)
+                
+                # Skip positions with no value
+                if value_usd <= 0 and amount0 <= 0 and amount1 <= 0:
+                    continue
+                
+                position_metrics = metrics.get(row['positionKey'], {})
+                lp_positions.append({
+                    'name': row.get('poolName') or 'Unknown LP',
+                    'token0': row.get('token0', 'Unknown'),
+                    'token1': row.get('token1', 'Unknown'),
+                    'amount0': amount0,
+                    'amount1': amount1,
+                    'valueUSD': value_usd,
+                    'notes': '',
+                    'impermanentLossPct': position_metrics.get('impermanentLossPct', 0),
+                    'realizedFeesUsd': position_metrics.get('realizedFeesUsd', 0),
+                    'rangeUtilization': position_metrics.get('rangeUtilization'),
+                    'inRange': position_metrics.get('inRange')
+                })
+            
+            print(f"Loaded {len(lp_positions)} LP positions from local history ({rows[0]['snapshotAt']})")
+            return lp_positions
+            
+        except Exception as e:
+            print(f"❌ Error reading LP history: {str(e)}")
+            return []
+
     def get_lp_positions(self) -> List[Dict[str, Any]]:
         """
-        Fetch LP positions from the LP_POSITIONS table in Airtable
+        Fetch LP positions, preferring the local LP history when it is fresh
+        Falls back to the LP_POSITIONS table in Airtable
         Returns a list of active LP positions with non-zero values
         """
+        lp_positions = self.get_lp_positions_from_history()
+        if lp_positions:
+            return lp_positions
+        
         try:
             print("Fetching LP positions from Airtable...")
             
@@ -697,7 +1004,6 @@ class WalletSnapshotTaker:
             
             # Debug the response
             print(f"Meteora pool API response status: {response.status_code}")
-            print(f"Meteora pool API response headers: {response.headers}")
             
             # Only try to parse JSON if we have content
             if response.content:
@@ -900,6 +1206,107 @@ class WalletSnapshotTaker:
             else:
                 print(f"• {balance['token']}: {balance['amount']:.2f} (${balance['value']:.2f})")
 
+    def take_fast_snapshot(self, record: bool = True) -> WalletSnapshot:
+        """
+        Take a wallet snapshot with one balance call and one bulk price pass
+        LP positions, the previous snapshot and investment flows are fetched concurrently
+        """
+        start_time = time.perf_counter()
+        created_at = datetime.now(timezone.utc).isoformat()
+        print("📸 Taking fast snapshot of KinKong wallet...")
+        
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            # Independent requests start immediately
+            balances_future = executor.submit(self.get_token_balances, False)
+            lp_future = executor.submit(self.get_lp_positions)
+            previous_future = executor.submit(self.get_previous_snapshot, 7)
+            compute_future = executor.submit(self.get_compute_pool_price)
+            
+            # Price every held mint once balances are known
+            token_balances = balances_future.result()
+            mints = [b['address'] for b in token_balances if b.get('address')]
+            prices, sources = self.get_bulk_token_prices(mints) if mints else ({}, {})
+            
+            compute_price = compute_future.result()
+            if compute_price is not None:
+                prices[COMPUTE_MINT] = compute_price
+                sources[COMPUTE_MINT] = 'meteora'
+            
+            balances = []
+            for balance_data in token_balances:
+                mint = balance_data.get('address')
+                amount = float(balance_data.get('uiAmount', 0) or 0)
+                price = prices.get(mint, float(balance_data.get('priceUsd', 0) or 0))
+                value = amount * price
+                
+                # Skip tokens with no value
+                if value <= 0:
+                    continue
+                
+                balances.append(TokenBalance(
+                    token=balance_data.get('symbol', 'Unknown'),
+                    mint=mint,
+                    amount=amount,
+                    price=price,
+                    value=value
+                ))
+            
+            # Investment accounting reuses the prices from this pass
+            symbol_prices = {'USDC': 1.0}
+            symbol_prices.update({b.token: b.price for b in balances})
+            if compute_price is not None:
+                symbol_prices['COMPUTE'] = compute_price
+            
+            invested_future = executor.submit(self.get_total_invested_amount, symbol_prices)
+            previous_value, previous_date = previous_future.result()
+            flow_future = executor.submit(self.get_investment_flow, previous_date, created_at, symbol_prices) if previous_date else None
+            
+            for position in lp_future.result():
+                balances.append(TokenBalance(
+                    token=f"LP: {position['token0']}/{position['token1']}",
+                    mint='LP_POSITION',
+                    amount=1,
+                    price=position['valueUSD'],
+                    value=position['valueUSD'],
+                    isLpPosition=True,
+                    lpDetails=position
+                ))
+            
+            total_invested = invested_future.result()
+            investor_7d_flow = flow_future.result() if flow_future else 0
+        
+        total_value = sum(b.value for b in balances)
+        net_result = total_value - total_invested
+        pnl_percentage = (net_result / total_invested) * 100 if total_invested > 0 else 0
+        
+        snapshot = WalletSnapshot(
+            createdAt=created_at,
+            balances=balances,
+            totalValue=total_value,
+            investedAmount=total_invested,
+            investor7dFlow=investor_7d_flow,
+            smallTransactionsFlow=0,
+            netResult=net_result,
+            grossResult=net_result,
+            pnlPercentage=pnl_percentage,
+            priceSources=sources
+        )
+        
+        if record:
+            self.snapshots_table.insert(snapshot.to_airtable_fields())
+        
+        snapshot.latencySeconds = time.perf_counter() - start_time
+        
+        print(f"\n✅ Fast wallet snapshot {'recorded' if record else 'taken'} in {snapshot.latencySeconds:.2f}s")
+        if snapshot.latencySeconds > self.snapshot_latency_target:
+            print(f"⚠️ Snapshot exceeded {self.snapshot_latency_target:.1f}s latency target")
+        print(f"Total Value: ${total_value:.2f}")
+        print(f"Total Invested: ${total_invested:.2f}")
+        print(f"Net Result (totalValue - investedAmount): ${net_result:.2f}")
+        print(f"PnL Percentage: {pnl_percentage:.2f}%")
+        
+        return snapshot
+
 def main():
     try:
         # Load environment variables from .env file
@@ -919,7 +1326,10 @@ def main():
 
         # Take snapshot
         snapshot_taker = WalletSnapshotTaker()
-        snapshot_taker.take_snapshot()
+        if '--fast' in sys.argv:
+            snapshot_taker.take_fast_snapshot()
+        else:
+            snapshot_taker.take_snapshot()
 
     except Exception as e:
         print(f"\n❌ Script failed: {str(e)}")
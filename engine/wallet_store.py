@@ -0,0 +1,387 @@
+"""
+Wallet Transaction Store
+
+Local, incremental copy of wallets' Birdeye transaction history, shared by the
+whale and KOL analyses. Transactions are kept in SQLite under data/, indexed on
+(wallet, blockTime). Each one is stored as its raw Birdeye payload plus a
+normalized row (type, symbol, USD value, timestamp, hash, fee, status) parsed
+once on arrival.
+
+A sync asks Birdeye for the newest page of a wallet's tx_list and stops as
+soon as it reaches a transaction already stored. Wallets that are already
+known start with a small page. Older pages are only walked, with `before`,
+while every transaction on the page is new. A wallet synced within
+min_sync_interval is not fetched at all. A long-tracked wallet therefore costs
+one small request, or none, instead of the latest 100 transactions every time.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Generator, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import get_rate_limiter, rate_limited_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'wallet_transactions.db'
+
+TX_LIST_URL = "https://public-api.birdeye.so/v1/wallet/tx_list"
+
+# Page sizes: first sync of a wallet, first page of a known wallet, older pages
+FULL_PAGE = 100
+KNOWN_WALLET_PAGE = 20
+
+# Never walk back further than this many pages in one sync
+MAX_PAGES = 5
+
+# Seconds during which a synced wallet is served from the store without a request
+DEFAULT_MIN_SYNC_INTERVAL = 600
+
+
+def parse_timestamp(value: Any) -> float:
+    """Epoch seconds from a numeric, numeric-string or ISO 8601 timestamp; 0 if unparseable"""
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, str):
+        try:
+            if "T" in value:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            return float(value)
+        except (ValueError, TypeError):
+            return 0.0
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def extract_transactions(data: Dict) -> List[Dict]:
+    """Transaction list from a tx_list response, wherever Birdeye put it"""
+    if not data or not data.get("success", False):
+        return []
+    txn_data = data.get("data", {}) or {}
+    if isinstance(txn_data.get("solana"), list):
+        return txn_data["solana"]
+
+    possible_paths = [
+        txn_data.get("transactions", []),
+        txn_data.get("items", []),
+        txn_data.get("solana", {}).get("transactions", []) if isinstance(txn_data.get("solana"), dict) else [],
+        txn_data.get("history", []),
+        txn_data.get("txs", []),
+        txn_data.get("tx_list", [])
+    ]
+    for path in possible_paths:
+        if path and isinstance(path, list):
+            return path
+    return []
+
+
+def transaction_timestamp(txn: Dict) -> float:
+    """Numeric timestamp of a raw transaction"""
+    for time_field in ["blockTime", "timestamp", "time", "date", "block_time"]:
+        if txn.get(time_field):
+            timestamp = parse_timestamp(txn[time_field])
+            if timestamp:
+                return timestamp
+    return 0.0
+
+
+def transaction_hash(txn: Dict) -> Optional[str]:
+    for hash_field in ["txHash", "signature", "tx_hash", "id"]:
+        if txn.get(hash_field):
+            return str(txn[hash_field])
+    return None
+
+
+def normalize_transaction(txn: Dict) -> Dict[str, Any]:
+    """
+    Normalized details of a raw transaction
+
+    Returns:
+        Dictionary with type, symbol, value (USD), timestamp and, when
+        available, txHash, fee (SOL) and status
+    """
+    tx_details = {
+        "type": "Unknown",
+        "symbol": "Unknown",
+        "value": 0,
+        "timestamp": 0
+    }
+
+    # Extract transaction type
+    for type_field in ["type", "txType", "transactionType", "mainAction"]:
+        if txn.get(type_field):
+            tx_details["type"] = txn[type_field]
+            break
+
+    balance_changes = txn.get("balanceChange") if isinstance(txn.get("balanceChange"), list) else []
+
+    # Symbol from direct fields, otherwise the balance change with the largest USD value
+    symbol = None
+    for symbol_field in ["symbol", "tokenSymbol", "token"]:
+        if txn.get(symbol_field):
+            symbol = txn[symbol_field]
+            break
+    if not symbol:
+        max_value = 0
+        for change in balance_changes:
+            if change.get("symbol"):
+                try:
+                    value = abs(float(change.get("usdValue", 0)))
+                    if value > max_value:
+                        max_value = value
+                        symbol = change["symbol"]
+                except (ValueError, TypeError):
+                    pass
+    if symbol:
+        tx_details["symbol"] = symbol
+
+    # Value from direct fields, otherwise the sum of balance change values
+    value = 0
+    for value_field in ["usdValue", "value", "valueUsd", "amountUsd", "amount_usd"]:
+        if txn.get(value_field):
+            try:
+                value = float(txn[value_field])
+                break
+            except (ValueError, TypeError):
+                pass
+    if value == 0:
+        for change in balance_changes:
+            if "usdValue" in change:
+                try:
+                    value += abs(float(change["usdValue"]))
+                except (ValueError, TypeError):
+                    pass
+    tx_details["value"] = value
+
+    tx_details["timestamp"] = transaction_timestamp(txn)
+
+    tx_hash = transaction_hash(txn)
+    if tx_hash:
+        tx_details["txHash"] = tx_hash
+
+    if "fee" in txn:
+        try:
+            tx_details["fee"] = float(txn["fee"]) / 1e9  # Convert lamports to SOL
+        except (ValueError, TypeError):
+            pass
+
+    if "status" in txn:
+        tx_details["status"] = "success" if txn["status"] else "failed"
+
+    return tx_details
+
+
+class WalletTransactionStore:
+    """SQLite store of normalized wallet transactions with a per-wallet sync cursor"""
+
+    def __init__(self, db_path: Optional[str] = None, min_sync_interval: float = DEFAULT_MIN_SYNC_INTERVAL):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.min_sync_interval = min_sync_interval
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS transactions (
+                    wallet TEXT NOT NULL,
+                    txHash TEXT NOT NULL,
+                    blockTime REAL NOT NULL,
+                    type TEXT,
+                    symbol TEXT,
+                    value REAL,
+                    fee REAL,
+                    status TEXT,
+                    raw TEXT NOT NULL,
+                    PRIMARY KEY (wallet, txHash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_wallet_time ON transactions (wallet, blockTime)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cursors (
+                    wallet TEXT PRIMARY KEY,
+                    newestBlockTime REAL NOT NULL,
+                    newestTxHash TEXT,
+                    syncedAt REAL NOT NULL
+                )
+            """)
+
+    def cursor(self, wallet: str) -> Optional[Dict[str, Any]]:
+        """Newest stored transaction and last sync time of a wallet, or None if never synced"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT newestBlockTime, newestTxHash, syncedAt FROM cursors WHERE wallet = ?",
+                               (wallet,)).fetchone()
+        if not row:
+            return None
+        return {'newestBlockTime': row[0], 'newestTxHash': row[1], 'syncedAt': row[2]}
+
+    def ingest(self, wallet: str, transactions: List[Dict]) -> int:
+        """Store raw transactions not seen before; returns how many were new"""
+        rows = []
+        for txn in transactions:
+            tx_hash = transaction_hash(txn)
+            if not tx_hash:
+                continue
+            details = normalize_transaction(txn)
+            rows.append((wallet, tx_hash, details["timestamp"], str(details["type"]), str(details["symbol"]),
+                         details["value"], details.get("fee"), details.get("status"), json.dumps(txn)))
+        if not rows:
+            return 0
+
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO transactions
+                (wallet, txHash, blockTime, type, symbol, value, fee, status, raw)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            return conn.total_changes - before
+
+    def mark_synced(self, wallet: str):
+        with self._connect() as conn:
+            newest = conn.execute("""
+                SELECT blockTime, txHash FROM transactions WHERE wallet = ? ORDER BY blockTime DESC LIMIT 1
+            """, (wallet,)).fetchone() or (0, None)
+            conn.execute("""
+                INSERT OR REPLACE INTO cursors (wallet, newestBlockTime, newestTxHash, syncedAt)
+                VALUES (?, ?, ?, ?)
+            """, (wallet, newest[0], newest[1], time.time()))
+
+    def recent(self, wallet: str, limit: int = 100, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        A wallet's stored transactions, newest first
+
+        Args:
+            wallet: Wallet address
+            limit: Maximum number of transactions
+            since: Only transactions at or after this epoch time
+
+        Returns:
+            Normalized transactions, each with its Birdeye payload under 'raw'
+        """
+        query = "SELECT txHash, blockTime, type, symbol, value, fee, status, raw FROM transactions WHERE wallet = ?"
+        params: List[Any] = [wallet]
+        if since is not None:
+            query += " AND blockTime >= ?"
+            params.append(since)
+        query += " ORDER BY blockTime DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        transactions = []
+        for tx_hash, block_time, tx_type, symbol, value, fee, status, raw in rows:
+            details = {"type": tx_type, "symbol": symbol, "value": value, "timestamp": block_time, "txHash": tx_hash}
+            if fee is not None:
+                details["fee"] = fee
+            if status is not None:
+                details["status"] = status
+            details["raw"] = json.loads(raw)
+            transactions.append(details)
+        return transactions
+
+    def _sync_steps(self, wallet: str, force: bool) -> Generator[Dict, Dict, int]:
+        """
+        Drive one incremental sync: yields tx_list request params, receives each
+        page's response JSON, and returns the number of new transactions
+        """
+        cursor = self.cursor(wallet)
+        if cursor and not force and time.time() - cursor['syncedAt'] < self.min_sync_interval:
+            return 0
+
+        params = {"wallet": wallet, "limit": KNOWN_WALLET_PAGE if cursor else FULL_PAGE}
+        new_total = 0
+        for _ in range(MAX_PAGES):
+            data = yield params
+            page = extract_transactions(data)
+            new = self.ingest(wallet, page)
+            new_total += new
+
+            # Stop at the first page that reaches stored history, or at the end of the history
+            if new < len(page) or len(page) < params["limit"]:
+                break
+            oldest_hash = transaction_hash(min(page, key=transaction_timestamp))
+            if not oldest_hash:
+                break
+            params = {"wallet": wallet, "limit": FULL_PAGE, "before": oldest_hash}
+
+        self.mark_synced(wallet)
+        return new_total
+
+    @staticmethod
+    def _headers(api_key: Optional[str]) -> Dict[str, str]:
+        return {
+            "X-API-KEY": api_key or os.getenv('BIRDEYE_API_KEY', ''),
+            "x-chain": "solana",
+            "accept": "application/json"
+        }
+
+    def sync(self, wallet: str, api_key: Optional[str] = None, force: bool = False) -> int:
+        """Fetch a wallet's new transactions with requests; returns how many were new, -1 on failure"""
+        steps = self._sync_steps(wallet, force)
+        try:
+            params = next(steps)
+            while True:
+                response = rate_limited_session('birdeye').get(TX_LIST_URL, headers=self._headers(api_key),
+                                                               params=params, timeout=15)
+                if response.status_code != 200:
+                    logger.error(f"Error from Birdeye API: {response.status_code} - {response.text}")
+                    return -1
+                params = steps.send(response.json())
+        except StopIteration as done:
+            return done.value
+        except Exception as e:
+            logger.error(f"Error syncing transactions for {wallet}: {e}")
+            return -1
+
+    async def async_sync(self, session, wallet: str, api_key: Optional[str] = None, force: bool = False) -> int:
+        """Fetch a wallet's new transactions on an aiohttp session; returns how many were new, -1 on failure"""
+        steps = self._sync_steps(wallet, force)
+        birdeye = get_rate_limiter('birdeye')
+        try:
+            params = next(steps)
+            while True:
+                await birdeye.acquire()
+                async with session.get(TX_LIST_URL, params=params, headers=self._headers(api_key)) as response:
+                    birdeye.update(response.status, response.headers)
+                    if response.status != 200:
+                        logger.error(f"Error from Birdeye API: {response.status} - {await response.text()}")
+                        return -1
+                    data = await response.json()
+                params = steps.send(data)
+        except StopIteration as done:
+            return done.value
+        except Exception as e:
+            logger.error(f"Error syncing transactions for {wallet}: {e}")
+            return -1
+
+
+_store: Optional[WalletTransactionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_wallet_store() -> WalletTransactionStore:
+    """Process-wide wallet transaction store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WalletTransactionStore()
+        return _store
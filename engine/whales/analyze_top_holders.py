@@ -9,7 +9,6 @@ from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 from airtable import Airtable
-import anthropic
 
 # Set Windows event loop policy
 if os.name == 'nt':  # Windows
@@ -20,6 +19,12 @@ project_root = str(Path(__file__).parent.parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from engine.bounded_pipeline import write_as_completed
+from engine.llm_broker import get_broker
+from engine.rate_limits import get_rate_limiter, limit_session
+from engine.wallet_digest import format_digest, summarize_transactions
+from engine.wallet_store import get_wallet_store
+
 # Setup logging
 def setup_logging():
     logger = logging.getLogger(__name__)
@@ -51,71 +56,74 @@ TOKENS = {
     }
 }
 
-async def get_top_holders(session, token_mint, limit=20):
-    """Get top holders for a token using Birdeye API"""
+# Holders analyzed per token, fetched in pages of HOLDER_PAGE_SIZE
+HOLDER_LIMIT = 200
+HOLDER_PAGE_SIZE = 100
+
+# Wallets analyzed more recently than this are skipped
+RECENT_ANALYSIS_DAYS = 7
+
+# Concurrent Birdeye transaction fetches and Claude analyses
+TX_CONCURRENCY = 8
+LLM_CONCURRENCY = 4
+
+async def get_top_holders(session, token_mint, limit=HOLDER_LIMIT):
+    """Get top holders for a token using Birdeye API, paging through up to limit holders"""
     url = "https://public-api.birdeye.so/defi/v3/token/holder"
-    params = {
-        "address": token_mint,
-        "offset": 0,
-        "limit": limit
-    }
     headers = {
         "x-api-key": os.getenv("BIRDEYE_API_KEY"),
         "x-chain": "solana"
     }
+    birdeye = get_rate_limiter('birdeye')
+    holders = []
     
     try:
-        async with session.get(url, params=params, headers=headers) as response:
-            if response.status == 200:
+        while len(holders) < limit:
+            params = {
+                "address": token_mint,
+                "offset": len(holders),
+                "limit": min(HOLDER_PAGE_SIZE, limit - len(holders))
+            }
+            await birdeye.acquire()
+            async with session.get(url, params=params, headers=headers) as response:
+                birdeye.update(response.status, response.headers)
+                if response.status != 200:
+                    logger.error(f"Failed to get top holders: {await response.text()}")
+                    break
                 data = await response.json()
-                if data.get("success"):
-                    return data.get("data", {}).get("items", [])
-            logger.error(f"Failed to get top holders: {await response.text()}")
-            return []
+                if not data.get("success"):
+                    logger.error(f"Failed to get top holders: {data}")
+                    break
+                items = data.get("data", {}).get("items", [])
+            holders.extend(items)
+            if len(items) < params["limit"]:
+                break
     except Exception as e:
         logger.error(f"Error getting top holders: {e}")
-        return []
+    return holders
 
 async def get_wallet_transactions(session, wallet_address, limit=100):
-    """Get transaction history for a wallet using Birdeye API"""
-    url = "https://public-api.birdeye.so/v1/wallet/tx_list"
-    params = {
-        "wallet": wallet_address,
-        "limit": limit
-    }
-    headers = {
-        "x-api-key": os.getenv("BIRDEYE_API_KEY"),
-        "x-chain": "solana"
-    }
-    
-    try:
-        async with session.get(url, params=params, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                if data.get("success"):
-                    return data.get("data", {})
-            logger.error(f"Failed to get wallet transactions: {await response.text()}")
-            return {}
-    except Exception as e:
-        logger.error(f"Error getting wallet transactions: {e}")
-        return {}
+    """Get transaction history for a wallet, syncing only new Birdeye transactions into the local store"""
+    store = get_wallet_store()
+    new_count = await store.async_sync(session, wallet_address, os.getenv("BIRDEYE_API_KEY"))
+    if new_count < 0:
+        logger.error(f"Failed to sync wallet transactions for {wallet_address}, using stored history")
+    transactions = [row["raw"] for row in store.recent(wallet_address, limit)]
+    # Same shape as the Birdeye tx_list data
+    return {"solana": transactions} if transactions else {}
 
 async def analyze_with_claude(wallet_address, transactions, token_name):
     """Analyze wallet transactions using Claude AI"""
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        
-        # Prepare transaction data for Claude
-        tx_summary = json.dumps(transactions, indent=2)
-        if len(tx_summary) > 50000:  # Limit size for Claude
-            tx_summary = tx_summary[:50000] + "... [truncated]"
+        # Send Claude a compact digest of the history rather than the raw rows
+        tx_summary = format_digest(summarize_transactions(transactions.get("solana", []), focus_symbol=token_name))
         
         prompt = f"""
         You are a cryptocurrency analyst specializing in Solana tokens. Analyze the following wallet transactions for a top holder of the {token_name} token.
 
         Wallet Address: {wallet_address}
 
-        Transaction History:
+        Transaction History Digest:
         {tx_summary}
 
         Focus on:
@@ -142,7 +150,8 @@ async def analyze_with_claude(wallet_address, transactions, token_name):
         Ensure your analysis is data-driven and objective.
         """
         
-        message = client.messages.create(
+        message = await get_broker().acreate_message(
+            caller="whales.analyze_holder",
             model="claude-3-7-sonnet-20250219",
             max_tokens=4000,
             temperature=0.2,
@@ -153,7 +162,7 @@ async def analyze_with_claude(wallet_address, transactions, token_name):
         )
         
         # Extract JSON from Claude's response
-        response_text = message.content[0].text
+        response_text = message.text
         
         # Find JSON in the response
         json_start = response_text.find('{')
@@ -173,7 +182,117 @@ async def analyze_with_claude(wallet_address, transactions, token_name):
         logger.error(f"Error analyzing with Claude: {e}")
         return None
 
-async def analyze_top_holders():
+def load_recent_analyses(whale_analysis_table, token_key, days=RECENT_ANALYSIS_DAYS):
+    """Wallets analyzed for a token in the last days, in one query"""
+    records = whale_analysis_table.get_all(
+        formula=f"AND({{token}}='{token_key}', IS_AFTER({{createdAt}}, DATEADD(NOW(), -{days}, 'days')))",
+        fields=['wallet']
+    )
+    return {record['fields'].get('wallet') for record in records}
+
+def build_analysis_record(wallet, token_key, amount, analysis):
+    """WHALE_ANALYSIS fields for a holder's analysis"""
+    return {
+        "wallet": wallet,
+        "token": token_key,
+        "holdingAmount": amount,
+        "holdingPattern": analysis.get("holdingPattern", "UNKNOWN"),
+        "tradingActivity": analysis.get("tradingActivity", "UNKNOWN"),
+        "diversification": analysis.get("diversification", "UNKNOWN"),
+        "outlook": analysis.get("outlook", "NEUTRAL"),
+        "confidenceScore": analysis.get("confidenceScore", 50),
+        "explanation": analysis.get("explanation", ""),
+        "keyInsights": "\n".join(analysis.get("keyInsights", [])),
+        "recommendedAction": analysis.get("recommendedAction", "MONITOR"),
+        "createdAt": datetime.now(timezone.utc).isoformat()
+    }
+
+async def analyze_token_holders(session, whale_analysis_table, token_key, token_info, holder_limit=HOLDER_LIMIT):
+    """
+    Analyze the top holders of one token
+    
+    Wallets analyzed in the last RECENT_ANALYSIS_DAYS are skipped using a
+    single WHALE_ANALYSIS query. The remaining wallets' transactions are
+    fetched concurrently (TX_CONCURRENCY), Claude analyzes them with at most
+    LLM_CONCURRENCY calls in flight, and finished analyses are inserted in
+    batches of WRITE_BATCH_SIZE.
+    
+    Returns:
+        Dictionary with holder, skipped, analyzed and saved counts plus stage timings
+    """
+    stats = {'holders': 0, 'skipped': 0, 'analyzed': 0, 'saved': 0}
+    timings = {'holders': 0.0, 'recent': 0.0, 'transactions': 0.0, 'claude': 0.0, 'airtable': 0.0}
+    
+    start = time.perf_counter()
+    holders = await get_top_holders(session, token_info["mint"], holder_limit)
+    timings['holders'] = time.perf_counter() - start
+    stats['holders'] = len(holders)
+    logger.info(f"Found {len(holders)} holders for {token_key}")
+    
+    start = time.perf_counter()
+    try:
+        recent = await asyncio.to_thread(load_recent_analyses, whale_analysis_table, token_key)
+    except Exception as e:
+        logger.error(f"Error loading recent analyses for {token_key}: {e}")
+        recent = set()
+    timings['recent'] = time.perf_counter() - start
+    
+    pending = [holder for holder in holders if holder.get("owner") and holder.get("owner") not in recent]
+    stats['skipped'] = len(holders) - len(pending)
+    logger.info(f"Skipping {stats['skipped']} wallets analyzed in the last {RECENT_ANALYSIS_DAYS} days, "
+                f"analyzing {len(pending)}")
+    
+    tx_semaphore = asyncio.Semaphore(TX_CONCURRENCY)
+    llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+    
+    async def analyze_holder(holder):
+        wallet = holder.get("owner")
+        amount = holder.get("ui_amount", 0)
+        
+        async with tx_semaphore:
+            start = time.perf_counter()
+            transactions = await get_wallet_transactions(session, wallet)
+            timings['transactions'] += time.perf_counter() - start
+        
+        if not transactions:
+            logger.warning(f"No transactions found for {wallet[:8]}...")
+            return None
+        
+        async with llm_semaphore:
+            start = time.perf_counter()
+            analysis = await analyze_with_claude(wallet, transactions, token_key)
+            timings['claude'] += time.perf_counter() - start
+        
+        if not analysis:
+            logger.warning(f"Failed to analyze {wallet[:8]}...")
+            return None
+        
+        logger.info(f"Analyzed {wallet[:8]} ({amount:,.0f} {token_key}) with outlook: {analysis.get('outlook')}")
+        return build_analysis_record(wallet, token_key, amount, analysis)
+    
+    async def save(batch) -> int:
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(whale_analysis_table.batch_insert, batch)
+            logger.info(f"Saved {len(batch)} analyses for {token_key}")
+            return len(batch)
+        except Exception as e:
+            logger.error(f"Error saving {len(batch)} analyses for {token_key}: {e}")
+            return 0
+        finally:
+            timings['airtable'] += time.perf_counter() - start
+    
+    counts = await write_as_completed([analyze_holder(holder) for holder in pending], save)
+    stats['analyzed'] = counts['completed']
+    stats['saved'] = counts['success']
+    
+    stats['timings'] = {stage: round(seconds, 2) for stage, seconds in timings.items()}
+    logger.info(f"{token_key}: {stats['analyzed']} analyzed, {stats['saved']} saved, {stats['skipped']} skipped. "
+                "Stage timings (transactions and claude are summed call time): " +
+                ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in timings.items()))
+    return stats
+
+async def analyze_top_holders(holder_limit=HOLDER_LIMIT):
     """Main function to analyze top holders for UBC and COMPUTE tokens"""
     load_dotenv(dotenv_path=os.path.join(project_root, '.env'))
     
@@ -187,65 +306,16 @@ async def analyze_top_holders():
     
     # Create WHALE_ANALYSIS table if it doesn't exist
     whale_analysis_table = Airtable(base_id, "WHALE_ANALYSIS", api_key)
+    limit_session(whale_analysis_table.session, 'airtable')
     
+    results = {}
     async with aiohttp.ClientSession() as session:
         for token_key, token_info in TOKENS.items():
             logger.info(f"Analyzing top holders for {token_key}...")
-            
-            # Get top holders
-            holders = await get_top_holders(session, token_info["mint"])
-            logger.info(f"Found {len(holders)} holders for {token_key}")
-            
-            for i, holder in enumerate(holders):
-                wallet = holder.get("owner")
-                amount = holder.get("ui_amount", 0)
-                
-                logger.info(f"Analyzing holder {i+1}/{len(holders)}: {wallet[:8]}... ({amount:,.0f} {token_key})")
-                
-                # Check if we already analyzed this wallet recently
-                existing_records = whale_analysis_table.get_all(
-                    formula=f"AND({{wallet}}='{wallet}', {{token}}='{token_key}', IS_AFTER({{createdAt}}, 'TODAY-7'))"
-                )
-                
-                if existing_records:
-                    logger.info(f"Skipping recent analysis for {wallet[:8]}...")
-                    continue
-                
-                # Get wallet transactions
-                transactions = await get_wallet_transactions(session, wallet)
-                
-                if not transactions:
-                    logger.warning(f"No transactions found for {wallet[:8]}...")
-                    continue
-                
-                # Analyze with Claude
-                analysis = await analyze_with_claude(wallet, transactions, token_key)
-                
-                if not analysis:
-                    logger.warning(f"Failed to analyze {wallet[:8]}...")
-                    continue
-                
-                # Save to Airtable
-                record_data = {
-                    "wallet": wallet,
-                    "token": token_key,
-                    "holdingAmount": amount,
-                    "holdingPattern": analysis.get("holdingPattern", "UNKNOWN"),
-                    "tradingActivity": analysis.get("tradingActivity", "UNKNOWN"),
-                    "diversification": analysis.get("diversification", "UNKNOWN"),
-                    "outlook": analysis.get("outlook", "NEUTRAL"),
-                    "confidenceScore": analysis.get("confidenceScore", 50),
-                    "explanation": analysis.get("explanation", ""),
-                    "keyInsights": "\n".join(analysis.get("keyInsights", [])),
-                    "recommendedAction": analysis.get("recommendedAction", "MONITOR"),
-                    "createdAt": datetime.now(timezone.utc).isoformat()
-                }
-                
-                whale_analysis_table.insert(record_data)
-                logger.info(f"Saved analysis for {wallet[:8]} with outlook: {analysis.get('outlook')}")
-                
-                # Rate limiting
-                await asyncio.sleep(2)
+            results[token_key] = await analyze_token_holders(
+                session, whale_analysis_table, token_key, token_info, holder_limit
+            )
+    return results
 
 async def generate_meta_analysis(token_key="ALL", timeframe="7d"):
     """Generate meta-analysis of whale behavior for a specific token or all tokens"""
@@ -380,9 +450,8 @@ async def generate_meta_analysis(token_key="ALL", timeframe="7d"):
     
     # Call Claude API for analysis
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        
-        message = client.messages.create(
+        message = await get_broker().acreate_message(
+            caller="whales.meta_analysis",
             model="claude-3-7-sonnet-latest",
             max_tokens=4000,
             temperature=0.2,
@@ -393,7 +462,7 @@ async def generate_meta_analysis(token_key="ALL", timeframe="7d"):
         )
         
         # Extract JSON from Claude's response
-        response_text = message.content[0].text
+        response_text = message.text
         
         # Find JSON in the response
         json_start = response_text.find('{')
@@ -462,6 +531,7 @@ def main():
         parser.add_argument('--meta-only', action='store_true', help='Only generate meta-analysis without analyzing top holders')
         parser.add_argument('--token', type=str, default='ALL', choices=['UBC', 'COMPUTE', 'ALL'], help='Token to analyze')
         parser.add_argument('--timeframe', type=str, default='7d', choices=['7d', '30d', '90d'], help='Timeframe for analysis')
+        parser.add_argument('--holders', type=int, default=HOLDER_LIMIT, help='Number of top holders to analyze per token')
         args = parser.parse_args()
         
         if args.meta_only:
@@ -471,7 +541,7 @@ def main():
             logger.info("✅ Meta-analysis completed")
         else:
             # Run full analysis
-            asyncio.run(analyze_top_holders())
+            asyncio.run(analyze_top_holders(args.holders))
             logger.info("✅ Whale analysis completed")
             
             # Generate meta-analysis for each token and combined
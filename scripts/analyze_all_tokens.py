@@ -22,15 +22,20 @@ import os
 from datetime import datetime
 import asyncio
 from airtable import Airtable
-from ratelimit import limits, sleep_and_retry
 import json
 from pathlib import Path
 from generate_chart import generate_chart, fetch_token_data, calculate_support_levels
-from analyze_charts import analyze_charts_with_claude, generate_signal, create_airtable_signal
+from analyze_charts import (
+    analyze_charts_with_claude,
+    build_chart_analysis_request,
+    parse_chart_analysis,
+    generate_signal,
+    create_airtable_signal
+)
+from engine.llm_broker import get_broker
 
-@sleep_and_retry
-@limits(calls=5, period=1)  # 5 calls per second
 def rate_limited_fetch(timeframe, hours, token_address):
+    # fetch_token_data paces itself on the shared Birdeye limiter
     return fetch_token_data(timeframe, hours, token_address)
 
 CHART_CONFIGS = [
@@ -102,6 +107,143 @@ async def get_active_tokens():
         print(f"Error fetching active tokens: {e}")
         return []
 
+def load_recent_analysis(token, token_dir):
+    """Return the saved analysis if it is under 30 minutes old and all its charts exist"""
+    analysis_path = token_dir / 'analysis.json'
+    if not analysis_path.exists():
+        return None
+
+    try:
+        with open(analysis_path, 'r') as f:
+            saved_analysis = json.load(f)
+            
+        # Parse the timestamp from saved analysis
+        analysis_time = datetime.fromisoformat(saved_analysis['timestamp'])
+        time_diff = datetime.now() - analysis_time
+        
+        # If analysis is less than 30 minutes old
+        if time_diff < timedelta(minutes=30):
+            print(f"Using recent analysis from {time_diff.seconds // 60} minutes ago")
+            
+            # Verify all chart files exist
+            all_charts_exist = all(
+                (token_dir / config['filename'].format(token=token['token'])).exists()
+                for config in CHART_CONFIGS
+            )
+            
+            if all_charts_exist:
+                print("All chart files present, using cached analysis")
+                return {
+                    'token_info': {
+                        'token': token['token'],
+                        'mint': token['mint']
+                    },
+                    'analyses': saved_analysis['analyses']
+                }
+            else:
+                print("Some chart files missing, regenerating analysis")
+    except Exception as e:
+        print(f"Error reading cached analysis: {e}")
+        # Continue with new analysis if there's any error reading cache
+    return None
+
+def generate_token_charts(token, token_dir):
+    """Generate charts for each timeframe; returns the paths that were written"""
+    chart_paths = []
+    for config in CHART_CONFIGS:
+        # Format config for this token
+        token_config = {
+            **config,
+            'title': config['title'].format(token=token['token']),
+            'subtitle': config['subtitle'].format(token=token['token']),
+            'filename': config['filename'].format(token=token['token'])
+        }
+        
+        # Fetch data
+        df = fetch_token_data(
+            timeframe=config['timeframe'],
+            hours=config['duration_hours'],
+            token_address=token['mint']
+        )
+        
+        if df is None or df.empty:
+            print(f"No data available for {token['token']} - {config['timeframe']}")
+            continue
+            
+        # Calculate support levels
+        support_levels = calculate_support_levels(df)
+        
+        # Generate chart and get the actual saved path
+        success = generate_chart(df, token_config, support_levels)
+        if success:
+            # Use the correct path where the file was actually saved
+            chart_path = token_dir / token_config['filename']
+            if chart_path.exists():  # Verify file exists
+                print(f"Generated chart: {chart_path}")
+                chart_paths.append(str(chart_path))  # Convert Path to string
+            else:
+                print(f"Chart file not found at {chart_path}")
+        else:
+            print(f"Failed to generate chart for {token['token']} - {config['timeframe']}")
+    return chart_paths
+
+def create_token_signals(token, analyses):
+    """Create Airtable signals for every non-HOLD timeframe with confidence >= 60"""
+    for timeframe, analysis in analyses.items():
+        if timeframe != 'overall':  # Skip the overall analysis
+            print(f"\n⏰ Processing {timeframe} timeframe...")
+            
+            # Extract signal details
+            signal_type = analysis.get('signal')
+            confidence = analysis.get('confidence', 0)
+            key_levels = analysis.get('key_levels')
+            
+            print(f"Signal type: {signal_type}")
+            print(f"Confidence: {confidence}")
+            print(f"Key levels: {key_levels}")
+            
+            if signal_type and signal_type != 'HOLD' and confidence >= 60:
+                print("✅ Signal meets criteria for creation")
+                
+                # Create signal with the correct timeframe
+                create_airtable_signal(
+                    analysis,
+                    timeframe,  # Use the timeframe directly from the analysis
+                    {
+                        'token': token['token'],
+                        'mint': token['mint']
+                    },
+                    analyses
+                )
+
+def save_analysis(token, token_dir, analyses):
+    """Write analysis.json for the token; returns the analysis data"""
+    # Convert ChartAnalysis objects to dictionaries
+    serializable_analyses = {}
+    for timeframe, analysis in analyses.items():
+        if timeframe == 'overall' or not hasattr(analysis, 'to_dict'):
+            serializable_analyses[timeframe] = analysis
+        else:
+            serializable_analyses[timeframe] = analysis.to_dict()
+
+    # Save analysis to file
+    analysis_path = token_dir / 'analysis.json'
+    with open(analysis_path, 'w') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(),
+            'token': token['token'],
+            'analyses': serializable_analyses
+        }, f, indent=2)
+    print(f"Saved analysis to {analysis_path}")
+    
+    return {
+        'token_info': {
+            'token': token['token'],
+            'mint': token['mint']
+        },
+        'analyses': serializable_analyses
+    }
+
 async def analyze_token(token):
     """Generate and analyze charts for a single token"""
     retries = 3
@@ -114,86 +256,11 @@ async def analyze_token(token):
             token_dir.mkdir(parents=True, exist_ok=True)
             
             # Check for recent analysis
-            analysis_path = token_dir / 'analysis.json'
-            if analysis_path.exists():
-                try:
-                    with open(analysis_path, 'r') as f:
-                        saved_analysis = json.load(f)
-                        
-                    # Parse the timestamp from saved analysis
-                    analysis_time = datetime.fromisoformat(saved_analysis['timestamp'])
-                    time_diff = datetime.now() - analysis_time
-                    
-                    # If analysis is less than 30 minutes old
-                    if time_diff < timedelta(minutes=30):
-                        print(f"Using recent analysis from {time_diff.seconds // 60} minutes ago")
-                        
-                        # Verify all chart files exist
-                        chart_paths = []
-                        all_charts_exist = True
-                        
-                        for config in CHART_CONFIGS:
-                            chart_filename = config['filename'].format(token=token['token'])
-                            chart_path = token_dir / chart_filename
-                            if chart_path.exists():
-                                chart_paths.append(str(chart_path))
-                            else:
-                                all_charts_exist = False
-                                break
-                        
-                        if all_charts_exist:
-                            print("All chart files present, using cached analysis")
-                            return {
-                                'token_info': {
-                                    'token': token['token'],
-                                    'mint': token['mint']
-                                },
-                                'analyses': saved_analysis['analyses']
-                            }
-                        else:
-                            print("Some chart files missing, regenerating analysis")
-                except Exception as e:
-                    print(f"Error reading cached analysis: {e}")
-                    # Continue with new analysis if there's any error reading cache
-            
-            # Generate charts for each timeframe
-            chart_paths = []
-            for config in CHART_CONFIGS:
-                # Format config for this token
-                token_config = {
-                    **config,
-                    'title': config['title'].format(token=token['token']),
-                    'subtitle': config['subtitle'].format(token=token['token']),
-                    'filename': config['filename'].format(token=token['token'])
-                }
-                
-                # Fetch data
-                df = fetch_token_data(
-                    timeframe=config['timeframe'],
-                    hours=config['duration_hours'],
-                    token_address=token['mint']
-                )
-                
-                if df is None or df.empty:
-                    print(f"No data available for {token['token']} - {config['timeframe']}")
-                    continue
-                    
-                # Calculate support levels
-                support_levels = calculate_support_levels(df)
-                
-                # Generate chart and get the actual saved path
-                success = generate_chart(df, token_config, support_levels)
-                if success:
-                    # Use the correct path where the file was actually saved
-                    chart_path = token_dir / token_config['filename']
-                    if chart_path.exists():  # Verify file exists
-                        print(f"Generated chart: {chart_path}")
-                        chart_paths.append(str(chart_path))  # Convert Path to string
-                    else:
-                        print(f"Chart file not found at {chart_path}")
-                else:
-                    print(f"Failed to generate chart for {token['token']} - {config['timeframe']}")
+            recent = load_recent_analysis(token, token_dir)
+            if recent:
+                return recent
             
+            chart_paths = generate_token_charts(token, token_dir)
             if not chart_paths:
                 print(f"No charts generated for {token['token']}")
                 return None
@@ -209,71 +276,12 @@ async def analyze_token(token):
                     }
                 )
                 
-                if analyses:
-                    for timeframe, analysis in analyses.items():
-                        if timeframe != 'overall':  # Skip the overall analysis
-                            print(f"\n⏰ Processing {timeframe} timeframe...")
-                            
-                            # Extract signal details
-                            signal_type = analysis.get('signal')
-                            confidence = analysis.get('confidence', 0)
-                            key_levels = analysis.get('key_levels')
-                            
-                            print(f"Signal type: {signal_type}")
-                            print(f"Confidence: {confidence}")
-                            print(f"Key levels: {key_levels}")
-                            
-                            if signal_type and signal_type != 'HOLD' and confidence >= 60:
-                                print("✅ Signal meets criteria for creation")
-                                
-                                # Create signal with the correct timeframe
-                                result = create_airtable_signal(
-                                    analysis,
-                                    timeframe,  # Use the timeframe directly from the analysis
-                                    {
-                                        'token': token['token'],
-                                        'mint': token['mint']
-                                    },
-                                    analyses
-                                )
-                
-                print("Analysis result type:", type(analyses))
-                print("Analysis keys:", analyses.keys() if analyses else None)
-                
                 if not analyses:
                     print(f"No analysis generated for {token['token']}")
                     return None
                 
-                # Convert ChartAnalysis objects to dictionaries
-                serializable_analyses = {}
-                for timeframe, analysis in analyses.items():
-                    print(f"Processing timeframe {timeframe}, analysis type: {type(analysis)}")
-                    if timeframe == 'overall':
-                        serializable_analyses[timeframe] = analysis
-                    else:
-                        if hasattr(analysis, 'to_dict'):
-                            serializable_analyses[timeframe] = analysis.to_dict()
-                        else:
-                            serializable_analyses[timeframe] = analysis
-
-                # Save analysis to file
-                analysis_path = token_dir / 'analysis.json'
-                with open(analysis_path, 'w') as f:
-                    json.dump({
-                        'timestamp': datetime.now().isoformat(),
-                        'token': token['token'],
-                        'analyses': serializable_analyses
-                    }, f, indent=2)
-                print(f"Saved analysis to {analysis_path}")
-                
-                # Return the analysis data
-                return {
-                    'token_info': {
-                        'token': token['token'],
-                        'mint': token['mint']
-                    },
-                    'analyses': serializable_analyses
-                }
+                create_token_signals(token, analyses)
+                return save_analysis(token, token_dir, analyses)
                 
             except Exception as e:
                 print(f"Error during analysis: {e}")
@@ -290,11 +298,79 @@ async def analyze_token(token):
             
     return None
 
+def analyze_tokens_batch(tokens, poll_interval=60):
+    """
+    Analyze all tokens through one Message Batches job
+    
+    Charts are rendered up front and every token's chart prompt is submitted
+    together; signals are created from each result as it is streamed back.
+    Batch results arrive within 24 hours at half the price, so this mode is
+    meant for the nightly scan rather than live signals.
+    """
+    results = []
+    requests_kwargs = {}
+    pending = {}
+
+    for i, token in enumerate(tokens):
+        print(f"\n🔄 Preparing {token['token']}...")
+        try:
+            token_dir = Path('public/charts') / token['token'].lower()
+            token_dir.mkdir(parents=True, exist_ok=True)
+
+            recent = load_recent_analysis(token, token_dir)
+            if recent:
+                results.append(recent)
+                continue
+
+            chart_paths = generate_token_charts(token, token_dir)
+            if not chart_paths:
+                print(f"No charts generated for {token['token']}")
+                continue
+
+            custom_id = f"token-{i}"
+            requests_kwargs[custom_id] = build_chart_analysis_request(
+                chart_paths,
+                token_info={
+                    'token': token['token'],
+                    'mint': token['mint']
+                }
+            )
+            pending[custom_id] = (token, token_dir)
+        except Exception as e:
+            print(f"❌ Error preparing {token['token']}: {e}")
+
+    if not requests_kwargs:
+        return results
+
+    print(f"\n📦 Submitting {len(requests_kwargs)} chart analyses as one batch...")
+    for custom_id, response in get_broker().run_batch("analyze_all_tokens.batch", requests_kwargs,
+                                                      poll_interval=poll_interval):
+        token, token_dir = pending[custom_id]
+        if isinstance(response, Exception):
+            print(f"\n❌ Batch analysis failed for {token['token']}: {response}")
+            continue
+
+        print(f"\n📥 Batch result for {token['token']} ({'cached' if response.cached else f'${response.cost:.4f}'})")
+        try:
+            analyses = parse_chart_analysis(response.text)
+            if not analyses:
+                print(f"No analysis generated for {token['token']}")
+                continue
+
+            create_token_signals(token, analyses)
+            results.append(save_analysis(token, token_dir, analyses))
+        except Exception as e:
+            print(f"\n❌ Error processing batch result for {token['token']}: {e}")
+
+    return results
+
 async def main():
     try:
         # Add argument parsing
         parser = argparse.ArgumentParser(description='Analyze token charts')
         parser.add_argument('--token', type=str, help='Analyze specific token only')
+        parser.add_argument('--batch', action='store_true',
+                            help='Submit all analyses as one Message Batches job (nightly scans)')
         args = parser.parse_args()
 
         print("\n🚀 Starting token analysis...")
@@ -322,22 +398,25 @@ async def main():
         analyses = []
         total = len(tokens)
         
-        for i, token in enumerate(tokens, 1):
-            print(f"\n=== Processing token {i}/{total}: {token['token']} ===")
-            try:
-                result = await analyze_token(token)
-                if result:
-                    print(f"\n✅ Analysis completed for {token['token']}")
-                    print("Analysis structure:", type(result))
-                    print("Analysis keys:", result.keys() if result else None)
-                    analyses.append(result)
-                else:
-                    print(f"\n❌ No valid analysis for {token['token']}")
-            except Exception as e:
-                print(f"\n❌ Error analyzing {token['token']}: {str(e)}")
-                continue
+        if args.batch:
+            analyses = analyze_tokens_batch(tokens)
+        else:
+            for i, token in enumerate(tokens, 1):
+                print(f"\n=== Processing token {i}/{total}: {token['token']} ===")
+                try:
+                    result = await analyze_token(token)
+                    if result:
+                        print(f"\n✅ Analysis completed for {token['token']}")
+                        print("Analysis structure:", type(result))
+                        print("Analysis keys:", result.keys() if result else None)
+                        analyses.append(result)
+                    else:
+                        print(f"\n❌ No valid analysis for {token['token']}")
+                except Exception as e:
+                    print(f"\n❌ Error analyzing {token['token']}: {str(e)}")
+                    continue
                 
-            print("\n" + "="*50)  # Visual separator between tokens
+                print("\n" + "="*50)  # Visual separator between tokens
         
         # Process all analyses in batch
         if analyses:
@@ -18,7 +18,6 @@ logger = logging.getLogger(__name__)
 from backend.src.airtable.tables import getTable
 from socials.post_signal import post_signal
 from utils.send_sse import send_signal_notification
-import anthropic
 import os
 import base64
 from datetime import datetime, timezone, timedelta
@@ -31,6 +30,8 @@ from collections import defaultdict
 import statistics
 from airtable import Airtable
 from scripts.validate_signal import validate_signal
+from engine.llm_broker import get_broker
+from scripts.chart_cache import get_chart_cache
 
 class ChartAnalysis:
     def __init__(self, timeframe, signal, confidence, reasoning, key_levels, risk_reward_ratio=None, reassess_conditions=None):
@@ -338,43 +339,46 @@ def get_latest_token_snapshot(token):
         print(f"Error fetching token snapshot: {e}")
         return None
 
-def analyze_charts_with_claude(chart_paths, token_info=None):
-    """Analyze multiple timeframe charts together using Claude 3"""
-    try:
-        # Debug logging at start
-        print("\nStarting chart analysis with:")
-        print(f"Chart paths: {chart_paths}")
-        print(f"Token info: {token_info}")
+CHART_ANALYSIS_MODEL = "claude-3-7-sonnet-20250219"
 
-        # Validate inputs
-        if not chart_paths:
-            raise ValueError("No chart paths provided")
-            
-        if not token_info or 'token' not in token_info:
-            raise ValueError("Invalid token info provided")
+def build_chart_analysis_request(chart_paths, token_info=None):
+    """Build the Claude request for a multi-timeframe chart analysis
+    
+    Returns:
+        dict: model, max_tokens, system and messages for LLMBroker.create_message
+        
+    Raises:
+        ValueError: If the charts or token info are missing
+    """
+    # Validate inputs
+    if not chart_paths:
+        raise ValueError("No chart paths provided")
+        
+    if not token_info or 'token' not in token_info:
+        raise ValueError("Invalid token info provided")
+        
+    # Verify chart files exist
+    existing_charts = []
+    for path in chart_paths:
+        if os.path.exists(path):
+            existing_charts.append(path)
+        else:
+            print(f"Warning: Chart not found at {path}")
             
-        # Verify chart files exist
-        existing_charts = []
-        for path in chart_paths:
-            if os.path.exists(path):
-                existing_charts.append(path)
-            else:
-                print(f"Warning: Chart not found at {path}")
-                
-        if not existing_charts:
-            raise ValueError("No valid chart files found")
+    if not existing_charts:
+        raise ValueError("No valid chart files found")
 
-        # Get API key from environment
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in .env file")
+    # Get API key from environment
+    api_key = os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        raise ValueError("ANTHROPIC_API_KEY not found in .env file")
 
-        # Format system prompt with token metrics
-        # Get latest snapshot
-        latest_snapshot = get_latest_token_snapshot(token_info['token'])
-        snapshot_text = ""
-        if latest_snapshot:
-            snapshot_text = f"""
+    # Format system prompt with token metrics
+    # Get latest snapshot
+    latest_snapshot = get_latest_token_snapshot(token_info['token'])
+    snapshot_text = ""
+    if latest_snapshot:
+        snapshot_text = f"""
 
 Primary Metrics (Live):
 • Current Price: ${latest_snapshot.get('price', 0):.4f}
@@ -391,51 +395,39 @@ Additional Metrics:
 • Volume on Up Day: {latest_snapshot.get('volumeOnUpDay', False)}
 • vs SOL Performance: {latest_snapshot.get('vsSolPerformance', 0):.2f}%"""
 
-        formatted_system_prompt = SYSTEM_PROMPT.format(token_metrics=snapshot_text)
-
-        # Make request to Claude via HTTP
-        print("\n🚀 Making request to Claude API...")
+    formatted_system_prompt = SYSTEM_PROMPT.format(token_metrics=snapshot_text)
 
-        claude_url = "https://api.anthropic.com/v1/messages"
-        headers = {
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json"
-        }
-
-        # Prepare chart images for Claude request
-        chart_contents = []
-        for chart_path in existing_charts:  # Use existing_charts instead of chart_paths
-            try:
-                with open(chart_path, "rb") as image_file:
-                    image_data = base64.b64encode(image_file.read()).decode('utf-8')
-                    
-                    # Map the chart path to the correct timeframe
-                    if '6h_scalp' in str(chart_path):
-                        timeframe = 'SCALP'
-                    elif '24h_intraday' in str(chart_path):
-                        timeframe = 'INTRADAY'
-                    elif '7d_swing' in str(chart_path):
-                        timeframe = 'SWING'
-                    elif '30d_position' in str(chart_path):
-                        timeframe = 'POSITION'
-                    else:
-                        print(f"Unknown timeframe in chart path: {chart_path}")
-                        continue
-
-                    chart_contents.append({
-                        "timeframe": timeframe,
-                        "data": image_data
-                    })
-                    print(f"Successfully loaded chart for {timeframe}")
-            except Exception as e:
-                print(f"Error loading chart {chart_path}: {e}")
+    # Prepare chart images for Claude request
+    chart_contents = []
+    for chart_path in existing_charts:  # Use existing_charts instead of chart_paths
+        try:
+            # Map the chart path to the correct timeframe
+            if '6h_scalp' in str(chart_path):
+                timeframe = 'SCALP'
+            elif '24h_intraday' in str(chart_path):
+                timeframe = 'INTRADAY'
+            elif '7d_swing' in str(chart_path):
+                timeframe = 'SWING'
+            elif '30d_position' in str(chart_path):
+                timeframe = 'POSITION'
+            else:
+                print(f"Unknown timeframe in chart path: {chart_path}")
                 continue
 
-        if not chart_contents:
-            raise ValueError("No chart images could be loaded")
-        
-        user_prompt = f"""I'm providing you with charts for {token_info['token']}/USD for a complete multi-timeframe analysis.
+            # Payload is reused from the chart cache when the file is unchanged
+            chart_contents.append({
+                "timeframe": timeframe,
+                "data": get_chart_cache().payload(chart_path)
+            })
+            print(f"Successfully loaded chart for {timeframe}")
+        except Exception as e:
+            print(f"Error loading chart {chart_path}: {e}")
+            continue
+
+    if not chart_contents:
+        raise ValueError("No chart images could be loaded")
+    
+    user_prompt = f"""I'm providing you with charts for {token_info['token']}/USD for a complete multi-timeframe analysis.
 
 Please analyze the charts in this specific order, from highest to lowest timeframe, to build a complete top-down analysis:
 
@@ -446,39 +438,36 @@ Please analyze the charts in this specific order, from highest to lowest timefra
 
 For each timeframe, consider how it relates to the higher timeframes above it. Your analysis should flow from the larger trend down to the immediate trading opportunities."""
 
-        # Create client with API key
-        client = anthropic.Client(api_key=api_key)
-        message = client.messages.create(
-            model="claude-3-7-sonnet-20250219",
-            max_tokens=4096,
-            system=formatted_system_prompt,
-            messages=[
-                {
-                    "role": "user", 
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": user_prompt
-                        },
-                        *[{
-                            "type": "image",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "image/png",
-                                "data": chart["data"]
-                            }
-                        } for chart in chart_contents]
-                    ]
-                }
-            ]
-        )
-        
-        # Add debug logging for Claude's response
-        print("\nRaw response from Claude:")
-        print(message.content[0].text)
+    return {
+        "model": CHART_ANALYSIS_MODEL,
+        "max_tokens": 4096,
+        "system": formatted_system_prompt,
+        "messages": [
+            {
+                "role": "user", 
+                "content": [
+                    {
+                        "type": "text",
+                        "text": user_prompt
+                    },
+                    *[{
+                        "type": "image",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "image/png",
+                            "data": chart["data"]
+                        }
+                    } for chart in chart_contents]
+                ]
+            }
+        ]
+    }
 
+def parse_chart_analysis(response_text):
+    """Parse Claude's chart analysis JSON into ChartAnalysis objects keyed by timeframe, plus 'overall'"""
+    try:
         # Clean and parse response with better error handling
-        cleaned_response = clean_json_string(message.content[0].text)
+        cleaned_response = clean_json_string(response_text)
         print("\nCleaned response:")
         print(cleaned_response)
         
@@ -533,6 +522,30 @@ For each timeframe, consider how it relates to the higher timeframes above it. Y
             print(cleaned_response)
         return None
 
+def analyze_charts_with_claude(chart_paths, token_info=None):
+    """Analyze multiple timeframe charts together using Claude 3"""
+    try:
+        # Debug logging at start
+        print("\nStarting chart analysis with:")
+        print(f"Chart paths: {chart_paths}")
+        print(f"Token info: {token_info}")
+
+        request = build_chart_analysis_request(chart_paths, token_info)
+
+        # Make request to Claude through the shared broker (cached by prompt + chart digests)
+        print("\n🚀 Making request to Claude API...")
+        message = get_broker().create_message(caller="analyze_charts", **request)
+        
+        # Add debug logging for Claude's response
+        print("\nRaw response from Claude:")
+        print(message.text)
+
+        return parse_chart_analysis(message.text)
+        
+    except Exception as e:
+        print(f"\nError analyzing charts: {e}")
+        return None
+
 def create_airtable_signal(analysis, timeframe, token_info, analyses=None, additional_fields=None):
     try:
         print(f"\nCreating Airtable signal for {token_info['token']}...")
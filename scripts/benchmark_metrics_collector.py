@@ -0,0 +1,113 @@
+import sys
+import time
+import asyncio
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from backend.src.utils.metrics_collector import ApiConfig, BirdeyeEndpoints, TokenMetricsCollector
+
+TOKEN_COUNT = 20
+
+# Seconds the stub takes to answer each request
+RESPONSE_DELAY = 0.05
+
+class StubBirdeye:
+    """Local stand-in for the three Birdeye endpoints; counts requests and client connections"""
+
+    def __init__(self):
+        self.requests = 0
+        self.peers = set()
+        self.app = web.Application()
+        self.app.router.add_get('/defi/price_volume/single', self.price)
+        self.app.router.add_get('/defi/v3/token/trade-data/single', self.trade_data)
+        self.app.router.add_get('/defi/v2/tokens/top_traders', self.top_traders)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/defi"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    async def _reply(self, request, data):
+        self.requests += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+        await asyncio.sleep(RESPONSE_DELAY)
+        return web.json_response({'success': True, 'data': data})
+
+    async def price(self, request):
+        seed = int(request.query['address'][4:])
+        return await self._reply(request, {'price': 1 + seed / 100, 'priceChangePercent': seed % 7,
+                                           'volumeUSD': 1000 * seed, 'updateUnixTime': 1_750_000_000})
+
+    async def trade_data(self, request):
+        seed = int(request.query['address'][4:])
+        return await self._reply(request, {'volume24h': 500 * seed, 'trades24h': 10 * seed,
+                                           'uniqueTraders': seed, 'buySellRatio': 1.2})
+
+    async def top_traders(self, request):
+        seed = int(request.query['address'][4:])
+        return await self._reply(request, {'items': [{'volume': seed * i, 'volumeBuy': i, 'volumeSell': seed,
+                                                      'tradeBuy': 1, 'tradeSell': 2} for i in range(3)]})
+
+async def legacy_collect(base_url: str, mints):
+    """Collection as take_snapshot did it before: a session per token, endpoints one after another"""
+    results = {}
+    for mint in mints:
+        async with aiohttp.ClientSession() as session:
+            results[mint] = {}
+            for name, url in BirdeyeEndpoints.all(mint, base_url).items():
+                async with session.get(url, headers={'X-API-KEY': 'test'}) as response:
+                    results[mint][name] = (await response.json()).get('data', {})
+    return results
+
+async def run_benchmark() -> bool:
+    stub = StubBirdeye()
+    await stub.start()
+    mints = [f'mint{i}' for i in range(TOKEN_COUNT)]
+    try:
+        print(f"\n⏱️ Collecting metrics for {TOKEN_COUNT} tokens, {RESPONSE_DELAY * 1000:.0f} ms per request...")
+
+        start = time.perf_counter()
+        legacy = await legacy_collect(stub.base_url, mints)
+        legacy_time = time.perf_counter() - start
+        legacy_connections = len(stub.peers)
+
+        stub.peers.clear()
+        start = time.perf_counter()
+        async with TokenMetricsCollector('test', ApiConfig(base_url=stub.base_url)) as collector:
+            collector.logger.setLevel('WARNING')
+            responses = await collector.get_tokens_metrics(mints)
+        collector_time = time.perf_counter() - start
+        collector_connections = len(stub.peers)
+    finally:
+        await stub.stop()
+
+    same = all(response.success and response.raw == legacy[mint] for mint, response in responses.items())
+    print(f"Serial, session per token: {legacy_time * 1000:7.0f} ms ({legacy_time / TOKEN_COUNT * 1000:5.1f} ms per token), "
+          f"{legacy_connections} connections")
+    print(f"Shared session, concurrent: {collector_time * 1000:6.0f} ms ({collector_time / TOKEN_COUNT * 1000:5.1f} ms per token), "
+          f"{collector_connections} connections")
+    print(f"Speedup: {legacy_time / collector_time:.1f}x")
+    print("✅ Collector returns the same payloads" if same else "❌ Collector results differ")
+    return same and collector_time < legacy_time
+
+def main():
+    print("🚀 Starting metrics collector benchmark...")
+    if asyncio.run(run_benchmark()):
+        print("\n✨ Benchmark completed!")
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import re
+import sys
+import time
+import random
+import string
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.token_matcher import TokenMatcher
+
+TWEET_COUNT = 10_000
+TOKEN_COUNT = 300
+
+WORDS = ("gm ser this is the one just bought more looking bullish chart breakout "
+         "wen moon liquidity pool staking rewards devs shipping community strong").split()
+
+def legacy_extract(text: str):
+    """Extraction as monitor_mentions did it before the matcher, one regex pass per call"""
+    IGNORE_TOKENS = {'$USD', '$USDT', '$USDC'}
+    pattern = r'\$([A-Za-z0-9]+)(?=[.,!?\s]|$)'
+    tokens = set()
+    for token in re.findall(pattern, text):
+        token = token.upper()
+        if f"${token}" not in IGNORE_TOKENS and 2 <= len(token) <= 10:
+            tokens.add(token)
+    return list(tokens)
+
+def synthetic_tokens(rng: random.Random):
+    records = []
+    for i in range(TOKEN_COUNT):
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 6))) + str(i)
+        records.append({'id': f'rec{i}', 'fields': {
+            'token': symbol,
+            'name': f"{symbol.title()} Protocol",
+            'isActive': rng.random() < 0.3,
+            'explanation': '',
+            'updatedAt': '2025-01-01T00:00:00Z'
+        }})
+    return records
+
+def synthetic_tweets(rng: random.Random, records):
+    symbols = [record['fields']['token'] for record in records]
+    tweets = []
+    for _ in range(TWEET_COUNT):
+        words = rng.choices(WORDS, k=rng.randint(8, 30))
+        for _ in range(rng.randint(0, 3)):
+            cashtag = '$' + (rng.choice(symbols) if rng.random() < 0.8 else
+                             ''.join(rng.choices(string.ascii_uppercase, k=4)))
+            words.insert(rng.randrange(len(words) + 1), cashtag.lower() if rng.random() < 0.2 else cashtag)
+        tweets.append(' '.join(words) + rng.choice(['', '!', '.', ' 🚀']))
+    return tweets
+
+def run_benchmark() -> bool:
+    rng = random.Random(42)
+    records = synthetic_tokens(rng)
+    tweets = synthetic_tweets(rng, records)
+    statuses = {record['fields']['token']: record['fields']['isActive'] for record in records}
+
+    print(f"\n⏱️ Classifying {len(tweets):,} synthetic tweets against {len(records)} tokens...")
+
+    # Legacy: extract per tweet, then one status lookup per mentioned token.
+    # Each lookup used to be an Airtable request; here it is free, so this understates the old cost.
+    start = time.perf_counter()
+    legacy_results = []
+    lookups = 0
+    for tweet in tweets:
+        tokens = legacy_extract(tweet)
+        lookups += len(tokens)
+        legacy_results.append({token: statuses.get(token) for token in tokens})
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = TokenMatcher(records)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    classified = matcher.classify(tweets, include_names=False)
+    matcher_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher.classify(tweets, include_names=True)
+    names_time = time.perf_counter() - start
+
+    same = all(set(legacy) == set(result['tokens']) for legacy, result in zip(legacy_results, classified))
+
+    print(f"Legacy extraction:         {legacy_time * 1000:8.1f} ms ({len(tweets) / legacy_time:,.0f} tweets/s), "
+          f"{lookups:,} per-token Airtable lookups")
+    print(f"Matcher build:             {build_time * 1000:8.1f} ms (once per reload)")
+    print(f"Matcher, cashtags:         {matcher_time * 1000:8.1f} ms ({len(tweets) / matcher_time:,.0f} tweets/s), 0 lookups")
+    print(f"Matcher, cashtags + names: {names_time * 1000:8.1f} ms ({len(tweets) / names_time:,.0f} tweets/s), 0 lookups")
+    print("✅ Matcher finds the same tokens as the legacy extraction" if same else "❌ Matcher results differ")
+    return same
+
+def main():
+    print("🚀 Starting token matcher benchmark...")
+    if run_benchmark():
+        print("\n✨ Benchmark completed!")
+    else:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
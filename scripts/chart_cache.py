@@ -0,0 +1,146 @@
+"""
+Chart Cache
+
+Tracks rendered chart PNGs under public/charts by (mint, timeframe, last candle
+time, style version). When a scan finds the same key and the file on disk is
+unchanged, the chart is reused instead of re-rendered, and its base64 payload
+is served from the cache instead of re-encoded for Claude. Artifacts that have
+not been used for max_age_days are removed along with their files.
+"""
+
+import os
+import sys
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = project_root / 'data' / 'chart_cache.db'
+DEFAULT_MAX_AGE_DAYS = 7
+
+
+def _file_signature(path: Path):
+    """(size, mtime_ns) used to detect a chart overwritten outside the cache"""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ChartCache:
+    """Index of rendered charts and their base64 payloads"""
+
+    def __init__(self, db_path: Optional[str] = None, max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        self.db_path = Path(db_path) if db_path else DEFAULT_DB_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age_days = max_age_days
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS charts (
+                    path TEXT PRIMARY KEY,
+                    mint TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    lastCandle INTEGER NOT NULL,
+                    styleVersion INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtimeNs INTEGER NOT NULL,
+                    payload TEXT NOT NULL,
+                    lastUsedAt REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_charts_used ON charts (lastUsedAt)")
+
+    @staticmethod
+    def _key_path(path) -> str:
+        return str(Path(path).resolve())
+
+    def lookup(self, path, mint: str, timeframe: str, last_candle: int, style_version: int) -> bool:
+        """Whether the chart at path was rendered for this exact key and is unchanged on disk"""
+        path = Path(path)
+        if not path.exists():
+            return False
+
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT mint, timeframe, lastCandle, styleVersion, size, mtimeNs FROM charts WHERE path = ?
+            """, (self._key_path(path),)).fetchone()
+            if not row or tuple(row) != (mint, timeframe, int(last_candle), int(style_version), *_file_signature(path)):
+                return False
+            conn.execute("UPDATE charts SET lastUsedAt = ? WHERE path = ?", (time.time(), self._key_path(path)))
+        return True
+
+    def store(self, path, mint: str, timeframe: str, last_candle: int, style_version: int) -> str:
+        """Record a freshly rendered chart and encode its payload once; returns the payload"""
+        path = Path(path)
+        payload = base64.b64encode(path.read_bytes()).decode('utf-8')
+        size, mtime_ns = _file_signature(path)
+
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO charts
+                (path, mint, timeframe, lastCandle, styleVersion, size, mtimeNs, payload, lastUsedAt)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (self._key_path(path), mint, timeframe, int(last_candle), int(style_version),
+                  size, mtime_ns, payload, time.time()))
+        return payload
+
+    def payload(self, path) -> str:
+        """Base64 payload of a chart, encoding the file only if the cached copy is stale or missing"""
+        path = Path(path)
+        size, mtime_ns = _file_signature(path)
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT size, mtimeNs, payload FROM charts WHERE path = ?",
+                               (self._key_path(path),)).fetchone()
+        if row and (row[0], row[1]) == (size, mtime_ns):
+            return row[2]
+        return base64.b64encode(path.read_bytes()).decode('utf-8')
+
+    def expire(self, max_age_days: Optional[float] = None) -> int:
+        """Delete artifacts unused for max_age_days, including their PNG files; returns the number removed"""
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        cutoff = time.time() - max_age_days * 86400
+
+        with self._connect() as conn:
+            stale = [row[0] for row in conn.execute(
+                "SELECT path FROM charts WHERE lastUsedAt < ?", (cutoff,)
+            ).fetchall()]
+            for path in stale:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Could not remove expired chart {path}: {e}")
+            conn.executemany("DELETE FROM charts WHERE path = ?", [(path,) for path in stale])
+
+        if stale:
+            logger.info(f"Expired {len(stale)} charts unused for {max_age_days} days")
+        return len(stale)
+
+
+_cache: Optional[ChartCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_chart_cache() -> ChartCache:
+    """Process-wide chart cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ChartCache()
+        return _cache
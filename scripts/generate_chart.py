@@ -1,5 +1,7 @@
 from dotenv import load_dotenv
 import os
+import sys
+from pathlib import Path
 from datetime import datetime
 import pandas as pd
 import mplfinance as mpf
@@ -11,12 +13,18 @@ load_dotenv(override=True)
 print("Environment check:")
 print(f"ANTHROPIC_API_KEY present: {bool(os.getenv('ANTHROPIC_API_KEY'))}")
 print(f"ANTHROPIC_API_KEY starts with: {os.getenv('ANTHROPIC_API_KEY', '')[:8]}...")
-import requests
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 import matplotlib.dates as mdates
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import rate_limited_session
+
 # Force reload environment variables
 load_dotenv(override=True)
 
@@ -28,6 +36,9 @@ print(f"ANTHROPIC_API_KEY starts with: {os.getenv('ANTHROPIC_API_KEY', '')[:8]}.
 # Load environment variables
 load_dotenv()
 
+# Bump whenever generate_chart's output changes so cached charts are re-rendered
+CHART_STYLE_VERSION = 1
+
 # Chart configurations
 CHART_CONFIGS = [
     {
@@ -87,7 +98,7 @@ def fetch_token_data(timeframe='1h', hours=24, token_address=None):
         print("Requesting URL:", url)
         print("With params:", params)
         
-        response = requests.get(url, headers=headers, params=params)
+        response = rate_limited_session('birdeye').get(url, headers=headers, params=params)
         print("Response status:", response.status_code)
         
         response.raise_for_status()
@@ -1,19 +1,25 @@
+import sys
+from pathlib import Path
 from datetime import datetime, timezone, timedelta
 import os
 from airtable import Airtable
 from dotenv import load_dotenv
 import time
-import requests
 from execute_trade import execute_trade_with_phantom
 from manage_signals import get_token_price, update_signal_status, calculate_pnl
 
-from ratelimit import limits, sleep_and_retry
 from datetime import datetime, timezone
 import asyncio
 from collections import deque
 
-# Rate limits and safety thresholds
-PRICE_CHECK_LIMIT = 5      # Calls per second
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import limit_session, rate_limited_session
+
+# Safety thresholds (API pacing comes from engine.rate_limits)
 TRADE_BATCH_SIZE = 10      # Max trades per batch
 BATCH_INTERVAL = 300       # Seconds between batches (5 minutes)
 MAX_RETRIES = 3           # Maximum retry attempts
@@ -27,8 +33,6 @@ last_batch_time = datetime.now()
 execution_attempts = {}    # Track retry attempts
 last_known_prices = {}    # Cache recent prices
 
-@sleep_and_retry
-@limits(calls=PRICE_CHECK_LIMIT, period=1)
 def rate_limited_price_check(token_name, validate_change=True):
     """
     Rate limited price check with token lookup using DexScreener
@@ -44,6 +48,7 @@ def rate_limited_price_check(token_name, validate_change=True):
         base_id = os.getenv('KINKONG_AIRTABLE_BASE_ID')
         api_key = os.getenv('KINKONG_AIRTABLE_API_KEY')
         tokens_table = Airtable(base_id, 'TOKENS', api_key)
+        limit_session(tokens_table.session, 'airtable')
         
         # Look up token by name
         token_records = tokens_table.get_all(
@@ -65,7 +70,7 @@ def rate_limited_price_check(token_name, validate_change=True):
         }
         
         print(f"Requesting DexScreener data for {token_name} ({token_mint})")
-        response = requests.get(url, headers=headers)
+        response = rate_limited_session('dexscreener').get(url, headers=headers)
         
         if response.ok:
             data = response.json()
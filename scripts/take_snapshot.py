@@ -17,6 +17,8 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
+from backend.src.utils.metrics_collector import collect_tokens_metrics
+
 # Force load environment variables from project root .env
 load_dotenv(dotenv_path=project_root / '.env', override=True)
 
@@ -355,177 +357,160 @@ async def validate_token_address(token_mint: str) -> bool:
         print(f"Error validating token address: {e}")
         return False
 
-async def get_enhanced_token_metrics(token_mint: str) -> Dict:
-    """Get comprehensive token metrics from Birdeye"""
-    try:
-        headers = {
-            "X-API-KEY": os.getenv('BIRDEYE_API_KEY'),
-            "x-chain": "solana",
-            "accept": "application/json"
-        }
-
-        # Define endpoints
-        base_url = "https://public-api.birdeye.so"
-        endpoints = {
-            'price': f"{base_url}/defi/price_volume/single?address={token_mint}&type=24h",
-            'trade_data': f"{base_url}/defi/v3/token/trade-data/single?address={token_mint}",
-            'top_traders': f"{base_url}/defi/v2/tokens/top_traders?address={token_mint}&time_frame=24h&sort_type=desc&sort_by=volume&limit=10"
-        }
-
-        async with aiohttp.ClientSession() as session:
-            responses = {}
-            
-            # Make parallel requests
-            for name, url in endpoints.items():
-                try:
-                    print(f"Requesting {name} data from: {url}")
-                    async with session.get(url, headers=headers) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            if data.get('success'):
-                                responses[name] = data.get('data', {})
-                                print(f"✅ {name} data received")
-                            else:
-                                print(f"❌ {name} API error: {data.get('message')}")
-                                responses[name] = {}
-                        else:
-                            print(f"❌ {name} request failed: {response.status}")
-                            print(f"Response: {await response.text()}")
-                            responses[name] = {}
-                except Exception as e:
-                    print(f"❌ Error fetching {name} data: {e}")
-                    responses[name] = {}
-
-        # Process price data
-        price_data = responses.get('price', {})
-        price_metrics = {
-            'current': price_data.get('price', 0),
-            'priceChangePercent': price_data.get('priceChangePercent', 0),
-            'volumeChangePercent': price_data.get('volumeChangePercent', 0),
-            'volumeUSD': price_data.get('volumeUSD', 0),
-            'updateUnixTime': price_data.get('updateUnixTime', 0),
-            'updateHumanTime': price_data.get('updateHumanTime', '')
-        }
-
-        # Process trade data with additional v3 metrics
-        trade_data = responses.get('trade_data', {})
-        trade_metrics = {
-            # Volume metrics
-            'volume24h': trade_data.get('volume24h', 0),
-            'volumeChange': trade_data.get('volumeChange', 0),
-            'volumeChangePercent': trade_data.get('volumeChangePercent', 0),
-            
-            # Trade count metrics
-            'trades24h': trade_data.get('trades24h', 0),
-            'tradesChange': trade_data.get('tradesChange', 0),
-            'tradesChangePercent': trade_data.get('tradesChangePercent', 0),
-            
-            # Price metrics
-            'priceHigh24h': trade_data.get('priceHigh24h', 0),
-            'priceLow24h': trade_data.get('priceLow24h', 0),
-            'priceChange24h': trade_data.get('priceChange24h', 0),
-            'priceChangePercent24h': trade_data.get('priceChangePercent24h', 0),
-            
-            # Trading activity
-            'avgTradeSize': trade_data.get('avgTradeSize', 0),
-            'avgTradeSizeChange': trade_data.get('avgTradeSizeChange', 0),
-            'avgTradeSizeChangePercent': trade_data.get('avgTradeSizeChangePercent', 0),
-            'buySellRatio': trade_data.get('buySellRatio', 1.0),
-            'buySellRatioChange': trade_data.get('buySellRatioChange', 0),
-            
-            # Transaction analysis
-            'largeTransactions': trade_data.get('largeTransactions', 0),
-            'largeTransactionsChange': trade_data.get('largeTransactionsChange', 0),
-            'largeTransactionVolume': trade_data.get('largeTransactionVolume', 0),
-            'largeTransactionVolumeChange': trade_data.get('largeTransactionVolumeChange', 0),
-            
-            # Trader metrics
-            'uniqueTraders': trade_data.get('uniqueTraders', 0),
-            'uniqueTradersChange': trade_data.get('uniqueTradersChange', 0),
-            'uniqueTradersChangePercent': trade_data.get('uniqueTradersChangePercent', 0),
-            'newTraders': trade_data.get('newTraders', 0),
-            'newTradersChange': trade_data.get('newTradersChange', 0),
-            
-            # Market depth
-            'marketDepthBid': trade_data.get('marketDepthBid', 0),
-            'marketDepthAsk': trade_data.get('marketDepthAsk', 0),
-            'marketDepthRatio': trade_data.get('marketDepthRatio', 0),
-            
-            # Liquidity metrics
-            'liquidityUSD': trade_data.get('liquidityUSD', 0),
-            'liquidityChange': trade_data.get('liquidityChange', 0),
-            'liquidityChangePercent': trade_data.get('liquidityChangePercent', 0),
-            
-            # Time-based metrics
-            'timeFirstTrade': trade_data.get('timeFirstTrade', ''),
-            'timeLastTrade': trade_data.get('timeLastTrade', ''),
-            'tradingHours': trade_data.get('tradingHours', 0),
-            'activeTradingHours': trade_data.get('activeTradingHours', 0),
-            
-            # Additional analysis
-            'volatility24h': trade_data.get('volatility24h', 0),
-            'momentum24h': trade_data.get('momentum24h', 0),
-            'trendStrength': trade_data.get('trendStrength', 0),
-            'averageSlippage': trade_data.get('averageSlippage', 0)
-        }
-
-        # Process top traders data
-        traders = responses.get('top_traders', {}).get('items', [])
-        trader_metrics = {
-            'totalVolume': sum(t.get('volume', 0) for t in traders),
-            'buyVolume': sum(t.get('volumeBuy', 0) for t in traders),
-            'sellVolume': sum(t.get('volumeSell', 0) for t in traders),
-            'buyTrades': sum(t.get('tradeBuy', 0) for t in traders),
-            'sellTrades': sum(t.get('tradeSell', 0) for t in traders),
-            'topTraderCount': len(traders)
-        }
-
-        # Combine all metrics
-        metrics = {
-            'price': price_metrics,
-            'trade': trade_metrics,
-            'traders': trader_metrics,
-            'timestamp': datetime.now(timezone.utc).isoformat()
+def format_enhanced_metrics(responses: Dict[str, Dict]) -> Dict:
+    """Snapshot metrics from the Birdeye price, trade_data and top_traders payloads"""
+    # Process price data
+    price_data = responses.get('price') or {}
+    price_metrics = {
+        'current': price_data.get('price', 0),
+        'priceChangePercent': price_data.get('priceChangePercent', 0),
+        'volumeChangePercent': price_data.get('volumeChangePercent', 0),
+        'volumeUSD': price_data.get('volumeUSD', 0),
+        'updateUnixTime': price_data.get('updateUnixTime', 0),
+        'updateHumanTime': price_data.get('updateHumanTime', '')
+    }
+
+    # Process trade data with additional v3 metrics
+    trade_data = responses.get('trade_data') or {}
+    trade_metrics = {
+        # Volume metrics
+        'volume24h': trade_data.get('volume24h', 0),
+        'volumeChange': trade_data.get('volumeChange', 0),
+        'volumeChangePercent': trade_data.get('volumeChangePercent', 0),
+        
+        # Trade count metrics
+        'trades24h': trade_data.get('trades24h', 0),
+        'tradesChange': trade_data.get('tradesChange', 0),
+        'tradesChangePercent': trade_data.get('tradesChangePercent', 0),
+        
+        # Price metrics
+        'priceHigh24h': trade_data.get('priceHigh24h', 0),
+        'priceLow24h': trade_data.get('priceLow24h', 0),
+        'priceChange24h': trade_data.get('priceChange24h', 0),
+        'priceChangePercent24h': trade_data.get('priceChangePercent24h', 0),
+        
+        # Trading activity
+        'avgTradeSize': trade_data.get('avgTradeSize', 0),
+        'avgTradeSizeChange': trade_data.get('avgTradeSizeChange', 0),
+        'avgTradeSizeChangePercent': trade_data.get('avgTradeSizeChangePercent', 0),
+        'buySellRatio': trade_data.get('buySellRatio', 1.0),
+        'buySellRatioChange': trade_data.get('buySellRatioChange', 0),
+        
+        # Transaction analysis
+        'largeTransactions': trade_data.get('largeTransactions', 0),
+        'largeTransactionsChange': trade_data.get('largeTransactionsChange', 0),
+        'largeTransactionVolume': trade_data.get('largeTransactionVolume', 0),
+        'largeTransactionVolumeChange': trade_data.get('largeTransactionVolumeChange', 0),
+        
+        # Trader metrics
+        'uniqueTraders': trade_data.get('uniqueTraders', 0),
+        'uniqueTradersChange': trade_data.get('uniqueTradersChange', 0),
+        'uniqueTradersChangePercent': trade_data.get('uniqueTradersChangePercent', 0),
+        'newTraders': trade_data.get('newTraders', 0),
+        'newTradersChange': trade_data.get('newTradersChange', 0),
+        
+        # Market depth
+        'marketDepthBid': trade_data.get('marketDepthBid', 0),
+        'marketDepthAsk': trade_data.get('marketDepthAsk', 0),
+        'marketDepthRatio': trade_data.get('marketDepthRatio', 0),
+        
+        # Liquidity metrics
+        'liquidityUSD': trade_data.get('liquidityUSD', 0),
+        'liquidityChange': trade_data.get('liquidityChange', 0),
+        'liquidityChangePercent': trade_data.get('liquidityChangePercent', 0),
+        
+        # Time-based metrics
+        'timeFirstTrade': trade_data.get('timeFirstTrade', ''),
+        'timeLastTrade': trade_data.get('timeLastTrade', ''),
+        'tradingHours': trade_data.get('tradingHours', 0),
+        'activeTradingHours': trade_data.get('activeTradingHours', 0),
+        
+        # Additional analysis
+        'volatility24h': trade_data.get('volatility24h', 0),
+        'momentum24h': trade_data.get('momentum24h', 0),
+        'trendStrength': trade_data.get('trendStrength', 0),
+        'averageSlippage': trade_data.get('averageSlippage', 0)
+    }
+
+    # Process top traders data
+    traders = (responses.get('top_traders') or {}).get('items', [])
+    trader_metrics = {
+        'totalVolume': sum(t.get('volume', 0) for t in traders),
+        'buyVolume': sum(t.get('volumeBuy', 0) for t in traders),
+        'sellVolume': sum(t.get('volumeSell', 0) for t in traders),
+        'buyTrades': sum(t.get('tradeBuy', 0) for t in traders),
+        'sellTrades': sum(t.get('tradeSell', 0) for t in traders),
+        'topTraderCount': len(traders)
+    }
+
+    # Combine all metrics
+    return {
+        'price': price_metrics,
+        'trade': trade_metrics,
+        'traders': trader_metrics,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+def empty_enhanced_metrics() -> Dict:
+    """Zeroed snapshot metrics for a token whose metrics could not be fetched"""
+    return {
+        'price': {
+            'current': 0,
+            'priceChangePercent': 0,
+            'volumeChangePercent': 0,
+            'volumeUSD': 0,
+            'updateUnixTime': 0,
+            'updateHumanTime': ''
+        },
+        'trade': {
+            'volume24h': 0,
+            'trades24h': 0,
+            'avgTradeSize': 0,
+            'buySellRatio': 1.0,
+            'largeTransactions': 0,
+            'uniqueTraders': 0,
+            'volumeChange': 0,
+            'tradesChange': 0
+        },
+        'traders': {
+            'totalVolume': 0,
+            'buyVolume': 0,
+            'sellVolume': 0,
+            'buyTrades': 0,
+            'sellTrades': 0,
+            'topTraderCount': 0
         }
-
-        print(f"\nMetrics for {token_mint}:")
+    }
+
+async def get_enhanced_tokens_metrics(token_mints: List[str]) -> Dict[str, Dict]:
+    """
+    Get comprehensive token metrics from Birdeye for many tokens at once
+    
+    All endpoints of all tokens are requested concurrently on one shared session.
+    
+    Returns:
+        Mint address to snapshot metrics
+    """
+    try:
+        responses = await collect_tokens_metrics(token_mints)
+    except Exception as e:
+        print(f"Error fetching metrics for {len(token_mints)} tokens: {e}")
+        return {mint: empty_enhanced_metrics() for mint in token_mints}
+
+    metrics_by_mint = {}
+    for mint, response in responses.items():
+        if response.error:
+            print(f"❌ Incomplete metrics for {mint}: {response.error}")
+        metrics = format_enhanced_metrics(response.raw or {})
+        print(f"\nMetrics for {mint}:")
         print(json.dumps(metrics, indent=2))
-        return metrics
+        metrics_by_mint[mint] = metrics
+    return metrics_by_mint
 
-    except Exception as e:
-        print(f"Error fetching metrics for {token_mint}: {e}")
-        if hasattr(e, '__traceback__'):
-            import traceback
-            print("Traceback:")
-            traceback.print_tb(e.__traceback__)
-        return {
-            'price': {
-                'current': 0,
-                'priceChangePercent': 0,
-                'volumeChangePercent': 0,
-                'volumeUSD': 0,
-                'updateUnixTime': 0,
-                'updateHumanTime': ''
-            },
-            'trade': {
-                'volume24h': 0,
-                'trades24h': 0,
-                'avgTradeSize': 0,
-                'buySellRatio': 1.0,
-                'largeTransactions': 0,
-                'uniqueTraders': 0,
-                'volumeChange': 0,
-                'tradesChange': 0
-            },
-            'traders': {
-                'totalVolume': 0,
-                'buyVolume': 0,
-                'sellVolume': 0,
-                'buyTrades': 0,
-                'sellTrades': 0,
-                'topTraderCount': 0
-            }
-        }
+async def get_enhanced_token_metrics(token_mint: str) -> Dict:
+    """Get comprehensive token metrics from Birdeye"""
+    metrics = await get_enhanced_tokens_metrics([token_mint])
+    return metrics.get(token_mint) or empty_enhanced_metrics()
 
 def get_token_price(token_mint: str) -> dict:
     """Get current token metrics from Birdeye"""
@@ -642,6 +627,11 @@ async def record_portfolio_snapshot():
         new_snapshots = []
         total_value = 0
         
+        # Get enhanced metrics for every token at once
+        mints = [token['fields']['mint'] for token in active_tokens
+                 if token['fields'].get('token') and token['fields'].get('mint')]
+        enhanced_by_mint = await get_enhanced_tokens_metrics(mints) if mints else {}
+        
         for token in active_tokens:
             try:
                 token_name = token['fields'].get('token')
@@ -657,7 +647,7 @@ async def record_portfolio_snapshot():
                 additional_metrics = calculate_additional_metrics(snapshots_table, token_name)
                 
                 # Get enhanced metrics
-                enhanced_metrics = await get_enhanced_token_metrics(mint)
+                enhanced_metrics = enhanced_by_mint.get(mint)
 
                 # Create snapshot with core metrics
                 snapshot = {
@@ -680,36 +670,9 @@ async def record_portfolio_snapshot():
                 # Add detailed metrics as JSON
                 if enhanced_metrics:
                     snapshot['metrics'] = json.dumps({
-                        'price': {
-                            'volatility24h': enhanced_metrics['price_metrics']['volatility_24h'],
-                            'momentumScore': enhanced_metrics['price_metrics']['momentum_score'],
-                            'movingAverages': enhanced_metrics['price_metrics']['ma_trends']
-                        },
-                        'liquidity': {
-                            'bidAskSpread': enhanced_metrics['liquidity_metrics']['bid_ask_spread'],
-                            'depth': {
-                                'buy2pct': enhanced_metrics['liquidity_metrics']['depth_buy_2pct'],
-                                'sell2pct': enhanced_metrics['liquidity_metrics']['depth_sell_2pct']
-                            },
-                            'score': enhanced_metrics['liquidity_metrics']['liquidity_score']
-                        },
-                        'holders': {
-                            'total': enhanced_metrics['holder_metrics']['total_holders'],
-                            'concentration': enhanced_metrics['holder_metrics']['holder_concentration'],
-                            'dailyTransfers': enhanced_metrics['holder_metrics']['daily_transfers']
-                        },
-                        'trading': {
-                            'buySellRatio': enhanced_metrics['trading_metrics']['buy_sell_ratio'],
-                            'avgTradeSize': enhanced_metrics['trading_metrics']['avg_trade_size'],
-                            'largeTxCount': enhanced_metrics['trading_metrics']['large_tx_count'],
-                            'vwap24h': enhanced_metrics['trading_metrics']['vwap_24h']
-                        },
-                        'pool': {
-                            'tvlChange24h': enhanced_metrics['pool_metrics']['tvl_change_24h'],
-                            'feeApr': enhanced_metrics['pool_metrics']['fee_apr'],
-                            'utilizationRate': enhanced_metrics['pool_metrics']['utilization_rate'],
-                            'ilRiskScore': enhanced_metrics['pool_metrics']['il_risk_score']
-                        },
+                        'price': enhanced_metrics['price'],
+                        'trade': enhanced_metrics['trade'],
+                        'traders': enhanced_metrics['traders'],
                         'additional': {
                             'volumeGrowth': additional_metrics.get('volumeGrowth'),
                             'priceTrend': additional_metrics.get('priceTrend'),
@@ -0,0 +1,222 @@
+import sys
+import base64
+import asyncio
+import tempfile
+import logging
+from pathlib import Path
+
+from aiohttp import web
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.token.associated import get_associated_token_address
+from solders.transaction import Transaction
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.batch_payouts import (
+    ASSOCIATED_TOKEN_PROGRAM_ID,
+    TOKEN_MINTS,
+    TOKEN_PROGRAM_ID,
+    BatchPayoutExecutor,
+    PayoutJournal
+)
+
+class MockRpc:
+    """In-memory JSON-RPC node that executes SPL transfers and ATA creations"""
+
+    def __init__(self, blockhash_validity: int = 150):
+        self.block_height = 1000
+        self.blockhash_validity = blockhash_validity
+        self.blockhashes = {}
+        self.accounts = set()
+        self.balances = {}
+        self.statuses = {}
+        self.sent = 0
+        # Fault injection
+        self.drop_responses = 0      # Land the transaction but fail the HTTP response
+        self.ignore_transactions = 0  # Accept the transaction but never land it
+
+    def _blockhash(self):
+        blockhash = str(Hash.new_unique())
+        self.blockhashes[blockhash] = self.block_height + self.blockhash_validity
+        return blockhash
+
+    def _execute(self, transaction: Transaction):
+        message = transaction.message
+        keys = message.account_keys
+        if str(transaction.signatures[0]) in self.statuses:
+            return
+        last_valid = self.blockhashes.get(str(message.recent_blockhash))
+        if last_valid is None or self.block_height > last_valid:
+            raise ValueError("Blockhash not found")
+        transaction.verify()
+
+        for ix in message.instructions:
+            program = keys[ix.program_id_index]
+            accounts = [keys[i] for i in ix.accounts]
+            if program == ASSOCIATED_TOKEN_PROGRAM_ID:
+                self.accounts.add(str(accounts[1]))
+            elif program == TOKEN_PROGRAM_ID:
+                destination = str(accounts[1])
+                if destination not in self.accounts:
+                    raise ValueError(f"Account {destination} does not exist")
+                units = int.from_bytes(bytes(ix.data)[1:9], 'little')
+                self.balances[destination] = self.balances.get(destination, 0) + units
+
+    async def handle(self, request):
+        payload = await request.json()
+        method, params = payload['method'], payload.get('params', [])
+        self.block_height += 1
+
+        if method == 'getLatestBlockhash':
+            blockhash = self._blockhash()
+            result = {'value': {'blockhash': blockhash, 'lastValidBlockHeight': self.blockhashes[blockhash]}}
+        elif method == 'getBlockHeight':
+            result = self.block_height
+        elif method == 'getMultipleAccounts':
+            result = {'value': [{'data': ['', 'base64']} if a in self.accounts else None for a in params[0]]}
+        elif method == 'getSignatureStatuses':
+            result = {'value': [self.statuses.get(s) for s in params[0]]}
+        elif method == 'sendTransaction':
+            transaction = Transaction.from_bytes(base64.b64decode(params[0]))
+            signature = str(transaction.signatures[0])
+            if self.ignore_transactions:
+                self.ignore_transactions -= 1
+                return web.json_response({'jsonrpc': '2.0', 'id': payload['id'], 'result': signature})
+            try:
+                self._execute(transaction)
+            except Exception as e:
+                return web.json_response({'jsonrpc': '2.0', 'id': payload['id'],
+                                          'error': {'code': -32002, 'message': str(e)}})
+            self.sent += 1
+            self.statuses[signature] = {'err': None, 'confirmationStatus': 'confirmed'}
+            if self.drop_responses:
+                self.drop_responses -= 1
+                return web.Response(status=503)
+            result = signature
+        else:
+            return web.json_response({'jsonrpc': '2.0', 'id': payload['id'],
+                                      'error': {'code': -32601, 'message': f'Unknown method {method}'}})
+
+        return web.json_response({'jsonrpc': '2.0', 'id': payload['id'], 'result': result})
+
+async def start_server(node: MockRpc):
+    app = web.Application()
+    app.router.add_post('/', node.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/"
+
+def random_payouts(count: int):
+    return [
+        {'wallet': str(Keypair().pubkey()), 'token': 'UBC' if i % 3 else 'COMPUTE', 'units': 1_000_000 + i}
+        for i in range(count)
+    ]
+
+def token_account(payout) -> str:
+    return str(get_associated_token_address(
+        Pubkey.from_string(payout['wallet']), Pubkey.from_string(TOKEN_MINTS[payout['token']])
+    ))
+
+def paid_units(node: MockRpc, payouts):
+    return {(p['wallet'], p['token']): node.balances.get(token_account(p), 0) for p in payouts}
+
+def check_paid_once(node: MockRpc, payouts) -> bool:
+    paid = paid_units(node, payouts)
+    return all(paid[(p['wallet'], p['token'])] == p['units'] for p in payouts)
+
+async def test_batched_payout(journal_dir: str) -> bool:
+    """Pay many wallets in packed transactions"""
+    print("\n📦 Testing packed payouts...")
+    node = MockRpc()
+    runner, url = await start_server(node)
+    try:
+        payouts = random_payouts(60)
+        executor = BatchPayoutExecutor(rpc_url=url, keypair=Keypair(), poll_interval=0.01,
+                                       journal=PayoutJournal(f"{journal_dir}/packed.db"))
+        summary = await executor.execute('run-packed', payouts)
+
+        print(f"{summary['confirmed']} payouts confirmed in {len(summary['signatures'])} transactions")
+        if summary['confirmed'] != len(payouts) or not check_paid_once(node, payouts):
+            print("❌ Payouts do not match distributions")
+            return False
+        if len(summary['signatures']) >= len(payouts) // 5:
+            print("❌ Transfers were not packed")
+            return False
+        print("✅ Packed payouts paid exactly once")
+        return True
+    finally:
+        await runner.cleanup()
+
+async def test_resume_after_crash(journal_dir: str) -> bool:
+    """Crash after sending, then resume without paying twice"""
+    print("\n🔁 Testing resume after a crash...")
+    node = MockRpc(blockhash_validity=5)
+    runner, url = await start_server(node)
+    try:
+        payouts = random_payouts(40)
+        journal = PayoutJournal(f"{journal_dir}/resume.db")
+        node.accounts.update(token_account(p) for p in payouts)
+
+        # First run: some responses are lost and one batch never lands, then the process "crashes"
+        node.drop_responses = 1
+        node.ignore_transactions = 1
+        first = BatchPayoutExecutor(rpc_url=url, keypair=Keypair(), journal=journal,
+                                    poll_interval=0.01, confirm_timeout=0)
+        keypair = first.keypair
+        summary = await first.execute('run-resume', payouts)
+        print(f"After crash: {summary['confirmed']} confirmed, {summary['submitted']} in flight, {summary['pending']} pending")
+
+        # Second run resumes from the journal alone with the same signer
+        second = BatchPayoutExecutor(rpc_url=url, keypair=keypair, journal=journal,
+                                     poll_interval=0.01, confirm_timeout=5)
+        summary = await second.execute('run-resume', [])
+        print(f"After resume: {summary['confirmed']} confirmed, {summary['submitted']} in flight, {summary['pending']} pending")
+
+        if summary['confirmed'] != len(payouts) or not check_paid_once(node, payouts):
+            print("❌ Resumed run double-paid or missed payouts")
+            return False
+
+        # A third run must not send anything
+        sent = node.sent
+        await second.execute('run-resume', payouts)
+        if node.sent != sent:
+            print("❌ Completed run sent new transactions")
+            return False
+
+        print("✅ Resumed run paid every wallet exactly once")
+        return True
+    finally:
+        await runner.cleanup()
+
+async def run_tests():
+    with tempfile.TemporaryDirectory() as journal_dir:
+        packed_success = await test_batched_payout(journal_dir)
+        resume_success = await test_resume_after_crash(journal_dir)
+    return packed_success, resume_success
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    print("🚀 Starting batch payout tests against a mock RPC...")
+
+    packed_success, resume_success = asyncio.run(run_tests())
+
+    print("\n📋 Test Summary:")
+    print(f"Packed payouts: {'✅' if packed_success else '❌'}")
+    print(f"Resume after crash: {'✅' if resume_success else '❌'}")
+
+    if packed_success and resume_success:
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
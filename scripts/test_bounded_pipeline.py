@@ -0,0 +1,111 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.bounded_pipeline import WRITE_BATCH_SIZE, BoundedPipeline, write_as_completed
+
+ITEMS = 45
+CALL_DELAY = 0.02
+CONCURRENCY = {'birdeye': 3, 'anthropic': 2}
+
+class CallCounter:
+    """Blocking provider stub that records the most calls it saw in flight"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak = 0
+
+    def __call__(self, value):
+        with self.lock:
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        time.sleep(CALL_DELAY)
+        with self.lock:
+            self.in_flight -= 1
+        return value
+
+def test_limits_and_batches() -> bool:
+    """Calls stay under each provider's limit and results are written in full batches"""
+    print("\n🚦 Testing provider limits and batched writes...")
+    birdeye, anthropic = CallCounter(), CallCounter()
+    batches = []
+
+    def write(batch):
+        batches.append(len(batch))
+        # Every third batch fails to save one record
+        return len(batch) - (1 if len(batches) % 3 == 0 else 0)
+
+    async def run():
+        pipeline = BoundedPipeline(CONCURRENCY, ['holdings', 'insights', 'airtable'], 'test-pipeline')
+
+        async def job(i):
+            value = await pipeline.call('holdings', 'birdeye', birdeye, i)
+            if value % 9 == 0:
+                return None
+            return await pipeline.call('insights', 'anthropic', anthropic, value)
+
+        counts = await pipeline.run([job(i) for i in range(ITEMS)], write)
+        return counts, pipeline.report(logging.getLogger(__name__), 1.0)
+
+    counts, timings = asyncio.run(run())
+    failed_jobs = len([i for i in range(ITEMS) if i % 9 == 0])
+    unwritten = len(batches) // 3
+
+    ok = (birdeye.peak == CONCURRENCY['birdeye'] and anthropic.peak == CONCURRENCY['anthropic'] and
+          all(size == WRITE_BATCH_SIZE for size in batches[:-1]) and sum(batches) == ITEMS - failed_jobs and
+          counts == {'completed': ITEMS - failed_jobs, 'success': ITEMS - failed_jobs - unwritten,
+                     'failure': failed_jobs + unwritten} and
+          timings['holdings'] >= ITEMS * CALL_DELAY and timings['total'] == 1.0)
+    print(f"Peak in flight: birdeye {birdeye.peak}, anthropic {anthropic.peak}; batches {batches}; counts {counts}")
+    print("✅ Limits held and writes batched" if ok else "❌ Limits or batching wrong")
+    return ok
+
+def test_writes_overlap() -> bool:
+    """The first batch is written before the slowest job finishes"""
+    print("\n🌊 Testing writes while jobs run...")
+    events = []
+
+    async def job(i):
+        await asyncio.sleep(0.3 if i == 0 else 0.01)
+        events.append(('done', i))
+        return i
+
+    async def write(batch):
+        events.append(('write', len(batch)))
+        return len(batch)
+
+    counts = asyncio.run(write_as_completed([job(i) for i in range(WRITE_BATCH_SIZE + 1)], write))
+    ok = events.index(('write', WRITE_BATCH_SIZE)) < events.index(('done', 0)) and counts['success'] == WRITE_BATCH_SIZE + 1
+    print(f"First write after {events.index(('write', WRITE_BATCH_SIZE))} completions, slow job done at "
+          f"{events.index(('done', 0))}")
+    print("✅ Batches written while jobs run" if ok else "❌ Writes waited for every job")
+    return ok
+
+def main():
+    print("🚀 Starting bounded pipeline tests...")
+    results = {
+        'Limits and batches': test_limits_and_batches(),
+        'Overlapping writes': test_writes_overlap()
+    }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import sys
+import time
+import random
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.distributions import (
+    calculate_distributions,
+    DistributionError,
+    NON_SUBSCRIBER_RATE,
+    SUBSCRIBER_RATE,
+    TOKEN_DECIMALS
+)
+
+def random_case(rng: random.Random, investors: int):
+    """Generate random investments, subscriptions and pools"""
+    wallets = [f"wallet{i}" for i in range(investors)]
+    rows = []
+    for wallet in wallets:
+        for _ in range(rng.randint(1, 3)):
+            token = rng.choice(['UBC', 'COMPUTE', 'USDC'])
+            amount = rng.choice([0, rng.uniform(0.000001, 10), rng.uniform(10, 1_000_000)])
+            rows.append((wallet, token, amount))
+    investments = pd.DataFrame(rows, columns=['wallet', 'token', 'amount'])
+    subscribed = {w for w in wallets if rng.random() < 0.3}
+    pools = {
+        'UBC': round(rng.choice([0, rng.uniform(0, 1), rng.uniform(1, 10_000_000)]), 6),
+        'COMPUTE': round(rng.choice([0, rng.uniform(0, 1), rng.uniform(1, 10_000_000)]), 6)
+    }
+    return investments, subscribed, pools
+
+def check_properties(investments, subscribed, pools) -> bool:
+    """Check the invariants of a single distribution"""
+    result = calculate_distributions(investments, subscribed, pools)
+
+    for token, pool in pools.items():
+        rows = result[result['token'] == token]
+        stakes = investments[investments['token'] == token].groupby('wallet')['amount'].sum()
+        stakes = stakes[stakes > 0]
+
+        if stakes.empty:
+            assert rows.empty, f"{token}: payouts without stakes"
+            continue
+
+        # Paid units equal the pool to the smallest unit
+        expected_units = int(round(pool * 10 ** TOKEN_DECIMALS[token]))
+        assert int(rows['units'].sum()) == expected_units, f"{token}: paid units differ from pool"
+
+        # Every wallet is within one unit of its exact pro-rata share
+        rates = np.where(rows['wallet'].isin(subscribed), SUBSCRIBER_RATE, NON_SUBSCRIBER_RATE) / SUBSCRIBER_RATE
+        effective = stakes.reindex(rows['wallet']).to_numpy() * rates
+        exact = effective / effective.sum() * expected_units
+        assert np.all(np.abs(rows['units'].to_numpy() - exact) < 1 + 1e-6), f"{token}: payout off by more than one unit"
+
+        # Subscription status only changes the rate
+        assert set(rows[rows['has_subscription']]['wallet']) <= subscribed, f"{token}: wrong subscription flag"
+        assert np.isclose(rows['percentage'].sum(), 100), f"{token}: shares do not sum to 100%"
+
+    return True
+
+def test_properties(cases: int = 300) -> bool:
+    """Run randomized property checks"""
+    print(f"\n🎲 Checking distribution properties on {cases} random cases...")
+    rng = random.Random(42)
+    try:
+        for i in range(cases):
+            investments, subscribed, pools = random_case(rng, rng.randint(1, 50))
+            check_properties(investments, subscribed, pools)
+        print(f"✅ All {cases} cases satisfied the invariants")
+        return True
+    except (AssertionError, DistributionError) as e:
+        print(f"❌ Case {i} failed: {str(e)}")
+        print(f"Pools: {pools}")
+        return False
+
+def test_float_rounding() -> bool:
+    """Large pools where floored float shares used to add up to one unit more than the pool"""
+    print("\n🧮 Checking a pool that float shares overpaid...")
+    investments = pd.DataFrame({
+        'wallet': ['wallet0', 'wallet1'],
+        'token': 'UBC',
+        'amount': [1629.6666666666667, 141298.42857142858]
+    })
+    pools = {'UBC': 9199881337.50363}
+    try:
+        result = calculate_distributions(investments, {'wallet0', 'wallet1'}, pools)
+        check_properties(investments, {'wallet0', 'wallet1'}, pools)
+    except (AssertionError, DistributionError) as e:
+        print(f"❌ {str(e)}")
+        return False
+    print(f"✅ Paid {int(result['units'].sum()):,} units, exactly the pool")
+    return True
+
+def test_performance(investors: int = 100_000) -> bool:
+    """Time a distribution across many investors"""
+    print(f"\n⏱️ Timing distribution across {investors:,} investors...")
+    rng = np.random.default_rng(7)
+    investments = pd.DataFrame({
+        'wallet': [f"wallet{i}" for i in rng.integers(0, investors, investors * 2)],
+        'token': rng.choice(['UBC', 'COMPUTE'], investors * 2),
+        'amount': rng.lognormal(8, 2, investors * 2)
+    })
+    subscribed = {f"wallet{i}" for i in range(0, investors, 3)}
+
+    start = time.perf_counter()
+    result = calculate_distributions(investments, subscribed, {'UBC': 1_234_567.891011, 'COMPUTE': 9_876_543.21})
+    elapsed = time.perf_counter() - start
+
+    print(f"Calculated {len(result):,} payouts in {elapsed:.3f}s")
+    if elapsed < 1:
+        print("✅ Under one second")
+        return True
+    print("❌ Slower than one second")
+    return False
+
+def main():
+    print("🚀 Starting distribution calculator tests...")
+
+    properties_success = test_properties()
+    rounding_success = test_float_rounding()
+    performance_success = test_performance()
+
+    print("\n📋 Test Summary:")
+    print(f"Properties: {'✅' if properties_success else '❌'}")
+    print(f"Float rounding: {'✅' if rounding_success else '❌'}")
+    print(f"Performance: {'✅' if performance_success else '❌'}")
+
+    if properties_success and rounding_success and performance_success:
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import socials.kol_artifacts as kol_artifacts
+from socials.kol_artifacts import IMAGE_CONCURRENCY, cached_detailed_tweet, generate_concurrently, generate_kol_image
+
+# Seconds the stub takes to "generate" an image
+GENERATION_DELAY = 0.3
+
+class StubImageServer:
+    """Local stand-in for Ideogram: POST /generate returns an image URL, GET /images/<n>.png serves it"""
+
+    def __init__(self):
+        self.generations = 0
+        self.downloads = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(GENERATION_DELAY)
+                with stub.lock:
+                    stub.generations += 1
+                    number = stub.generations
+                prompt_ok = 'Influence Score' in body['image_request']['prompt']
+                self._reply(200 if prompt_ok else 400, json.dumps(
+                    {'data': [{'url': f'http://127.0.0.1:{stub.port}/images/{number}.png'}]}).encode())
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.downloads += 1
+                self._reply(200, b'\x89PNG stub ' + self.path.encode())
+
+            def _reply(self, status, content):
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+def make_kols(count: int):
+    return [{'name': f'KOL {i}', 'xUsername': f'kol_{i}', 'profile': 'Whale', 'influenceScore': 50 + i}
+            for i in range(count)]
+
+def generate_all(kols, output_dir: str):
+    return generate_concurrently(lambda kol_data: generate_kol_image(kol_data, output_dir),
+                                 kols, IMAGE_CONCURRENCY, label="images")
+
+def test_images_cached(stub: StubImageServer, output_dir: str) -> bool:
+    """Images are generated concurrently once, then reused until their inputs change"""
+    print("\n🖼️ Testing image generation and reuse...")
+    kols = make_kols(8)
+
+    start = time.perf_counter()
+    first = generate_all(kols, output_dir)
+    first_time = time.perf_counter() - start
+    first_generations = stub.generations
+
+    second = generate_all(kols, output_dir)
+    second_generations = stub.generations - first_generations
+
+    kols[3]['profile'] = 'Degen'
+    os.remove(first[5])
+    third = generate_all(kols, output_dir)
+    third_generations = stub.generations - first_generations - second_generations
+
+    serial_time = len(kols) * GENERATION_DELAY
+    ok = (all(first) and first_generations == 8 and first_time < serial_time * 0.6 and
+          second == first and second_generations == 0 and
+          third_generations == 2 and all(os.path.exists(path) for path in third))
+    print(f"First run: {first_generations} generations in {first_time:.2f}s (serial ~{serial_time:.1f}s); "
+          f"unchanged rerun: {second_generations}; one KOL changed and one image deleted: {third_generations}")
+    print("✅ Only new or changed images generated" if ok else "❌ Image cache not working")
+    return ok
+
+def test_tweets_cached(output_dir: str) -> bool:
+    """Tweets are regenerated only when a field the prompt uses changes"""
+    print("\n✍️ Testing tweet reuse...")
+    calls = []
+
+    def generate(kol_data):
+        calls.append(kol_data['name'])
+        return f"Tweet about {kol_data['name']} ({kol_data['profile']})"
+
+    kol_data = make_kols(1)[0]
+    first = cached_detailed_tweet(kol_data, generate, output_dir)
+    again = cached_detailed_tweet(kol_data, generate, output_dir)
+    kol_data['profilePicture'] = 'https://example.com/new.png'  # Not used by the tweet prompt
+    unrelated = cached_detailed_tweet(kol_data, generate, output_dir)
+    kol_data['profile'] = 'Alpha'
+    changed = cached_detailed_tweet(kol_data, generate, output_dir)
+    failing = cached_detailed_tweet(make_kols(2)[1], lambda kol_data: "", output_dir)
+
+    ok = (first == again == unrelated and len(calls) == 2 and changed.endswith('(Alpha)') and failing is None)
+    print(f"Generator called {len(calls)} times for 4 lookups")
+    print("✅ Tweets reused until their inputs change" if ok else "❌ Tweet cache not working")
+    return ok
+
+def test_manifest_persists(output_dir: str) -> bool:
+    """A new process sees the manifest and reuses the images on disk"""
+    print("\n💾 Testing manifest persistence...")
+    kol_artifacts._caches.clear()
+    cache = kol_artifacts.get_artifact_cache(output_dir)
+    kol_data = make_kols(1)[0]
+    path = cache.lookup(f"image:{kol_artifacts.kol_image_filename(kol_data)}",
+                        kol_artifacts.kol_image_request(kol_data))
+    ok = path is not None and os.path.exists(path)
+    print("✅ Manifest reloaded from disk" if ok else "❌ Manifest not persisted")
+    return ok
+
+class StubKOLAnalyzer:
+    """Stand-in for KOLAnalyzer that records Airtable writes in order"""
+
+    writes = []
+
+    def get_all_kols(self):
+        return [{'id': f'rec{i}', 'fields': {'X': f'KOL {i}', 'xUsername': f'kol_{i}'}} for i in range(3)]
+
+    def update_kol_record(self, record_id, data):
+        self.writes.append(('single', record_id, dict(data)))
+        return True
+
+    def update_kol_records(self, updates):
+        self.writes.extend(('batch', update['record_id'], dict(update['update_data'])) for update in updates)
+        return len(updates)
+
+def test_sent_recorded_immediately() -> bool:
+    """A sent tweet is marked sent before the next KOL is handled, and one failing KOL does not stop the run"""
+    print("\n📨 Testing sent flags...")
+    import socials.analyze_kols as analyze_kols
+
+    sent = []
+
+    def send_tweet(tweet_content, image_path=None):
+        if 'KOL 1' in tweet_content:
+            raise RuntimeError("X API error")
+        # The previous sent tweet must already be recorded when the next one goes out
+        recorded = [record_id for kind, record_id, data in StubKOLAnalyzer.writes if data.get('sent')]
+        sent.append(len(recorded) == len(sent))
+        return True
+
+    originals = {name: getattr(analyze_kols, name) for name in
+                 ['KOLAnalyzer', 'send_tweet', 'cached_detailed_tweet', 'get_kol_image_path']}
+    analyze_kols.KOLAnalyzer = StubKOLAnalyzer
+    analyze_kols.send_tweet = send_tweet
+    analyze_kols.cached_detailed_tweet = lambda kol_data, generate: f"Tweet about {kol_data['name']}"
+    analyze_kols.get_kol_image_path = lambda kol_data: None
+    try:
+        StubKOLAnalyzer.writes = []
+        analyze_kols.generate_and_send_tweets_for_all_kols(dry_run=False)
+    finally:
+        for name, value in originals.items():
+            setattr(analyze_kols, name, value)
+
+    marked = [(kind, record_id) for kind, record_id, data in StubKOLAnalyzer.writes if data.get('sent')]
+    ok = sent == [True, True] and marked == [('single', 'rec0'), ('single', 'rec2')]
+    print(f"Sent {len(sent)} tweets, sent flags written: {marked}")
+    print("✅ Sent flags written right after each tweet" if ok else "❌ Sent flags delayed or run aborted")
+    return ok
+
+def main():
+    print("🚀 Starting KOL artifact tests...")
+    stub = StubImageServer()
+    kol_artifacts.IDEOGRAM_URL = f'http://127.0.0.1:{stub.port}/generate'
+    os.environ['IDEOGRAM_API_KEY'] = 'test'
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            results = {
+                'Images cached': test_images_cached(stub, output_dir),
+                'Tweets cached': test_tweets_cached(output_dir),
+                'Manifest persists': test_manifest_persists(output_dir),
+                'Sent recorded immediately': test_sent_recorded_immediately()
+            }
+    finally:
+        stub.stop()
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import os
+import sys
+import json
+import time
+import base64
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# The stub has no rate limit; keep the shared Anthropic limiter out of the timings
+os.environ['RATE_LIMIT_ANTHROPIC'] = '1000,1000'
+
+from engine.llm_broker import LLMBroker, LLMError, model_cost
+
+class StubClaude:
+    """Local Messages API stub with scripted failures and in-flight tracking"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = 0
+        self.failures = []  # Status codes returned before succeeding
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.batches = {}  # Batch id -> {'requests', 'polls'}
+        self.batch_polls = 2  # Status polls answered 'in_progress' before a batch ends
+        self.batch_errors = set()  # custom_ids returned as errored
+
+    @staticmethod
+    def reply(body):
+        return {
+            'model': body['model'],
+            'content': [{'type': 'text', 'text': f"echo {len(json.dumps(body['messages']))}"}],
+            'stop_reason': 'end_turn',
+            'usage': {'input_tokens': 100, 'output_tokens': 20}
+        }
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, payload, content_type='application/json'):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('content-type', content_type)
+                self.send_header('content-length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')  # v1/messages/batches/<id>[/results]
+                batch_id = parts[3]
+                with stub.lock:
+                    stub.requests += 1
+                    batch = stub.batches[batch_id]
+
+                if len(parts) == 4:
+                    batch['polls'] += 1
+                    ended = batch['polls'] > stub.batch_polls
+                    self.send_json({
+                        'id': batch_id,
+                        'type': 'message_batch',
+                        'processing_status': 'ended' if ended else 'in_progress',
+                        'request_counts': {'processing': 0 if ended else len(batch['requests']),
+                                           'succeeded': len(batch['requests']) if ended else 0},
+                        'results_url': f"http://{self.headers['Host']}/v1/messages/batches/{batch_id}/results" if ended else None
+                    })
+                    return
+
+                # Results stream in arbitrary order, one JSON object per line
+                lines = []
+                for request in reversed(batch['requests']):
+                    custom_id = request['custom_id']
+                    if custom_id in stub.batch_errors:
+                        result = {'type': 'errored', 'error': {'type': 'invalid_request_error', 'message': 'bad'}}
+                    else:
+                        result = {'type': 'succeeded', 'message': stub.reply(request['params'])}
+                    lines.append(json.dumps({'custom_id': custom_id, 'result': result}))
+                self.send_json(('\n'.join(lines) + '\n').encode(), 'application/binary')
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                if self.path == '/v1/messages/batches':
+                    with stub.lock:
+                        stub.requests += 1
+                        batch_id = f"msgbatch_{len(stub.batches) + 1}"
+                        stub.batches[batch_id] = {'requests': body['requests'], 'polls': 0}
+                    self.send_json({'id': batch_id, 'type': 'message_batch', 'processing_status': 'in_progress'})
+                    return
+
+                with stub.lock:
+                    stub.requests += 1
+                    status = stub.failures.pop(0) if stub.failures else 200
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    time.sleep(stub.delay)
+                    if status != 200:
+                        self.send_response(status)
+                        self.send_header('retry-after', '0')
+                        self.end_headers()
+                        self.wfile.write(b'{"type":"error"}')
+                        return
+
+                    self.send_json(stub.reply(body))
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+        return Handler
+
+def start_stub(stub: StubClaude):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), stub.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def image_message(image_bytes: bytes, prompt: str = "Analyze this chart"):
+    return [{
+        'role': 'user',
+        'content': [
+            {'type': 'text', 'text': prompt},
+            {'type': 'image', 'source': {'type': 'base64', 'media_type': 'image/png',
+                                         'data': base64.b64encode(image_bytes).decode()}}
+        ]
+    }]
+
+def test_cache(base_url: str, stub: StubClaude, db_path: str) -> bool:
+    """Identical requests, including images, are answered from the cache"""
+    print("\n💾 Testing response cache...")
+    broker = LLMBroker(api_key='test', base_url=base_url, db_path=db_path)
+    before = stub.requests
+
+    first = broker.create_message('charts', model='claude-3-7-sonnet-20250219', max_tokens=100,
+                                  messages=image_message(b'chart-1'), system='sys')
+    second = broker.create_message('charts', model='claude-3-7-sonnet-20250219', max_tokens=100,
+                                   messages=image_message(b'chart-1'), system='sys')
+    other = broker.create_message('charts', model='claude-3-7-sonnet-20250219', max_tokens=100,
+                                  messages=image_message(b'chart-2'), system='sys')
+
+    # A new broker on the same database still hits the cache
+    reopened = LLMBroker(api_key='test', base_url=base_url, db_path=db_path)
+    third = reopened.create_message('charts', model='claude-3-7-sonnet-20250219', max_tokens=100,
+                                    messages=image_message(b'chart-1'), system='sys')
+
+    stats = broker.usage_summary()['charts']
+    ok = (
+        stub.requests - before == 2
+        and not first.cached and second.cached and not other.cached and third.cached
+        and second.text == first.text and second.cost == 0
+        and stats['calls'] == 3 and stats['cache_hits'] == 1
+        and stats['input_tokens'] == 200 and abs(stats['cost'] - 2 * model_cost('claude-3-7-sonnet', 100, 20)) < 1e-12
+    )
+    print(f"{stub.requests - before} API requests for 4 calls, stats: {stats}")
+    print("✅ Cache hits cost nothing" if ok else "❌ Cache behaved unexpectedly")
+    return ok
+
+def test_retries(base_url: str, stub: StubClaude, db_path: str) -> bool:
+    """429 and 529 responses are retried, other errors are not"""
+    print("\n🔁 Testing retries...")
+    broker = LLMBroker(api_key='test', base_url=base_url, db_path=db_path, backoff_base=0.01, max_retries=3)
+
+    stub.failures = [429, 529, 503]
+    before = stub.requests
+    response = broker.create_message('retry', model='claude-3-5-haiku-latest', max_tokens=10,
+                                     messages=[{'role': 'user', 'content': 'retry me'}], use_cache=False)
+    retried = stub.requests - before == 4 and broker.usage_summary()['retry']['retries'] == 3
+
+    stub.failures = [400]
+    try:
+        broker.create_message('retry', model='claude-3-5-haiku-latest', max_tokens=10,
+                              messages=[{'role': 'user', 'content': 'bad request'}], use_cache=False)
+        not_retried = False
+    except LLMError as e:
+        not_retried = e.status == 400
+
+    ok = retried and not_retried and response.text.startswith('echo')
+    print("✅ Transient errors retried, client errors raised" if ok else "❌ Retry behaviour wrong")
+    return ok
+
+def test_concurrency(base_url: str, stub: StubClaude, db_path: str) -> bool:
+    """Batch calls run in parallel but never above the broker's limit"""
+    print("\n⚡ Testing bounded concurrency...")
+    broker = LLMBroker(api_key='test', base_url=base_url, db_path=db_path, max_concurrency=3)
+    stub.delay = 0.2
+    stub.max_in_flight = 0
+
+    start = time.perf_counter()
+    results = broker.create_messages('batch', [
+        {'model': 'claude-3-7-sonnet-20250219', 'max_tokens': 10,
+         'messages': [{'role': 'user', 'content': f'token {i}'}]}
+        for i in range(9)
+    ])
+    elapsed = time.perf_counter() - start
+    stub.delay = 0.0
+
+    ok = all(not isinstance(r, Exception) for r in results) and stub.max_in_flight == 3 and elapsed < 1.2
+    print(f"9 calls in {elapsed:.2f}s, max in flight {stub.max_in_flight}")
+    print("✅ Concurrency bounded" if ok else "❌ Concurrency not bounded as expected")
+    return ok
+
+def test_batch(base_url: str, stub: StubClaude, db_path: str) -> bool:
+    """Uncached requests go out as one batch at half price; errors are reported per request"""
+    print("\n📦 Testing Message Batches mode...")
+    broker = LLMBroker(api_key='test', base_url=base_url, db_path=db_path)
+    model = 'claude-3-7-sonnet-20250219'
+    requests_kwargs = {
+        f'token-{i}': {'model': model, 'max_tokens': 100, 'system': 'sys',
+                       'messages': image_message(f'chart-{i}'.encode())}
+        for i in range(5)
+    }
+
+    # token-0 was analyzed earlier today and must not be resubmitted
+    broker.create_message('warmup', **requests_kwargs['token-0'])
+    stub.batch_errors = {'token-3'}
+    batches_before = len(stub.batches)
+
+    results = dict(broker.run_batch('nightly', requests_kwargs, poll_interval=0.01))
+    batch = stub.batches[f"msgbatch_{batches_before + 1}"]
+    submitted = sorted(request['custom_id'] for request in batch['requests'])
+    succeeded = {k: v for k, v in results.items() if not isinstance(v, Exception)}
+    stats = broker.usage_summary()['nightly']
+
+    # Successful batch results land in the cache for later interactive calls
+    again = broker.create_message('nightly', **requests_kwargs['token-1'])
+
+    ok = (
+        len(stub.batches) == batches_before + 1
+        and submitted == ['token-1', 'token-2', 'token-3', 'token-4']
+        and batch['polls'] == stub.batch_polls + 1
+        and set(results) == set(requests_kwargs)
+        and isinstance(results['token-3'], LLMError)
+        and results['token-0'].cached and results['token-0'].cost == 0
+        and all(abs(succeeded[k].cost - 0.5 * model_cost(model, 100, 20)) < 1e-12
+                for k in ('token-1', 'token-2', 'token-4'))
+        and stats['errors'] == 1 and stats['cache_hits'] == 1
+        and again.cached
+    )
+    print(f"Submitted {submitted}, {len(succeeded)} succeeded, stats: {stats}")
+    print("✅ Batch mode skips cached requests and bills at half price" if ok else "❌ Batch mode behaved unexpectedly")
+    return ok
+
+def main():
+    print("🚀 Starting LLM broker tests against a local stub server...")
+    stub = StubClaude()
+    server, base_url = start_stub(stub)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            'Cache': test_cache(base_url, stub, f"{tmp}/cache.db"),
+            'Retries': test_retries(base_url, stub, f"{tmp}/retry.db"),
+            'Concurrency': test_concurrency(base_url, stub, f"{tmp}/batch.db"),
+            'Message Batches': test_batch(base_url, stub, f"{tmp}/nightly.db")
+        }
+    server.shutdown()
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
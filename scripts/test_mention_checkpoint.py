@@ -0,0 +1,154 @@
+import sys
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import socials.monitor_mentions as monitor_mentions
+from socials.monitor_mentions import MAX_MENTION_ATTEMPTS, MentionCheckpoint
+
+def test_out_of_order_completion(path: Path) -> bool:
+    """since_id only moves past mentions once every older one is handled"""
+    print("\n🔢 Testing out-of-order completion...")
+    checkpoint = MentionCheckpoint(path)
+    checkpoint.begin(['101', '102', '103'], since_id='100')
+
+    checkpoint.complete('103')
+    after_newest = checkpoint.since_id
+    checkpoint.complete('101')
+    after_oldest = checkpoint.since_id
+    checkpoint.complete('102')
+    after_all = checkpoint.since_id
+
+    ok = (after_newest, after_oldest, after_all) == ('100', '101', '103') and checkpoint.done == set()
+    print(f"since_id after 103: {after_newest}, after 101: {after_oldest}, after 102: {after_all}")
+    print("✅ Watermark advances in order" if ok else "❌ Watermark skipped an unhandled mention")
+    return ok
+
+def test_crash_resume(path: Path) -> bool:
+    """After a crash, unhandled mentions are retried and handled ones are skipped"""
+    print("\n💥 Testing resume after a crash...")
+    checkpoint = MentionCheckpoint(path)
+    checkpoint.begin(['201', '202', '203', '204'], since_id='200')
+    checkpoint.complete('201')
+    checkpoint.complete('203')
+    # Process dies here, with 202 and 204 still in flight
+
+    resumed = MentionCheckpoint(path)
+    fetched = ['201', '202', '203', '204', '205']
+    todo = [mention_id for mention_id in fetched if not resumed.is_done(mention_id)]
+
+    ok = resumed.since_id == '201' and todo == ['202', '204', '205'] and not path.with_suffix('.tmp').exists()
+    print(f"Resumed from since_id {resumed.since_id}, still to handle: {todo}")
+    print("✅ Nothing dropped or duplicated" if ok else "❌ Resume dropped or repeated mentions")
+    return ok
+
+def test_retry_skips_done_steps(path: Path) -> bool:
+    """A retried mention is not saved again and tokens already answered get no second reply"""
+    print("\n🔁 Testing retry side effects...")
+    calls = []
+    failures = {'BONK': 1}
+
+    async def save_message(mention_data, context='X_MENTION', tokens=None):
+        calls.append(('save', mention_data['id']))
+
+    async def noop(*args):
+        return None
+
+    async def check_token_active_status(token):
+        return False, None
+
+    async def generate_not_bullish_explanation(token):
+        if failures.get(token):
+            failures[token] -= 1
+            raise RuntimeError("LLM unavailable")
+        return f"{token} is not bullish"
+
+    async def send_tweet_reply(tweet_id, text):
+        calls.append(('reply', text.split()[0]))
+        return True
+
+    stubs = {
+        'save_message': save_message,
+        'process_tokens': noop,
+        'check_token_active_status': check_token_active_status,
+        'generate_not_bullish_explanation': generate_not_bullish_explanation,
+        'send_tweet_reply': send_tweet_reply,
+    }
+    originals = {name: getattr(monitor_mentions, name) for name in stubs}
+    for name, stub in stubs.items():
+        setattr(monitor_mentions, name, stub)
+
+    mention = {'id': '301', 'text': 'What about $WIF and $BONK?'}
+    mention_data = {'id': '301', 'text': mention['text']}
+    try:
+        checkpoint = MentionCheckpoint(path)
+        checkpoint.begin(['301'], since_id='300')
+        try:
+            asyncio.run(monitor_mentions.process_mention(mention, mention_data, ['WIF', 'BONK'], {}, checkpoint))
+            first_failed = False
+        except RuntimeError:
+            first_failed = True
+            checkpoint.fail('301')
+
+        # Next run reloads the checkpoint from disk
+        resumed = MentionCheckpoint(path)
+        resumed.begin(['301'])
+        asyncio.run(monitor_mentions.process_mention(mention, mention_data, ['WIF', 'BONK'], {}, resumed))
+        resumed.complete('301')
+    finally:
+        for name, original in originals.items():
+            setattr(monitor_mentions, name, original)
+
+    expected = [('save', '301'), ('reply', 'WIF'), ('reply', 'BONK')]
+    ok = first_failed and calls == expected and resumed.since_id == '301' and not resumed.steps
+    print(f"Side effects over two attempts: {calls}")
+    print("✅ Retry only redid the failed token" if ok else "❌ Retry repeated side effects")
+    return ok
+
+def test_give_up(path: Path) -> bool:
+    """A mention that keeps failing stops holding since_id back"""
+    print("\n🛑 Testing attempt limit...")
+    held_back = []
+    for _ in range(MAX_MENTION_ATTEMPTS):
+        checkpoint = MentionCheckpoint(path)
+        checkpoint.begin(['401', '402'], since_id='400')
+        checkpoint.complete('402')
+        attempts = checkpoint.fail('401')
+        held_back.append(checkpoint.since_id)
+        if attempts >= MAX_MENTION_ATTEMPTS:
+            checkpoint.complete('401')
+
+    final = MentionCheckpoint(path)
+    ok = held_back[:-1] == ['400'] * (MAX_MENTION_ATTEMPTS - 1) and final.since_id == '402' and not final.attempts
+    print(f"since_id after each failed run: {held_back}, final: {final.since_id}")
+    print("✅ Mention given up after the attempt limit" if ok else "❌ Failing mention retried forever")
+    return ok
+
+def main():
+    print("🚀 Starting mention checkpoint tests...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        results = {
+            'Out-of-order completion': test_out_of_order_completion(tmp / 'order.txt'),
+            'Crash resume': test_crash_resume(tmp / 'resume.txt'),
+            'Retry side effects': test_retry_skips_done_steps(tmp / 'retry.txt'),
+            'Attempt limit': test_give_up(tmp / 'limit.txt')
+        }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
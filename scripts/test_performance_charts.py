@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.utils.performance_charts import chart_data, render_charts
+from engine.utils.signal_metrics import compute_metrics, prepare_signals
+
+def make_signals(count: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    return prepare_signals(pd.DataFrame({
+        'createdAt': pd.date_range('2025-01-01', periods=count, freq='6h', tz='UTC'),
+        'token': rng.choice(['UBC', 'COMPUTE', 'SOL', 'JUP', 'BONK'], count),
+        'type': 'BUY',
+        'confidence': 'HIGH',
+        'timeframe': rng.choice(['SCALP', 'INTRADAY', 'SWING', 'POSITION'], count),
+        'entryPrice': rng.uniform(1, 2, count),
+        'targetPrice': rng.uniform(1.5, 3, count),
+        'actualReturn': rng.normal(1, 10, count)
+    }))
+
+def test_render_and_skip(output_dir: str) -> bool:
+    """Every chart renders once, then only charts whose data changed are redrawn"""
+    print("\n📊 Testing chart rendering and reuse...")
+    df = make_signals()
+    metrics = compute_metrics(df)
+    charts = chart_data(df, metrics)
+
+    # At least two workers, so the process pool is used even on a single core
+    workers = max(2, os.cpu_count() or 1)
+    start = time.perf_counter()
+    first = render_charts(charts, output_dir, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    second = render_charts(chart_data(df, metrics), output_dir)
+
+    metrics['max_consecutive_wins'] += 1
+    os.remove(os.path.join(output_dir, 'return_by_token.png'))
+    third = render_charts(chart_data(df, metrics), output_dir)
+
+    images_ok = all(Path(output_dir, name).read_bytes()[:8] == b'\x89PNG\r\n\x1a\n' for name in charts)
+    ok = (images_ok and sorted(first['rendered']) == sorted(charts) and not first['failed'] and
+          not second['rendered'] and len(second['skipped']) == len(charts) and
+          sorted(third['rendered']) == ['consistency_metrics.png', 'return_by_token.png'])
+    print(f"First run: {len(first['rendered'])} charts in {elapsed:.2f}s with {workers} workers; "
+          f"unchanged rerun: {len(second['rendered'])} redrawn; "
+          f"one metric changed and one image deleted: {sorted(third['rendered'])}")
+    print("✅ Only changed charts redrawn" if ok else "❌ Chart rendering or reuse not working")
+    return ok
+
+def test_serial_matches(output_dir: str) -> bool:
+    """Charts drawn in this process are the same files the pool produces"""
+    print("\n🧵 Testing in-process rendering...")
+    df = make_signals()
+    charts = chart_data(df, compute_metrics(df))
+    with tempfile.TemporaryDirectory() as serial_dir:
+        serial = render_charts(charts, serial_dir, max_workers=1)
+        same = all(Path(serial_dir, name).read_bytes() == Path(output_dir, name).read_bytes()
+                   for name in charts if name != 'consistency_metrics.png')
+    ok = sorted(serial['rendered']) == sorted(charts) and same
+    print("✅ In-process charts match the pool's" if ok else "❌ In-process charts differ")
+    return ok
+
+def main():
+    print("🚀 Starting performance chart tests...")
+    with tempfile.TemporaryDirectory() as output_dir:
+        results = {
+            'Render and skip': test_render_and_skip(output_dir),
+            'Serial matches': test_serial_matches(output_dir)
+        }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Start the DexScreener bucket far above what the stub allows, so only header adaptation can keep it in check
+os.environ['RATE_LIMIT_DEXSCREENER'] = '100,100'
+
+from engine.rate_limits import RateLimiter, rate_limited_session
+
+class WindowedApi:
+    """Local API allowing `limit` requests per fixed window, reporting x-ratelimit-* headers"""
+
+    def __init__(self, limit: int = 5, window: float = 1.0):
+        self.limit = limit
+        self.window = window
+        self.window_start = time.time()
+        self.used = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with api.lock:
+                    now = time.time()
+                    if now - api.window_start >= api.window:
+                        api.window_start = now
+                        api.used = 0
+                    reset_at = api.window_start + api.window
+                    if api.used >= api.limit:
+                        api.rejected += 1
+                        status = 429
+                    else:
+                        api.used += 1
+                        status = 200
+                    remaining = api.limit - api.used
+
+                body = json.dumps({'ok': status == 200}).encode()
+                self.send_response(status)
+                self.send_header('x-ratelimit-remaining', str(remaining))
+                self.send_header('x-ratelimit-reset', f"{reset_at:.3f}")
+                if status == 429:
+                    self.send_header('retry-after', f"{max(0.0, reset_at - time.time()):.3f}")
+                self.send_header('content-length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+def test_bucket_pacing() -> bool:
+    """Concurrent async callers get permits at the configured rate after the burst"""
+    print("\n🪣 Testing token bucket pacing...")
+    limiter = RateLimiter('test', rate=20, burst=5)
+
+    async def run():
+        await asyncio.gather(*(limiter.acquire() for _ in range(25)))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    # 5 immediate permits, then 20 more at 20/s
+    ok = 0.9 <= elapsed <= 1.3 and limiter.permits == 25
+    print(f"25 permits in {elapsed:.2f}s ({limiter.stats()})")
+    print("✅ Bucket paced correctly" if ok else "❌ Bucket pacing wrong")
+    return ok
+
+def test_sync_and_async_share_bucket() -> bool:
+    """Threads using wait() and coroutines using acquire() draw from the same bucket"""
+    print("\n🔀 Testing sync and async callers together...")
+    limiter = RateLimiter('shared', rate=10, burst=2)
+
+    def sync_caller():
+        for _ in range(5):
+            limiter.wait()
+
+    async def async_caller():
+        for _ in range(5):
+            await limiter.acquire()
+
+    start = time.perf_counter()
+    thread = threading.Thread(target=sync_caller)
+    thread.start()
+    asyncio.run(async_caller())
+    thread.join()
+    elapsed = time.perf_counter() - start
+
+    # 2 burst permits, then 8 more at 10/s
+    ok = 0.7 <= elapsed <= 1.1
+    print(f"10 permits across a thread and a coroutine in {elapsed:.2f}s")
+    print("✅ Bucket shared across callers" if ok else "❌ Callers not sharing the bucket")
+    return ok
+
+def test_header_adaptation() -> bool:
+    """retry-after, exhausted quotas and remaining/reset pairs all reshape the bucket"""
+    print("\n📨 Testing header adaptation...")
+    limiter = RateLimiter('headers', rate=100, burst=10)
+
+    limiter.update(429, {'Retry-After': '0.3'})
+    start = time.perf_counter()
+    limiter.wait()
+    retry_after_wait = time.perf_counter() - start
+
+    limiter.update(200, {'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(time.time() + 0.4)})
+    start = time.perf_counter()
+    limiter.wait()
+    exhausted_wait = time.perf_counter() - start
+
+    limiter.update(200, {'x-ratelimit-remaining': '10', 'x-ratelimit-reset': '2'})
+    adapted_rate = limiter.rate
+
+    ok = 0.25 <= retry_after_wait <= 0.45 and 0.3 <= exhausted_wait <= 0.55 and abs(adapted_rate - 5) < 1e-9
+    print(f"retry-after wait {retry_after_wait:.2f}s, exhausted wait {exhausted_wait:.2f}s, adapted rate {adapted_rate}/s")
+    print("✅ Headers honoured" if ok else "❌ Headers not honoured")
+    return ok
+
+def test_session_against_api() -> bool:
+    """A limited session stays inside a server's window purely from its headers"""
+    print("\n🌐 Testing rate-limited session against a windowed API...")
+    api = WindowedApi(limit=5, window=1.0)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), api.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/latest/dex/tokens/test"
+
+    session = rate_limited_session('dexscreener')
+    start = time.perf_counter()
+    statuses = [session.get(url, timeout=5).status_code for _ in range(15)]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    # The quota is spread over each window rather than spent in a burst: ~3 windows plus pacing slack
+    ok = statuses.count(200) == 15 and api.rejected == 0 and elapsed < 5
+    print(f"15 requests in {elapsed:.2f}s, {api.rejected} rejected")
+    print("✅ No 429s while using the full quota" if ok else "❌ Session exceeded the server's limit")
+    return ok
+
+def main():
+    print("🚀 Starting rate limiter tests...")
+    results = {
+        'Bucket pacing': test_bucket_pacing(),
+        'Shared bucket': test_sync_and_async_share_bucket(),
+        'Header adaptation': test_header_adaptation(),
+        'Limited session': test_session_against_api()
+    }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.records import Signal, TokenSnapshot, Trade, parse_time
+
+RECORD_COUNT = 20000
+
+def make_snapshots(count: int = RECORD_COUNT):
+    return [{'id': f'rec{i}', 'fields': {
+        'token': 'UBC', 'price': str(1 + i / 1000), 'volume24h': 1000 + i, 'liquidity': None,
+        'createdAt': f'2025-01-{1 + i % 28:02d}T{i % 24:02d}:00:00.000Z'}} for i in range(count)]
+
+def test_parsing() -> bool:
+    """Numbers, timestamps and missing fields are parsed the way the engine read them"""
+    print("\n🧾 Testing record parsing...")
+    snapshot = TokenSnapshot.from_airtable(make_snapshots(1)[0])
+    trade = Trade.from_airtable({'id': 'recT', 'fields': {
+        'token': 'UBC', 'type': 'BUY', 'price': '0.5', 'targetPrice': 'n/a', 'createdAt': '2025-01-01T00:00:00Z'}})
+    signal = Signal.from_airtable({'fields': {'token': 'UBC'}})
+
+    checks = {
+        'numeric strings': snapshot.price == 1.0 and trade.price == 0.5,
+        'missing and invalid numbers are 0': snapshot.liquidity == 0.0 and trade.targetPrice == 0.0,
+        'timestamps in epoch seconds': trade.createdAt == parse_time('2025-01-01T00:00:00+00:00') == 1735689600.0,
+        'missing text is empty': signal.id == '' and signal.type == '' and trade.status == '',
+        'no instance dict': not hasattr(snapshot, '__dict__'),
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+def test_arrays() -> bool:
+    """Structured arrays keep record order and give the same totals as the dict loops"""
+    print("\n🧮 Testing structured arrays...")
+    records = make_snapshots()
+
+    start = time.perf_counter()
+    for _ in range(5):
+        volumes = [float(record['fields'].get('volume24h', 0)) for record in records]
+        prices = [float(record['fields'].get('price', 0)) for record in records]
+        dict_totals = (sum(volumes), sum(prices) / len(prices))
+    dict_time = (time.perf_counter() - start) / 5
+
+    array = TokenSnapshot.array_from_airtable(records)
+    start = time.perf_counter()
+    for _ in range(5):
+        array_totals = (array['volume24h'].sum(), array['price'].mean())
+    array_time = (time.perf_counter() - start) / 5
+
+    ok = (np.allclose(dict_totals, array_totals) and array['id'][0] == 'rec0' and
+          array['id'][-1] == f'rec{RECORD_COUNT - 1}' and array.dtype['createdAt'] == np.float64)
+    print(f"Sum and mean of {RECORD_COUNT} snapshots: dict loops {dict_time * 1000:.1f} ms, "
+          f"array {array_time * 1000:.2f} ms")
+    print("✅ Array totals match" if ok else "❌ Array totals differ")
+    return ok
+
+def test_memory() -> bool:
+    """Parsed records hold the same data in less memory than the Airtable dicts"""
+    print("\n💾 Testing record memory...")
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = make_snapshots()
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    parsed = TokenSnapshot.parse_all(records)
+    record_bytes = tracemalloc.get_traced_memory()[0] - before
+
+    before = tracemalloc.get_traced_memory()[0]
+    array = TokenSnapshot.to_array(parsed)
+    array_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    ok = record_bytes < dict_bytes and len(array) == len(parsed) == RECORD_COUNT
+    print(f"Per snapshot: Airtable dict {dict_bytes / RECORD_COUNT:.0f} B, "
+          f"slotted record {record_bytes / RECORD_COUNT:.0f} B, array row {array_bytes / RECORD_COUNT:.0f} B")
+    print("✅ Records are smaller than dicts" if ok else "❌ Records are not smaller")
+    return ok
+
+def main():
+    print("🚀 Starting record tests...")
+    results = {
+        'Parsing': test_parsing(),
+        'Arrays': test_arrays(),
+        'Memory': test_memory()
+    }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import sys
+import math
+import time
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.utils.signal_metrics import (FULL_SYNC_INTERVAL, SignalPerformanceStore, compute_metrics,
+                                        prepare_signals, window_metrics)
+
+NOW = 1_750_000_000
+
+class StubSignalsTable:
+    """Stand-in for the pyairtable SIGNALS table; records the formulas it is queried with"""
+
+    def __init__(self, records):
+        self.records = records
+        self.formulas = []
+
+    def all(self, formula=None, fields=None):
+        self.formulas.append(formula)
+        if 'LAST_MODIFIED_TIME' in (formula or ''):
+            return [record for record in self.records if record.get('modified')]
+        return self.records
+
+def make_record(i: int, days_ago: float, actual_return: float, modified: bool = False):
+    created_at = datetime.fromtimestamp(NOW - days_ago * 86400, timezone.utc)
+    return {'id': f'rec{i}', 'modified': modified, 'fields': {
+        'token': f'T{i % 4}', 'type': 'BUY', 'confidence': 'HIGH', 'timeframe': 'SWING',
+        'entryPrice': 1.0, 'targetPrice': 1.2, 'stopLoss': 0.9, 'actualReturn': actual_return,
+        'createdAt': created_at.strftime('%Y-%m-%dT%H:%M:%S.000Z')}}
+
+def test_known_values() -> bool:
+    """Returns, win rate, drawdown and streaks of a small hand-computed series"""
+    print("\n🧮 Testing metric values...")
+    returns = [10, -5, -5, -5, 20, 10]
+    df = prepare_signals(pd.DataFrame({
+        'createdAt': pd.date_range('2025-01-01', periods=len(returns), freq='D', tz='UTC'),
+        'token': 'UBC', 'type': 'BUY', 'confidence': 'HIGH', 'timeframe': 'SWING',
+        'entryPrice': 2.0, 'targetPrice': 2.5, 'actualReturn': returns}).iloc[::-1])
+    metrics = compute_metrics(df)
+
+    # 1.1 peak, then three 5% losses: 1 - 0.95 ** 3
+    checks = {
+        'expected return': math.isclose(metrics['average_expected_return'], 25.0),
+        'win rate': math.isclose(metrics['win_rate'], 50.0),
+        'profit factor': math.isclose(metrics['profit_factor'], 40 / 15),
+        'drawdown': math.isclose(metrics['max_drawdown'], (1 - 0.95 ** 3) * 100),
+        'streaks in signal order': (metrics['max_consecutive_wins'], metrics['max_consecutive_losses']) == (2, 3),
+        'top tokens': metrics['top_tokens']['UBC']['count'] == 6,
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    return all(checks.values())
+
+def test_windows_match() -> bool:
+    """Prefix-sum windows equal the full metrics of each window's slice"""
+    print("\n🪟 Testing rolling windows...")
+    rng = np.random.default_rng(3)
+    count = 5000
+    df = prepare_signals(pd.DataFrame({
+        'createdAt': pd.to_datetime(NOW - rng.uniform(0, 200 * 86400, count), unit='s', utc=True),
+        'type': 'BUY', 'entryPrice': rng.uniform(1, 2, count), 'targetPrice': rng.uniform(1.5, 3, count),
+        'actualReturn': rng.normal(1, 10, count)}))
+
+    start = time.perf_counter()
+    windows = window_metrics(df, now=NOW)
+    elapsed = time.perf_counter() - start
+
+    ok = True
+    for name, days in [('7d', 7), ('30d', 30), ('90d', 90), ('all', None)]:
+        window = df if days is None else df[df['createdAt'] >= pd.Timestamp(NOW - days * 86400, unit='s', tz='UTC')]
+        expected = compute_metrics(window)
+        matches = windows[name]['signals'] == expected['total_signals'] and all(
+            math.isclose(windows[name][key], expected[key], rel_tol=1e-9)
+            for key in ['win_rate', 'average_actual_return', 'average_expected_return', 'sharpe_ratio',
+                        'profit_factor', 'max_drawdown'])
+        print(f"{'✅' if matches else '❌'} {name}: {windows[name]['signals']} signals")
+        ok = ok and matches
+    print(f"4 windows over {count} signals in {elapsed * 1000:.1f} ms")
+    return ok
+
+def test_incremental_sync() -> bool:
+    """Later syncs only ask Airtable for modified signals and update them in place"""
+    print("\n🔄 Testing incremental sync...")
+    records = [make_record(i, days_ago=i, actual_return=5 if i % 2 else -5) for i in range(40)]
+    table = StubSignalsTable(records)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SignalPerformanceStore(Path(tmp_dir) / 'signals.db')
+        first = store.sync(table)
+
+        records[0]['fields']['actualReturn'] = 12.5
+        records[0]['modified'] = True
+        records.append(make_record(40, days_ago=0.5, actual_return=8, modified=True))
+        second = store.sync(table)
+
+        recent = store.load(days_back=7, now=NOW)
+        everything = store.load()
+
+    ok = (first == 40 and second == 2 and 'LAST_MODIFIED_TIME' not in table.formulas[0] and
+          'LAST_MODIFIED_TIME' in table.formulas[1] and len(everything) == 41 and len(recent) == 9 and
+          recent['actualReturn'].iloc[-1] == 12.5 and recent['expectedReturn'].notna().all())
+    print(f"First sync: {first} signals; second sync: {second}; last 7 days: {len(recent)} of {len(everything)}")
+    print("✅ Only modified signals refetched" if ok else "❌ Incremental sync not working")
+    return ok
+
+def test_stale_signals_removed() -> bool:
+    """Signals edited out of the filter or deleted in Airtable leave the store"""
+    print("\n🧹 Testing stale signal removal...")
+    records = [make_record(i, days_ago=i, actual_return=5) for i in range(10)]
+    table = StubSignalsTable(records)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SignalPerformanceStore(Path(tmp_dir) / 'signals.db')
+        store.sync(table)
+
+        # Return cleared on one signal, confidence lowered on another
+        records[0]['fields']['actualReturn'] = ''
+        records[1]['fields']['confidence'] = 'MEDIUM'
+        records[0]['modified'] = records[1]['modified'] = True
+        store.sync(table)
+        after_edit = len(store.load())
+
+        # Deleted signals are only noticed by the periodic full resync
+        del records[2:4]
+        store.sync(table)
+        before_resync = len(store.load())
+        with store._connect() as conn:
+            conn.execute("UPDATE sync_state SET value = value - ? WHERE key = 'lastFullSyncAt'",
+                         (FULL_SYNC_INTERVAL,))
+        store.sync(table)
+        after_resync = store.load()
+
+    ok = (after_edit == 8 and before_resync == 8 and len(after_resync) == 6 and
+          'LAST_MODIFIED_TIME' not in table.formulas[-1] and
+          not {'rec0', 'rec1', 'rec2', 'rec3'} & set(after_resync['id']))
+    print(f"Stored after edits: {after_edit}, after deletes: {before_resync}, after full resync: {len(after_resync)}")
+    print("✅ Stale signals removed" if ok else "❌ Stale signals kept")
+    return ok
+
+def main():
+    print("🚀 Starting signal metrics tests...")
+    results = {
+        'Metric values': test_known_values(),
+        'Rolling windows': test_windows_match(),
+        'Incremental sync': test_incremental_sync(),
+        'Stale signals': test_stale_signals_removed()
+    }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
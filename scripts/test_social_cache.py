@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import time
+import tempfile
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# TokenManager only needs the credentials to be present; every X request goes to the stub
+for var in ('KINKONG_AIRTABLE_BASE_ID', 'KINKONG_AIRTABLE_API_KEY', 'BIRDEYE_API_KEY'):
+    os.environ.setdefault(var, 'test')
+
+import engine.social_cache as social_cache
+from engine.social_cache import ACCOUNT_TWEETS, USER_IDS, SocialCache
+from engine.rate_limits import rate_limited_session
+
+class StubX(BaseAdapter):
+    """Transport adapter answering X user and timeline requests, counting every call"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def send(self, request, **kwargs):
+        self.calls.append(request.path_url)
+        if '/users/by/username/' in request.path_url:
+            body = {'data': {'id': '42', 'username': request.path_url.rsplit('/', 1)[-1]}}
+        else:
+            body = {'data': [{'id': '1', 'text': 'gm', 'public_metrics': {'like_count': 3, 'retweet_count': 1}}]}
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(body).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+def test_ttl_and_persistence(db_path: Path) -> bool:
+    """Entries survive a new cache instance and expire after their TTL"""
+    print("\n⏳ Testing TTL and persistence...")
+    cache = SocialCache(db_path)
+    cache.set(USER_IDS, 'kinkong', '1')
+    cache.set(ACCOUNT_TWEETS, 'kinkong|10', [{'id': '1'}], ttl=0.2)
+
+    reopened = SocialCache(db_path)
+    persisted = reopened.get(USER_IDS, 'kinkong') == '1' and reopened.get(ACCOUNT_TWEETS, 'kinkong|10') == [{'id': '1'}]
+    time.sleep(0.3)
+    expired = reopened.get(ACCOUNT_TWEETS, 'kinkong|10') is None
+
+    ok = persisted and expired
+    print(f"Persisted: {persisted}, expired: {expired}")
+    print("✅ TTL and persistence work" if ok else "❌ TTL or persistence broken")
+    return ok
+
+def test_lru_eviction(db_path: Path) -> bool:
+    """The least recently used entries go first once max_entries is exceeded"""
+    print("\n🧹 Testing LRU eviction...")
+    cache = SocialCache(db_path, max_entries=3)
+    cache.clear()
+    for key in ('a', 'b', 'c'):
+        cache.set(USER_IDS, key, key)
+        time.sleep(0.01)
+    cache.get(USER_IDS, 'a')  # 'b' is now the least recently used
+    cache.set(USER_IDS, 'd', 'd')
+
+    kept = {key for key in ('a', 'b', 'c', 'd') if cache.get(USER_IDS, key) is not None}
+    ok = kept == {'a', 'c', 'd'}
+    print(f"Kept {sorted(kept)}")
+    print("✅ LRU entry evicted" if ok else "❌ Wrong entry evicted")
+    return ok
+
+def test_failures_not_cached(db_path: Path) -> bool:
+    """A loader returning None is retried on the next lookup"""
+    print("\n🚫 Testing that failures are not cached...")
+    cache = SocialCache(db_path)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        return None
+
+    cache.get_or_load(USER_IDS, 'missing', failing)
+    cache.get_or_load(USER_IDS, 'missing', failing)
+    ok = len(calls) == 2
+    print(f"Loader called {len(calls)} times")
+    print("✅ Failures retried" if ok else "❌ Failure was cached")
+    return ok
+
+def test_repeated_scan_makes_no_x_calls(db_path: Path) -> bool:
+    """A second scan of the same accounts within the TTL never reaches X"""
+    print("\n🐦 Testing repeated scans against a stub X API...")
+    from engine.tokens import TokenManager
+    token_manager = TokenManager()
+
+    social_cache._cache = SocialCache(db_path)
+    social_cache._cache.clear()
+    stub = StubX()
+    rate_limited_session('x').mount('https://api.twitter.com/', stub)
+
+    def scan():
+        for account in ('ubc4ai', 'kinkong_ubc', 'solana'):
+            token_manager.get_account_tweets(account, 'test-token')
+        token_manager.search_token_tweets('COMPUTE', 'test-token')
+
+    scan()
+    first_scan_calls = len(stub.calls)
+    scan()
+    second_scan_calls = len(stub.calls) - first_scan_calls
+
+    # Three user lookups, three timelines and one search the first time
+    ok = first_scan_calls == 7 and second_scan_calls == 0
+    print(f"First scan: {first_scan_calls} X calls, second scan: {second_scan_calls} X calls")
+    print("✅ Repeated scan served from cache" if ok else "❌ Repeated scan hit the X API")
+    return ok
+
+def main():
+    print("🚀 Starting social cache tests...")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        results = {
+            'TTL and persistence': test_ttl_and_persistence(tmp / 'ttl.db'),
+            'LRU eviction': test_lru_eviction(tmp / 'lru.db'),
+            'Failures not cached': test_failures_not_cached(tmp / 'failures.db'),
+            'Repeated scan': test_repeated_scan_makes_no_x_calls(tmp / 'scan.db')
+        }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
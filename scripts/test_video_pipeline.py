@@ -0,0 +1,194 @@
+import os
+import sys
+import time
+import importlib
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import videos.generate_tiktok as generate_tiktok
+assemble_video = importlib.import_module('videos.utils.assemble_video')
+generate_image = importlib.import_module('videos.utils.generate_image')
+
+# Seconds the stubs take per image, per clip and per processed clip
+IMAGE_DELAY = 0.1
+CLIP_DELAYS = [0.2, 0.2, 0.2, 0.8]
+PROCESS_DELAY = 0.2
+
+def stub_render(video_path, output_path, target_width, target_height, duration):
+    """Stand-in for render_processed_clip: records when processing started; screen 3 fails"""
+    started = time.time()
+    time.sleep(PROCESS_DELAY)
+    if Path(video_path).stem == '3' and not os.environ.get('VIDEO_PIPELINE_FIX_3'):
+        raise RuntimeError("ffmpeg failed")
+    Path(output_path).write_text(str(started))
+    return str(output_path)
+
+class StubGenerators:
+    """Image and clip generators that write small files and count their calls"""
+
+    def __init__(self):
+        self.calls = []
+
+    def image(self, screen, screen_num, image_dir):
+        self.calls.append(('image', screen_num))
+        time.sleep(IMAGE_DELAY)
+        path = Path(image_dir) / f"{screen_num}.png"
+        path.write_bytes(b'png')
+        return str(path)
+
+    def video(self, image_path, prompt, output_path):
+        screen_num = int(Path(output_path).stem)
+        self.calls.append(('video', screen_num))
+        time.sleep(CLIP_DELAYS[screen_num - 1])
+        Path(output_path).write_bytes(b'mp4')
+        return str(output_path)
+
+def run_pipeline(stubs: StubGenerators, video_dir: Path):
+    generate_tiktok.generate_image = stubs.image
+    generate_tiktok.generate_video = stubs.video
+    generate_tiktok.render_processed_clip = stub_render
+    screens = [{'text': f'Screen {i}', 'background': 'charts'} for i in range(1, len(CLIP_DELAYS) + 1)]
+    start = time.time()
+    results = generate_tiktok.run_screen_pipeline(screens, video_dir, 1080, 1920, 2.5, max_workers=2)
+    return results, start, time.time() - start
+
+def test_streaming(video_dir: Path) -> bool:
+    """Clips are processed as soon as they exist, without waiting for the slowest screen"""
+    print("\n🏭 Testing streaming pipeline...")
+    results, start, elapsed = run_pipeline(StubGenerators(), video_dir)
+    processed = dict(results['processed'])
+
+    # Generation of the slow screen ends about IMAGE_DELAY + its clip delay after the start
+    slow_done = start + IMAGE_DELAY + max(CLIP_DELAYS)
+    first_started = float(Path(processed[1]).read_text())
+    barrier = IMAGE_DELAY + max(CLIP_DELAYS) + PROCESS_DELAY * len(CLIP_DELAYS)
+    ok = (processed[3] is None and all(processed[i] for i in (1, 2, 4)) and
+          all(path for _, path in results['clips']) and first_started < slow_done)
+    print(f"{len(CLIP_DELAYS)} screens in {elapsed:.2f}s (staged with a barrier ~{barrier:.2f}s); "
+          f"first clip processed {slow_done - first_started:.2f}s before the slowest clip was ready")
+    print("✅ Screens stream through the stages" if ok else "❌ Pipeline waited between stages")
+    return ok
+
+def test_resume(video_dir: Path) -> bool:
+    """A rerun reuses images and clips on disk and only redoes the screen that failed"""
+    print("\n♻️ Testing resume...")
+    stubs = StubGenerators()
+    os.environ['VIDEO_PIPELINE_FIX_3'] = '1'
+    try:
+        results, _, elapsed = run_pipeline(stubs, video_dir)
+    finally:
+        os.environ.pop('VIDEO_PIPELINE_FIX_3')
+
+    ok = not stubs.calls and all(path for _, path in results['processed'])
+    print(f"Rerun in {elapsed:.2f}s with {len(stubs.calls)} generation calls")
+    print("✅ Only the failed screen redone" if ok else "❌ Rerun regenerated assets")
+    return ok
+
+def test_processed_cache(tmp_dir: Path) -> bool:
+    """Processed clips are written atomically and reused until their source changes"""
+    print("\n💾 Testing processed clip cache...")
+    renders = []
+
+    class StubClip:
+        def write_videofile(self, path, **kwargs):
+            renders.append(path)
+            Path(path).write_bytes(b'processed')
+
+        def close(self):
+            pass
+
+    original = assemble_video.process_video_clip
+    assemble_video.process_video_clip = lambda **kwargs: StubClip()
+    try:
+        source = tmp_dir / '1.mp4'
+        source.write_bytes(b'clip')
+        output = assemble_video.processed_clip_path(source, tmp_dir / 'processed', 1080, 1920, 2.5)
+        first = assemble_video.render_processed_clip(source, output, 1080, 1920, 2.5)
+        again = assemble_video.render_processed_clip(source, output, 1080, 1920, 2.5)
+        os.utime(source, (time.time() + 10, time.time() + 10))
+        assemble_video.render_processed_clip(source, output, 1080, 1920, 2.5)
+
+        assemble_video.process_video_clip = lambda **kwargs: None
+        try:
+            assemble_video.render_processed_clip(source, tmp_dir / 'broken.mp4', 1080, 1920, 2.5)
+            failed_cleanly = False
+        except RuntimeError:
+            failed_cleanly = not (tmp_dir / 'broken.mp4').exists()
+    finally:
+        assemble_video.process_video_clip = original
+
+    leftovers = [path.name for path in output.parent.iterdir() if path.name.startswith('.')]
+    ok = first == again == str(output) and len(renders) == 2 and not leftovers and failed_cleanly
+    print(f"3 lookups, {len(renders)} renders, temporary files left: {leftovers}")
+    print("✅ Processed clips cached" if ok else "❌ Processed clip cache not working")
+    return ok
+
+def test_image_promotion(tmp_dir: Path) -> bool:
+    """An image only reaches its final path once it is accepted"""
+    print("\n🖼️ Testing image promotion...")
+    output = tmp_dir / '1.png'
+    seen_final = []
+    verdicts = iter([False, True])
+
+    class Response:
+        status_code = 200
+        content = b'png'
+
+        def json(self):
+            return {'data': [{'url': 'https://example.com/1.png'}]}
+
+    generator = generate_image.ImageGenerator.__new__(generate_image.ImageGenerator)
+    generator.base_url = 'https://example.com/generate'
+    generator.headers = {}
+    generator.max_retries = 3
+
+    def verify(image_path, expected_text):
+        seen_final.append(output.exists())
+        return next(verdicts)
+
+    generator.verify_text_in_image = verify
+    original_post, original_get = generate_image.requests.post, generate_image.requests.get
+    generate_image.requests.post = lambda *args, **kwargs: Response()
+    generate_image.requests.get = lambda *args, **kwargs: Response()
+    try:
+        path = generator.generate_and_save_image('prompt', 1, tmp_dir, 'TEXT')
+    finally:
+        generate_image.requests.post, generate_image.requests.get = original_post, original_get
+
+    ok = path == str(output) and output.exists() and seen_final == [False, False] and \
+        not any(item.name.startswith('.') for item in tmp_dir.iterdir())
+    print(f"Final image present during verification: {seen_final}; result: {path}")
+    print("✅ Rejected images never reach the final path" if ok else "❌ Unverified image left at the final path")
+    return ok
+
+def main():
+    print("🚀 Starting video pipeline tests...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = Path(tmp_dir)
+        video_dir = tmp_dir / 'video1'
+        (tmp_dir / 'cache').mkdir()
+        (tmp_dir / 'images').mkdir()
+        results = {
+            'Streaming': test_streaming(video_dir),
+            'Resume': test_resume(video_dir),
+            'Processed cache': test_processed_cache(tmp_dir / 'cache'),
+            'Image promotion': test_image_promotion(tmp_dir / 'images')
+        }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import sys
+import json
+import time
+import random
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.wallet_digest import format_digest, summarize_transactions
+
+SOL_MINT = 'So11111111111111111111111111111111111111112'
+USDC_MINT = 'EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v'
+NOW = 1_750_000_000
+
+def swap(tx_hash: str, block_time: float, token: str, token_amount: float, quote_mint: str, quote_amount: float):
+    """Birdeye-style swap: token_amount of token against -quote_amount of SOL or USDC (raw amounts)"""
+    quote = ('SOL', 9) if quote_mint == SOL_MINT else ('USDC', 6)
+    return {
+        'txHash': tx_hash,
+        'blockTime': block_time,
+        'status': True,
+        'fee': 5000,
+        'mainAction': 'swap',
+        'balanceChange': [
+            {'symbol': token, 'address': f'{token}mint', 'decimals': 6, 'amount': int(token_amount * 1e6)},
+            {'symbol': quote[0], 'address': quote_mint, 'decimals': quote[1],
+             'amount': int(-quote_amount * 10 ** quote[1])}
+        ]
+    }
+
+def test_digest_values() -> bool:
+    """Flows, PnL and holding periods of a small hand-computed history"""
+    print("\n🧮 Testing digest values...")
+    transactions = [
+        # UBC: buy 100 for 1 SOL, buy 100 for 3 SOL, sell 150 for 6 SOL two hours later
+        swap('a', NOW - 10 * 86400, 'UBC', 100, SOL_MINT, 1),
+        swap('b', NOW - 9 * 86400, 'UBC', 100, SOL_MINT, 3),
+        swap('c', NOW - 9 * 86400 + 7200, 'UBC', -150, SOL_MINT, -6),
+        # COMPUTE: buy 1000 for 50 USDC, sell 1000 for 40 USDC ten days later
+        swap('d', NOW - 20 * 86400, 'COMPUTE', 1000, USDC_MINT, 50),
+        swap('e', NOW - 10 * 86400, 'COMPUTE', -1000, USDC_MINT, -40),
+        # DOGE: a sell with no buy in the history
+        swap('f', NOW - 3600, 'DOGE', -10, SOL_MINT, -0.5),
+    ]
+    digest = summarize_transactions(transactions, now=NOW)
+    tokens = {entry['symbol']: entry for entry in digest['tokens']}
+
+    ubc, compute = tokens.get('UBC', {}), tokens.get('COMPUTE', {})
+    checks = {
+        'frequency': digest['frequency']['transactions'] == 6 and digest['frequency']['last24h'] == 1,
+        'quotes excluded': set(tokens) == {'UBC', 'COMPUTE', 'DOGE'} and digest['tokenCount'] == 3,
+        'UBC flows': ubc.get('netAmount') == 50 and ubc.get('inSol') == 4 and ubc.get('outSol') == 6,
+        # Average cost 0.02 SOL, 150 sold at 0.04 SOL
+        'UBC PnL': ubc.get('pnlSol') == 3.0,
+        'COMPUTE PnL': compute.get('pnlUsd') == -10.0 and compute.get('buys') == 1 and compute.get('sells') == 1,
+        'total PnL': digest['realizedPnl'] == {'USD': -10.0, 'SOL': 3.0},
+        'holding periods': digest['holdingPeriods'] == {'<1h': 0, '1h-1d': 1, '1d-7d': 0, '7d-30d': 1,
+                                                        '>30d': 0, 'sells without buy': 1},
+        'focus': summarize_transactions(transactions, focus_symbol='doge', now=NOW,
+                                        max_tokens=1)['tokens'][0]['symbol'] == 'DOGE',
+        'empty': format_digest(summarize_transactions([], now=NOW)) == "No transaction history available",
+    }
+    for name, passed in checks.items():
+        print(f"{'✅' if passed else '❌'} {name}")
+    print(format_digest(digest))
+    return all(checks.values())
+
+def test_prompt_size() -> bool:
+    """The digest of 100 transactions is a fraction of the raw rows embedded in prompts before"""
+    print("\n📏 Testing prompt size...")
+    rng = random.Random(7)
+    symbols = [f'TOK{i}' for i in range(25)]
+    transactions = []
+    for i in range(100):
+        symbol = rng.choice(symbols)
+        quote_mint = rng.choice([SOL_MINT, USDC_MINT])
+        amount = rng.uniform(10, 10_000) * rng.choice([1, -1])
+        transaction = swap(f'{i:088d}', NOW - i * 5000, symbol, amount, quote_mint, amount / rng.uniform(50, 500))
+        transaction.update(blockNumber=300_000_000 + i, contractLabel={'name': 'Jupiter Aggregator v6'},
+                           **{'from': 'W' * 44, 'to': 'JUP6LkbZbjS1jKKwapdHNy74zcZ3tLUZoi5QNyVTaV4'})
+        for change in transaction['balanceChange']:
+            change.update(name=f"{change['symbol']} Token", logoURI=f"https://img.example/{change['symbol']}.png")
+        transactions.append(transaction)
+
+    start = time.perf_counter()
+    digest = format_digest(summarize_transactions(transactions, now=NOW))
+    elapsed = time.perf_counter() - start
+
+    raw = json.dumps(transactions, indent=2)
+    ratio = len(raw) / len(digest)
+    ok = ratio >= 10
+    print(f"Raw rows: {len(raw):,} chars (~{len(raw) // 4:,} tokens), digest: {len(digest):,} chars "
+          f"(~{len(digest) // 4:,} tokens), {ratio:.0f}x smaller, built in {elapsed * 1000:.1f} ms")
+    print("✅ Digest is compact" if ok else "❌ Digest is not much smaller than the raw rows")
+    return ok
+
+def main():
+    print("🚀 Starting wallet digest tests...")
+    results = {
+        'Digest values': test_digest_values(),
+        'Prompt size': test_prompt_size()
+    }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
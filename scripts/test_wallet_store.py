@@ -0,0 +1,135 @@
+import sys
+import json
+import tempfile
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent.absolute())
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from engine.wallet_store import WalletTransactionStore
+from engine.rate_limits import rate_limited_session
+
+WALLET = 'WhaLe1111111111111111111111111111111111111'
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+def make_transaction(i: int):
+    return {
+        'txHash': f'tx{i:05d}',
+        'blockTime': (START + timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+        'status': True,
+        'fee': 5000,
+        'mainAction': 'swap',
+        'balanceChange': [
+            {'symbol': 'SOL', 'usdValue': -10.0 * (i % 7 + 1)},
+            {'symbol': 'UBC', 'usdValue': 10.0 * (i % 7 + 1)}
+        ]
+    }
+
+class StubBirdeye(BaseAdapter):
+    """Transport adapter serving tx_list newest first, honouring limit and before, counting every call"""
+
+    def __init__(self, count: int):
+        super().__init__()
+        self.transactions = [make_transaction(i) for i in range(count)]
+        self.calls = []
+
+    def add(self, count: int):
+        first = len(self.transactions)
+        self.transactions += [make_transaction(i) for i in range(first, first + count)]
+
+    def send(self, request, **kwargs):
+        params = {key: values[0] for key, values in parse_qs(urlparse(request.url).query).items()}
+        self.calls.append(params)
+        newest_first = self.transactions[::-1]
+        if 'before' in params:
+            hashes = [txn['txHash'] for txn in newest_first]
+            newest_first = newest_first[hashes.index(params['before']) + 1:]
+        page = newest_first[:int(params.get('limit', 100))]
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({'success': True, 'data': {'solana': page}}).encode()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+def test_incremental_sync(db_path: Path) -> bool:
+    """The first sync walks the whole history; later syncs download only what is new"""
+    print("\n🔄 Testing incremental sync against a stub Birdeye API...")
+    stub = StubBirdeye(250)
+    rate_limited_session('birdeye').mount('https://public-api.birdeye.so/', stub)
+    store = WalletTransactionStore(db_path)
+
+    first_new = store.sync(WALLET, 'test-key')
+    first_calls = len(stub.calls)
+
+    throttled_new = store.sync(WALLET, 'test-key')
+    throttled_calls = len(stub.calls) - first_calls
+
+    stub.add(3)
+    calls_before = len(stub.calls)
+    second_new = store.sync(WALLET, 'test-key', force=True)
+    second_calls = stub.calls[calls_before:]
+
+    ok = (first_new == 250 and first_calls == 3 and
+          throttled_new == 0 and throttled_calls == 0 and
+          second_new == 3 and len(second_calls) == 1 and int(second_calls[0]['limit']) < 100)
+    print(f"First sync: {first_new} new in {first_calls} calls; "
+          f"immediate resync: {throttled_calls} calls; "
+          f"after 3 new transactions: {second_new} new in {len(second_calls)} call(s) "
+          f"of {second_calls[0]['limit'] if second_calls else '-'}")
+    print("✅ Only new transactions downloaded" if ok else "❌ Sync downloaded more than needed")
+    return ok
+
+def test_normalized_rows(db_path: Path) -> bool:
+    """Stored rows come back newest first with parsed timestamp, symbol, value and fee"""
+    print("\n🧾 Testing normalized rows...")
+    store = WalletTransactionStore(db_path)
+    rows = store.recent(WALLET, limit=5)
+    newest = rows[0] if rows else {}
+
+    expected_time = (START + timedelta(minutes=252)).timestamp()
+    ok = (len(rows) == 5 and
+          [row['txHash'] for row in rows] == [f'tx{i:05d}' for i in range(252, 247, -1)] and
+          newest['timestamp'] == expected_time and
+          newest['symbol'] == 'SOL' and newest['type'] == 'swap' and
+          newest['value'] == 20.0 * (252 % 7 + 1) and
+          newest['fee'] == 5000 / 1e9 and newest['status'] == 'success' and
+          newest['raw']['txHash'] == 'tx00252')
+    since = store.recent(WALLET, limit=500, since=(START + timedelta(minutes=200)).timestamp())
+    ok = ok and len(since) == 53
+    print(f"Newest: {({key: value for key, value in newest.items() if key != 'raw'})}")
+    print("✅ Rows normalized and ordered" if ok else "❌ Rows not normalized as expected")
+    return ok
+
+def main():
+    print("🚀 Starting wallet transaction store tests...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'wallet_transactions.db'
+        results = {
+            'Incremental sync': test_incremental_sync(db_path),
+            'Normalized rows': test_normalized_rows(db_path)
+        }
+
+    print("\n📋 Test Summary:")
+    for name, success in results.items():
+        print(f"{name}: {'✅' if success else '❌'}")
+
+    if all(results.values()):
+        print("\n✨ All tests passed!")
+    else:
+        print("\n⚠️ Some tests failed")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
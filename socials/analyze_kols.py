@@ -17,7 +17,39 @@ import argparse
 from typing import Dict, List, Optional, Any
 from dotenv import load_dotenv
 from airtable import Airtable
-from anthropic import Anthropic
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.bounded_pipeline import BoundedPipeline
+from engine.llm_broker import get_broker
+from engine.rate_limits import get_rate_limiter, limit_session, rate_limited_session
+from engine.wallet_digest import format_digest, summarize_transactions
+from engine.wallet_store import get_wallet_store, normalize_transaction
+from socials.kol_artifacts import (
+    IMAGE_CONCURRENCY,
+    TWEET_CONCURRENCY,
+    cached_detailed_tweet,
+    generate_concurrently,
+    generate_kol_image,
+    get_artifact_cache,
+    kol_data_from_fields,
+    kol_image_filename,
+)
+
+# Maximum calls in flight per provider while analyzing all KOLs
+KOL_CONCURRENCY = {
+    'birdeye': 6,
+    'x': 4,
+    'anthropic': 4
+}
+
+# Stored transactions summarized into the digest sent to Claude
+DIGEST_HISTORY = 500
 
 # Fix for Windows asyncio
 if platform.system() == 'Windows':
@@ -58,6 +90,7 @@ class KOLAnalyzer:
             raise ValueError("Missing Airtable credentials in environment variables")
         
         self.kol_table = Airtable(self.base_id, 'KOL_ANALYSIS', self.api_key)
+        limit_session(self.kol_table.session, 'airtable')
         
         # API keys
         self.birdeye_api_key = os.getenv('BIRDEYE_API_KEY')
@@ -75,7 +108,7 @@ class KOLAnalyzer:
         
         # Initialize Claude client
         if self.claude_api_key:
-            self.claude = Anthropic(api_key=self.claude_api_key)
+            self.claude = get_broker()
     
     def get_all_kols(self) -> List[Dict]:
         """Fetch all KOL records from Airtable"""
@@ -104,7 +137,7 @@ class KOLAnalyzer:
                 "wallet": wallet_address
             }
             
-            response = requests.get(url, headers=headers, params=params)
+            response = rate_limited_session('birdeye').get(url, headers=headers, params=params)
         
             # Log the API request details
             self.logger.info(f"Birdeye Holdings API Request: URL={url}, Params={params}")
@@ -218,7 +251,7 @@ class KOLAnalyzer:
             return {"error": str(e)}
     
     def get_wallet_transactions(self, wallet_address: str) -> Dict[str, Any]:
-        """Get wallet transaction history from Birdeye API"""
+        """Get wallet transaction history, synced incrementally from Birdeye into the local store"""
         if not self.birdeye_api_key or not wallet_address:
             self.logger.warning(f"Missing API key or wallet address for transactions")
             return {
@@ -227,211 +260,108 @@ class KOLAnalyzer:
             }
         
         try:
-            self.logger.info(f"Fetching transaction history for {wallet_address}")
-            url = "https://public-api.birdeye.so/v1/wallet/tx_list"
-            headers = {
-                "X-API-KEY": self.birdeye_api_key,
-                "x-chain": "solana",
-                "accept": "application/json"  # Added as per documentation
-            }
-            params = {
-                "wallet": wallet_address,
-                "limit": 100  # Use the default limit as per documentation
-            }
-            
-            # Log the API request details
-            self.logger.info(f"Birdeye Transactions API Request: URL={url}, Params={params}")
-            
-            response = requests.get(url, headers=headers, params=params, timeout=15)
-            self.logger.info(f"Birdeye Transactions API Response Status: {response.status_code}")
-            
-            if response.status_code != 200:
-                self.logger.error(f"Error from Birdeye API: {response.status_code} - {response.text}")
-                return {
-                    "recentTransactions": [],
-                    "riskScore": 50
-                }
+            store = get_wallet_store()
+            new_count = store.sync(wallet_address, self.birdeye_api_key)
+            if new_count < 0:
+                self.logger.warning(f"Could not sync transactions for {wallet_address}, using stored history")
+            else:
+                self.logger.info(f"Synced {new_count} new transactions for {wallet_address}")
             
-            # Log the raw response for debugging
-            self.logger.debug(f"Birdeye transactions API response: {response.text[:1000]}...")
-            # Log the raw response
-            self.logger.info(f"Birdeye Transactions API Response: {response.text[:500]}...")
+            # Stored rows are newest first and already normalized; risk scoring reads the Birdeye payloads
+            history = store.recent(wallet_address, limit=DIGEST_HISTORY)
+            stored = history[:100]
+            transactions = [dict(row["raw"], timestamp_numeric=row["timestamp"]) for row in stored]
+            recent_txns = [{key: value for key, value in row.items() if key != "raw"} for row in stored]
+            self.logger.info(f"Loaded {len(recent_txns)} stored transactions")
             
-            try:
-                data = response.json()
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Invalid JSON response from Birdeye API: {e}")
-                return {"error": "Invalid API response format"}
+            # The digest covers the longer stored history at a fraction of the prompt size of raw rows
+            digest = summarize_transactions([row["raw"] for row in history])
             
             # Calculate metrics
             thirty_days_ago_timestamp = time.time() - (30 * 24 * 60 * 60)
-            recent_txns = []
             risk_score = 50  # Default medium risk
             
-            # Check if the response is successful
-            if data.get("success", False):
-                # Extract transactions from the response
-                txn_data = data.get("data", {})
-                transactions = []
-                
-                # Check all possible paths to find transactions
-                if "solana" in txn_data and isinstance(txn_data["solana"], list):
-                    transactions = txn_data["solana"]
-                    self.logger.info(f"Found {len(transactions)} transactions in data->solana")
-                else:
-                    possible_paths = [
-                        # Direct paths
-                        txn_data.get("transactions", []),
-                        txn_data.get("items", []),
-                        # Nested under solana
-                        txn_data.get("solana", {}).get("transactions", []) if isinstance(txn_data.get("solana"), dict) else [],
-                        # Nested under other possible keys
-                        txn_data.get("history", []),
-                        txn_data.get("txs", []),
-                        txn_data.get("tx_list", [])
-                    ]
+            # Calculate risk score based on transaction patterns
+            try:
+                # Only calculate if we have enough transactions
+                if len(transactions) >= 5:
+                    # 1. Transaction frequency (0-40 points)
+                    # Count transactions in the last 30 days
+                    recent_tx_count = sum(1 for t in transactions if t.get("timestamp_numeric", 0) > thirty_days_ago_timestamp)
+                    tx_frequency_score = min(40, int(recent_tx_count * 0.8))
                     
-                    # Use the first non-empty path
-                    for path in possible_paths:
-                        if path and isinstance(path, list):
-                            transactions = path
-                            self.logger.info(f"Found {len(transactions)} transactions in alternative path")
-                            break
-                
-                # If we found transactions, process them
-                if transactions:
-                    # Sort transactions by timestamp if possible
-                    try:
-                        # First, ensure all transactions have a numeric timestamp
-                        for txn in transactions:
-                            if "blockTime" in txn and isinstance(txn["blockTime"], str):
+                    # 2. Token diversity (0-30 points)
+                    # Count unique tokens in transactions
+                    unique_tokens = set()
+                    for t in transactions[:50]:  # Look at last 50 transactions
+                        token_symbol = None
+                        # Try different fields that might contain the token symbol
+                        for field in ["symbol", "tokenSymbol", "token"]:
+                            if field in t:
+                                token_symbol = t[field]
+                                break
+                        
+                        # Also check in balanceChange if it exists
+                        if "balanceChange" in t and isinstance(t["balanceChange"], list):
+                            for change in t["balanceChange"]:
+                                if "symbol" in change:
+                                    token_symbol = change["symbol"]
+                        
+                        if token_symbol:
+                            unique_tokens.add(token_symbol)
+                    
+                    # More unique tokens = higher risk
+                    token_diversity_score = min(30, len(unique_tokens) * 3)
+                    
+                    # 3. Transaction size volatility (0-30 points)
+                    # Calculate coefficient of variation of transaction values
+                    tx_values = []
+                    for t in transactions[:20]:  # Look at last 20 transactions
+                        value = 0
+                        # Try to extract value from different possible fields
+                        for field in ["value", "usdValue", "amountUsd"]:
+                            if field in t and t[field]:
                                 try:
-                                    # Convert ISO format to timestamp
-                                    if "T" in txn["blockTime"]:
-                                        from datetime import datetime
-                                        dt = datetime.fromisoformat(txn["blockTime"].replace("Z", "+00:00"))
-                                        txn["timestamp_numeric"] = dt.timestamp()
-                                    else:
-                                        txn["timestamp_numeric"] = float(txn["blockTime"])
+                                    value = float(t[field])
+                                    break
                                 except (ValueError, TypeError):
-                                    txn["timestamp_numeric"] = 0
-                            elif "blockTime" in txn:
-                                txn["timestamp_numeric"] = float(txn["blockTime"])
-                            elif "timestamp" in txn:
-                                if isinstance(txn["timestamp"], str):
+                                    pass
+                        
+                        # Also check in balanceChange if it exists
+                        if value == 0 and "balanceChange" in t and isinstance(t["balanceChange"], list):
+                            for change in t["balanceChange"]:
+                                if "usdValue" in change:
                                     try:
-                                        if "T" in txn["timestamp"]:
-                                            from datetime import datetime
-                                            dt = datetime.fromisoformat(txn["timestamp"].replace("Z", "+00:00"))
-                                            txn["timestamp_numeric"] = dt.timestamp()
-                                        else:
-                                            txn["timestamp_numeric"] = float(txn["timestamp"])
+                                        value += abs(float(change["usdValue"]))
                                     except (ValueError, TypeError):
-                                        txn["timestamp_numeric"] = 0
-                                else:
-                                    txn["timestamp_numeric"] = float(txn["timestamp"])
-                            else:
-                                txn["timestamp_numeric"] = 0
+                                        pass
                         
-                        # Sort by timestamp_numeric in descending order (newest first)
-                        transactions.sort(key=lambda x: x.get("timestamp_numeric", 0), reverse=True)
-                        self.logger.info(f"Sorted {len(transactions)} transactions by timestamp")
-                    except Exception as e:
-                        self.logger.error(f"Error sorting transactions: {e}")
-                    
-                    # Process transactions for display
-                    for txn in transactions[:100]:  # Process more transactions for analysis
-                        # Extract transaction data
-                        tx_details = self._extract_transaction_details(txn)
-                        if tx_details:
-                            recent_txns.append(tx_details)
+                        if value > 0:
+                            tx_values.append(value)
                     
-                    self.logger.info(f"Extracted {len(recent_txns)} formatted transactions")
+                    volatility_score = 0
+                    if tx_values and len(tx_values) >= 3:
+                        mean_value = sum(tx_values) / len(tx_values)
+                        if mean_value > 0:
+                            std_dev = (sum((v - mean_value) ** 2 for v in tx_values) / len(tx_values)) ** 0.5
+                            cv = std_dev / mean_value  # Coefficient of variation
+                            volatility_score = min(30, int(cv * 100))
                     
-                    # Calculate risk score based on transaction patterns
-                    try:
-                        # Only calculate if we have enough transactions
-                        if len(transactions) >= 5:
-                            # 1. Transaction frequency (0-40 points)
-                            # Count transactions in the last 30 days
-                            recent_tx_count = sum(1 for t in transactions if t.get("timestamp_numeric", 0) > thirty_days_ago_timestamp)
-                            tx_frequency_score = min(40, int(recent_tx_count * 0.8))
-                            
-                            # 2. Token diversity (0-30 points)
-                            # Count unique tokens in transactions
-                            unique_tokens = set()
-                            for t in transactions[:50]:  # Look at last 50 transactions
-                                token_symbol = None
-                                # Try different fields that might contain the token symbol
-                                for field in ["symbol", "tokenSymbol", "token"]:
-                                    if field in t:
-                                        token_symbol = t[field]
-                                        break
-                                
-                                # Also check in balanceChange if it exists
-                                if "balanceChange" in t and isinstance(t["balanceChange"], list):
-                                    for change in t["balanceChange"]:
-                                        if "symbol" in change:
-                                            token_symbol = change["symbol"]
-                                
-                                if token_symbol:
-                                    unique_tokens.add(token_symbol)
-                            
-                            # More unique tokens = higher risk
-                            token_diversity_score = min(30, len(unique_tokens) * 3)
-                            
-                            # 3. Transaction size volatility (0-30 points)
-                            # Calculate coefficient of variation of transaction values
-                            tx_values = []
-                            for t in transactions[:20]:  # Look at last 20 transactions
-                                value = 0
-                                # Try to extract value from different possible fields
-                                for field in ["value", "usdValue", "amountUsd"]:
-                                    if field in t and t[field]:
-                                        try:
-                                            value = float(t[field])
-                                            break
-                                        except (ValueError, TypeError):
-                                            pass
-                                
-                                # Also check in balanceChange if it exists
-                                if value == 0 and "balanceChange" in t and isinstance(t["balanceChange"], list):
-                                    for change in t["balanceChange"]:
-                                        if "usdValue" in change:
-                                            try:
-                                                value += abs(float(change["usdValue"]))
-                                            except (ValueError, TypeError):
-                                                pass
-                                
-                                if value > 0:
-                                    tx_values.append(value)
-                            
-                            volatility_score = 0
-                            if tx_values and len(tx_values) >= 3:
-                                mean_value = sum(tx_values) / len(tx_values)
-                                if mean_value > 0:
-                                    std_dev = (sum((v - mean_value) ** 2 for v in tx_values) / len(tx_values)) ** 0.5
-                                    cv = std_dev / mean_value  # Coefficient of variation
-                                    volatility_score = min(30, int(cv * 100))
-                            
-                            # Combine scores
-                            risk_score = tx_frequency_score + token_diversity_score + volatility_score
-                            self.logger.info(f"Risk score components: frequency={tx_frequency_score}, diversity={token_diversity_score}, volatility={volatility_score}")
-                        else:
-                            # Not enough transactions to calculate a meaningful risk score
-                            risk_score = 50  # Default medium risk
-                            self.logger.info(f"Not enough transactions ({len(transactions)}) to calculate risk score, using default")
-                    except Exception as e:
-                        self.logger.error(f"Error calculating risk score: {e}")
-                        risk_score = 50  # Default on error
+                    # Combine scores
+                    risk_score = tx_frequency_score + token_diversity_score + volatility_score
+                    self.logger.info(f"Risk score components: frequency={tx_frequency_score}, diversity={token_diversity_score}, volatility={volatility_score}")
                 else:
-                    self.logger.warning(f"No transactions found in response. Response structure: {list(txn_data.keys())}")
-            else:
-                self.logger.warning(f"Birdeye API returned unsuccessful response: {data.get('success', False)}")
+                    # Not enough transactions to calculate a meaningful risk score
+                    risk_score = 50  # Default medium risk
+                    self.logger.info(f"Not enough transactions ({len(transactions)}) to calculate risk score, using default")
+            except Exception as e:
+                self.logger.error(f"Error calculating risk score: {e}")
+                risk_score = 50  # Default on error
             
             return {
                 "recentTransactions": recent_txns[:15],  # Return more recent transactions
-                "riskScore": risk_score
+                "riskScore": risk_score,
+                "transactionDigest": digest
             }
         except Exception as e:
             self.logger.error(f"Error fetching wallet transactions: {e}")
@@ -469,7 +399,7 @@ class KOLAnalyzer:
             # Log the API request details
             self.logger.info(f"X API Request: URL={url}, Params={params}")
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = rate_limited_session('x').get(url, params=params, headers=headers, timeout=10)
             self.logger.info(f"X API Response Status: {response.status_code}")
             
             # If the new endpoint fails, try the old one as fallback
@@ -478,7 +408,7 @@ class KOLAnalyzer:
                 url = f"https://api.twitter.com/2/users/by/username/{username}"
                 self.logger.info(f"X Legacy API Request: URL={url}, Params={params}")
                 
-                response = requests.get(url, params=params, headers=headers, timeout=10)
+                response = rate_limited_session('x').get(url, params=params, headers=headers, timeout=10)
                 self.logger.info(f"X Legacy API Response Status: {response.status_code}")
             
             if response.status_code != 200:
@@ -578,8 +508,8 @@ class KOLAnalyzer:
             Transaction History:
             - Risk Score: {kol_data.get('riskScore', 50)}/100
             
-            Recent Transactions:
-            {json.dumps(kol_data.get('recentTransactions', []), indent=2)}
+            Transaction Digest:
+            {format_digest(kol_data.get('transactionDigest'))}
             
             Social Influence:
             - Influence Score: {kol_data.get('influenceScore', 0)}/100
@@ -627,7 +557,8 @@ class KOLAnalyzer:
             Ensure your response is ONLY the JSON object, with no additional text before or after.
             """
             
-            response = self.claude.messages.create(
+            response = self.claude.create_message(
+                caller="kols.generate_insights",
                 model="claude-3-7-sonnet-latest",
                 max_tokens=1000,
                 temperature=0.2,
@@ -638,7 +569,7 @@ class KOLAnalyzer:
             )
             
             # Extract JSON from response
-            content = response.content[0].text.strip()
+            content = response.text.strip()
             
             # Log the Claude API response
             self.logger.info(f"Claude API Response: {content[:500]}...")
@@ -717,108 +648,7 @@ class KOLAnalyzer:
     def _extract_transaction_details(self, txn: Dict) -> Optional[Dict]:
         """Extract relevant details from a transaction"""
         try:
-            # Initialize with default values
-            tx_details = {
-                "type": "Unknown",
-                "symbol": "Unknown",
-                "value": 0,
-                "timestamp": 0
-            }
-            
-            # Extract transaction type
-            for type_field in ["type", "txType", "transactionType", "mainAction"]:
-                if type_field in txn and txn[type_field]:
-                    tx_details["type"] = txn[type_field]
-                    break
-            
-            # Extract symbol
-            symbol = None
-            # Try direct symbol fields
-            for symbol_field in ["symbol", "tokenSymbol", "token"]:
-                if symbol_field in txn and txn[symbol_field]:
-                    symbol = txn[symbol_field]
-                    break
-            
-            # If no symbol found, check balanceChange
-            if not symbol and "balanceChange" in txn and isinstance(txn["balanceChange"], list) and txn["balanceChange"]:
-                # Use the symbol from the first balance change with the largest value
-                max_value = 0
-                for change in txn["balanceChange"]:
-                    if "symbol" in change and change["symbol"]:
-                        try:
-                            value = abs(float(change.get("usdValue", 0)))
-                            if value > max_value:
-                                max_value = value
-                                symbol = change["symbol"]
-                        except (ValueError, TypeError):
-                            pass
-            
-            if symbol:
-                tx_details["symbol"] = symbol
-            
-            # Extract value
-            value = 0
-            # Try direct value fields
-            for value_field in ["usdValue", "value", "valueUsd", "amountUsd", "amount_usd"]:
-                if value_field in txn and txn[value_field]:
-                    try:
-                        value = float(txn[value_field])
-                        break
-                    except (ValueError, TypeError):
-                        pass
-            
-            # If no value found, sum balanceChange values
-            if value == 0 and "balanceChange" in txn and isinstance(txn["balanceChange"], list):
-                for change in txn["balanceChange"]:
-                    if "usdValue" in change:
-                        try:
-                            value += abs(float(change["usdValue"]))
-                        except (ValueError, TypeError):
-                            pass
-            
-            tx_details["value"] = value
-            
-            # Extract timestamp
-            timestamp = txn.get("timestamp_numeric", 0)
-            if timestamp == 0:
-                # Try to get timestamp from other fields
-                for time_field in ["timestamp", "blockTime", "time", "date", "block_time"]:
-                    if time_field in txn and txn[time_field]:
-                        try:
-                            if isinstance(txn[time_field], str):
-                                # Try to parse ISO format
-                                if "T" in txn[time_field]:
-                                    from datetime import datetime
-                                    dt = datetime.fromisoformat(txn[time_field].replace("Z", "+00:00"))
-                                    timestamp = dt.timestamp()
-                                else:
-                                    timestamp = float(txn[time_field])
-                            else:
-                                timestamp = float(txn[time_field])
-                            break
-                        except (ValueError, TypeError):
-                            pass
-            
-            tx_details["timestamp"] = timestamp
-            
-            # Add transaction hash if available
-            for hash_field in ["txHash", "signature", "tx_hash", "id"]:
-                if hash_field in txn and txn[hash_field]:
-                    tx_details["txHash"] = txn[hash_field]
-                    break
-            
-            # Add fee if available
-            if "fee" in txn:
-                try:
-                    tx_details["fee"] = float(txn["fee"]) / 1e9  # Convert lamports to SOL
-                except (ValueError, TypeError):
-                    pass
-            
-            # Add status if available
-            if "status" in txn:
-                tx_details["status"] = "success" if txn["status"] else "failed"
-            
-            return tx_details
+            return normalize_transaction(txn)
         except Exception as e:
             self.logger.error(f"Error extracting transaction details: {e}")
             return None
@@ -866,7 +696,7 @@ class KOLAnalyzer:
         }
         
         print("\nTesting token list endpoint...")
-        response = requests.get(url, headers=headers, params=params)
+        response = rate_limited_session('birdeye').get(url, headers=headers, params=params)
         print(f"Status code: {response.status_code}")
         
         if response.status_code == 200:
@@ -888,7 +718,7 @@ class KOLAnalyzer:
         }
         
         print("\nTesting transaction list endpoint...")
-        response = requests.get(url, headers=headers, params=params)
+        response = rate_limited_session('birdeye').get(url, headers=headers, params=params)
         print(f"Status code: {response.status_code}")
         
         if response.status_code == 200:
@@ -913,27 +743,27 @@ class KOLAnalyzer:
             self.logger.error(f"Error updating KOL record: {e}")
             return False
     
-    def analyze_kol(self, kol_record: Dict) -> Dict[str, Any]:
-        """Analyze a single KOL and return updated data"""
-        record_id = kol_record["id"]
-        fields = kol_record["fields"]
-        
+    def update_kol_records(self, updates: List[Dict[str, Any]]) -> int:
+        """Update several KOL records in batched Airtable requests; returns the number written"""
+        try:
+            self.logger.info(f"Updating {len(updates)} KOL records")
+            self.kol_table.batch_update([{"id": update["record_id"], "fields": update["update_data"]}
+                                         for update in updates])
+            return len(updates)
+        except Exception as e:
+            self.logger.error(f"Error updating batch of {len(updates)} KOL records: {e}")
+            return 0
+    
+    def _new_kol_data(self, fields: Dict) -> Dict[str, Any]:
+        """Analysis data of a KOL record, with default values for everything not fetched yet"""
         # Use "X" field for the name instead of "name"
         kol_name = fields.get("X", "Unknown")
-        self.logger.info(f"Analyzing KOL: {kol_name}")
-        
-        # Extract key fields
-        wallet_address = fields.get("wallet", "")
-    
-        # Try to get X username from different possible field names
-        x_username = fields.get("xUsername", fields.get("X", ""))
-    
-        # Initialize result data with correct field name
-        result_data = {
+        return {
             "name": kol_name,  # Store as "name" for internal use
             "X": kol_name,     # Also store as "X" for Airtable update
-            "wallet": wallet_address,
-            "xUsername": x_username,
+            "wallet": fields.get("wallet", ""),
+            # Try to get X username from different possible field names
+            "xUsername": fields.get("xUsername", fields.get("X", "")),
             # Initialize with default values to ensure they exist
             "totalValue": 0,
             "tokenCount": 0,
@@ -948,34 +778,23 @@ class KOLAnalyzer:
             "description": "",
             "influenceScore": 0
         }
-        
-        # Get wallet holdings data
-        if wallet_address:
-            holdings_data = self.get_wallet_holdings(wallet_address)
-            if "error" not in holdings_data:
-                result_data.update(holdings_data)
-                self.logger.info(f"Updated holdings data for {kol_name}: ${result_data.get('totalValue', 0):,.2f}")
-        
-        # Get wallet transaction history
-        if wallet_address:
-            transaction_data = self.get_wallet_transactions(wallet_address)
-            if "error" not in transaction_data:
-                result_data.update(transaction_data)
-                self.logger.info(f"Updated transaction data for {kol_name}: {len(result_data.get('recentTransactions', []))} transactions")
-        
-        # Get X profile data
-        if x_username:
-            self.logger.info(f"Using X username: {x_username}")
-            x_data = self.get_x_profile(x_username)
-            if "error" not in x_data:
-                result_data.update(x_data)
-                self.logger.info(f"Updated X profile data for {kol_name}: {result_data.get('followers', 0):,} followers")
-        
-        # Generate insights with all collected data
-        insights_data = self.generate_insights(result_data)
-        result_data.update(insights_data)
-        
-        # Prepare data for Airtable update
+    
+    def _merge_kol_data(self, result_data: Dict[str, Any], source: str, data: Dict[str, Any]):
+        """Merge holdings, transactions or profile data into a KOL's analysis data unless it failed"""
+        if "error" in data:
+            return
+        result_data.update(data)
+        kol_name = result_data["name"]
+        if source == "holdings":
+            self.logger.info(f"Updated holdings data for {kol_name}: ${result_data.get('totalValue', 0):,.2f}")
+        elif source == "transactions":
+            self.logger.info(f"Updated transaction data for {kol_name}: {len(result_data.get('recentTransactions', []))} transactions")
+        else:
+            self.logger.info(f"Updated X profile data for {kol_name}: {result_data.get('followers', 0):,} followers")
+    
+    def _build_update_data(self, result_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Airtable fields for a KOL's completed analysis"""
+        kol_name = result_data["name"]
         update_data = {
             "X": result_data.get("X", "Unknown"),  # Use X field for name
             "totalValue": result_data.get("totalValue", 0),
@@ -1007,155 +826,109 @@ class KOLAnalyzer:
             self.logger.warning(f"No transactions found for {kol_name}")
             update_data["transactionsJSON"] = json.dumps([{"type": "No data", "symbol": "Unknown", "value": 0, "timestamp": 0}])
         
+        return update_data
+    
+    def analyze_kol(self, kol_record: Dict) -> Dict[str, Any]:
+        """Analyze a single KOL and return updated data"""
+        record_id = kol_record["id"]
+        result_data = self._new_kol_data(kol_record["fields"])
+        wallet_address = result_data["wallet"]
+        x_username = result_data["xUsername"]
+        self.logger.info(f"Analyzing KOL: {result_data['name']}")
+        
+        # Get wallet holdings and transaction history
+        if wallet_address:
+            self._merge_kol_data(result_data, "holdings", self.get_wallet_holdings(wallet_address))
+            self._merge_kol_data(result_data, "transactions", self.get_wallet_transactions(wallet_address))
+        
+        # Get X profile data
+        if x_username:
+            self.logger.info(f"Using X username: {x_username}")
+            self._merge_kol_data(result_data, "profile", self.get_x_profile(x_username))
+        
+        # Generate insights with all collected data
+        result_data.update(self.generate_insights(result_data))
+        
         return {
             "record_id": record_id,
-            "update_data": update_data,
+            "update_data": self._build_update_data(result_data),
             "full_data": result_data
         }
     
-    async def analyze_all_kols(self):
-        """Analyze all KOLs and update their records"""
-        kol_records = self.get_all_kols()
+    async def analyze_all_kols(self) -> Dict[str, Any]:
+        """
+        Analyze all KOLs concurrently and update their records
         
+        Each KOL's holdings, transactions and X profile are fetched at the same
+        time, and many KOLs are in flight at once, with at most
+        KOL_CONCURRENCY[provider] calls per provider on top of the shared
+        provider rate limiters. Insights are generated once a KOL's data is in.
+        Finished records are written back in batches of WRITE_BATCH_SIZE.
+        
+        Returns:
+            Dictionary with success, failure and total counts, plus 'timings'
+            holding the seconds spent in each stage
+        """
+        results = {'success': 0, 'failure': 0, 'total': 0}
+        total_start = time.perf_counter()
+        
+        kol_records = self.get_all_kols()
         if not kol_records:
             self.logger.warning("No KOL records found to analyze")
-            return
+            return results
         
+        results['total'] = len(kol_records)
         self.logger.info(f"Starting analysis of {len(kol_records)} KOLs")
         
-        for kol_record in kol_records:
+        pipeline = BoundedPipeline(KOL_CONCURRENCY, ['holdings', 'transactions', 'profile', 'insights', 'airtable'],
+                                   'kol-analysis')
+        
+        async def analyze(kol_record: Dict) -> Optional[Dict[str, Any]]:
             try:
-                result = self.analyze_kol(kol_record)
-                self.update_kol_record(result["record_id"], result["update_data"])
+                result_data = self._new_kol_data(kol_record["fields"])
+                wallet_address = result_data["wallet"]
+                x_username = result_data["xUsername"]
+                self.logger.info(f"Analyzing KOL: {result_data['name']}")
+                
+                fetches = {}
+                if wallet_address:
+                    fetches["holdings"] = pipeline.call('holdings', 'birdeye', self.get_wallet_holdings, wallet_address)
+                    fetches["transactions"] = pipeline.call('transactions', 'birdeye', self.get_wallet_transactions, wallet_address)
+                if x_username:
+                    fetches["profile"] = pipeline.call('profile', 'x', self.get_x_profile, x_username)
                 
-                # Sleep to avoid rate limiting
-                await asyncio.sleep(2)
+                # Merge in the same order as the serial analysis so later sources win on shared keys
+                for source, data in zip(fetches, await asyncio.gather(*fetches.values())):
+                    self._merge_kol_data(result_data, source, data)
+                
+                result_data.update(await pipeline.call('insights', 'anthropic', self.generate_insights, result_data))
+                return {
+                    "record_id": kol_record["id"],
+                    "update_data": self._build_update_data(result_data),
+                    "full_data": result_data
+                }
             except Exception as e:
                 self.logger.error(f"Error analyzing KOL {kol_record.get('id', 'Unknown')}: {e}")
+                return None
+        
+        counts = await pipeline.run([analyze(kol_record) for kol_record in kol_records], self.update_kol_records)
+        results['success'] = counts['success']
+        results['failure'] = counts['failure']
         
-        self.logger.info("KOL analysis completed")
+        self.logger.info(f"KOL analysis completed: {results['success']} updated, {results['failure']} failed")
+        results['timings'] = pipeline.report(self.logger, time.perf_counter() - total_start)
+        return results
 
-def generate_kol_image(kol_data: Dict[str, Any], output_dir: str = "public/kols") -> Optional[str]:
+def generate_all_kol_images(force: bool = False):
     """
-    Generate a KOL image using Ideogram API with a fun, degen jungle theme
+    Generate images for all KOLs in the database
+    
+    Images run IMAGE_CONCURRENCY at a time, and KOLs whose image inputs are
+    unchanged keep their existing image.
     
     Args:
-        kol_data: Dictionary containing KOL data
-        output_dir: Directory to save the generated image
-        
-    Returns:
-        Path to the generated image or None if generation failed
+        force: Regenerate every image even if unchanged
     """
-    logger = setup_logging()
-    try:
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Extract KOL data
-        name = kol_data.get("name", "Unknown KOL")
-        x_username = kol_data.get("xUsername", "").replace("@", "")
-        profile_type = kol_data.get("profile", "Unknown")
-        influence_score = kol_data.get("influenceScore", 0)
-        
-        # Create a shorter, more focused prompt for Ideogram
-        prompt = f"""
-        Create a FUN, DEGEN JUNGLE crypto card for @{x_username or name}.
-        
-        TEXT MUST BE LARGE, LEGIBLE, AND STAND OUT CLEARLY against the background.
-        
-        Include:
-        - "@{x_username or name}" in BOLD, LARGE typography
-        - "Profile: {profile_type}" in gold font with glow effect
-        - "Influence Score: {influence_score}" in vibrant colors
-        
-        Background should be colorful jungle with:
-        - Neon tropical plants and vines
-        - Solana logo hidden in the foliage
-        - Bright, fun colors - not realistic/bio jungle
-        - Party/degen jungle vibe with crypto elements
-        
-        Style: Bold, playful, crypto-degen aesthetic with high contrast to ensure text readability.
-        """
-        
-        # Ideogram API parameters
-        ideogram_api_key = os.getenv('IDEOGRAM_API_KEY')
-        if not ideogram_api_key:
-            logger.error("Missing Ideogram API key")
-            return None
-        
-        # Prepare the API request
-        url = "https://api.ideogram.ai/generate"
-        headers = {
-            "Api-Key": ideogram_api_key,
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "image_request": {
-                "prompt": prompt,
-                "aspect_ratio": "ASPECT_4_3",  # 4:3 landscape format
-                "model": "V_2_TURBO",  # Changed from V_2 to V_2_TURBO
-                "magic_prompt_option": "AUTO",
-                "style_type": "DESIGN",  # Design style for dashboards
-                "num_images": 1
-            }
-        }
-        
-        logger.info(f"Sending request to Ideogram API for {name}")
-        
-        # Make the API request
-        response = requests.post(url, headers=headers, json=payload, timeout=60)
-        
-        if response.status_code != 200:
-            logger.error(f"Ideogram API error: {response.status_code} - {response.text}")
-            return None
-        
-        # Parse the response
-        result = response.json()
-        
-        if not result.get("data") or not result["data"]:
-            logger.error(f"No image data in Ideogram response: {result}")
-            return None
-        
-        # Get the image URL
-        image_url = result["data"][0].get("url")
-        
-        if not image_url:
-            logger.error(f"No image URL in Ideogram response: {result}")
-            return None
-        
-        # Download the image
-        logger.info(f"Downloading image from {image_url}")
-        img_response = requests.get(image_url, timeout=30)
-        
-        if img_response.status_code != 200:
-            logger.error(f"Failed to download image: {img_response.status_code}")
-            return None
-        
-        # Save the image using the X handle if available, otherwise use the name
-        if x_username:
-            filename = f"{x_username.replace('@', '')}.png"
-        else:
-            # Create a safe filename from the name
-            safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '_')).replace(' ', '_')
-            filename = f"{safe_name}.png"
-        
-        output_path = os.path.join(output_dir, filename)
-        
-        # Save the image
-        with open(output_path, 'wb') as f:
-            f.write(img_response.content)
-        
-        logger.info(f"Generated KOL image: {output_path}")
-        return output_path
-    
-    except Exception as e:
-        logger.error(f"Error generating KOL image: {e}")
-        logger.exception("Exception details:")
-        return None
-
-def generate_all_kol_images():
-    """Generate images for all KOLs in the database"""
     # Get logger from setup_logging
     logger = setup_logging()
     try:
@@ -1167,44 +940,18 @@ def generate_all_kol_images():
             return
         
         logger.info(f"Generating images for {len(kol_records)} KOLs")
+        kols = [kol_data_from_fields(record['fields']) for record in kol_records]
+        image_paths = generate_concurrently(lambda kol_data: generate_kol_image(kol_data, force=force),
+                                            kols, IMAGE_CONCURRENCY, label="images")
         
-        for record in kol_records:
-            try:
-                # Extract fields from record
-                fields = record['fields']
-                
-                # Create data dictionary for image generation
-                kol_data = {
-                    "name": fields.get("X", "Unknown KOL"),
-                    "xUsername": fields.get("xUsername", ""),
-                    "profilePicture": fields.get("profilePicture", ""),
-                    "influenceScore": fields.get("influenceScore", 0),
-                    "profile": fields.get("profile", "Unknown"),
-                    "analysis": fields.get("analysis", "No analysis available"),
-                    "insights": fields.get("insights", ""),
-                    "holdings": []
-                }
-                
-                # Parse holdings JSON if available
-                if "holdingsJSON" in fields and fields["holdingsJSON"]:
-                    try:
-                        kol_data["holdings"] = json.loads(fields["holdingsJSON"])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid holdings JSON for {kol_data['name']}")
-                
-                # Generate image
-                image_path = generate_kol_image(kol_data)
-                
-                if image_path:
-                    logger.info(f"Generated image for {kol_data['name']}: {image_path}")
-                else:
-                    logger.warning(f"Failed to generate image for {kol_data['name']}")
-            
-            except Exception as e:
-                logger.error(f"Error processing KOL record: {e}")
-                continue
+        for kol_data, image_path in zip(kols, image_paths):
+            if image_path:
+                logger.info(f"Image for {kol_data['name']}: {image_path}")
+            else:
+                logger.warning(f"Failed to generate image for {kol_data['name']}")
         
-        logger.info("KOL image generation completed")
+        cache = get_artifact_cache()
+        logger.info(f"KOL image generation completed: {cache.misses} generated, {cache.hits} unchanged")
     
     except Exception as e:
         logger.error(f"Error in generate_all_kol_images: {e}")
@@ -1281,14 +1028,6 @@ def generate_tweet_content(kol_data: Dict[str, Any]) -> str:
         return ""
     
     try:
-        # Initialize Claude client
-        claude_api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not claude_api_key:
-            logger.error("Missing Claude API key")
-            return ""
-        
-        claude = Anthropic(api_key=claude_api_key)
-        
         # Prepare context for Claude
         context = f"""
         KOL Analysis Data:
@@ -1338,17 +1077,19 @@ def generate_tweet_content(kol_data: Dict[str, Any]) -> str:
         
         logger.info(f"Generating tweet for KOL: {kol_data.get('name')}")
         
-        response = claude.messages.create(
+        response = get_broker().create_message(
+            caller="kols.tweet",
             model="claude-3-7-sonnet-latest",
             max_tokens=300,
             temperature=0.7,  # Slightly higher temperature for creative content
             system="You are a crypto analyst who creates engaging tweets. Keep responses under 280 characters.",
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            use_cache=False  # Tweets are posted publicly, never replay an earlier one
         )
         
-        tweet_content = response.content[0].text.strip()
+        tweet_content = response.text.strip()
         
         # Ensure the tweet ends with the required text
         if "Visit konginvest.ai for more Alpha" not in tweet_content:
@@ -1381,14 +1122,6 @@ def generate_detailed_tweet_content(kol_data: Dict[str, Any]) -> str:
         return ""
     
     try:
-        # Initialize Claude client
-        claude_api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not claude_api_key:
-            logger.error("Missing Claude API key")
-            return ""
-        
-        claude = Anthropic(api_key=claude_api_key)
-        
         # Prepare context for Claude
         context = f"""
         KOL Analysis Data:
@@ -1440,17 +1173,19 @@ def generate_detailed_tweet_content(kol_data: Dict[str, Any]) -> str:
         
         logger.info(f"Generating detailed tweet for KOL: {kol_data.get('name')}")
         
-        response = claude.messages.create(
+        response = get_broker().create_message(
+            caller="kols.detailed_tweet",
             model="claude-3-7-sonnet-latest",
             max_tokens=800,
             temperature=0.7,  # Slightly higher temperature for creative content
             system="You are a crypto analyst who creates engaging, detailed content. Write a detailed analysis of 500-800 characters.",
             messages=[
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            use_cache=False  # Tweets are posted publicly, never replay an earlier one
         )
         
-        detailed_tweet = response.content[0].text.strip()
+        detailed_tweet = response.text.strip()
         
         # Ensure the tweet ends with the required text
         if "Visit konginvest.ai for more Alpha" not in detailed_tweet:
@@ -1481,18 +1216,10 @@ def get_kol_image_path(kol_data: Dict[str, Any], output_dir: str = "public/kols"
     os.makedirs(output_dir, exist_ok=True)
     
     # Determine filename based on X username or name
-    x_username = kol_data.get("xUsername", "").replace("@", "")
     name = kol_data.get("name", "Unknown KOL")
     
-    if x_username:
-        filename = f"{x_username}.png"
-    else:
-        # Create a safe filename from the name
-        safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '_')).replace(' ', '_')
-        filename = f"{safe_name}.png"
-    
     # Check if image already exists
-    image_path = os.path.join(output_dir, filename)
+    image_path = os.path.join(output_dir, kol_image_filename(kol_data))
     if os.path.exists(image_path):
         logger.info(f"Found existing image for {name}: {image_path}")
         return image_path
@@ -1534,6 +1261,9 @@ def send_tweet(tweet_content: str, image_path: Optional[str] = None) -> bool:
                 logger.info(f"Image path (for manual posting): {image_path}")
             return False
             
+        # Posting shares the X limiter with lookups and searches
+        get_rate_limiter('x').wait()
+        
         # Initialize tweepy client - same approach as in monitor_mentions.py
         import tweepy
         client = tweepy.Client(
@@ -1600,6 +1330,11 @@ def generate_and_send_tweets_for_all_kols(dry_run: bool = True) -> None:
     """
     Generate and send detailed tweets for all KOLs in the database
     
+    Tweets and images are generated concurrently, reusing those whose inputs
+    are unchanged; tweets are then sent one at a time. A sent tweet is marked
+    sent in its record immediately, while detailedMessage-only updates are
+    written in batches at the end.
+    
     Args:
         dry_run: If True, generate tweets but don't send them
     """
@@ -1612,56 +1347,41 @@ def generate_and_send_tweets_for_all_kols(dry_run: bool = True) -> None:
             logger.warning("No KOL records found")
             return
         
-        logger.info(f"Generating detailed tweets for {len(kol_records)} KOLs")
-        
+        pending = []
         for record in kol_records:
+            fields = record['fields']
+            
+            # Skip if no X username
+            if not fields.get("xUsername") and not fields.get("X"):
+                logger.warning(f"Skipping KOL with no X username: {fields.get('X', 'Unknown')}")
+                continue
+            
+            # Skip if already sent
+            if fields.get("sent") == True:
+                logger.info(f"Skipping KOL {fields.get('X', 'Unknown')} - tweet already sent")
+                continue
+            
+            pending.append((record, kol_data_from_fields(fields)))
+        
+        logger.info(f"Generating detailed tweets for {len(pending)} KOLs")
+        
+        def generate(item):
+            record, kol_data = item
+            tweet_content = cached_detailed_tweet(kol_data, generate_detailed_tweet_content)
+            if not tweet_content:
+                return None
+            # Get image path (either existing or generate new)
+            return tweet_content, get_kol_image_path(kol_data)
+        
+        generated = generate_concurrently(generate, pending, TWEET_CONCURRENCY, label="tweets and images")
+        
+        updates = []
+        for (record, kol_data), result in zip(pending, generated):
             try:
-                # Extract fields from record
-                fields = record['fields']
-                record_id = record['id']
-                
-                # Skip if no X username
-                if not fields.get("xUsername") and not fields.get("X"):
-                    logger.warning(f"Skipping KOL with no X username: {fields.get('X', 'Unknown')}")
-                    continue
-                
-                # Skip if already sent
-                if fields.get("sent") == True:
-                    logger.info(f"Skipping KOL {fields.get('X', 'Unknown')} - tweet already sent")
-                    continue
-                
-                # Create data dictionary for tweet generation and image generation
-                kol_data = {
-                    "name": fields.get("X", "Unknown KOL"),
-                    "xUsername": fields.get("xUsername", fields.get("X", "")),
-                    "totalValue": fields.get("totalValue", 0),
-                    "tokenCount": fields.get("tokenCount", 0),
-                    "diversity": fields.get("diversity", 0),
-                    "riskScore": fields.get("riskScore", 50),
-                    "profile": fields.get("profile", "Unknown"),
-                    "analysis": fields.get("analysis", ""),
-                    "insights": fields.get("insights", ""),
-                    "profilePicture": fields.get("profilePicture", ""),
-                    "influenceScore": fields.get("influenceScore", 0),
-                    "holdings": []
-                }
-                
-                # Parse holdings JSON if available
-                if "holdingsJSON" in fields and fields["holdingsJSON"]:
-                    try:
-                        kol_data["holdings"] = json.loads(fields["holdingsJSON"])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid holdings JSON for {kol_data['name']}")
-                
-                # Generate detailed tweet content instead of regular tweet
-                tweet_content = generate_detailed_tweet_content(kol_data)
-                
-                if not tweet_content:
+                if not result:
                     logger.warning(f"Failed to generate detailed tweet for {kol_data['name']}")
                     continue
-                
-                # Get image path (either existing or generate new)
-                image_path = get_kol_image_path(kol_data)
+                tweet_content, image_path = result
                 
                 if not image_path:
                     logger.warning(f"Failed to get image for {kol_data['name']}")
@@ -1679,23 +1399,27 @@ def generate_and_send_tweets_for_all_kols(dry_run: bool = True) -> None:
                     success = send_tweet(tweet_content, image_path)
                     if success:
                         logger.info(f"Detailed tweet sent for {kol_data['name']}")
-                        # Update the sent field to True
+                        # Record the send right away, so a later failure cannot lead to a second post
                         update_data["sent"] = True
                         update_data["sentDate"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                        if not analyzer.update_kol_record(record['id'], update_data):
+                            logger.error(f"Detailed tweet sent for {kol_data['name']} but not marked sent "
+                                         f"in record {record['id']}")
+                        continue
                     else:
                         logger.warning(f"Failed to send detailed tweet for {kol_data['name']}")
                 
-                # Update the Airtable record
-                analyzer.kol_table.update(record_id, update_data)
-                logger.info(f"Updated detailedMessage field for {kol_data['name']}")
-                
-                # Sleep to avoid rate limiting
-                time.sleep(2)
+                # Unsent tweets only change detailedMessage, which can wait for a batch
+                if record['fields'].get("detailedMessage") != tweet_content:
+                    updates.append({"record_id": record['id'], "update_data": update_data})
             
             except Exception as e:
-                logger.error(f"Error processing KOL record: {e}")
+                logger.error(f"Error processing KOL {kol_data.get('name', 'Unknown')}: {e}")
                 continue
         
+        written = analyzer.update_kol_records(updates) if updates else 0
+        logger.info(f"Updated {written} of {len(updates)} KOL records")
+        
         if dry_run:
             logger.info("Dry run completed - no detailed tweets were actually sent")
         else:
@@ -1704,8 +1428,16 @@ def generate_and_send_tweets_for_all_kols(dry_run: bool = True) -> None:
     except Exception as e:
         logger.error(f"Error in generate_and_send_tweets_for_all_kols: {e}")
 
-def generate_detailed_tweets_for_all_kols():
-    """Generate detailed tweets for all KOLs in the database"""
+def generate_detailed_tweets_for_all_kols(force: bool = False):
+    """
+    Generate detailed tweets for all KOLs in the database
+    
+    Tweets run TWEET_CONCURRENCY at a time; KOLs whose data is unchanged keep
+    their tweet, and only changed detailedMessage fields are written back.
+    
+    Args:
+        force: Regenerate every tweet even if unchanged
+    """
     logger = setup_logging()
     try:
         analyzer = KOLAnalyzer()
@@ -1715,67 +1447,30 @@ def generate_detailed_tweets_for_all_kols():
             logger.warning("No KOL records found")
             return
         
-        logger.info(f"Generating detailed tweets for {len(kol_records)} KOLs")
-        
+        # Skip if no X username
+        records = []
         for record in kol_records:
-            try:
-                # Extract fields from record
-                fields = record['fields']
-                record_id = record['id']
-                
-                # Skip if no X username
-                if not fields.get("xUsername") and not fields.get("X"):
-                    logger.warning(f"Skipping KOL with no X username: {fields.get('X', 'Unknown')}")
-                    continue
-                
-                # Create data dictionary for tweet generation
-                kol_data = {
-                    "name": fields.get("X", "Unknown KOL"),
-                    "xUsername": fields.get("xUsername", fields.get("X", "")),
-                    "totalValue": fields.get("totalValue", 0),
-                    "tokenCount": fields.get("tokenCount", 0),
-                    "diversity": fields.get("diversity", 0),
-                    "riskScore": fields.get("riskScore", 50),
-                    "profile": fields.get("profile", "Unknown"),
-                    "analysis": fields.get("analysis", ""),
-                    "insights": fields.get("insights", ""),
-                    "profilePicture": fields.get("profilePicture", ""),
-                    "influenceScore": fields.get("influenceScore", 0),
-                    "holdings": []
-                }
-                
-                # Parse holdings JSON if available
-                if "holdingsJSON" in fields and fields["holdingsJSON"]:
-                    try:
-                        kol_data["holdings"] = json.loads(fields["holdingsJSON"])
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid holdings JSON for {kol_data['name']}")
-                
-                # Generate detailed tweet content
-                detailed_tweet = generate_detailed_tweet_content(kol_data)
-                
-                if detailed_tweet:
-                    logger.info(f"Generated detailed tweet for {kol_data['name']}")
-                    
-                    # Update the detailedMessage field in Airtable
-                    update_data = {
-                        "detailedMessage": detailed_tweet
-                    }
-                    
-                    # Update the Airtable record
-                    analyzer.kol_table.update(record_id, update_data)
-                    logger.info(f"Updated detailedMessage field for {kol_data['name']}")
-                else:
-                    logger.warning(f"Failed to generate detailed tweet for {kol_data['name']}")
-                
-                # Sleep to avoid rate limiting
-                time.sleep(2)
-            
-            except Exception as e:
-                logger.error(f"Error processing KOL record: {e}")
-                continue
+            if not record['fields'].get("xUsername") and not record['fields'].get("X"):
+                logger.warning(f"Skipping KOL with no X username: {record['fields'].get('X', 'Unknown')}")
+            else:
+                records.append(record)
+        
+        logger.info(f"Generating detailed tweets for {len(records)} KOLs")
+        kols = [kol_data_from_fields(record['fields']) for record in records]
+        tweets = generate_concurrently(
+            lambda kol_data: cached_detailed_tweet(kol_data, generate_detailed_tweet_content, force=force),
+            kols, TWEET_CONCURRENCY, label="detailed tweets")
+        
+        updates = []
+        for record, kol_data, detailed_tweet in zip(records, kols, tweets):
+            if not detailed_tweet:
+                logger.warning(f"Failed to generate detailed tweet for {kol_data['name']}")
+            elif record['fields'].get("detailedMessage") != detailed_tweet:
+                updates.append({"record_id": record['id'], "update_data": {"detailedMessage": detailed_tweet}})
         
-        logger.info("Detailed tweet generation completed")
+        written = analyzer.update_kol_records(updates) if updates else 0
+        logger.info(f"Detailed tweet generation completed: updated detailedMessage for {written} KOLs, "
+                    f"{len(records) - len(updates)} unchanged or failed")
     
     except Exception as e:
         logger.error(f"Error in generate_detailed_tweets_for_all_kols: {e}")
@@ -2004,7 +1699,7 @@ async def main():
         parser.add_argument('--send-tweets', action='store_true', help='Generate and send tweets for all KOLs')
         parser.add_argument('--send-tweet', type=str, help='Generate and send tweet for a specific KOL by name')
         parser.add_argument('--send-random-tweet', action='store_true', help='Generate and send tweet for a random KOL')
-        parser.add_argument('--force', action='store_true', help='Force sending tweet even if already sent')
+        parser.add_argument('--force', action='store_true', help='Force sending tweet even if already sent, or regenerate unchanged images and tweets')
         
         args = parser.parse_args()
         
@@ -2078,7 +1773,7 @@ async def main():
         # Generate detailed tweets for all KOLs
         if args.generate_detailed_tweets:
             logger.info("Generating detailed tweets for all KOLs")
-            generate_detailed_tweets_for_all_kols()
+            generate_detailed_tweets_for_all_kols(force=args.force)
             return
         
         # Test Birdeye API with a specific wallet
@@ -2095,7 +1790,7 @@ async def main():
         # Generate images for all KOLs
         if args.generate_images:
             logger.info("Generating images for all KOLs")
-            generate_all_kol_images()
+            generate_all_kol_images(force=args.force)
             return
         
         # Generate tweets for all KOLs (dry run)
@@ -0,0 +1,333 @@
+"""
+KOL Artifacts
+
+Cache and scheduler for the generated KOL artifacts: card images under
+public/kols and detailed tweets.
+
+Each artifact is keyed by KOL, and a manifest in the output directory holds
+the hash of the inputs it was generated from. For an image, the inputs are
+the full Ideogram request. For a tweet, they are the KOL fields the prompt
+uses. An artifact is regenerated only when its inputs hash changes, or when
+its image file has gone missing. Otherwise the existing file or text is
+reused.
+
+Batches run on a bounded thread pool. Cached artifacts return immediately,
+so only changed KOLs cost an API call.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+logger = logging.getLogger("kol_analyzer")
+
+DEFAULT_OUTPUT_DIR = "public/kols"
+MANIFEST_NAME = ".artifacts.json"
+
+IDEOGRAM_URL = "https://api.ideogram.ai/generate"
+
+# Maximum generations in flight per artifact type
+IMAGE_CONCURRENCY = 4
+TWEET_CONCURRENCY = 4
+
+# KOL fields that feed the detailed tweet prompt
+TWEET_INPUT_FIELDS = ['name', 'xUsername', 'totalValue', 'tokenCount', 'diversity', 'holdings',
+                      'riskScore', 'profile', 'analysis', 'insights']
+
+
+def inputs_hash(inputs: Any) -> str:
+    """Stable hash of JSON-serializable generation inputs"""
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ArtifactCache:
+    """Manifest of generated artifacts and the hash of the inputs behind each"""
+
+    def __init__(self, output_dir: str = DEFAULT_OUTPUT_DIR):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.output_dir / MANIFEST_NAME
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        try:
+            self.entries = json.loads(self.manifest_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def _save(self):
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self.entries, indent=2, sort_keys=True))
+        os.replace(tmp_path, self.manifest_path)
+
+    def lookup(self, key: str, inputs: Any) -> Optional[str]:
+        """Cached artifact for these inputs, or None if missing, stale or its file is gone"""
+        with self._lock:
+            entry = self.entries.get(key)
+        if not entry or entry['hash'] != inputs_hash(inputs):
+            return None
+        if entry.get('file') and not os.path.exists(entry['value']):
+            return None
+        return entry['value']
+
+    def store(self, key: str, inputs: Any, value: str, is_file: bool = False):
+        with self._lock:
+            self.entries[key] = {'hash': inputs_hash(inputs), 'value': value, 'file': is_file,
+                                 'generatedAt': time.strftime("%Y-%m-%d %H:%M:%S")}
+            self._save()
+
+    def get_or_build(self, key: str, inputs: Any, build: Callable[[], Optional[str]],
+                     is_file: bool = False, force: bool = False) -> Optional[str]:
+        """
+        Cached artifact, or build it and record it for next time
+
+        Args:
+            key: Artifact key, e.g. "image:ubc4ai.png"
+            inputs: Everything the artifact is generated from
+            build: Generates the artifact; returns a file path or text, None on failure
+            is_file: Whether the artifact is a file path that must still exist
+            force: Regenerate even if the inputs are unchanged
+
+        Returns:
+            File path or text, or None if generation failed; failures are not cached
+        """
+        if not force:
+            cached = self.lookup(key, inputs)
+            if cached is not None:
+                self.hits += 1
+                return cached
+        self.misses += 1
+        value = build()
+        if value is not None:
+            self.store(key, inputs, value, is_file)
+        return value
+
+
+_caches: Dict[str, ArtifactCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_artifact_cache(output_dir: str = DEFAULT_OUTPUT_DIR) -> ArtifactCache:
+    """Process-wide artifact cache of an output directory"""
+    key = os.path.abspath(output_dir)
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = ArtifactCache(output_dir)
+        return _caches[key]
+
+
+def generate_concurrently(func: Callable[[Any], Any], items: Iterable[Any], max_workers: int,
+                          label: str = "artifacts") -> List[Any]:
+    """
+    Apply a generation function to many items with bounded parallelism
+
+    Args:
+        func: Called once per item; exceptions are logged and give None
+        items: Items to generate for
+        max_workers: Maximum calls in flight
+        label: What is being generated, for the timing log
+
+    Returns:
+        Results in the order of items
+    """
+    items = list(items)
+
+    def run(item):
+        try:
+            return func(item)
+        except Exception as e:
+            logger.error(f"Error generating {label}: {e}")
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='kol-artifacts') as executor:
+        results = list(executor.map(run, items))
+    logger.info(f"Generated {label} for {len(items)} KOLs in {time.perf_counter() - start:.1f}s")
+    return results
+
+
+def kol_data_from_fields(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """KOL data for image and tweet generation from a KOL_ANALYSIS record's fields"""
+    kol_data = {
+        "name": fields.get("X", "Unknown KOL"),
+        "xUsername": fields.get("xUsername", fields.get("X", "")),
+        "totalValue": fields.get("totalValue", 0),
+        "tokenCount": fields.get("tokenCount", 0),
+        "diversity": fields.get("diversity", 0),
+        "riskScore": fields.get("riskScore", 50),
+        "profile": fields.get("profile", "Unknown"),
+        "analysis": fields.get("analysis", ""),
+        "insights": fields.get("insights", ""),
+        "profilePicture": fields.get("profilePicture", ""),
+        "influenceScore": fields.get("influenceScore", 0),
+        "holdings": []
+    }
+
+    # Parse holdings JSON if available
+    if fields.get("holdingsJSON"):
+        try:
+            kol_data["holdings"] = json.loads(fields["holdingsJSON"])
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid holdings JSON for {kol_data['name']}")
+    return kol_data
+
+
+def kol_image_filename(kol_data: Dict[str, Any]) -> str:
+    """Image filename from the X handle if available, otherwise from the name"""
+    x_username = kol_data.get("xUsername", "").replace("@", "")
+    if x_username:
+        return f"{x_username}.png"
+    # Create a safe filename from the name
+    name = kol_data.get("name", "Unknown KOL")
+    safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '_')).replace(' ', '_')
+    return f"{safe_name}.png"
+
+
+def kol_image_request(kol_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Ideogram request for a KOL card; the image is regenerated whenever it changes"""
+    name = kol_data.get("name", "Unknown KOL")
+    x_username = kol_data.get("xUsername", "").replace("@", "")
+    profile_type = kol_data.get("profile", "Unknown")
+    influence_score = kol_data.get("influenceScore", 0)
+
+    # Create a shorter, more focused prompt for Ideogram
+    prompt = f"""
+        Create a FUN, DEGEN JUNGLE crypto card for @{x_username or name}.
+
+        TEXT MUST BE LARGE, LEGIBLE, AND STAND OUT CLEARLY against the background.
+
+        Include:
+        - "@{x_username or name}" in BOLD, LARGE typography
+        - "Profile: {profile_type}" in gold font with glow effect
+        - "Influence Score: {influence_score}" in vibrant colors
+
+        Background should be colorful jungle with:
+        - Neon tropical plants and vines
+        - Solana logo hidden in the foliage
+        - Bright, fun colors - not realistic/bio jungle
+        - Party/degen jungle vibe with crypto elements
+
+        Style: Bold, playful, crypto-degen aesthetic with high contrast to ensure text readability.
+        """
+
+    return {
+        "image_request": {
+            "prompt": prompt,
+            "aspect_ratio": "ASPECT_4_3",  # 4:3 landscape format
+            "model": "V_2_TURBO",  # Changed from V_2 to V_2_TURBO
+            "magic_prompt_option": "AUTO",
+            "style_type": "DESIGN",  # Design style for dashboards
+            "num_images": 1
+        }
+    }
+
+
+def _render_kol_image(name: str, payload: Dict[str, Any], output_path: str) -> Optional[str]:
+    """Request an image from Ideogram and save it; returns the path or None on failure"""
+    ideogram_api_key = os.getenv('IDEOGRAM_API_KEY')
+    if not ideogram_api_key:
+        logger.error("Missing Ideogram API key")
+        return None
+
+    headers = {
+        "Api-Key": ideogram_api_key,
+        "Content-Type": "application/json"
+    }
+
+    logger.info(f"Sending request to Ideogram API for {name}")
+    response = requests.post(IDEOGRAM_URL, headers=headers, json=payload, timeout=60)
+    if response.status_code != 200:
+        logger.error(f"Ideogram API error: {response.status_code} - {response.text}")
+        return None
+
+    result = response.json()
+    if not result.get("data"):
+        logger.error(f"No image data in Ideogram response: {result}")
+        return None
+
+    image_url = result["data"][0].get("url")
+    if not image_url:
+        logger.error(f"No image URL in Ideogram response: {result}")
+        return None
+
+    logger.info(f"Downloading image from {image_url}")
+    img_response = requests.get(image_url, timeout=30)
+    if img_response.status_code != 200:
+        logger.error(f"Failed to download image: {img_response.status_code}")
+        return None
+
+    # Write beside the target first so a failed download never leaves a partial image
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(img_response.content)
+    os.replace(tmp_path, output_path)
+
+    logger.info(f"Generated KOL image: {output_path}")
+    return output_path
+
+
+def generate_kol_image(kol_data: Dict[str, Any], output_dir: str = DEFAULT_OUTPUT_DIR,
+                       force: bool = False) -> Optional[str]:
+    """
+    Generate a KOL image using Ideogram API with a fun, degen jungle theme
+
+    The existing image is reused when the Ideogram request for the KOL is
+    unchanged since it was generated.
+
+    Args:
+        kol_data: Dictionary containing KOL data
+        output_dir: Directory to save the generated image
+        force: Regenerate even if the KOL's image is up to date
+
+    Returns:
+        Path to the generated image or None if generation failed
+    """
+    try:
+        name = kol_data.get("name", "Unknown KOL")
+        filename = kol_image_filename(kol_data)
+        payload = kol_image_request(kol_data)
+        output_path = os.path.join(output_dir, filename)
+
+        cache = get_artifact_cache(output_dir)
+        return cache.get_or_build(f"image:{filename}", payload,
+                                  lambda: _render_kol_image(name, payload, output_path),
+                                  is_file=True, force=force)
+    except Exception as e:
+        logger.error(f"Error generating KOL image: {e}")
+        logger.exception("Exception details:")
+        return None
+
+
+def cached_detailed_tweet(kol_data: Dict[str, Any], generate: Callable[[Dict[str, Any]], str],
+                          output_dir: str = DEFAULT_OUTPUT_DIR, force: bool = False) -> Optional[str]:
+    """
+    Detailed tweet for a KOL, generated only when the fields it is written from changed
+
+    Args:
+        kol_data: Dictionary containing KOL data
+        generate: Tweet generator, returning "" on failure
+        output_dir: Directory holding the artifact manifest
+        force: Regenerate even if the KOL's data is unchanged
+
+    Returns:
+        Tweet text, or None if generation failed
+    """
+    inputs = {field: kol_data.get(field) for field in TWEET_INPUT_FIELDS}
+    key = f"tweet:{kol_data.get('xUsername', '').replace('@', '') or kol_data.get('name', '')}"
+    return get_artifact_cache(output_dir).get_or_build(key, inputs, lambda: generate(kol_data) or None,
+                                                       force=force)
@@ -1,82 +1,60 @@
 import os
 import sys
 import json
+import asyncio
 import requests
 import aiohttp
 import logging
 import anthropic
 import traceback
-import subprocess
 from pathlib import Path
 from dotenv import load_dotenv
 from requests_oauthlib import OAuth1
 from datetime import datetime, timezone, timedelta
-import subprocess
 from typing import Optional, List, Dict
 from airtable import Airtable as AirtableAPI
 from airtable import Airtable
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.llm_broker import get_broker
+from engine.rate_limits import rate_limited_session
+from engine.social_cache import ACCOUNT_TWEETS, get_social_cache, resolve_x_user_id
+from engine.token_matcher import get_token_matcher, refresh_tokens
+
+# Mention ingestion checkpoint: since_id on the first line, handled newer mention IDs below
+CHECKPOINT_PATH = project_root / 'data' / 'last_mention_id.txt'
+
+# Runs a failing mention is retried in before it is given up
+MAX_MENTION_ATTEMPTS = 3
+
+# Concurrent mention workers
+MENTION_WORKERS = 4
+
+# Largest page of the mentions timeline
+MENTIONS_PAGE_SIZE = 100
+
+# Maximum length of a recent search query
+SEARCH_QUERY_LIMIT = 512
+
 def extract_tokens_from_text(text: str) -> List[str]:
     """Extract tokens that start with $ symbol"""
-    import re
-    
-    # Liste des tokens à ignorer (stablecoins etc)
-    IGNORE_TOKENS = {'$USD', '$USDT', '$USDC'}
-    
-    # Pattern uniquement pour les tokens avec $
-    pattern = r'\$([A-Za-z0-9]+)(?=[.,!?\s]|$)'
-    
-    # Trouver tous les matches et filtrer
-    matches = re.findall(pattern, text)
-    tokens = set()
-    
-    for token in matches:
-        token = token.upper()
-        if (f"${token}" not in IGNORE_TOKENS and 
-            len(token) >= 2 and  # Au moins 2 caractères après le $
-            len(token) <= 10):   # Maximum 10 caractères
-            tokens.add(token)
+    tokens = get_token_matcher().extract(text)
     
     if tokens:
-        logger.info(f"Found tokens in text: {list(tokens)}")
+        logger.info(f"Found tokens in text: {tokens}")
     
-    return list(tokens)
+    return tokens
 
-def check_token_status(token: str, airtable_base_id: str, airtable_api_key: str) -> bool:
-    """Check if token needs updating (doesn't exist or old data)"""
-    try:
-        # Initialize Airtable with proper parameters
-        airtable = Airtable(
-            base_id=airtable_base_id,
-            table_name='TOKENS',  # Specify the table name
-            api_key=airtable_api_key
-        )
-        
-        # Get token record
-        records = airtable.get_all(
-            formula=f"{{token}}='{token}'",
-            fields=['token', 'updatedAt']
-        )
-        
-        if not records:
-            logger.info(f"Token {token} not found in database")
-            return True
-            
-        # Check updatedAt timestamp
-        record = records[0]
-        updated_at = record.get('fields', {}).get('updatedAt')
-        if not updated_at:
-            return True
-            
-        # Convert to datetime and check if older than 48 hours
-        updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-        age = datetime.now(timezone.utc) - updated_at
-        
-        return age > timedelta(hours=48)
-        
-    except Exception as e:
-        logger.error(f"Error checking token status: {e}")
-        return True
+def check_token_status(token: str) -> bool:
+    """Check if token needs updating (doesn't exist or old data), from the in-memory TOKENS map"""
+    needs_update = get_token_matcher().needs_update(token)
+    if needs_update and not get_token_matcher().status(token):
+        logger.info(f"Token {token} not found in database")
+    return needs_update
 
 async def update_token(token: str):
     """Update token data using TokenManager"""
@@ -103,7 +81,7 @@ async def update_token(token: str):
             token_manager = TokenManager()
             
             # Process token
-            success = token_manager.process_token(token)
+            success = await asyncio.to_thread(token_manager.process_token, token)
             
             if success:
                 logger.info(f"Successfully updated token {token}")
@@ -149,8 +127,8 @@ def setup_logging():
 
 logger = setup_logging()
 
-async def save_message(message_data: dict, context: str = 'X_MENTION'):
-    """Save message to MESSAGES table"""
+async def save_message(message_data: dict, context: str = 'X_MENTION', tokens: Optional[List[str]] = None):
+    """Save message to MESSAGES table, with the tokens it mentions if already extracted"""
     try:
         airtable = Airtable(
             os.getenv('KINKONG_AIRTABLE_BASE_ID'),
@@ -159,7 +137,8 @@ async def save_message(message_data: dict, context: str = 'X_MENTION'):
         )
         
         # Extract tokens and convert to string
-        tokens = extract_tokens_from_text(message_data['text'])
+        if tokens is None:
+            tokens = extract_tokens_from_text(message_data['text'])
         tokens_string = json.dumps(tokens) if tokens else None
         
         # Format message record avec 'content' au lieu de 'text'
@@ -173,7 +152,7 @@ async def save_message(message_data: dict, context: str = 'X_MENTION'):
             'createdAt': message_data['created_at']
         }
         
-        airtable.insert(record)
+        await asyncio.to_thread(airtable.insert, record)
         logger.info(f"Saved message: {message_data['id']}")
         return True
         
@@ -192,9 +171,11 @@ async def process_tokens(tokens: list):
             return False
         
         for token in tokens:
-            if check_token_status(token, base_id, api_key):
+            if await asyncio.to_thread(check_token_status, token):
                 logger.info(f"Token {token} needs updating")
-                await update_token(token)
+                if await update_token(token):
+                    # Pick up the new status and explanation
+                    await asyncio.to_thread(refresh_tokens, [token])
             else:
                 logger.info(f"Token {token} is up to date")
         return True
@@ -213,7 +194,8 @@ async def get_last_mention_id() -> Optional[str]:
         )
         
         # Get latest X_MENTION message
-        records = airtable.get_all(
+        records = await asyncio.to_thread(
+            airtable.get_all,
             formula="context='X_MENTION'",
             sort=[('createdAt', 'desc')],
             maxRecords=1
@@ -268,13 +250,6 @@ def send_telegram_notification(mention):
 def generate_reply_with_claude(mention_text: str, username: str) -> Optional[str]:
     """Generate reply content using Claude"""
     try:
-        # Get API key from environment
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found")
-            
-        client = anthropic.Client(api_key=api_key)
-        
         system_prompt = """You are KinKong, a cryptocurrency trading bot on X (formerly Twitter).
         Generate friendly, professional replies to mentions.
         Keep responses concise but informative and relevant to trading/crypto.
@@ -286,10 +261,12 @@ def generate_reply_with_claude(mention_text: str, username: str) -> Optional[str
 
         {mention_text}"""
 
-        message = client.messages.create(
+        message = get_broker().create_message(
+            caller="monitor_mentions.reply",
             model="claude-3-7-sonnet-20250219",
             max_tokens=1000,
             system=system_prompt,
+            use_cache=False,  # Replies are posted publicly, never replay an earlier one
             messages=[
                 {
                     "role": "user",
@@ -299,7 +276,7 @@ def generate_reply_with_claude(mention_text: str, username: str) -> Optional[str
         )
         
         # Extract and clean the reply text
-        reply_text = message.content[0].text.strip()
+        reply_text = message.text.strip()
         
         return reply_text
         
@@ -324,7 +301,8 @@ async def get_latest_market_sentiment() -> Optional[str]:
         )
         
         # Get latest sentiment record
-        records = airtable.get_all(
+        records = await asyncio.to_thread(
+            airtable.get_all,
             sort=[('createdAt', 'desc')],
             maxRecords=1
         )
@@ -363,7 +341,8 @@ async def get_recent_signals_for_token(token: str) -> List[Dict]:
         one_hour_ago = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
         
         # Get signals for token created in the last hour
-        records = airtable.get_all(
+        records = await asyncio.to_thread(
+            airtable.get_all,
             formula=f"AND({{token}}='{token}', IS_AFTER({{createdAt}}, '{one_hour_ago}'))",
             sort=[('createdAt', 'desc')],
             maxRecords=4
@@ -460,7 +439,8 @@ async def generate_signal_response(token: str, signals: List[Dict], mention_text
 
         user_prompt = f"Write a reply about ${token} based on the recent signals and current market sentiment"
 
-        message = client.messages.create(
+        message = await asyncio.to_thread(
+            client.messages.create,
             model="claude-3-7-sonnet-20250219",
             max_tokens=500,
             system=system_prompt,
@@ -483,7 +463,7 @@ async def generate_signal_response(token: str, signals: List[Dict], mention_text
 
 async def check_token_active_status(token: str) -> tuple[bool, Optional[str]]:
     """
-    Check if a token is active in Airtable and get its explanation
+    Check if a token is active and get its explanation, from the in-memory TOKENS map
     
     Args:
         token: Token symbol to check
@@ -492,33 +472,17 @@ async def check_token_active_status(token: str) -> tuple[bool, Optional[str]]:
         Tuple of (is_active, explanation)
     """
     try:
-        # Initialize Airtable
-        airtable = Airtable(
-            os.getenv('KINKONG_AIRTABLE_BASE_ID'),
-            'TOKENS',
-            os.getenv('KINKONG_AIRTABLE_API_KEY')
-        )
+        status = (await asyncio.to_thread(get_token_matcher)).status(token)
         
-        # Get token record
-        records = airtable.get_all(
-            formula=f"{{token}}='{token}'",
-            fields=['token', 'isActive', 'explanation']
-        )
-        
-        if not records:
+        if not status:
             logger.warning(f"Token {token} not found in database after update")
             return False, None
             
-        # Get active status and explanation
-        record = records[0]['fields']
-        is_active = record.get('isActive', False)
-        explanation = record.get('explanation', '')
+        logger.info(f"Token {token} active status: {status.is_active}")
+        if status.explanation:
+            logger.info(f"Explanation: {status.explanation[:100]}...")
         
-        logger.info(f"Token {token} active status: {is_active}")
-        if explanation:
-            logger.info(f"Explanation: {explanation[:100]}...")
-        
-        return is_active, explanation
+        return status.is_active, status.explanation
         
     except Exception as e:
         logger.error(f"Error checking token active status: {e}")
@@ -548,7 +512,7 @@ async def handle_special_token(token: str, mention_id: str, mention_text: str, u
             
         # Get last 20 tweets from @ubc4ai
         logger.info("Getting last 20 tweets from @ubc4ai")
-        ubc_tweets = get_account_tweets("ubc4ai", x_bearer_token)
+        ubc_tweets = await asyncio.to_thread(get_account_tweets, "ubc4ai", x_bearer_token)
         
         if not ubc_tweets:
             logger.warning("No tweets found from @ubc4ai")
@@ -591,7 +555,8 @@ async def handle_special_token(token: str, mention_id: str, mention_text: str, u
 
         user_prompt = f"Write a reply to @{username}'s mention of ${token}"
 
-        message = client.messages.create(
+        message = await asyncio.to_thread(
+            client.messages.create,
             model="claude-3-7-sonnet-20250219",
             max_tokens=500,
             system=system_prompt,
@@ -652,7 +617,8 @@ async def generate_not_bullish_explanation(token: str) -> str:
 
         user_prompt = f"Write a tweet explaining why you're not bullish on ${token} at this time."
 
-        message = client.messages.create(
+        message = await asyncio.to_thread(
+            client.messages.create,
             model="claude-3-7-sonnet-20250219",
             max_tokens=500,
             system=system_prompt,
@@ -675,7 +641,7 @@ async def generate_not_bullish_explanation(token: str) -> str:
 
 def get_account_tweets(x_account: str, bearer_token: str) -> List[Dict]:
     """
-    Get recent tweets from a specific X account
+    Get recent tweets from a specific X account, served from the social cache within its TTL
     
     Args:
         x_account: X account username (without @)
@@ -684,57 +650,50 @@ def get_account_tweets(x_account: str, bearer_token: str) -> List[Dict]:
     Returns:
         List of tweet data dictionaries
     """
-    try:
-        # Remove @ if present in account name
-        x_account = x_account.lstrip('@')
-        
-        logger.info(f"Getting tweets from account @{x_account}")
-        
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "Content-Type": "application/json"
-        }
-        
-        # First get the user ID
-        user_url = f"https://api.twitter.com/2/users/by/username/{x_account}"
-        user_response = requests.get(user_url, headers=headers, timeout=15)
-        
-        if not user_response.ok:
-            logger.error(f"X/Twitter API error: {user_response.status_code}")
-            logger.error(f"Response: {user_response.text}")
-            return []
-        
-        user_data = user_response.json()
-        user_id = user_data.get('data', {}).get('id')
-        
-        if not user_id:
-            logger.error(f"Could not find user ID for account: @{x_account}")
-            return []
+    # Remove @ if present in account name
+    x_account = x_account.lstrip('@')
+    
+    def load() -> Optional[List[Dict]]:
+        try:
+            logger.info(f"Getting tweets from account @{x_account}")
             
-        # Then get their tweets
-        tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
-        params = {
-            "max_results": 20,  # Get last 20 tweets
-            "tweet.fields": "created_at,public_metrics,text",
-            "exclude": "retweets,replies"
-        }
-        
-        response = requests.get(tweets_url, headers=headers, params=params, timeout=15)
-        
-        if not response.ok:
-            logger.error(f"X/Twitter API error: {response.status_code}")
-            logger.error(f"Response: {response.text}")
-            return []
-        
-        data = response.json()
-        tweets = data.get('data', [])
-        
-        logger.info(f"Found {len(tweets)} tweets from @{x_account}")
-        return tweets
-        
-    except Exception as e:
-        logger.error(f"Error getting tweets for account @{x_account}: {e}")
-        return []
+            # First get the user ID
+            user_id = resolve_x_user_id(x_account, bearer_token)
+            
+            if not user_id:
+                logger.error(f"Could not find user ID for account: @{x_account}")
+                return None
+            
+            headers = {
+                "Authorization": f"Bearer {bearer_token}",
+                "Content-Type": "application/json"
+            }
+                
+            # Then get their tweets
+            tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
+            params = {
+                "max_results": 20,  # Get last 20 tweets
+                "tweet.fields": "created_at,public_metrics,text",
+                "exclude": "retweets,replies"
+            }
+            
+            response = rate_limited_session('x').get(tweets_url, headers=headers, params=params, timeout=15)
+            
+            if not response.ok:
+                logger.error(f"X/Twitter API error: {response.status_code}")
+                logger.error(f"Response: {response.text}")
+                return None
+            
+            data = response.json()
+            return data.get('data', [])
+            
+        except Exception as e:
+            logger.error(f"Error getting tweets for account @{x_account}: {e}")
+            return None
+    
+    tweets = get_social_cache().get_or_load(ACCOUNT_TWEETS, f"{x_account.lower()}|20", load) or []
+    logger.info(f"Found {len(tweets)} tweets from @{x_account}")
+    return tweets
 
 async def send_tweet_reply(tweet_id: str, text: str) -> bool:
     """
@@ -769,7 +728,8 @@ async def send_tweet_reply(tweet_id: str, text: str) -> bool:
         )
         
         # Send reply
-        response = client.create_tweet(
+        response = await asyncio.to_thread(
+            client.create_tweet,
             text=text,
             in_reply_to_tweet_id=tweet_id
         )
@@ -786,8 +746,316 @@ async def send_tweet_reply(tweet_id: str, text: str) -> bool:
         return False
 
 
-async def check_mentions():
-    """Check mentions of @kinkong_ubc once"""
+class MentionCheckpoint:
+    """
+    Ingestion checkpoint in data/last_mention_id.txt
+    
+    The first line is the since_id used for the next fetch. It only moves
+    past a mention once every older mention of the batch is handled, so a
+    crash never drops a mention. The following lines list the handled
+    mentions newer than since_id, so a restart never replies to them twice.
+    Mentions that failed are listed with their attempt count and the side
+    effects already done (saved, replied per token), so a retry skips them.
+    Every change is written to a temporary file and renamed over the
+    checkpoint, so the file is never left half-written.
+    """
+    
+    def __init__(self, path: Path = CHECKPOINT_PATH):
+        self.path = Path(path)
+        self.since_id: Optional[str] = None
+        self.done: set = set()
+        self.pending: List[int] = []
+        self.attempts: Dict[str, int] = {}
+        self.steps: Dict[str, set] = {}
+        
+        if self.path.exists():
+            lines = [line.strip() for line in self.path.read_text().splitlines() if line.strip()]
+            if lines:
+                self.since_id = lines[0]
+                for line in lines[1:]:
+                    mention_id, *progress = line.split()
+                    if progress:
+                        self.attempts[mention_id] = int(progress[0])
+                        self.steps[mention_id] = set(progress[1:])
+                    else:
+                        self.done.add(mention_id)
+    
+    @property
+    def exists(self) -> bool:
+        return self.since_id is not None
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        progress = [
+            ' '.join([mention_id, str(self.attempts.get(mention_id, 0)), *sorted(self.steps.get(mention_id, ()))])
+            for mention_id in sorted(set(self.attempts) | set(self.steps), key=int)
+        ]
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join([self.since_id or '', *sorted(self.done, key=int), *progress]) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def begin(self, mention_ids: List[str], since_id: Optional[str] = None):
+        """Start a batch; since_id seeds the checkpoint when it does not exist yet"""
+        if self.since_id is None and since_id:
+            self.since_id = since_id
+        self.pending = sorted(int(mention_id) for mention_id in mention_ids)
+    
+    def is_done(self, mention_id: str) -> bool:
+        return mention_id in self.done or (
+            self.since_id is not None and int(mention_id) <= int(self.since_id)
+        )
+    
+    def has_step(self, mention_id: str, step: str) -> bool:
+        return step in self.steps.get(mention_id, ())
+    
+    def record_step(self, mention_id: str, step: str):
+        """Record a side effect of a mention, so a retry does not repeat it"""
+        self.steps.setdefault(mention_id, set()).add(step)
+        self._save()
+    
+    def fail(self, mention_id: str) -> int:
+        """Count a failed attempt at a mention and return the attempts so far"""
+        self.attempts[mention_id] = self.attempts.get(mention_id, 0) + 1
+        self._save()
+        return self.attempts[mention_id]
+    
+    def complete(self, mention_id: str):
+        """Record a handled mention and advance since_id over the oldest handled ones"""
+        self.done.add(mention_id)
+        self.attempts.pop(mention_id, None)
+        self.steps.pop(mention_id, None)
+        while self.pending and str(self.pending[0]) in self.done:
+            self.since_id = str(self.pending.pop(0))
+        if self.since_id is not None:
+            self.done = {done_id for done_id in self.done if int(done_id) > int(self.since_id)}
+        self._save()
+
+def fetch_new_mentions(user_id: str, auth, since_id: Optional[str]) -> tuple[List[Dict], Dict]:
+    """
+    Fetch every mention newer than since_id with its authors and referenced tweets expanded
+    
+    Args:
+        user_id: ID of the authenticated account
+        auth: OAuth1 credentials
+        since_id: Newest mention already handled, if any
+        
+    Returns:
+        Tuple of (mentions, includes) merged across pages
+    """
+    mentions_url = f"https://api.twitter.com/2/users/{user_id}/mentions"
+    params = {
+        "tweet.fields": "created_at,text,conversation_id,referenced_tweets,author_id",
+        "expansions": "author_id,referenced_tweets.id",
+        "user.fields": "username",
+        # Without a checkpoint only look at the latest page
+        "max_results": MENTIONS_PAGE_SIZE if since_id else 10
+    }
+    if since_id:
+        params["since_id"] = since_id
+    
+    mentions = []
+    includes = {'users': [], 'tweets': []}
+    while True:
+        response = rate_limited_session('x').get(mentions_url, auth=auth, params=params, timeout=30)
+        if not response.ok:
+            logger.error(f"Mentions request failed: {response.status_code}")
+            logger.error(f"Response: {response.text}")
+            response.raise_for_status()
+        
+        data = response.json()
+        mentions.extend(data.get('data', []))
+        for key in includes:
+            includes[key].extend(data.get('includes', {}).get(key, []))
+        
+        next_token = data.get('meta', {}).get('next_token')
+        if not since_id or not next_token:
+            break
+        params["pagination_token"] = next_token
+    
+    return mentions, includes
+
+def fetch_conversation_texts(conversation_ids: List[str], auth) -> Dict[str, List[str]]:
+    """
+    Get the tweets of many conversations with as few searches as the query length allows
+    
+    Args:
+        conversation_ids: Conversation IDs to look up
+        auth: OAuth1 credentials
+        
+    Returns:
+        Dictionary of conversation ID to tweet texts
+    """
+    texts = {conversation_id: [] for conversation_id in conversation_ids}
+    
+    # Group the conversation IDs into OR-queries that fit the search query limit
+    queries = []
+    clauses = []
+    for conversation_id in conversation_ids:
+        clause = f"conversation_id:{conversation_id}"
+        if clauses and len(" OR ".join(clauses + [clause])) > SEARCH_QUERY_LIMIT:
+            queries.append(" OR ".join(clauses))
+            clauses = []
+        clauses.append(clause)
+    if clauses:
+        queries.append(" OR ".join(clauses))
+    
+    search_url = "https://api.twitter.com/2/tweets/search/recent"
+    for query in queries:
+        try:
+            params = {
+                "query": query,
+                "tweet.fields": "created_at,text,conversation_id",
+                "max_results": 100
+            }
+            response = rate_limited_session('x').get(search_url, auth=auth, params=params, timeout=30)
+            if response.status_code != 200:
+                logger.error(f"Conversation search failed: {response.status_code}")
+                continue
+            for tweet in response.json().get('data', []):
+                if tweet.get('conversation_id') in texts:
+                    texts[tweet['conversation_id']].append(tweet['text'])
+        except Exception as e:
+            logger.error(f"Error getting conversation context: {e}")
+            # Continue with what we have even if context gathering fails
+    
+    return texts
+
+async def process_mention(mention: Dict, mention_data: Dict, tokens: List[str],
+                          token_locks: Dict[str, asyncio.Lock], checkpoint: MentionCheckpoint):
+    """
+    Save a mention and reply to the tokens it mentions
+    
+    Args:
+        mention: Mention tweet as returned by the API
+        mention_data: Mention record with the full conversation text
+        tokens: Tokens mentioned in the full conversation text
+        token_locks: Per-token locks, so one token is not refreshed by two workers at once
+        checkpoint: Records the save and each token handled, so a retry skips them
+    """
+    # Save mention with full context
+    if not checkpoint.has_step(mention['id'], 'saved'):
+        await save_message(mention_data, 'X_MENTION', tokens)
+        checkpoint.record_step(mention['id'], 'saved')
+    
+    if not tokens:
+        logger.info("No tokens found in conversation")
+        return
+    
+    logger.info(f"Found tokens in conversation: {tokens}")
+    
+    # Filter out stablecoins
+    stablecoins = ['USDC', 'USDT', 'DAI', 'BUSD', 'TUSD', 'USDH', 'USDD']
+    non_stablecoin_tokens = [t for t in tokens if t not in stablecoins]
+    
+    if not non_stablecoin_tokens:
+        logger.info("Only stablecoins mentioned, doing nothing")
+        return
+    
+    # Process regular tokens first
+    regular_tokens = [t for t in non_stablecoin_tokens if t not in ['UBC', 'COMPUTE']]
+    special_tokens = [t for t in non_stablecoin_tokens if t in ['UBC', 'COMPUTE']]
+    
+    # Tokens already answered by an earlier attempt at this mention
+    regular_tokens = [t for t in regular_tokens if not checkpoint.has_step(mention['id'], f"replied:{t}")]
+    special_tokens = [t for t in special_tokens if not checkpoint.has_step(mention['id'], f"replied:{t}")]
+    
+    # Process regular tokens
+    for token in regular_tokens:
+        async with token_locks.setdefault(token, asyncio.Lock()):
+            await process_tokens([token])
+            
+            # First check if token was updated
+            is_active, explanation = await check_token_active_status(token)
+            
+            if is_active:
+                logger.info(f"Token {token} is active, taking snapshot and generating signals")
+                
+                # Call token_snapshots.py for the token
+                try:
+                    logger.info(f"Taking snapshot for {token}")
+                    snapshot_process = await asyncio.create_subprocess_exec(
+                        sys.executable, str(Path(__file__).parent.parent / "engine" / "token_snapshots.py"), token,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    stdout, stderr = await snapshot_process.communicate()
+                    if snapshot_process.returncode == 0:
+                        logger.info(f"Successfully took snapshot for {token}")
+                        logger.info(stdout.decode(errors='replace'))
+                    else:
+                        logger.error(f"Failed to take snapshot for {token}")
+                        logger.error(f"Error: {stderr.decode(errors='replace')}")
+                except Exception as e:
+                    logger.error(f"Error calling token_snapshots.py: {e}")
+                
+                # Call signals.py for the token
+                try:
+                    logger.info(f"Generating signals for {token}")
+                    signals_process = await asyncio.create_subprocess_exec(
+                        sys.executable, str(Path(__file__).parent.parent / "engine" / "signals.py"), token,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.PIPE
+                    )
+                    stdout, stderr = await signals_process.communicate()
+                    if signals_process.returncode == 0:
+                        logger.info(f"Successfully generated signals for {token}")
+                        logger.info(stdout.decode(errors='replace'))
+                        
+                        # Get recent signals and generate response
+                        signals = await get_recent_signals_for_token(token)
+                        response_text = await generate_signal_response(token, signals, mention['text'])
+                        
+                        # Send response tweet
+                        if await send_tweet_reply(mention['id'], response_text):
+                            logger.info(f"Sent signal response for {token}")
+                        else:
+                            logger.error(f"Failed to send signal response for {token}")
+                    else:
+                        logger.error(f"Failed to generate signals for {token}")
+                        logger.error(f"Error: {stderr.decode(errors='replace')}")
+                except Exception as e:
+                    logger.error(f"Error calling signals.py: {e}")
+                
+            else:
+                logger.info(f"Token {token} is not active, generating explanation")
+                
+                # Generate explanation
+                reply_text = await generate_not_bullish_explanation(token)
+                
+                # Send reply tweet
+                if await send_tweet_reply(mention['id'], reply_text):
+                    logger.info(f"Sent reply for inactive token {token}")
+                else:
+                    logger.error(f"Failed to send reply for inactive token {token}")
+            
+            checkpoint.record_step(mention['id'], f"replied:{token}")
+    
+    # Handle special tokens (UBC, COMPUTE)
+    for token in special_tokens:
+        logger.info(f"Processing special token: {token}")
+        await handle_special_token(
+            token, 
+            mention['id'], 
+            mention['text'], 
+            mention_data.get('author_username', '')
+        )
+        checkpoint.record_step(mention['id'], f"replied:{token}")
+
+async def check_mentions(max_workers: int = MENTION_WORKERS):
+    """
+    Check mentions of @kinkong_ubc once
+    
+    New mentions are fetched in one paginated call with their authors and
+    referenced tweets expanded, and the conversations they belong to are
+    looked up with batched searches. The mentions are then handled oldest
+    first by max_workers concurrent workers, and the checkpoint is updated
+    after each one that is handled. A mention whose processing fails stays
+    unhandled and is fetched again by the next run, skipping the steps it
+    already completed, until it has failed MAX_MENTION_ATTEMPTS times.
+    """
     try:
         # Get OAuth credentials
         api_key = os.getenv('X_API_KEY')
@@ -810,7 +1078,7 @@ async def check_mentions():
         
         # Get authenticated user ID using v2 endpoint
         me_url = "https://api.twitter.com/2/users/me"
-        me_response = requests.get(me_url, auth=auth)
+        me_response = await asyncio.to_thread(rate_limited_session('x').get, me_url, auth=auth, timeout=30)
         
         if me_response.status_code == 403:
             logger.error("Authentication failed")
@@ -821,220 +1089,95 @@ async def check_mentions():
             
         user_id = me_response.json()['data']['id']
         
-        # Get mentions using v2 endpoint with correct parameters
-        mentions_url = f"https://api.twitter.com/2/users/{user_id}/mentions"
-        
-        # Get last mention ID from Airtable
-        last_mention_id = await get_last_mention_id()
-        logger.info(f"Last processed mention ID: {last_mention_id}")
+        # Resume from the checkpoint, falling back to the latest saved mention
+        checkpoint = MentionCheckpoint()
+        since_id = checkpoint.since_id
+        if not checkpoint.exists:
+            since_id = await get_last_mention_id()
+        logger.info(f"Last processed mention ID: {since_id}")
         
-        params = {
-            "tweet.fields": "created_at,text,conversation_id,referenced_tweets",
-            "expansions": "author_id,referenced_tweets.id",
-            "user.fields": "username",
-            "max_results": 10
-        }
-        
-        # Add since_id if we have a last mention
-        if last_mention_id:
-            params["since_id"] = last_mention_id
-            logger.info(f"Checking for mentions since ID: {last_mention_id}")
-        else:
-            logger.info("No last mention ID found, checking all recent mentions")
-            
         logger.info(f"Fetching mentions for user ID: {user_id}")
-        response = requests.get(mentions_url, auth=auth, params=params)
+        mentions, includes = await asyncio.to_thread(fetch_new_mentions, user_id, auth, since_id)
         
-        if not response.ok:
-            logger.error(f"Mentions request failed: {response.status_code}")
-            logger.error(f"Response: {response.text}")
-            response.raise_for_status()
+        mentions = [mention for mention in mentions if not checkpoint.is_done(mention['id'])]
+        if not mentions:
+            logger.info("No new mentions found")
+            return
         
-        data = response.json()
-        logger.info(f"API Response: {json.dumps(data, indent=2)}")
+        mentions.sort(key=lambda mention: int(mention['id']))
+        logger.info(f"Found {len(mentions)} new mentions")
+        checkpoint.begin([mention['id'] for mention in mentions], since_id)
         
-        if "data" in data:
-            mentions_count = len(data["data"])
-            logger.info(f"Found {mentions_count} new mentions")
-                
-            newest_id = None
-            for mention in data["data"]:
+        # Context for every mention from the expansions and one batch of conversation searches
+        users = {user['id']: user for user in includes['users']}
+        referenced = {tweet['id']: tweet['text'] for tweet in includes['tweets']}
+        conversation_ids = sorted({mention['conversation_id'] for mention in mentions if mention.get('conversation_id')})
+        conversations = await asyncio.to_thread(fetch_conversation_texts, conversation_ids, auth)
+        
+        mention_records = []
+        for mention in mentions:
+            author = users.get(mention.get('author_id'))
+            
+            # Mention text, then its conversation and any quoted or replied-to tweets
+            conversation_texts = [mention['text']]
+            conversation_texts.extend(conversations.get(mention.get('conversation_id'), []))
+            conversation_texts.extend(
+                referenced[ref['id']] for ref in mention.get('referenced_tweets', []) if ref.get('id') in referenced
+            )
+            
+            # Format mention data
+            mention_data = {
+                'id': mention['id'],
+                'text': " ".join(conversation_texts),
+                'created_at': mention['created_at'],
+                'author_username': author['username'] if author else None
+            }
+            mention_records.append((mention, mention_data))
+        
+        # Extract the tokens of the whole batch in one pass over the precompiled matcher
+        matcher = await asyncio.to_thread(get_token_matcher)
+        classified = matcher.classify([mention_data['text'] for _, mention_data in mention_records],
+                                      include_names=False)
+        
+        queue = asyncio.Queue()
+        for (mention, mention_data), classification in zip(mention_records, classified):
+            queue.put_nowait((mention, mention_data, classification['tokens']))
+        
+        token_locks = {}
+        latencies = []
+        
+        async def worker():
+            while True:
+                mention, mention_data, tokens = await queue.get()
                 try:
-                    # Track newest mention ID
-                    if not newest_id or int(mention["id"]) > int(newest_id):
-                        newest_id = mention["id"]
-                        
-                    # Get author info
-                    author = next(
-                        (u for u in data["includes"]["users"] if u["id"] == mention["author_id"]),
-                        None
-                    )
-                        
-                    # Format mention data
-                    mention_data = {
-                        'id': mention['id'],
-                        'text': mention['text'],
-                        'created_at': mention['created_at'],
-                        'author_username': author['username'] if author else None
-                    }
-
-                    # Initialize conversation text array
-                    conversation_texts = [mention['text']]  # Start with mention text
-
-                    # Get conversation context
-                    try:
-                        # Get conversation ID
-                        conversation_id = mention.get("conversation_id")
-                        if conversation_id:
-                            conversation_url = f"https://api.twitter.com/2/tweets/search/recent"
-                            params = {
-                                "query": f"conversation_id:{conversation_id}",
-                                "tweet.fields": "created_at,text,referenced_tweets",
-                                "expansions": "referenced_tweets.id",
-                                "max_results": 100
-                            }
-                            
-                            # Use synchronous requests instead of aiohttp
-                            conv_response = requests.get(conversation_url, auth=auth, params=params)
-                            if conv_response.status_code == 200:
-                                conv_data = conv_response.json()
-                                if "data" in conv_data:
-                                    for tweet in conv_data["data"]:
-                                        conversation_texts.append(tweet["text"])
-                                        logger.debug(f"Added conversation tweet: {tweet['text'][:50]}...")
-
-                        # Get any quoted or replied-to tweets
-                        referenced_tweets = mention.get("referenced_tweets", [])
-                        for ref in referenced_tweets:
-                            ref_id = ref.get("id")
-                            if ref_id:
-                                ref_url = f"https://api.twitter.com/2/tweets/{ref_id}"
-                                ref_response = requests.get(ref_url, auth=auth)
-                                if ref_response.status_code == 200:
-                                    ref_data = ref_response.json()
-                                    if "data" in ref_data:
-                                        conversation_texts.append(ref_data["data"]["text"])
-                                        logger.debug(f"Added referenced tweet: {ref_data['data']['text'][:50]}...")
-
-                    except Exception as e:
-                        logger.error(f"Error getting conversation context: {e}")
-                        # Continue with what we have even if context gathering fails
-
-                    # Combine all conversation texts
-                    combined_text = " ".join(conversation_texts)
-                    mention_data['text'] = combined_text  # Update with full context
-
-                    # Save mention with full context
-                    await save_message(mention_data, 'X_MENTION')
-                    
-                    # Extract tokens from full context
-                    tokens = extract_tokens_from_text(combined_text)
-                    
-                    if tokens:
-                        logger.info(f"Found tokens in conversation: {tokens}")
-                        
-                        # Filter out stablecoins
-                        stablecoins = ['USDC', 'USDT', 'DAI', 'BUSD', 'TUSD', 'USDH', 'USDD']
-                        non_stablecoin_tokens = [t for t in tokens if t not in stablecoins]
-                        
-                        if not non_stablecoin_tokens:
-                            logger.info("Only stablecoins mentioned, doing nothing")
-                            continue  # Skip to next mention if only stablecoins were mentioned
-                        
-                        # Process regular tokens first
-                        regular_tokens = [t for t in non_stablecoin_tokens if t not in ['UBC', 'COMPUTE']]
-                        special_tokens = [t for t in non_stablecoin_tokens if t in ['UBC', 'COMPUTE']]
-                        
-                        # Process regular tokens
-                        if regular_tokens:
-                            await process_tokens(regular_tokens)
-                            
-                            # Check if any of the regular tokens are not active and send a reply
-                            for token in regular_tokens:
-                                # First check if token was updated
-                                is_active, explanation = await check_token_active_status(token)
-                                
-                                if is_active:
-                                    logger.info(f"Token {token} is active, taking snapshot and generating signals")
-                                    
-                                    # Call token_snapshots.py for the token
-                                    try:
-                                        logger.info(f"Taking snapshot for {token}")
-                                        snapshot_process = subprocess.run(
-                                            [sys.executable, str(Path(__file__).parent.parent / "engine" / "token_snapshots.py"), token],
-                                            capture_output=True,
-                                            text=True,
-                                            check=False
-                                        )
-                                        if snapshot_process.returncode == 0:
-                                            logger.info(f"Successfully took snapshot for {token}")
-                                            logger.info(snapshot_process.stdout)
-                                        else:
-                                            logger.error(f"Failed to take snapshot for {token}")
-                                            logger.error(f"Error: {snapshot_process.stderr}")
-                                    except Exception as e:
-                                        logger.error(f"Error calling token_snapshots.py: {e}")
-                                    
-                                    # Call signals.py for the token
-                                    try:
-                                        logger.info(f"Generating signals for {token}")
-                                        signals_process = subprocess.run(
-                                            [sys.executable, str(Path(__file__).parent.parent / "engine" / "signals.py"), token],
-                                            capture_output=True,
-                                            text=True,
-                                            check=False
-                                        )
-                                        if signals_process.returncode == 0:
-                                            logger.info(f"Successfully generated signals for {token}")
-                                            logger.info(signals_process.stdout)
-                                            
-                                            # Get recent signals and generate response
-                                            signals = await get_recent_signals_for_token(token)
-                                            response_text = await generate_signal_response(token, signals, mention['text'])
-                                            
-                                            # Send response tweet
-                                            if await send_tweet_reply(mention['id'], response_text):
-                                                logger.info(f"Sent signal response for {token}")
-                                            else:
-                                                logger.error(f"Failed to send signal response for {token}")
-                                        else:
-                                            logger.error(f"Failed to generate signals for {token}")
-                                            logger.error(f"Error: {signals_process.stderr}")
-                                    except Exception as e:
-                                        logger.error(f"Error calling signals.py: {e}")
-                                    
-                                else:
-                                    logger.info(f"Token {token} is not active, generating explanation")
-                                    
-                                    # Generate explanation
-                                    reply_text = await generate_not_bullish_explanation(token)
-                                    
-                                    # Send reply tweet
-                                    if await send_tweet_reply(mention['id'], reply_text):
-                                        logger.info(f"Sent reply for inactive token {token}")
-                                    else:
-                                        logger.error(f"Failed to send reply for inactive token {token}")
-                        
-                        # Handle special tokens (UBC, COMPUTE)
-                        for token in special_tokens:
-                            logger.info(f"Processing special token: {token}")
-                            await handle_special_token(
-                                token, 
-                                mention['id'], 
-                                mention['text'], 
-                                mention_data.get('author_username', '')
-                            )
-                    else:
-                        logger.info("No tokens found in conversation")
+                    await process_mention(mention, mention_data, tokens, token_locks, checkpoint)
+                    checkpoint.complete(mention['id'])
                 except Exception as e:
-                    logger.error(f"Error processing mention: {e}")
-                    continue
-            
-            # Log newest mention ID if we found any mentions
-            if newest_id:
-                logger.info(f"Processed mentions up to ID: {newest_id}")
-        else:
-            logger.info("No new mentions found")
+                    logger.error(traceback.format_exc())
+                    attempts = checkpoint.fail(mention['id'])
+                    if attempts >= MAX_MENTION_ATTEMPTS:
+                        # Stop holding since_id back for a mention that keeps failing
+                        logger.error(f"Giving up on mention {mention['id']} after {attempts} attempts: {e}")
+                        checkpoint.complete(mention['id'])
+                    else:
+                        # Left pending: since_id stays before it, so the next run retries it
+                        logger.error(f"Error processing mention {mention['id']} "
+                                     f"(attempt {attempts}/{MAX_MENTION_ATTEMPTS}), will retry next run: {e}")
+                finally:
+                    created_at = datetime.fromisoformat(mention['created_at'].replace('Z', '+00:00'))
+                    latencies.append((datetime.now(timezone.utc) - created_at).total_seconds())
+                    queue.task_done()
+        
+        workers = [asyncio.create_task(worker()) for _ in range(min(max_workers, len(mentions)))]
+        await queue.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        
+        latencies.sort()
+        logger.info(f"Processed mentions up to ID: {checkpoint.since_id}")
+        logger.info(f"Mention-to-reply latency: median {latencies[len(latencies) // 2]:.0f}s, "
+                    f"max {latencies[-1]:.0f}s over {len(latencies)} mentions")
                 
     except Exception as e:
         logger.error(f"Check mentions failed: {e}")
@@ -1069,5 +1212,4 @@ async def main():
         raise
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
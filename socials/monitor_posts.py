@@ -33,13 +33,22 @@ try:
 except ImportError:
     ANTHROPIC_AVAILABLE = False
     print("Warning: anthropic module not available, some features will be disabled")
-from time import sleep
-from ratelimit import limits, sleep_and_retry
+from pathlib import Path
 from dotenv import load_dotenv
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.rate_limits import rate_limited_session
+from engine.social_cache import (
+    ACCOUNT_TWEETS, SENTIMENT, TWEET_SEARCHES, get_social_cache, resolve_x_user_id, tweets_digest
+)
+
 def setup_logging():
     logging.basicConfig(
         level=logging.INFO,
@@ -49,21 +58,6 @@ def setup_logging():
 
 logger = setup_logging()
 
-class TweetCache:
-    def __init__(self):
-        self.cache = {}
-        self.expiry = timedelta(hours=1)
-
-    def get(self, tweet_id):
-        if tweet_id in self.cache:
-            timestamp, data = self.cache[tweet_id]
-            if datetime.now() - timestamp < self.expiry:
-                return data
-        return None
-
-    def set(self, tweet_id, data):
-        self.cache[tweet_id] = (datetime.now(), data)
-
 class MetricsTracker:
     def __init__(self):
         self.metrics = {
@@ -80,7 +74,6 @@ class MetricsTracker:
     def report(self):
         return self.metrics
 
-tweet_cache = TweetCache()
 metrics = MetricsTracker()
 
 def load_config():
@@ -92,7 +85,6 @@ def load_config():
             'max_tweets_per_token': 20,
             'analysis_threshold': 0.7,
             'cache_expiry_hours': 1,
-            'delay_between_tokens': 2,
             'max_retries': 3
         }
 
@@ -114,7 +106,7 @@ class AirtableAPI:
                 "filterByFormula": "{isActive}=1"
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = rate_limited_session('airtable').get(url, headers=self.headers, params=params)
             response.raise_for_status()
             
             records = response.json().get('records', [])
@@ -124,99 +116,101 @@ class AirtableAPI:
             logger.error(f"Error fetching tokens from Airtable: {str(e)}")
             return []
 
-# Define rate limits (450 requests per 15-minute window for search)
-CALLS_PER_WINDOW = 450
-WINDOW_SECONDS = 15 * 60
-
-@sleep_and_retry
-@limits(calls=CALLS_PER_WINDOW, period=WINDOW_SECONDS)
+# X requests are paced by the shared 'x' limiter, which follows the x-rate-limit-* headers,
+# and results are shared with engine/tokens.py through the social cache
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def search_token_tweets(token: str, bearer_token: str) -> List[Dict]:
     """Search recent tweets mentioning a token"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "Content-Type": "application/json"
-        }
-        
-        # Search endpoint
-        search_url = "https://api.twitter.com/2/tweets/search/recent"
-        
-        # Search for token without $ prefix
-        query = f"{token} -is:retweet -is:reply lang:en"
-        
-        params = {
-            "query": query,
-            "max_results": 10,
-            "tweet.fields": "created_at,public_metrics,text",
-            "sort_order": "relevancy"
-        }
-        
-        response = requests.get(search_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        tweets = response.json().get('data', [])
-        logger.info(f"Found {len(tweets)} tweets mentioning {token}")
-        return tweets
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error searching tweets for token {token}: {str(e)}")
-        if e.response is not None:
-            logger.error(f"Response content: {e.response.content}")
-        return []
-    except Exception as e:
-        logger.error(f"Unexpected error searching tweets for token {token}: {str(e)}")
-        return []
+    # Search for token without $ prefix
+    query = f"{token} -is:retweet -is:reply lang:en"
+
+    def load() -> Optional[List[Dict]]:
+        try:
+            headers = {
+                "Authorization": f"Bearer {bearer_token}",
+                "Content-Type": "application/json"
+            }
+            
+            # Search endpoint
+            search_url = "https://api.twitter.com/2/tweets/search/recent"
+            
+            params = {
+                "query": query,
+                "max_results": 10,
+                "tweet.fields": "created_at,public_metrics,text",
+                "sort_order": "relevancy"
+            }
+            
+            response = rate_limited_session('x').get(search_url, headers=headers, params=params)
+            response.raise_for_status()
+            
+            return response.json().get('data', [])
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error searching tweets for token {token}: {str(e)}")
+            if e.response is not None:
+                logger.error(f"Response content: {e.response.content}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error searching tweets for token {token}: {str(e)}")
+            return None
+
+    tweets = get_social_cache().get_or_load(TWEET_SEARCHES, f"{query}|10", load) or []
+    logger.info(f"Found {len(tweets)} tweets mentioning {token}")
+    return tweets
 
-@sleep_and_retry
-@limits(calls=CALLS_PER_WINDOW, period=WINDOW_SECONDS)
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def get_account_tweets(x_account: str, bearer_token: str) -> List[Dict]:
     """Get recent tweets from a specific X account"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {bearer_token}",
-            "Content-Type": "application/json"
-        }
-        
-        # Remove @ if present in account name
-        x_account = x_account.lstrip('@')
-        
-        # First get the user ID
-        user_url = f"https://api.twitter.com/2/users/by/username/{x_account}"
-        user_response = requests.get(user_url, headers=headers)
-        user_response.raise_for_status()
-        
-        user_id = user_response.json().get('data', {}).get('id')
-        if not user_id:
-            logger.error(f"Could not find user ID for account: {x_account}")
-            return []
+    # Remove @ if present in account name
+    x_account = x_account.lstrip('@')
+
+    def load() -> Optional[List[Dict]]:
+        try:
+            headers = {
+                "Authorization": f"Bearer {bearer_token}",
+                "Content-Type": "application/json"
+            }
             
-        # Then get their tweets
-        tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
-        params = {
-            "max_results": 10,  # Get last 10 tweets
-            "tweet.fields": "created_at,public_metrics,text",
-            "exclude": "retweets,replies"
-        }
-        
-        response = requests.get(tweets_url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        tweets = response.json().get('data', [])
-        return tweets
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error fetching tweets for account {x_account}: {str(e)}")
-        if e.response is not None:
-            logger.error(f"Response content: {e.response.content}")
-        return []
-    except Exception as e:
-        logger.error(f"Unexpected error fetching tweets for account {x_account}: {str(e)}")
-        return []
+            # First get the user ID
+            user_id = resolve_x_user_id(x_account, bearer_token)
+            if not user_id:
+                logger.error(f"Could not find user ID for account: {x_account}")
+                return None
+                
+            # Then get their tweets
+            tweets_url = f"https://api.twitter.com/2/users/{user_id}/tweets"
+            params = {
+                "max_results": 10,  # Get last 10 tweets
+                "tweet.fields": "created_at,public_metrics,text",
+                "exclude": "retweets,replies"
+            }
+            
+            response = rate_limited_session('x').get(tweets_url, headers=headers, params=params)
+            response.raise_for_status()
+            
+            return response.json().get('data', [])
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching tweets for account {x_account}: {str(e)}")
+            if e.response is not None:
+                logger.error(f"Response content: {e.response.content}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error fetching tweets for account {x_account}: {str(e)}")
+            return None
+
+    return get_social_cache().get_or_load(ACCOUNT_TWEETS, f"{x_account.lower()}|10", load) or []
 
 def analyze_sentiment_with_claude(token: str, tweets: List[Dict]) -> Optional[str]:
     """Analyze tweet sentiment using Claude"""
+    cache = get_social_cache()
+    cache_key = f"{token.upper()}|{tweets_digest(tweets)}"
+    cached = cache.get(SENTIMENT, cache_key)
+    if cached is not None:
+        logger.info(f"Using cached sentiment verdict for {token}")
+        return cached['analysis']
+
     try:
         api_key = os.getenv('ANTHROPIC_API_KEY')
         if not api_key:
@@ -279,10 +273,10 @@ def analyze_sentiment_with_claude(token: str, tweets: List[Dict]) -> Optional[st
         analysis = message.content[0].text.strip()
         
         # Check if analysis ends with a verdict
-        if "VERDICT: BULLISH" in analysis:
-            return analysis  # Return full analysis for bullish verdict
-        elif "VERDICT: NOT BULLISH" in analysis:
-            return analysis  # Return full analysis even for not bullish
+        if "VERDICT: BULLISH" in analysis or "VERDICT: NOT BULLISH" in analysis:
+            # Return full analysis whatever the verdict
+            cache.set(SENTIMENT, cache_key, {'is_bullish': "VERDICT: BULLISH" in analysis, 'analysis': analysis})
+            return analysis
         else:
             logger.warning(f"Analysis missing verdict: {analysis[:50]}...")
             return None
@@ -330,9 +324,8 @@ def monitor_token(token: Optional[str] = None) -> tuple[bool, Optional[str]]:
     try:
         start_time = datetime.now()
         
-        # Load environment variables and config
+        # Load environment variables
         load_dotenv()
-        config = load_config()
         
         # Verify required environment variables
         required_vars = [
@@ -420,10 +413,6 @@ def monitor_token(token: Optional[str] = None) -> tuple[bool, Optional[str]]:
                     logger.info(f"No analysis generated for ${token_symbol}")
                     analysis_text = "No analysis could be generated"  # Default text for failed analysis
                 
-                # Add delay between tokens if processing multiple
-                if len(tokens) > 1:
-                    sleep(config['delay_between_tokens'])
-                
             except Exception as e:
                 logger.error(f"Error processing token {token_symbol}: {e}")
                 metrics.increment('errors')
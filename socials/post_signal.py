@@ -1,11 +1,19 @@
 import os
+import sys
 import json
 import requests
-import anthropic
+from pathlib import Path
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 from typing import Dict, Optional
 
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from engine.llm_broker import get_broker
+
 def setup_logging():
     import logging
     logging.basicConfig(
@@ -238,13 +246,6 @@ Write a short, engaging tweet about a trading signal. The tweet should:
 def generate_tweet_with_claude(signal_data: Dict) -> Optional[str]:
     """Generate tweet content using Claude"""
     try:
-        # Get API key from environment
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found")
-            
-        client = anthropic.Client(api_key=api_key)
-        
         # Get token info and market sentiment
         airtable = AirtableAPI(os.getenv('KINKONG_AIRTABLE_BASE_ID'), os.getenv('KINKONG_AIRTABLE_API_KEY'))
         token_info = get_token_info(signal_data.get('fields', {}).get('token'), airtable)
@@ -270,10 +271,12 @@ Expected Return: {fields.get('expectedReturn')}%
 
 Market Sentiment: {market_sentiment.get('classification') if market_sentiment else 'UNKNOWN'}"""
 
-        message = client.messages.create(
+        message = get_broker().create_message(
+            caller="post_signal.tweet",
             model="claude-3-7-sonnet-20250219",
             max_tokens=1000,
             system=system_prompt,
+            use_cache=False,  # Tweets are posted publicly, never replay an earlier one
             messages=[
                 {
                     "role": "user",
@@ -283,7 +286,7 @@ Market Sentiment: {market_sentiment.get('classification') if market_sentiment el
         )
         
         # Extract and clean the tweet text
-        tweet_text = message.content[0].text.strip()
+        tweet_text = message.text.strip()
         
         # Ensure tweet is within X's character limit
         if len(tweet_text) > 280:
@@ -4,80 +4,16 @@ import json
 import asyncio
 import logging
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, List, Optional, Tuple
 
-def generate_videos_parallel(image_results: List[Tuple[int, str]], screens: List[Dict], videos_dir: Path) -> List[Tuple[int, str]]:
-    """
-    Generate all videos in parallel using a thread pool
-    Returns list of tuples (screen_number, video_path)
-    """
-    logger.info(f"🎥 Starting parallel video generation for {len(image_results)} images...")
-    
-    def generate_single(args: Tuple[int, str, Dict]) -> Tuple[int, Optional[str]]:
-        """Worker function for each video generation task"""
-        screen_num, image_path, screen = args
-        if not image_path:
-            logger.error(f"❌ No image path for screen {screen_num}")
-            return screen_num, None
-            
-        # Get the corresponding screen data for the prompt
-        prompt = f"Smooth camera movement exploring the scene. {screen.get('background', '')}"
-        
-        logger.info(f"🎬 Generating video {screen_num}/{len(image_results)}")
-        
-        # Generate video from image
-        video_path = generate_video(
-            image_path=image_path,
-            prompt=prompt,
-            output_path=videos_dir / f"{screen_num}.mp4"
-        )
-        
-        if video_path:
-            logger.info(f"✅ Generated video {screen_num}: {video_path}")
-            return screen_num, str(video_path)
-        else:
-            logger.error(f"❌ Failed to generate video for screen {screen_num}")
-            return screen_num, None
-
-    # Create tasks list combining screen number, image path, and screen data
-    tasks = [
-        (screen_num, image_path, screens[i])
-        for i, (screen_num, image_path) in enumerate(image_results)
-    ]
-    
-    results = []
-    
-    # Use ThreadPoolExecutor to run tasks in parallel
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        # Submit all tasks
-        future_to_screen = {
-            executor.submit(generate_single, task): task[0]
-            for task in tasks
-        }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_screen):
-            screen_num = future_to_screen[future]
-            try:
-                result = future.result()
-                results.append(result)
-                logger.info(f"✅ Completed video generation for screen {screen_num}")
-            except Exception as e:
-                logger.error(f"❌ Error generating video {screen_num}: {e}")
-                logger.exception("Detailed error trace:")
-                results.append((screen_num, None))
-
-    # Sort results by screen number
-    results.sort(key=lambda x: x[0])
-    return results
-
 # Add project root to Python path
 project_root = str(Path(__file__).parent.parent.absolute())
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from videos.utils.assemble_video import assemble_video
+from videos.utils.assemble_video import assemble_video, processed_clip_path, render_processed_clip
 from videos.utils.generate_prompts import PromptGenerator
 from videos.utils.generate_image import generate_image
 from videos.utils.generate_video import generate_video
@@ -90,72 +26,146 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def generate_images_parallel(screens: List[Dict]) -> List[Tuple[int, Optional[str]]]:
+# Image and clip generation are API calls, so this many screens are generated at once
+GENERATION_WORKERS = 5
+
+def generate_screen_clip(screen_num: int, screen: Dict, image_dir: Path, videos_dir: Path) -> Optional[str]:
     """
-    Generate all images in parallel using a thread pool
-    Returns list of tuples (screen_number, image_path)
+    Generate the image and then the animated clip for one screen
+    An image or clip already on disk from an earlier run is reused
+    Returns the clip path, or None if either step failed
     """
-    logger.info(f"🎨 Starting parallel image generation for {len(screens)} screens...")
-    
-    # Create base directory for images
-    base_dir = Path('videos/videos/video1/images').resolve()
-    base_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"📁 Using image directory: {base_dir}")
-    
-    def generate_single(args: Tuple[int, Dict]) -> Tuple[int, Optional[str]]:
-        """Worker function for each image generation task"""
-        i, screen = args
-        if not screen:
-            logger.warning(f"⚠️ No screen data for screen {i}")
-            return i, None
-            
-        logger.info(f"🖼️ Generating image {i}/{len(screens)}")
+    if not screen:
+        logger.warning(f"⚠️ No screen data for screen {screen_num}")
+        return None
+
+    image_path = image_dir / f"{screen_num}.png"
+    if image_path.exists():
+        logger.info(f"♻️ Reusing image {screen_num}: {image_path}")
+    else:
+        logger.info(f"🖼️ Generating image {screen_num}")
         logger.debug(f"Screen data: {screen}")
-        
-        # Pass the entire screen dict to generate_image
-        image_path = generate_image(screen, i, base_dir)
-        
-        if not image_path:
-            logger.error(f"❌ Failed to generate image {i}")
-            return i, None
-            
-        logger.info(f"✅ Generated image {i}: {image_path}")
-        return i, str(Path(image_path).resolve())  # Return absolute path
+        generated = generate_image(screen, screen_num, image_dir)
+        if not generated:
+            logger.error(f"❌ Failed to generate image {screen_num}")
+            return None
+        image_path = Path(generated)
+        logger.info(f"✅ Generated image {screen_num}: {image_path}")
 
-    # Create tasks for each screen
-    tasks = list(enumerate(screens, 1))
-    results = []
+    video_path = videos_dir / f"{screen_num}.mp4"
+    if video_path.exists():
+        logger.info(f"♻️ Reusing video {screen_num}: {video_path}")
+        return str(video_path)
 
-    # Use ThreadPoolExecutor to run tasks in parallel
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        # Submit all tasks
-        future_to_screen = {
-            executor.submit(generate_single, task): task[0] 
-            for task in tasks
+    # Get the corresponding screen data for the prompt
+    prompt = f"Smooth camera movement exploring the scene. {screen.get('background', '')}"
+    logger.info(f"🎬 Generating video {screen_num}")
+    generated = generate_video(
+        image_path=image_path.resolve(),
+        prompt=prompt,
+        output_path=video_path
+    )
+    if not generated:
+        logger.error(f"❌ Failed to generate video for screen {screen_num}")
+        return None
+
+    logger.info(f"✅ Generated video {screen_num}: {generated}")
+    return str(generated)
+
+def run_screen_pipeline(
+    screens: List[Dict],
+    video_dir: Path,
+    width: int,
+    height: int,
+    duration_per_screen: float,
+    max_workers: Optional[int] = None
+) -> Dict[str, List[Tuple[int, Optional[str]]]]:
+    """
+    Take every screen through image -> clip -> processed clip
+    Each screen moves to the next stage as soon as its previous one finishes:
+    generation runs in a thread pool and clip processing, which is CPU bound,
+    in a process pool. Every stage writes to video_dir, so a rerun only
+    redoes what is missing
+    Returns the 'clips' and 'processed' paths as (screen_number, path) sorted by
+    screen, with None for screens that failed
+    """
+    image_dir = video_dir / 'images'
+    videos_dir = video_dir / 'videos'
+    cache_dir = video_dir / 'processed'
+    for directory in (image_dir, videos_dir, cache_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    clips = {screen_num: None for screen_num in range(1, len(screens) + 1)}
+    processed = dict(clips)
+    handled = set()
+
+    def process_args(screen_num: int) -> Tuple:
+        clip_path = clips[screen_num]
+        return (clip_path, processed_clip_path(clip_path, cache_dir, width, height, duration_per_screen),
+                width, height, duration_per_screen)
+
+    workers = min(len(screens), max_workers or os.cpu_count() or 1)
+    logger.info(f"🏭 Running {len(screens)} screens through the pipeline with "
+                f"{GENERATION_WORKERS} generation threads and {workers} processing workers")
+
+    with ThreadPoolExecutor(max_workers=GENERATION_WORKERS) as generation:
+        generating = {
+            generation.submit(generate_screen_clip, screen_num, screen, image_dir, videos_dir): screen_num
+            for screen_num, screen in enumerate(screens, 1)
         }
-        
-        # Collect results as they complete
-        for future in as_completed(future_to_screen):
-            screen_num = future_to_screen[future]
-            try:
-                result = future.result()
-                results.append(result)
-            except Exception as e:
-                logger.error(f"❌ Error generating image {screen_num}: {e}")
-                results.append((screen_num, None))
+        processing = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for future in as_completed(generating):
+                    screen_num = generating[future]
+                    try:
+                        clips[screen_num] = future.result()
+                    except Exception as e:
+                        logger.error(f"❌ Error generating screen {screen_num}: {e}")
+                        logger.exception("Detailed error trace:")
+                    if clips[screen_num]:
+                        processing[pool.submit(render_processed_clip, *process_args(screen_num))] = screen_num
+
+                for future in as_completed(processing):
+                    screen_num = processing[future]
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        raise error
+                    handled.add(screen_num)
+                    if error is None:
+                        processed[screen_num] = future.result()
+                        logger.info(f"✅ Completed screen {screen_num}")
+                    else:
+                        logger.error(f"❌ Error processing screen {screen_num}: {error}")
+        except (OSError, BrokenProcessPool) as e:
+            logger.warning(f"Process pool unavailable, processing the remaining clips in this process: {e}")
 
-    # Sort results by screen number
-    results.sort(key=lambda x: x[0])
-    return results
+        # Whatever the pool did not get to, once generation has finished
+        for future in as_completed(generating):
+            screen_num = generating[future]
+            if clips[screen_num] is None and future.exception() is None:
+                clips[screen_num] = future.result()
+            if clips[screen_num] and screen_num not in handled:
+                try:
+                    processed[screen_num] = render_processed_clip(*process_args(screen_num))
+                except Exception as e:
+                    logger.error(f"❌ Error processing screen {screen_num}: {e}")
 
-async def create_tiktok_video():
+    return {'clips': sorted(clips.items()), 'processed': sorted(processed.items())}
+
+async def create_tiktok_video(video_num: Optional[int] = None):
+    """
+    Create a TikTok video from the latest signal
+    Pass the number of an earlier video to resume it: its script, images,
+    clips and processed clips are reused and only what is missing is generated
+    """
     try:
-        # Find next available video number
         base_dir = Path('videos/videos')
-        video_num = 1
-        
-        while (base_dir / f'video{video_num}/images').exists():
-            video_num += 1
+        if video_num is None:
+            # Find next available video number
+            video_num = 1
+            while (base_dir / f'video{video_num}/images').exists():
+                video_num += 1
             
         # Create directory structure
         video_dir = base_dir / f'video{video_num}'
@@ -166,21 +176,26 @@ async def create_tiktok_video():
         logger.debug(f"Video directory: {video_dir}")
         logger.debug(f"Images directory: {image_dir}")
 
-        # Generate script
-        logger.info("📝 Generating video script from latest signal...")
-        generator = PromptGenerator()
-        signal = generator.get_latest_signal()
-        
-        if not signal:
-            logger.error("❌ No trading signal found")
-            return
+        # Reuse the script of a resumed video, otherwise generate one
+        script_path = video_dir / 'script.json'
+        if script_path.exists():
+            logger.info(f"♻️ Reusing script: {script_path}")
+            script_json = script_path.read_text(encoding='utf-8')
+        else:
+            logger.info("📝 Generating video script from latest signal...")
+            generator = PromptGenerator()
+            signal = generator.get_latest_signal()
             
-        logger.info(f"📊 Found signal for token: {signal.get('token')}")
-        
-        script_json = await generator.generate_video_script(signal)
-        if not script_json:
-            logger.error("❌ Failed to generate video script")
-            return
+            if not signal:
+                logger.error("❌ No trading signal found")
+                return
+                
+            logger.info(f"📊 Found signal for token: {signal.get('token')}")
+            
+            script_json = await generator.generate_video_script(signal)
+            if not script_json:
+                logger.error("❌ Failed to generate video script")
+                return
 
         # Parse JSON response
         try:
@@ -192,7 +207,6 @@ async def create_tiktok_video():
                 return
 
             # Save script to JSON file
-            script_path = video_dir / 'script.json'
             try:
                 with open(script_path, 'w', encoding='utf-8') as f:
                     json.dump(script, f, indent=2, ensure_ascii=False)
@@ -202,37 +216,28 @@ async def create_tiktok_video():
 
             logger.info(f"✅ Successfully parsed script with {len(screens)} screens")
 
-            # Generate all images in parallel
-            image_results = generate_images_parallel(screens)
-
-            # Check if we have all images
-            failed_screens = [num for num, path in image_results if path is None]
-            if failed_screens:
-                logger.error(f"❌ Failed to generate images for screens: {failed_screens}")
-                return
+            # Video settings
+            width = 1080
+            height = 1920
+            duration_per_screen = 2.5
+            logger.info(f"📺 Video settings: {width}x{height}, {duration_per_screen}s per screen")
 
-            logger.info("✅ All images generated successfully")
+            # Generate images and clips and process the clips, screen by screen
+            results = run_screen_pipeline(screens, video_dir, width, height, duration_per_screen)
+            clips = dict(results['clips'])
 
-            # Generate animated videos from images in parallel
-            logger.info("🎥 Generating animated videos from images...")
-            videos_dir = video_dir / 'videos'
-            videos_dir.mkdir(exist_ok=True)
+            # Filter out failed screens
+            failed_screens = [num for num, path in results['processed'] if path is None]
+            if failed_screens:
+                logger.error(f"❌ Failed to generate screens: {failed_screens}, "
+                             f"rerun with video number {video_num} to retry them")
 
-            video_results = generate_videos_parallel(image_results, screens, videos_dir)
-            
-            # Filter out failed generations
-            video_paths = [(num, path) for num, path in video_results if path is not None]
+            video_paths = [(num, clips[num]) for num, path in results['processed'] if path is not None]
             
             if not video_paths:
                 logger.error("❌ No videos were successfully generated")
                 return
 
-            # Video settings
-            width = 1080
-            height = 1920
-            duration_per_screen = 2.5
-            logger.info(f"📺 Video settings: {width}x{height}, {duration_per_screen}s per screen")
-
             # Assemble and write final video
             success = assemble_video(
                 video_paths=video_paths,
@@ -240,7 +245,8 @@ async def create_tiktok_video():
                 video_num=video_num,
                 width=width,
                 height=height,
-                duration_per_screen=duration_per_screen
+                duration_per_screen=duration_per_screen,
+                cache_dir=video_dir / 'processed'
             )
 
             if not success:
@@ -265,7 +271,9 @@ if __name__ == "__main__":
         if sys.platform == 'win32':
             asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
             
-        asyncio.run(create_tiktok_video())
+        # Optional video number to resume
+        video_num = int(sys.argv[1]) if len(sys.argv) > 1 else None
+        asyncio.run(create_tiktok_video(video_num))
         logger.info("✅ Process completed")
     except KeyboardInterrupt:
         logger.info("⚠️ Process interrupted by user")
@@ -1,4 +1,5 @@
 import json
+import os
 import sys
 import logging
 from pathlib import Path
@@ -44,6 +45,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Frame rate of processed clips and the final video
+FPS = 30
+
+def processed_clip_path(
+    video_path: str | Path,
+    cache_dir: Path,
+    target_width: int,
+    target_height: int,
+    duration: float
+) -> Path:
+    """
+    Where the processed version of a clip is cached; the name carries the settings it was made with
+    """
+    return Path(cache_dir) / f"{Path(video_path).stem}_{target_width}x{target_height}_{duration}s.mp4"
+
+def render_processed_clip(
+    video_path: str | Path,
+    output_path: str | Path,
+    target_width: int,
+    target_height: int,
+    duration: float,
+    fps: int = FPS
+) -> str:
+    """
+    Resize, crop and trim one clip and write it to output_path
+    Reuses output_path when it is newer than the source clip. Runs in worker processes,
+    so it raises instead of returning None on failure
+    """
+    output_path = Path(output_path)
+    if output_path.exists() and output_path.stat().st_mtime >= Path(video_path).stat().st_mtime:
+        logger.info(f"♻️ Reusing processed clip: {output_path}")
+        return str(output_path)
+
+    screen_clip = process_video_clip(
+        video_path=video_path,
+        screen={},
+        target_width=target_width,
+        target_height=target_height,
+        duration=duration,
+        video_num=0
+    )
+    if screen_clip is None:
+        raise RuntimeError(f"Could not process clip {video_path}")
+
+    # Write next to the target and move into place, so an interrupted write is never reused
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.stem}.tmp.mp4")
+    try:
+        screen_clip.write_videofile(
+            str(tmp_path),
+            fps=fps,
+            codec='libx264',
+            audio=False,
+            logger=None
+        )
+    finally:
+        screen_clip.close()
+    os.replace(tmp_path, output_path)
+    logger.info(f"✅ Processed clip written to: {output_path}")
+    return str(output_path)
+
 def process_video_clip(
     video_path: str | Path,
     screen: Dict,
@@ -108,10 +170,13 @@ def assemble_final_video(
     video_num: int,
     width: int = 1080,
     height: int = 1920,
-    duration_per_screen: float = 2.5
+    duration_per_screen: float = 2.5,
+    cache_dir: Optional[Path] = None
 ) -> Optional[CompositeVideoClip]:
     """
     Assemble all video clips into final video
+    With a cache_dir, each clip is processed once to disk and reused on later runs,
+    so a failed final write does not redo the per-clip work
     """
     try:
         logger.info(f"🎞️ Creating video clips for video {video_num}...")
@@ -121,14 +186,28 @@ def assemble_final_video(
         for i, (screen_num, video_path) in enumerate(video_paths):
             logger.info(f"Processing screen {screen_num}/{len(screens)} for video {video_num}")
             
-            screen_clip = process_video_clip(
-                video_path=video_path,
-                screen=screens[i],
-                target_width=width,
-                target_height=height,
-                duration=duration_per_screen,
-                video_num=video_num
-            )
+            if cache_dir is not None:
+                try:
+                    processed_path = render_processed_clip(
+                        video_path=video_path,
+                        output_path=processed_clip_path(video_path, cache_dir, width, height, duration_per_screen),
+                        target_width=width,
+                        target_height=height,
+                        duration=duration_per_screen
+                    )
+                    screen_clip = VideoFileClip(processed_path).with_duration(duration_per_screen)
+                except Exception as e:
+                    logger.error(f"Error processing video clip: {e}")
+                    screen_clip = None
+            else:
+                screen_clip = process_video_clip(
+                    video_path=video_path,
+                    screen=screens[i],
+                    target_width=width,
+                    target_height=height,
+                    duration=duration_per_screen,
+                    video_num=video_num
+                )
             
             if screen_clip:
                 # Set the start time for this clip
@@ -163,7 +242,7 @@ def write_final_video(
     final_clip: CompositeVideoClip,
     video_num: int,
     output_dir: Optional[Path] = None,
-    fps: int = 30
+    fps: int = FPS
 ) -> bool:
     """
     Write the final video to disk with aggressive cleanup
@@ -250,10 +329,12 @@ def assemble_video(
     width: int = 1080,
     height: int = 1920,
     duration_per_screen: float = 2.5,
-    output_dir: Optional[Path] = None
+    output_dir: Optional[Path] = None,
+    cache_dir: Optional[Path] = None
 ) -> bool:
     """
     Main entry point for video assembly process
+    cache_dir holds processed clips between runs, see assemble_final_video
     """
     try:
         logger.info(f"🎥 Starting video assembly for video {video_num}")
@@ -267,7 +348,8 @@ def assemble_video(
                 video_num=video_num,
                 width=width,
                 height=height,
-                duration_per_screen=duration_per_screen
+                duration_per_screen=duration_per_screen,
+                cache_dir=cache_dir
             )
             
             if not final_clip:
@@ -279,7 +361,7 @@ def assemble_video(
                 final_clip=final_clip,
                 video_num=video_num,
                 output_dir=output_dir,
-                fps=30
+                fps=FPS
             )
             
             return success
@@ -354,11 +436,12 @@ def main():
                 logger.error(f"Video file not found: {video_path}")
                 sys.exit(1)
                 
-        # Assemble the video
+        # Assemble the video, reusing clips processed by earlier runs
         success = assemble_video(
             video_paths=video_paths,
             screens=screens,
-            video_num=video_num
+            video_num=video_num,
+            cache_dir=video_dir / 'processed'
         )
         
         if success:
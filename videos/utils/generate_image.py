@@ -68,8 +68,18 @@ class ImageGenerator:
             logger.error(f"Error in text verification: {e}")
             return False
 
+    @staticmethod
+    def _promote(candidate_path: str, output_path: Path) -> str:
+        """Move an accepted image from its candidate file to its final path"""
+        os.replace(candidate_path, output_path)
+        return str(output_path)
+
     def generate_and_save_image(self, prompt: str, image_number: int, output_dir: Path, expected_text: str) -> Optional[str]:
-        """Generate image from prompt and save it, with text verification"""
+        """
+        Generate image from prompt and save it, with text verification
+        Candidates are written to a temporary file; only the accepted image is
+        moved to {image_number}.png, so that path never holds a rejected image
+        """
         attempts = 0
         last_generated_path = None
         
@@ -92,6 +102,7 @@ class ImageGenerator:
                 # Ensure output directory exists
                 output_dir.mkdir(parents=True, exist_ok=True)
                 output_path = output_dir / f"{image_number}.png"
+                candidate_path = output_dir / f".{image_number}.tmp.png"
                 
                 logger.debug(f"Will save image to: {output_path}")
 
@@ -121,40 +132,40 @@ class ImageGenerator:
                     logger.error(f"Failed to download image: {img_response.status_code}")
                     continue
                     
-                # Save the image
-                with open(output_path, 'wb') as f:
+                # Save the image as a candidate until it is accepted
+                with open(candidate_path, 'wb') as f:
                     f.write(img_response.content)
                 
-                logger.info(f"Image saved to {output_path}")
+                logger.info(f"Image candidate saved to {candidate_path}")
 
                 # Save the last generated path in case all attempts fail
-                last_generated_path = str(output_path)
+                last_generated_path = str(candidate_path)
 
                 # Verify text in image
-                if expected_text and not self.verify_text_in_image(str(output_path), expected_text):
+                if expected_text and not self.verify_text_in_image(str(candidate_path), expected_text):
                     logger.warning(f"Text verification failed on attempt {attempts}")
                     if attempts < self.max_retries:
                         logger.info("Retrying image generation...")
                         continue
                     else:
                         logger.warning("All verification attempts failed, using last generated image")
-                        return last_generated_path
+                        return self._promote(last_generated_path, output_path)
                 else:
                     logger.info("Text verification passed!")
-                    return str(output_path)
+                    return self._promote(str(candidate_path), output_path)
 
             except Exception as e:
                 logger.error(f"Error in attempt {attempts}: {e}")
                 if attempts >= self.max_retries:
                     if last_generated_path:
                         logger.warning("Using last generated image despite errors")
-                        return last_generated_path
+                        return self._promote(last_generated_path, output_dir / f"{image_number}.png")
                     return None
             
         # If we get here and have a last generated image, use it
         if last_generated_path:
             logger.warning("Using last generated image after all attempts")
-            return last_generated_path
+            return self._promote(last_generated_path, output_dir / f"{image_number}.png")
             
         logger.error(f"Failed to generate any usable image after {self.max_retries} attempts")
         return None
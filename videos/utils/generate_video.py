@@ -192,8 +192,11 @@ class VideoGenerator:
                     logger.info(f"✅ Downloading video from: {video_url}")
                     video_response = requests.get(video_url)
                     if video_response.status_code == 200:
-                        with open(output_path, 'wb') as f:
+                        # Write next to the target and move into place, so a partial download is never reused
+                        tmp_path = output_path.with_name(f".{output_path.stem}.tmp{output_path.suffix}")
+                        with open(tmp_path, 'wb') as f:
                             f.write(video_response.content)
+                        os.replace(tmp_path, output_path)
                         logger.info(f"✅ Video saved to: {output_path}")
                         return str(output_path)
                     else: